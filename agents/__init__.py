@@ -3,10 +3,14 @@ from .goal_clarifier import GoalClarifierAgent
 from .domain_researcher import DomainResearcherAgent
 from .bio_optimizer import BioOptimizerAgent
 from .json_formatter import JSONFormatterAgent
+from .replanner import IncrementalReplanner
+from .fallback_planner import LocalFallbackPlanner
 
 __all__ = [
     "GoalClarifierAgent",
     "DomainResearcherAgent",
     "BioOptimizerAgent",
     "JSONFormatterAgent",
+    "IncrementalReplanner",
+    "LocalFallbackPlanner",
 ]
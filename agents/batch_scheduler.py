@@ -0,0 +1,502 @@
+"""
+Batched A3 scheduling kernel
+
+`BioOptimizerAgent.optimize_schedule` schedules one user in a Python loop that
+builds pydantic objects as it goes. `schedule_kernel` schedules N users at
+once from their compiled energy vectors (see utils/profile_store.py) and
+atomic chunk durations. Free intervals, the timeline cursors, rest rules and
+insight totals run as whole-batch array passes, one pass per queue position.
+The default backend is a plain-Python loop running the shared timeline engine
+per user; backend="numpy" opts into the vectorized passes (NumPy is optional
+and not installed by requirements.txt). For 100k users × 7 chunks on a
+laptop-class CPU, the Python backend takes about 4s and NumPy about 1s.
+
+`BatchScheduler.compact_batch` turns the kernel output into one
+CompactSchedule per user (typed columns, records interned once per run);
+ScheduleItems are only built when an output is materialized.
+
+Slots follow `_get_available_time_slots`: the user's peak windows (runs of
+ENERGY_PEAK, in time order), plus the policy's fallback slots when there are
+fewer than min_peak_slots, capped at max_slots, merged with `free_intervals`. The output matches
+`optimize_schedule` for profiles whose peak hours are disjoint, listed in
+time order, aligned to the vector's 15-minute slots and not crossing
+midnight (the policy's fallback slots must be aligned too).
+
+    batch = schedule_kernel(energy_vectors, chunk_durations)
+    compact = BatchScheduler().compact_batch(requests)   # held until serialized
+    outputs = BatchScheduler().optimize_batch(requests)  # materialized
+"""
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from agents.bio_optimizer import (
+    BURNOUT_WARNING,
+    GAP_RATIONALE,
+    PEAK_RATIONALE,
+    BioOptimizerAgent,
+)
+from schemas.agent1_output import UserBioProfile
+from schemas.agent2_output import ProTip, Task
+from schemas.agent3_output import BioInsights, BioOptimizerOutput, RestPeriod
+from schemas.compact_schedule import SHARED_RECORDS, CompactSchedule, RecordPool
+from schemas.time_types import TimeRange, format_minutes
+from utils.profile_store import (
+    BIO_FIELDS,
+    ENERGY_PEAK,
+    SLOT_MINUTES,
+    SLOTS_PER_DAY,
+    UserProfile,
+    compile_energy_vector,
+)
+from utils.scheduling_policy import CompiledPolicy, DEFAULT_POLICY
+from utils.timeline import free_intervals, place
+
+KERNEL_BACKENDS = ("numpy", "python")
+
+# Placement kinds in ScheduleBatch.kinds
+FOCUS = 0
+REST = 1
+
+# RestPeriod defaults, for rest rows built without the model
+_REST_NAME = RestPeriod.model_fields["name"].default
+_REST_DESCRIPTION = RestPeriod.model_fields["description"].default
+
+_PEAK_RUN = re.compile(re.escape(bytes([ENERGY_PEAK])) + b"+")
+
+
+class BatchRequest(NamedTuple):
+    """One user's A3 input in a batch"""
+    tasks: List[Task]
+    tips: List[ProTip]
+    bio_profile: UserBioProfile
+    timing_research: Dict[str, Any]
+    energy: Optional[bytes] = None  # compiled energy vector (None = compile from bio_profile)
+
+
+class CompactOutput(NamedTuple):
+    """One user's A3 output with the schedule held as compact rows"""
+    schedule: CompactSchedule
+    bio_insights: BioInsights
+
+    def materialize(self) -> BioOptimizerOutput:
+        """Build the BioOptimizerOutput (ScheduleItems are created here)"""
+        return BioOptimizerOutput(optimized_schedule=self.schedule.materialize(), bio_insights=self.bio_insights)
+
+
+class ScheduleBatch:
+    """
+    Kernel output: every user's placements in flat columns
+
+    User u's placements are positions offsets[u] to offsets[u + 1], in
+    placement order. `refs` holds the queue index of a focus placement (a
+    chunk split across intervals has one placement per piece) or the rest
+    rule index of a rest; `peak` is only meaningful for focus.
+    """
+
+    def __init__(
+        self,
+        offsets: List[int],
+        kinds: List[int],
+        starts: List[int],
+        ends: List[int],
+        refs: List[int],
+        peak: List[bool],
+        focus_total: List[int],
+        rest_total: List[int],
+        match: List[int],
+        warning: List[bool]
+    ):
+        self.offsets = offsets
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self.refs = refs
+        self.peak = peak
+        self.focus_total = focus_total
+        self.rest_total = rest_total
+        self.match = match
+        self.warning = warning
+
+    def placements(self, row: int) -> range:
+        """Positions of one user's placements"""
+        return range(self.offsets[row], self.offsets[row + 1])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+def default_backend() -> str:
+    """Plain Python; NumPy only when requested, since it is an optional dependency"""
+    return "python"
+
+
+def bio_energy_vector(bio_profile: UserBioProfile) -> bytes:
+    """
+    Energy vector of an A1 bio profile, as ProfileStore.compiled builds it
+
+    Args:
+        bio_profile: User's biological profile
+
+    Returns:
+        SLOTS_PER_DAY bytes
+    """
+    return compile_energy_vector(UserProfile(user_id="", **bio_profile.model_dump(include=set(BIO_FIELDS))))
+
+
+def schedule_kernel(
+    energy: Any,
+    durations: Sequence[Sequence[int]],
+    backend: Optional[str] = None,
+    policy: CompiledPolicy = DEFAULT_POLICY
+) -> ScheduleBatch:
+    """
+    Place atomic chunks, rests and insight totals for N users at once
+
+    Args:
+        energy: N energy vectors (SLOTS_PER_DAY bytes each, or an
+            N × SLOTS_PER_DAY uint8 array)
+        durations: Per user, atomic chunk durations in queue order
+        backend: "numpy" or "python" (None = default_backend())
+        policy: Rest rules and slot limits
+
+    Returns:
+        ScheduleBatch with every user's placements
+
+    Raises:
+        ValueError: If backend is unknown or the inputs differ in length
+        ImportError: If the numpy backend is requested without NumPy
+    """
+    backend = backend or default_backend()
+    if backend not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown kernel backend '{backend}'. Choose from: {', '.join(KERNEL_BACKENDS)}")
+    if len(energy) != len(durations):
+        raise ValueError(f"Got {len(energy)} energy vectors for {len(durations)} users")
+    if backend == "numpy":
+        if np is None:
+            raise ImportError("numpy is not installed. Run: pip install numpy")
+        return _kernel_numpy(energy, durations, policy)
+    return _kernel_python(energy, durations, policy)
+
+
+def _in_peak(levels: bytes, minute: int) -> bool:
+    """TimeRange.contains over the peak runs (a run's end minute counts)"""
+    slot = minute // SLOT_MINUTES
+    if levels[slot % SLOTS_PER_DAY] == ENERGY_PEAK:
+        return True
+    return minute % SLOT_MINUTES == 0 and levels[(slot - 1) % SLOTS_PER_DAY] == ENERGY_PEAK
+
+
+def _kernel_python(energy: Any, durations: Sequence[Sequence[int]], policy: CompiledPolicy) -> ScheduleBatch:
+    """Plain-Python kernel: the shared timeline engine, per user, on ints"""
+    batch = ScheduleBatch([0], [], [], [], [], [], [], [], [], [])
+    for levels, user_durations in zip(energy, durations):
+        levels = bytes(levels)
+        slots = policy.slots([
+            TimeRange(run.start() * SLOT_MINUTES, run.end() * SLOT_MINUTES)
+            for run in _PEAK_RUN.finditer(levels)
+        ])
+
+        focus = rested = 0
+        for kind, start, end, ref in place(user_durations, free_intervals(slots), policy.rest_rules):
+            batch.kinds.append(FOCUS if kind == "focus" else REST)
+            batch.starts.append(start)
+            batch.ends.append(end)
+            batch.refs.append(ref)
+            if kind == "focus":
+                batch.peak.append(_in_peak(levels, start))
+                focus += end - start
+            else:
+                batch.peak.append(False)
+                rested += end - start
+
+        total = focus + rested
+        batch.offsets.append(len(batch.kinds))
+        batch.focus_total.append(focus)
+        batch.rest_total.append(rested)
+        batch.match.append(min(100, int((rested / total) * 100)) if total > 0 else 0)
+        batch.warning.append(focus > 90 and rested < 20)
+    return batch
+
+
+def _kernel_numpy(energy: Any, durations: Sequence[Sequence[int]], policy: CompiledPolicy) -> ScheduleBatch:
+    """Whole-batch array passes: one pass per queue position (and piece) moves every user's cursor"""
+    if isinstance(energy, np.ndarray):
+        levels = energy.astype(np.uint8, copy=False).reshape(-1, SLOTS_PER_DAY)
+    else:
+        levels = np.frombuffer(b"".join(bytes(row) for row in energy), dtype=np.uint8).reshape(-1, SLOTS_PER_DAY)
+    users = len(levels)
+    rows = np.arange(users)
+    max_slots = policy.max_slots
+    rules = policy.rest_rules
+
+    # Candidate slots per 15-minute cell: priority of the first slot covering
+    # it (peak runs in time order, then fallback slots), max_slots = not free
+    peak = levels == ENERGY_PEAK
+    run_edges = np.diff(np.pad(peak.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    runs = (run_edges == 1).sum(axis=1)
+    run_index = np.cumsum(run_edges[:, :SLOTS_PER_DAY] == 1, axis=1) - 1
+    priority = np.where(peak & (run_index < max_slots), run_index, max_slots)
+    short = runs < policy.min_peak_slots
+    for offset, slot in enumerate(policy.fallback_slots):
+        rank = runs + offset
+        fill = short & (rank < max_slots)
+        cells = slice(slot.start // SLOT_MINUTES, -(-slot.end // SLOT_MINUTES))
+        priority[fill, cells] = np.minimum(priority[fill, cells], rank[fill, None])
+
+    # Free intervals: runs of free cells, each ranked by its best slot
+    free = priority < max_slots
+    free_edges = np.diff(np.pad(free.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    interval_rows, interval_starts = np.nonzero(free_edges == 1)
+    _, interval_ends = np.nonzero(free_edges == -1)
+    intervals = np.bincount(interval_rows, minlength=users)
+    interval_start = np.zeros((users, max_slots), dtype=np.int64)
+    interval_end = np.zeros((users, max_slots), dtype=np.int64)
+    if len(interval_rows):
+        best = np.minimum.reduceat(priority.ravel(), interval_rows * SLOTS_PER_DAY + interval_starts)
+        order = np.lexsort((best, interval_rows))
+        rank = np.arange(len(order)) - np.repeat(np.cumsum(intervals) - intervals, intervals)
+        interval_start[interval_rows[order], rank] = interval_starts[order] * SLOT_MINUTES
+        interval_end[interval_rows[order], rank] = interval_ends[order] * SLOT_MINUTES
+
+    counts = np.array([len(user_durations) for user_durations in durations], dtype=np.int64)
+    chunks = np.zeros((users, int(counts.max()) if users else 0), dtype=np.int64)
+    for row, user_durations in enumerate(durations):
+        chunks[row, :len(user_durations)] = user_durations
+
+    thresholds = np.array([rule.focus_minutes for rule in rules], dtype=np.int64)
+    rest_minutes = np.array([rule.rest_minutes for rule in rules], dtype=np.int64)
+    interval = np.zeros(users, dtype=np.int64)
+    cursor = interval_start[:, 0].copy()
+    streak = np.zeros((users, len(rules)), dtype=np.int64)
+    records = []  # (rows, step, sub-step, kind, start, end, ref) per pass
+
+    def enter_next(moving):
+        """Move users to their next interval with a fresh streak"""
+        interval[moving] += 1
+        current = np.minimum(interval, max_slots - 1)
+        cursor[moving] = interval_start[rows, current][moving]
+        streak[moving] = 0
+
+    for step in range(chunks.shape[1]):
+        active = (step < counts) & (interval < intervals)
+        if not active.any():
+            break
+        left = chunks[:, step].copy()
+
+        # One pass per piece: a chunk longer than an interval continues in the next
+        piece = 0
+        while active.any():
+            current = np.minimum(interval, max_slots - 1)
+            enter_next(active & (cursor + left > interval_end[rows, current]) & (cursor > interval_start[rows, current]))
+            active &= interval < intervals
+            current = np.minimum(interval, max_slots - 1)
+            end = interval_end[rows, current]
+            length = np.minimum(left, end - cursor)
+
+            placed = np.nonzero(active)[0]
+            records.append((placed, step, 2 * piece, FOCUS, cursor[placed], cursor[placed] + length[placed], np.full(len(placed), step)))
+            cursor[active] += length[active]
+            left[active] -= length[active]
+            streak[active] += length[active, None]
+
+            # First rest rule now owed (rules are checked longest first)
+            due = np.full(users, -1, dtype=np.int64)
+            for index in reversed(range(len(rules))):
+                due[active & (streak[:, index] >= thresholds[index])] = index
+            owed = due >= 0
+            rest = np.where(owed, rest_minutes[due], 0)
+            fits = owed & (cursor + rest <= end)
+            rested = np.nonzero(fits)[0]
+            records.append((rested, step, 2 * piece + 1, REST, cursor[rested], cursor[rested] + rest[rested], due[rested]))
+            cursor[fits] += rest[fits]
+            streak[fits] = np.where(rest_minutes[None, :] <= rest[fits, None], 0, streak[fits])
+            enter_next(owed & ~fits)
+
+            active &= left > 0
+            piece += 1
+
+    if records:
+        columns = [np.concatenate([np.broadcast_to(np.asarray(record[i]), record[0].shape) for record in records]) for i in range(7)]
+    else:
+        columns = [np.zeros(0, dtype=np.int64)] * 7
+    user, step, sub, kind, start, end, ref = columns
+    order = np.lexsort((sub, step, user))
+    user, kind, start, end, ref = user[order], kind[order], start[order], end[order], ref[order]
+
+    cell = start // SLOT_MINUTES
+    in_peak = (kind == FOCUS) & (
+        (levels[user, cell % SLOTS_PER_DAY] == ENERGY_PEAK)
+        | ((start % SLOT_MINUTES == 0) & (levels[user, (cell - 1) % SLOTS_PER_DAY] == ENERGY_PEAK))
+    )
+    minutes = end - start
+    focus = np.bincount(user, weights=np.where(kind == FOCUS, minutes, 0), minlength=users).astype(np.int64)
+    rested = np.bincount(user, weights=np.where(kind == REST, minutes, 0), minlength=users).astype(np.int64)
+    total = focus + rested
+    with np.errstate(divide="ignore", invalid="ignore"):
+        match = np.where(total > 0, np.minimum(100, (rested / total * 100).astype(np.int64)), 0)
+
+    return ScheduleBatch(
+        offsets=np.concatenate([[0], np.cumsum(np.bincount(user, minlength=users))]).tolist(),
+        kinds=kind.tolist(),
+        starts=start.tolist(),
+        ends=end.tolist(),
+        refs=ref.tolist(),
+        peak=in_peak.tolist(),
+        focus_total=focus.tolist(),
+        rest_total=rested.tolist(),
+        match=match.tolist(),
+        warning=((focus > 90) & (rested < 20)).tolist()
+    )
+
+
+class BatchScheduler:
+    """A3 for many users: one kernel call, compact rows per user, materialization on demand"""
+
+    def __init__(self, agent: Optional[BioOptimizerAgent] = None, backend: Optional[str] = None):
+        """
+        Initialize batch scheduler
+
+        Args:
+            agent: A3 agent used to build atomic queues and rest periods; its
+                policy drives the kernel (default: one with mock search; no
+                LLM or search calls are made)
+            backend: Kernel backend (None = default_backend())
+        """
+        self.agent = agent or BioOptimizerAgent(use_mock_search=True)
+        self.backend = backend
+
+    def optimize_batch(self, requests: Sequence[BatchRequest]) -> List[BioOptimizerOutput]:
+        """
+        Schedule every request (optimize_schedule with precomputed research, for N users)
+
+        Args:
+            requests: One BatchRequest per user
+
+        Returns:
+            One BioOptimizerOutput per request, in order
+        """
+        return [output.materialize() for output in self.compact_batch(requests)]
+
+    def compact_batch(
+        self,
+        requests: Sequence[BatchRequest],
+        pool: Optional[RecordPool] = None
+    ) -> List[CompactOutput]:
+        """
+        Schedule every request without building ScheduleItems
+
+        Args:
+            requests: One BatchRequest per user
+            pool: Record pool shared by the run's schedules (default: a new one)
+
+        Returns:
+            One CompactOutput per request, in order
+        """
+        pool = pool if pool is not None else RecordPool()
+        queues = [
+            self.agent._build_atomic_queue(request.tasks, request.tips, request.bio_profile, request.timing_research)
+            for request in requests
+        ]
+        batch = schedule_kernel(
+            [request.energy or bio_energy_vector(request.bio_profile) for request in requests],
+            [[atomic["duration"] for _, atomic, _ in queue] for queue in queues],
+            self.backend,
+            self.agent.policy
+        )
+        return [
+            self.compact(batch, row, queue, request.bio_profile, request.timing_research, pool)
+            for row, (queue, request) in enumerate(zip(queues, requests))
+        ]
+
+    def compact(
+        self,
+        batch: ScheduleBatch,
+        row: int,
+        queue: List,
+        bio_profile: UserBioProfile,
+        timing_research: Dict[str, Any],
+        pool: Optional[RecordPool] = None
+    ) -> CompactOutput:
+        """
+        Build one user's compact schedule from the kernel output
+
+        Args:
+            batch: Kernel output
+            row: User's row in the batch
+            queue: User's atomic queue (from _build_atomic_queue)
+            bio_profile: User's biological profile
+            timing_research: User's timing research
+            pool: Record pool for the schedule (default: its own)
+
+        Returns:
+            CompactOutput whose materialize() equals optimize_schedule's output
+        """
+        evidence_url = (timing_research.get("timing_results") or [{}])[0].get("url", "")
+        rest_url = (timing_research.get("ultradian_results") or [{}])[0].get("url", "")
+        schedule = CompactSchedule(pool)
+        intern = schedule.pool.intern
+        rationale_ids = (
+            intern(SHARED_RECORDS.rationale(GAP_RATIONALE, evidence_url, "intermediate")),
+            intern(SHARED_RECORDS.rationale(PEAK_RATIONALE, evidence_url, bio_profile.chronotype)),
+        )
+        # Same rationale as _create_rest_period, one per rest rule
+        rest_ids = [
+            intern(SHARED_RECORDS.rationale(rule.reason, rest_url, "all"))
+            for rule in self.agent.policy.rest_rules
+        ]
+        design_ids: Dict[tuple, int] = {}
+
+        last_ref, piece = None, 0
+        for position in batch.placements(row):
+            start, end, ref = batch.starts[position], batch.ends[position], batch.refs[position]
+            if batch.kinds[position] == REST:
+                schedule.append_row(
+                    task_id=f"rest_{format_minutes(start).replace(':', '')}",
+                    original_task_ref="",
+                    name=_REST_NAME,
+                    description=_REST_DESCRIPTION,
+                    scheduled_time=TimeRange(start, end),
+                    duration_minutes=end - start,
+                    kind="rest",
+                    rationale_id=rest_ids[ref]
+                )
+                continue
+            task, atomic, attached_tips = queue[ref]
+            piece = piece + 1 if ref == last_ref else 0
+            last_ref = ref
+            schedule.append_row(
+                task_id=f"atomic_{ref + 1}" + (f"_{piece + 1}" if piece else ""),
+                original_task_ref=task.task_id,
+                name=atomic["name"],
+                description=atomic["description"],
+                scheduled_time=TimeRange(start, end),
+                duration_minutes=end - start,
+                kind="focus",
+                rationale_id=rationale_ids[batch.peak[position]],
+                design_id=self._design_id(atomic, intern, design_ids),
+                attached_tips=attached_tips
+            )
+
+        return CompactOutput(
+            schedule=schedule,
+            bio_insights=BioInsights(
+                total_focus_time=f"{batch.focus_total[row]} minutes",
+                total_rest_time=f"{batch.rest_total[row]} minutes",
+                energy_curve_match=f"{batch.match[row]}%",
+                warning=BURNOUT_WARNING if batch.warning[row] else ""
+            )
+        )
+
+    @staticmethod
+    def _design_id(atomic: Dict, intern, cache: Dict[tuple, int]) -> int:
+        """Pool id of an atomic chunk's AtomicDesign (chunks of one task share it)"""
+        key = (atomic["principle"], atomic["trigger"], atomic["friction_reduction"])
+        design_id = cache.get(key)
+        if design_id is None:
+            design_id = cache[key] = intern(SHARED_RECORDS.design(*key))
+        return design_id
@@ -1,5 +1,7 @@
+import copy
 import os
-from typing import Dict, Any, List
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Iterable
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from schemas.agent3_output import (
@@ -8,12 +10,52 @@ from schemas.agent3_output import (
     RestPeriod,
     BioInsights,
     RationaleTiming,
-    AtomicDesign
+    DayPlan,
+    MultiDayOptimizerOutput
 )
 from schemas.agent1_output import UserBioProfile
 from schemas.agent2_output import Task, ProTip
+from schemas.time_types import DurationParseError, TimeRange, format_minutes, parse_duration
+from schemas.compact_schedule import SHARED_RECORDS
+from schemas.pipeline_events import PipelineEvent
+from utils.scheduling_policy import CompiledPolicy, default_policy
+from utils.timeline import Placement, free_intervals, place, placed_minutes
+from utils.validators import find_overlaps
 from utils.web_search import WebSearchTool, MockWebSearchTool
-from utils.validators import time_to_minutes, minutes_to_time
+
+# Timing rationales for focus items in and outside the peak windows
+PEAK_RATIONALE = "Peak performance window - optimal for deep work"
+GAP_RATIONALE = "Energy gap time - suitable for routine tasks"
+
+BURNOUT_WARNING = "High focus time detected. Consider adding more rest periods to prevent burnout."
+
+# Duration of a task whose estimated_duration cannot be read
+DEFAULT_TASK_MINUTES = 30
+
+# Focus minutes a user can sustain in one day, by predicted energy
+DAILY_FOCUS_BUDGET = {"high": 180, "medium": 120, "low": 60}
+
+# Rest owed per minute of focus (5 min per 25 min Pomodoro); unpaid rest is
+# carried to the next day as fatigue
+REST_PER_FOCUS_MINUTE = 0.2
+
+# Share of a rest deficit that is still felt the next morning
+OVERNIGHT_CARRYOVER = 0.5
+
+# The daily budget never drops below this share of the base budget
+MIN_BUDGET_SHARE = 0.5
+
+# Built-in evidence used when timing research cannot reach the web
+LOCAL_TIMING_EVIDENCE = [
+    {"title": "Chronotypes and peak performance",
+     "url": "https://www.sleepfoundation.org/how-sleep-works/chronotypes",
+     "content": "Schedule demanding work in the chronotype's peak alertness window."},
+]
+LOCAL_ULTRADIAN_EVIDENCE = [
+    {"title": "The Pomodoro Technique",
+     "url": "https://francescocirillo.com/products/the-pomodoro-technique",
+     "content": "25 minutes of focus followed by a 5 minute break."},
+]
 
 class BioOptimizerAgent:
     """
@@ -21,14 +63,22 @@ class BioOptimizerAgent:
     Applies Atomic Habits, researches biological timing, calculates rest times, and schedules tasks
     """
     
-    def __init__(self, model: str = "gemini-2.5-flash-lite", use_mock_search: bool = False):
+    def __init__(
+        self,
+        model: str = "gemini-2.5-flash-lite",
+        use_mock_search: bool = False,
+        policy: Optional[CompiledPolicy] = None
+    ):
         """
         Initialize Bio-Optimizer Agent
         
         Args:
             model: Gemini model to use (default: gemini-2.5-flash-lite)
             use_mock_search: If True, use mock search tool for testing
+            policy: Chunking, rest and slot rules (None = default_policy(),
+                the ATP_SCHEDULING_POLICY file or the built-in defaults)
         """
+        self.policy = policy or default_policy()
         self.llm = ChatGoogleGenerativeAI(
             model=model,
             temperature=0.5,
@@ -74,11 +124,27 @@ IMPORTANT: Research biological timing using web search before assigning times. D
 
 Return ONLY structured JSON output, no additional text."""
     
+    def with_policy(self, policy: CompiledPolicy) -> "BioOptimizerAgent":
+        """
+        Same agent (sharing its LLM and search tool) with another scheduling policy
+        
+        Args:
+            policy: Compiled scheduling policy (e.g., a tenant's, from load_policy)
+        
+        Returns:
+            BioOptimizerAgent
+        """
+        agent = copy.copy(self)
+        agent.policy = policy
+        return agent
+    
     def optimize_schedule(
         self,
         tasks: List[Task],
         tips: List[ProTip],
-        bio_profile: UserBioProfile
+        bio_profile: UserBioProfile,
+        timing_research: Optional[Dict[str, Any]] = None,
+        free_slots: Optional[List[TimeRange]] = None
     ) -> BioOptimizerOutput:
         """
         Optimize schedule based on tasks, tips, and biological profile
@@ -87,22 +153,27 @@ Return ONLY structured JSON output, no additional text."""
             tasks: List of tasks from Agent A2
             tips: List of pro tips from Agent A2
             bio_profile: User's biological context
+            timing_research: Precomputed timing research (None = search now)
+            free_slots: Free time slots from the user's calendar, overriding
+                peak hours (None = peak hours)
         
         Returns:
             BioOptimizerOutput with optimized schedule and insights
         """
         # Research biological timing for the activity
-        timing_research = self._research_biological_timing(
-            activity=tasks[0].name if tasks else "activity",
-            bio_profile=bio_profile
-        )
+        if timing_research is None:
+            timing_research = self._research_biological_timing(
+                activity=tasks[0].name if tasks else "activity",
+                bio_profile=bio_profile
+            )
         
         # Generate optimized schedule
         schedule = self._generate_schedule(
             tasks=tasks,
             tips=tips,
             bio_profile=bio_profile,
-            timing_research=timing_research
+            timing_research=timing_research,
+            free_slots=free_slots
         )
         
         # Calculate bio insights
@@ -113,6 +184,130 @@ Return ONLY structured JSON output, no additional text."""
             bio_insights=insights
         )
     
+    def optimize_schedule_stream(
+        self,
+        tasks: List[Task],
+        tips: List[ProTip],
+        bio_profile: UserBioProfile,
+        free_slots: Optional[List[TimeRange]] = None
+    ) -> Iterator[PipelineEvent]:
+        """
+        Optimize schedule, yielding each item as soon as it is placed
+        
+        Args:
+            tasks: List of tasks from Agent A2
+            tips: List of pro tips from Agent A2
+            bio_profile: User's biological context
+            free_slots: Free time slots from the user's calendar (None = peak hours)
+        
+        Yields:
+            "schedule_item" and "rest" events in schedule order, an "insights"
+            event, then a "result" event with the BioOptimizerOutput
+        """
+        timing_research = self._research_biological_timing(
+            activity=tasks[0].name if tasks else "activity",
+            bio_profile=bio_profile
+        )
+        
+        schedule = []
+        queue = self._build_atomic_queue(tasks, tips, bio_profile, timing_research)
+        for item in self._iter_slots(
+            queue=queue,
+            slots=free_slots if free_slots is not None else self._get_available_time_slots(bio_profile),
+            bio_profile=bio_profile,
+            timing_research=timing_research
+        ):
+            schedule.append(item)
+            yield PipelineEvent(stage="a3", type="rest" if item.type == "rest" else "schedule_item", data=item)
+        
+        insights = self._calculate_insights(schedule)
+        yield PipelineEvent(stage="a3", type="insights", data=insights)
+        yield PipelineEvent(stage="a3", type="result", data=BioOptimizerOutput(
+            optimized_schedule=schedule,
+            bio_insights=insights
+        ))
+    
+    def optimize_horizon(
+        self,
+        tasks: List[Task],
+        tips: List[ProTip],
+        bio_profile: UserBioProfile,
+        days: int = 7,
+        start_date: Optional[date] = None,
+        free_slots: Optional[Dict[date, List[TimeRange]]] = None
+    ) -> MultiDayOptimizerOutput:
+        """
+        Spread tasks over several days with a single research pass
+        
+        Each day gets its own free-time index (peak hours, or `free_slots[day]`
+        when given) and a focus budget derived from the predicted energy level.
+        Rest owed but not taken (focus minutes × REST_PER_FOCUS_MINUTE − rest
+        taken) carries over as fatigue and shrinks the next day's budget.
+        
+        Args:
+            tasks: List of tasks from Agent A2
+            tips: List of pro tips from Agent A2
+            bio_profile: User's biological context
+            days: Number of days in the horizon
+            start_date: First day (default: tomorrow)
+            free_slots: Optional per-day free time slots overriding peak hours
+        
+        Returns:
+            MultiDayOptimizerOutput with one DayPlan per day
+        """
+        start_date = start_date or date.today() + timedelta(days=1)
+        
+        # Research once for the whole horizon
+        timing_research = self._research_biological_timing(
+            activity=tasks[0].name if tasks else "activity",
+            bio_profile=bio_profile
+        )
+        queue = self._build_atomic_queue(tasks, tips, bio_profile, timing_research)
+        
+        base_budget = DAILY_FOCUS_BUDGET.get(bio_profile.energy_tomorrow, DAILY_FOCUS_BUDGET["medium"])
+        fatigue = 0
+        remaining = queue
+        day_plans = []
+        
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            slots = (free_slots or {}).get(day)
+            if slots is None:
+                slots = self._get_available_time_slots(bio_profile)
+            
+            # Carried fatigue shrinks today's budget; spread remaining work evenly
+            budget = max(int(base_budget * MIN_BUDGET_SHARE), base_budget - fatigue)
+            remaining_minutes = sum(atomic["duration"] for _, atomic, _ in remaining)
+            target = min(budget, -(-remaining_minutes // (days - offset)))
+            
+            schedule, remaining, focus_minutes = self._fill_slots(
+                queue=remaining,
+                slots=slots,
+                bio_profile=bio_profile,
+                timing_research=timing_research,
+                focus_budget=target,
+                first_index=len(queue) - len(remaining) + 1
+            )
+            
+            rest_minutes = sum(item.duration_minutes for item in schedule if item.type == "rest")
+            rest_deficit = max(0, round(focus_minutes * REST_PER_FOCUS_MINUTE) - rest_minutes)
+            carried_in = fatigue
+            fatigue = int((fatigue + rest_deficit / REST_PER_FOCUS_MINUTE) * OVERNIGHT_CARRYOVER)
+            
+            day_plans.append(DayPlan(
+                day=day,
+                optimized_schedule=schedule,
+                bio_insights=self._calculate_insights(schedule),
+                focus_budget=budget,
+                carried_fatigue=carried_in
+            ))
+        
+        return MultiDayOptimizerOutput(
+            start_date=start_date,
+            days=day_plans,
+            unscheduled_task_refs=list(dict.fromkeys(task.task_id for task, _, _ in remaining))
+        )
+    
     def _research_biological_timing(
         self,
         activity: str,
@@ -146,7 +341,25 @@ Return ONLY structured JSON output, no additional text."""
             "activity": activity,
             "chronotype": chronotype,
             "timing_results": results,
-            "ultradian_results": ultradian_results
+            "ultradian_results": ultradian_results.get("results", [])
+        }
+    
+    def local_timing_research(self, activity: str, bio_profile: UserBioProfile) -> Dict[str, Any]:
+        """
+        Timing research from built-in evidence, without web search (degraded mode)
+        
+        Args:
+            activity: Activity name
+            bio_profile: User's biological profile
+        
+        Returns:
+            Dict shaped like _research_biological_timing's result
+        """
+        return {
+            "activity": activity,
+            "chronotype": bio_profile.chronotype,
+            "timing_results": list(LOCAL_TIMING_EVIDENCE),
+            "ultradian_results": list(LOCAL_ULTRADIAN_EVIDENCE)
         }
     
     def _generate_schedule(
@@ -154,7 +367,8 @@ Return ONLY structured JSON output, no additional text."""
         tasks: List[Task],
         tips: List[ProTip],
         bio_profile: UserBioProfile,
-        timing_research: Dict[str, Any]
+        timing_research: Dict[str, Any],
+        free_slots: Optional[List[TimeRange]] = None
     ) -> List[ScheduleItem]:
         """
         Generate optimized schedule with tasks and rest periods
@@ -164,108 +378,208 @@ Return ONLY structured JSON output, no additional text."""
             tips: List of tips
             bio_profile: User's biological profile
             timing_research: Research results
+            free_slots: Free time slots (None = peak hours)
         
         Returns:
             List of ScheduleItem and RestPeriod objects
         """
-        # Sort tasks by difficulty
-        sorted_tasks = sorted(tasks, key=lambda t: t.difficulty, reverse=True)
+        queue = self._build_atomic_queue(tasks, tips, bio_profile, timing_research)
+        schedule, _, _ = self._fill_slots(
+            queue=queue,
+            slots=free_slots if free_slots is not None else self._get_available_time_slots(bio_profile),
+            bio_profile=bio_profile,
+            timing_research=timing_research
+        )
+        return schedule
+    
+    def _build_atomic_queue(
+        self,
+        tasks: List[Task],
+        tips: List[ProTip],
+        bio_profile: UserBioProfile,
+        timing_research: Dict[str, Any]
+    ) -> List[Tuple[Task, Dict, List[str]]]:
+        """
+        Expand tasks into the ordered queue of atomic chunks to schedule
         
-        # Get available time slots based on peak hours
-        available_slots = self._get_available_time_slots(bio_profile)
+        Args:
+            tasks: List of tasks
+            tips: List of tips
+            bio_profile: User's biological profile
+            timing_research: Research results
         
-        schedule = []
-        current_slot_idx = 0
-        consecutive_focus_minutes = 0
+        Returns:
+            List of (original task, atomic task dict, attached tip IDs)
+        """
+        # Sort tasks by difficulty
+        sorted_tasks = sorted(tasks, key=lambda t: t.difficulty, reverse=True)
         
+        queue = []
         for task in sorted_tasks:
-            # Get current time slot
-            if current_slot_idx >= len(available_slots):
-                break
-            
-            slot = available_slots[current_slot_idx]
-            
             # Apply atomic design principles
             atomic_task = self._apply_atomic_habits(task, timing_research)
             
+            # Attach relevant tips
+            attached_tips = [
+                tip.tip_id for tip in tips
+                if tip.applies_to_task == task.task_id
+            ]
+            
             # Generate atomic tasks (break into smaller chunks if needed)
             atomic_tasks = self._break_into_atomic_tasks(
                 task=task,
                 atomic_design=atomic_task,
                 bio_profile=bio_profile
             )
+            queue.extend((task, atomic, attached_tips) for atomic in atomic_tasks)
+        
+        return queue
+    
+    def _fill_slots(
+        self,
+        queue: List[Tuple[Task, Dict, List[str]]],
+        slots: List[TimeRange],
+        bio_profile: UserBioProfile,
+        timing_research: Dict[str, Any],
+        focus_budget: Optional[int] = None,
+        first_index: int = 1
+    ) -> Tuple[List, List[Tuple[Task, Dict, List[str]]], int]:
+        """
+        Place atomic chunks from the front of the queue into free slots
+        
+        Args:
+            queue: Atomic chunks from _build_atomic_queue
+            slots: Free time slots for one day
+            bio_profile: User's biological profile
+            timing_research: Research results
+            focus_budget: Stop once this many focus minutes are placed (None = no limit)
+            first_index: Number used for the first item's task_id
+        
+        Returns:
+            Tuple of (schedule items, chunks left to place, focus minutes
+            placed); a chunk placed in part stays first in the queue with its
+            remaining minutes
+        
+        Raises:
+            ValueError: If placed items overlap (never expected; guards calendar sync)
+        """
+        placements = list(self._place(queue, slots, focus_budget))
+        schedule = list(self._materialize(queue, placements, bio_profile, timing_research, first_index))
+        overlaps = find_overlaps([item.scheduled_time for item in schedule])
+        if overlaps:
+            first, second = (schedule[i] for i in overlaps[0])
+            raise ValueError(f"Schedule overlaps: {first.task_id} {first.scheduled_time} and {second.task_id} {second.scheduled_time}")
+        
+        done, minutes, pieces = placed_minutes([atomic["duration"] for _, atomic, _ in queue], placements)
+        remaining = queue[done:]
+        if pieces:
+            task, atomic, attached_tips = remaining[0]
+            remaining[0] = (task, {
+                **atomic,
+                "duration": atomic["duration"] - minutes,
+                "pieces": atomic.get("pieces", 0) + pieces
+            }, attached_tips)
+        focus_minutes = sum(item.duration_minutes for item in schedule if item.type == "focus")
+        return schedule, remaining, focus_minutes
+    
+    def _iter_slots(
+        self,
+        queue: List[Tuple[Task, Dict, List[str]]],
+        slots: List[TimeRange],
+        bio_profile: UserBioProfile,
+        timing_research: Dict[str, Any],
+        focus_budget: Optional[int] = None,
+        first_index: int = 1
+    ) -> Iterator[Any]:
+        """
+        Generator behind _fill_slots: yields each item as it is placed
+        
+        Args:
+            Same as _fill_slots
+        
+        Yields:
+            ScheduleItem and RestPeriod objects in placement order (interval by interval)
+        """
+        return self._materialize(
+            queue, self._place(queue, slots, focus_budget), bio_profile, timing_research, first_index
+        )
+    
+    def _place(
+        self,
+        queue: List[Tuple[Task, Dict, List[str]]],
+        slots: List[TimeRange],
+        focus_budget: Optional[int] = None
+    ) -> Iterator[Placement]:
+        """Timeline placements of the queue under this agent's rest rules"""
+        return place(
+            durations=[atomic["duration"] for _, atomic, _ in queue],
+            intervals=free_intervals(slots),
+            policies=self.policy.rest_rules,
+            focus_budget=focus_budget
+        )
+    
+    def _materialize(
+        self,
+        queue: List[Tuple[Task, Dict, List[str]]],
+        placements: Iterable[Placement],
+        bio_profile: UserBioProfile,
+        timing_research: Dict[str, Any],
+        first_index: int = 1
+    ) -> Iterator[Any]:
+        """
+        Build schedule items from timeline placements
+        
+        A chunk split across intervals (or days) keeps its task_id on the
+        first piece; later pieces get a "_2", "_3", ... suffix.
+        
+        Args:
+            queue: Atomic chunks the placements index into
+            placements: Placements from _place
+            bio_profile: User's biological profile
+            timing_research: Research results
+            first_index: Number used for the first chunk's task_id
+        
+        Yields:
+            ScheduleItem and RestPeriod objects in placement order
+        """
+        last_index, piece = None, 0
+        for kind, start_mins, end_mins, index in placements:
+            if kind == "rest":
+                policy = self.policy.rest_rules[index]
+                yield self._create_rest_period(
+                    end_time=start_mins,
+                    duration=policy.rest_minutes,
+                    reason=policy.reason,
+                    timing_research=timing_research
+                )
+                continue
             
-            for atomic in atomic_tasks:
-                if current_slot_idx >= len(available_slots):
-                    break
-                
-                # Calculate timing
-                start_time, end_time, duration = self._calculate_timing(
-                    atomic=atomic,
-                    slot=available_slots[current_slot_idx],
+            task, atomic, attached_tips = queue[index]
+            piece = piece + 1 if index == last_index else atomic.get("pieces", 0)
+            last_index = index
+            task_id = f"atomic_{first_index + index}" + (f"_{piece + 1}" if piece else "")
+            
+            # Create schedule item (design/rationale records are shared)
+            yield ScheduleItem(
+                task_id=task_id,
+                original_task_ref=task.task_id,
+                name=atomic["name"],
+                description=atomic["description"],
+                scheduled_time=TimeRange(start_mins, end_mins),
+                rationale_timing=self._generate_rationale(
+                    start_time=start_mins,
                     bio_profile=bio_profile,
                     timing_research=timing_research
-                )
-                
-                # Attach relevant tips
-                attached_tips = [
-                    tip.tip_id for tip in tips
-                    if tip.applies_to_task == task.task_id
-                ]
-                
-                # Create schedule item
-                schedule_item = ScheduleItem(
-                    task_id=f"atomic_{len(schedule) + 1}",
-                    original_task_ref=task.task_id,
-                    name=atomic["name"],
-                    description=atomic["description"],
-                    scheduled_time=f"{start_time}-{end_time}",
-                    rationale_timing=self._generate_rationale(
-                        start_time=start_time,
-                        bio_profile=bio_profile,
-                        timing_research=timing_research
-                    ),
-                    atomic_design=AtomicDesign(
-                        principle=atomic["principle"],
-                        trigger=atomic["trigger"],
-                        friction_reduction=atomic["friction_reduction"]
-                    ),
-                    attached_tips=attached_tips,
-                    duration_minutes=duration,
-                    type="focus"
-                )
-                
-                schedule.append(schedule_item)
-                
-                # Track consecutive focus time
-                consecutive_focus_minutes += duration
-                
-                # Add rest period if needed
-                if consecutive_focus_minutes >= 90:
-                    # Long break (ultradian rhythm)
-                    rest_period = self._create_rest_period(
-                        end_time=end_time,
-                        duration=20,
-                        reason="Ultradian rhythm recovery after 90+ min focus",
-                        timing_research=timing_research
-                    )
-                    schedule.append(rest_period)
-                    consecutive_focus_minutes = 0
-                elif consecutive_focus_minutes >= 25:
-                    # Short break (Pomodoro)
-                    rest_period = self._create_rest_period(
-                        end_time=end_time,
-                        duration=5,
-                        reason="Pomodoro short break for cognitive recovery",
-                        timing_research=timing_research
-                    )
-                    schedule.append(rest_period)
-                    consecutive_focus_minutes = 0
-                
-                # Move to next slot
-                current_slot_idx += 1
-        
-        return schedule
+                ),
+                atomic_design=SHARED_RECORDS.design(
+                    principle=atomic["principle"],
+                    trigger=atomic["trigger"],
+                    friction_reduction=atomic["friction_reduction"]
+                ),
+                attached_tips=attached_tips,
+                duration_minutes=end_mins - start_mins,
+                type="focus"
+            )
     
     def _apply_atomic_habits(self, task: Task, timing_research: Dict) -> Dict[str, str]:
         """
@@ -304,7 +618,7 @@ Return ONLY structured JSON output, no additional text."""
         bio_profile: UserBioProfile
     ) -> List[Dict]:
         """
-        Break task into atomic chunks
+        Break task into atomic chunks (sizes from the scheduling policy)
         
         Args:
             task: Original task
@@ -317,7 +631,7 @@ Return ONLY structured JSON output, no additional text."""
         # Parse duration (e.g., "PT30M" -> 30)
         duration = self._parse_duration(task.estimated_duration)
         
-        if task.difficulty == "low" or duration <= 5:
+        if not self.policy.is_split(task.difficulty, duration):
             # Already atomic
             return [{
                 "name": task.name,
@@ -327,73 +641,26 @@ Return ONLY structured JSON output, no additional text."""
                 "friction_reduction": atomic_design["friction_reduction"],
                 "duration": duration
             }]
-        elif task.difficulty == "medium":
-            # Break into 10-15 min chunks
-            chunks = max(1, duration // 15)
-            return [
-                {
-                    "name": f"{task.name} (Part {i+1}/{chunks})",
-                    "description": f"{task.description} - Part {i+1}",
-                    "principle": atomic_design["principle"],
-                    "trigger": atomic_design["trigger"],
-                    "friction_reduction": atomic_design["friction_reduction"],
-                    "duration": min(15, duration)
-                }
-                for i in range(chunks)
-            ]
-        else:  # high
-            # Break into 25-min Pomodoro chunks
-            chunks = max(1, duration // 25)
-            return [
-                {
-                    "name": f"{task.name} (Pomodoro {i+1}/{chunks})",
-                    "description": f"{task.description} - Pomodoro session {i+1}",
-                    "principle": atomic_design["principle"],
-                    "trigger": atomic_design["trigger"],
-                    "friction_reduction": atomic_design["friction_reduction"],
-                    "duration": min(25, duration)
-                }
-                for i in range(chunks)
-            ]
-    
-    def _calculate_timing(
-        self,
-        atomic: Dict,
-        slot: str,
-        bio_profile: UserBioProfile,
-        timing_research: Dict
-    ) -> tuple:
-        """
-        Calculate start and end time for a task
-        
-        Args:
-            atomic: Atomic task dict
-            slot: Time slot (e.g., "08:00-10:00")
-            bio_profile: User's biological profile
-            timing_research: Timing research results
-        
-        Returns:
-            Tuple of (start_time, end_time, duration_minutes)
-        """
-        # Parse slot
-        start_str, end_str = slot.split("-")
-        start_mins = time_to_minutes(start_str)
-        end_mins = time_to_minutes(end_str)
-        slot_duration = end_mins - start_mins
-        
-        # Task duration
-        task_duration = atomic["duration"]
         
-        # If task fits in slot, use slot start
-        if task_duration <= slot_duration:
-            return start_str, minutes_to_time(start_mins + task_duration), task_duration
-        else:
-            # Truncate to slot duration
-            return start_str, end_str, slot_duration
+        # Near-equal chunks no longer than the difficulty's max_minutes
+        chunks = self.policy.split(task.difficulty, duration)
+        rule = self.policy.chunk_rule(task.difficulty)
+        session_label = rule.session_label or rule.label
+        return [
+            {
+                "name": f"{task.name} ({rule.label} {i+1}/{len(chunks)})",
+                "description": f"{task.description} - {session_label} {i+1}",
+                "principle": atomic_design["principle"],
+                "trigger": atomic_design["trigger"],
+                "friction_reduction": atomic_design["friction_reduction"],
+                "duration": minutes
+            }
+            for i, minutes in enumerate(chunks)
+        ]
     
     def _generate_rationale(
         self,
-        start_time: str,
+        start_time: int,
         bio_profile: UserBioProfile,
         timing_research: Dict
     ) -> RationaleTiming:
@@ -401,32 +668,30 @@ Return ONLY structured JSON output, no additional text."""
         Generate rationale for timing assignment
         
         Args:
-            start_time: Task start time
+            start_time: Task start time (minutes since midnight)
             bio_profile: User's biological profile
             timing_research: Timing research results
         
         Returns:
-            RationaleTiming object
+            Shared RationaleTiming object
         """
         # Check if time matches peak hours
-        start_mins = time_to_minutes(start_time)
-        
         is_peak = any(
             self._time_in_range(start_time, peak_range)
             for peak_range in bio_profile.peak_hours
         )
         
         if is_peak:
-            reason = "Peak performance window - optimal for deep work"
+            reason = PEAK_RATIONALE
             chronotype_match = bio_profile.chronotype
         else:
-            reason = "Energy gap time - suitable for routine tasks"
+            reason = GAP_RATIONALE
             chronotype_match = "intermediate"
         
         # Get evidence URL from research
-        evidence_url = timing_research.get("timing_results", [{}])[0].get("url", "")
+        evidence_url = (timing_research.get("timing_results") or [{}])[0].get("url", "")
         
-        return RationaleTiming(
+        return SHARED_RECORDS.rationale(
             why_this_time=reason,
             evidence_url=evidence_url,
             chronotype_match=chronotype_match
@@ -434,7 +699,7 @@ Return ONLY structured JSON output, no additional text."""
     
     def _create_rest_period(
         self,
-        end_time: str,
+        end_time: int,
         duration: int,
         reason: str,
         timing_research: Dict
@@ -443,7 +708,7 @@ Return ONLY structured JSON output, no additional text."""
         Create a rest period
         
         Args:
-            end_time: End time of previous task
+            end_time: End time of previous task (minutes since midnight)
             duration: Rest duration in minutes
             reason: Reason for rest
             timing_research: Timing research results
@@ -451,24 +716,20 @@ Return ONLY structured JSON output, no additional text."""
         Returns:
             RestPeriod object
         """
-        end_mins = time_to_minutes(end_time)
-        start_mins = end_mins
-        end_rest_mins = end_mins + duration
-        
-        evidence_url = timing_research.get("ultradian_results", [{}])[0].get("url", "")
+        evidence_url = (timing_research.get("ultradian_results") or [{}])[0].get("url", "")
         
         return RestPeriod(
-            task_id=f"rest_{end_time.replace(':', '')}",
-            scheduled_time=f"{end_time}-{minutes_to_time(end_rest_mins)}",
+            task_id=f"rest_{format_minutes(end_time).replace(':', '')}",
+            scheduled_time=TimeRange(end_time, end_time + duration),
             duration_minutes=duration,
-            rationale_timing=RationaleTiming(
+            rationale_timing=SHARED_RECORDS.rationale(
                 why_this_time=reason,
                 evidence_url=evidence_url,
                 chronotype_match="all"
             )
         )
     
-    def _get_available_time_slots(self, bio_profile: UserBioProfile) -> List[str]:
+    def _get_available_time_slots(self, bio_profile: UserBioProfile) -> List[TimeRange]:
         """
         Get available time slots based on user's peak hours and constraints
         
@@ -476,24 +737,10 @@ Return ONLY structured JSON output, no additional text."""
             bio_profile: User's biological profile
         
         Returns:
-            List of time slots in "HH:MM-HH:MM" format
+            List of time slots
         """
-        slots = []
-        
-        # Add peak hours as priority slots
-        for peak_range in bio_profile.peak_hours:
-            slots.append(peak_range)
-        
-        # Add other hours if needed
-        if len(slots) < 3:
-            slots.extend([
-                "06:00-07:00",
-                "11:00-12:00",
-                "14:00-15:00",
-                "16:00-17:00"
-            ])
-        
-        return slots[:6]  # Max 6 slots for MVP
+        # Peak hours first, the policy's fallback slots if there are too few
+        return self.policy.slots(bio_profile.peak_hours)
     
     def _calculate_insights(self, schedule: List) -> BioInsights:
         """
@@ -522,7 +769,7 @@ Return ONLY structured JSON output, no additional text."""
         
         warning = ""
         if total_focus > 90 and total_rest < 20:
-            warning = "High focus time detected. Consider adding more rest periods to prevent burnout."
+            warning = BURNOUT_WARNING
         
         return BioInsights(
             total_focus_time=f"{total_focus} minutes",
@@ -536,38 +783,26 @@ Return ONLY structured JSON output, no additional text."""
         Parse ISO 8601 duration to minutes
         
         Args:
-            iso_duration: Duration string (e.g., "PT30M")
+            iso_duration: Duration string (e.g., "PT30M", "PT1H30M"; read in
+                lenient mode, since it comes from the LLM)
         
         Returns:
-            Duration in minutes
+            Duration in minutes (DEFAULT_TASK_MINUTES if unreadable)
         """
         try:
-            # Parse PT30M -> 30
-            import re
-            match = re.search(r'PT(\d+)M', iso_duration)
-            if match:
-                return int(match.group(1))
-            return 30  # Default
-        except:
-            return 30
+            return parse_duration(iso_duration, strict=False)
+        except DurationParseError:
+            return DEFAULT_TASK_MINUTES
     
-    def _time_in_range(self, time_str: str, time_range: str) -> bool:
+    def _time_in_range(self, minute: int, time_range: TimeRange) -> bool:
         """
         Check if a time falls within a range
         
         Args:
-            time_str: Time string "HH:MM"
-            time_range: Time range "HH:MM-HH:MM"
+            minute: Time in minutes since midnight
+            time_range: Time range
         
         Returns:
             True if time is in range
         """
-        try:
-            start_str, end_str = time_range.split("-")
-            time_mins = time_to_minutes(time_str)
-            start_mins = time_to_minutes(start_str)
-            end_mins = time_to_minutes(end_str)
-            
-            return start_mins <= time_mins <= end_mins
-        except:
-            return False
\ No newline at end of file
+        return time_range.contains(minute)
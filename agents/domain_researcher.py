@@ -1,13 +1,33 @@
 import os
-from typing import Dict, Any, List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
 from schemas.agent2_output import (
     DomainResearcherOutput,
     Task,
     ProTip
 )
 from utils.web_search import WebSearchTool, MockWebSearchTool
+from utils.template_store import TemplateStore
+from utils.activity_index import ActivityIndex, get_activity_index
+from schemas.pipeline_events import PipelineEvent, stage_result
+from utils.resilience import get_endpoint
+
+# Structured-output wrappers, defined once so pydantic builds their schemas at import
+class TaskList(BaseModel):
+    tasks: List[Task]
+
+
+class TipList(BaseModel):
+    pro_tips: List[ProTip]
+
+
+class WarningList(BaseModel):
+    warnings: List[str]
+
 
 class DomainResearcherAgent:
     """
@@ -15,19 +35,35 @@ class DomainResearcherAgent:
     Researches workflow + Pro Tips with evidence citations
     """
     
-    def __init__(self, model: str = "gemini-2.5-flash-lite", use_mock_search: bool = False):
+    def __init__(
+        self,
+        model: str = "gemini-2.5-flash-lite",
+        use_mock_search: bool = False,
+        template_store: Optional[TemplateStore] = None,
+        activity_index: Optional[ActivityIndex] = None
+    ):
         """
         Initialize Domain Researcher Agent
         
         Args:
             model: Gemini model to use (default: gemini-2.5-flash-lite)
             use_mock_search: If True, use mock search tool for testing
+            template_store: Optional store of per-activity outputs; a hit skips
+                the searches and task/tip/warning generation
+            activity_index: Activity canonicalization index (default: shared
+                index of common activities)
         """
+        self.template_store = template_store
+        self.activity_index = activity_index or get_activity_index()
+        self._speculation_executor: Optional[ThreadPoolExecutor] = None
+        self._speculation_lock = threading.Lock()
+
         self.llm = ChatGoogleGenerativeAI(
             model=model,
             temperature=0.3,
             api_key=os.getenv("GOOGLE_API_KEY")  # Will read from GOOGLE_API_KEY env var
         )
+        self.llm_endpoint = get_endpoint("gemini")
         
         # Initialize web search tool
         if use_mock_search:
@@ -71,7 +107,8 @@ Return ONLY structured JSON output, no additional text."""
     def research_domain(
         self,
         goal: str,
-        bio_context: Dict
+        bio_context: Dict,
+        speculation: Optional[Future] = None
     ) -> DomainResearcherOutput:
         """
         Research domain for the given goal
@@ -79,6 +116,8 @@ Return ONLY structured JSON output, no additional text."""
         Args:
             goal: Clarified goal from Agent A1
             bio_context: User's biological context
+            speculation: Future from speculate(); its output is reused when it
+                researched the same activity, otherwise it is discarded
         
         Returns:
             DomainResearcherOutput with tasks and tips
@@ -86,24 +125,191 @@ Return ONLY structured JSON output, no additional text."""
         # Extract activity from goal
         activity = self._extract_activity(goal)
         
+        output = self._speculative_output(speculation, activity)
+        if output is not None:
+            return output
+        
+        return self._research_activity(goal, activity)
+    
+    def research_domain_stream(
+        self,
+        goal: str,
+        bio_context: Dict,
+        speculation: Optional[Future] = None
+    ) -> Iterator[PipelineEvent]:
+        """
+        Research domain for the given goal, yielding partial results as they are ready
+        
+        Args:
+            goal: Clarified goal from Agent A1
+            bio_context: User's biological context
+            speculation: Future from speculate() (see research_domain)
+        
+        Yields:
+            "task", "tip" and "warning" events, then a "result" event with the
+            DomainResearcherOutput
+        """
+        activity = self._extract_activity(goal)
+        
+        output = self._speculative_output(speculation, activity)
+        if output is None:
+            output = self._template_output(goal, activity)
+        if output is not None:
+            yield from self._output_events(output)
+            yield PipelineEvent(stage="a2", type="result", data=output)
+            return
+        
+        for event in self._research_stream(goal, activity):
+            if event.type == "result" and self.template_store is not None:
+                self.template_store.put(activity, event.data)
+            yield event
+    
+    def speculate(self, goal: str) -> Future:
+        """
+        Start researching a provisional goal in the background
+        
+        Called as soon as A1 has broken out the goals, so searches and task
+        generation overlap with the remaining clarification turns. Pass the
+        returned future to research_domain once the goal is final.
+        
+        Args:
+            goal: Provisional goal (e.g., the goals from A1's first turn)
+        
+        Returns:
+            Future of (activity, DomainResearcherOutput)
+        """
+        with self._speculation_lock:
+            if self._speculation_executor is None:
+                self._speculation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atp-speculate")
+            return self._speculation_executor.submit(self._speculate, goal)
+    
+    def _speculate(self, goal: str) -> Tuple[str, DomainResearcherOutput]:
+        activity = self._extract_activity(goal)
+        return activity, self._research_activity(goal, activity)
+    
+    def _speculative_output(
+        self,
+        speculation: Optional[Future],
+        activity: str
+    ) -> Optional[DomainResearcherOutput]:
+        """
+        Keep or discard a speculative result for the final activity
+        
+        Args:
+            speculation: Future from speculate() (None = no speculation)
+            activity: Activity extracted from the final goal
+        
+        Returns:
+            The speculative output if it researched the same activity, else None
+        """
+        if speculation is None:
+            return None
+        try:
+            speculative_activity, output = speculation.result()
+        except Exception as e:
+            print(f"⚠️  Speculative research failed, researching again: {e}")
+            return None
+        if speculative_activity != activity:
+            print(f"🗑️  Discarding speculative research for '{speculative_activity}' (final activity: '{activity}')")
+            return None
+        return output
+    
+    def _research_activity(self, goal: str, activity: str) -> DomainResearcherOutput:
+        """
+        Template hit or fresh research (stored as the activity's template)
+        
+        Args:
+            goal: Clarified goal from Agent A1
+            activity: Activity name
+        
+        Returns:
+            DomainResearcherOutput with tasks and tips
+        """
+        output = self._template_output(goal, activity)
+        if output is not None:
+            return output
+        
+        output = self._research(goal, activity)
+        if self.template_store is not None:
+            self.template_store.put(activity, output)
+        return output
+    
+    def _template_output(self, goal: str, activity: str) -> Optional[DomainResearcherOutput]:
+        """
+        Warm path: copy of the activity template (stale ones are refreshed in the background)
+        
+        Args:
+            goal: Clarified goal from Agent A1
+            activity: Activity name
+        
+        Returns:
+            DomainResearcherOutput or None if there is no template
+        """
+        if self.template_store is None:
+            return None
+        entry = self.template_store.lookup(activity)
+        if entry is None:
+            return None
+        if not self.template_store.is_fresh(entry):
+            self.template_store.refresh_in_background(
+                activity, lambda: self._research(goal, activity)
+            )
+        return entry.output.model_copy(deep=True)
+    
+    def _output_events(self, output: DomainResearcherOutput) -> Iterator[PipelineEvent]:
+        """Partial-result events for a complete A2 output"""
+        for task in output.tasks:
+            yield PipelineEvent(stage="a2", type="task", data=task)
+        for tip in output.pro_tips:
+            yield PipelineEvent(stage="a2", type="tip", data=tip)
+        for warning in output.warnings:
+            yield PipelineEvent(stage="a2", type="warning", data=warning)
+    
+    def _research(self, goal: str, activity: str) -> DomainResearcherOutput:
+        """
+        Run searches and generate tasks, tips and warnings for an activity
+        
+        Args:
+            goal: Clarified goal from Agent A1
+            activity: Activity name
+        
+        Returns:
+            DomainResearcherOutput with tasks and tips
+        """
+        return stage_result(self._research_stream(goal, activity))
+    
+    def _research_stream(self, goal: str, activity: str) -> Iterator[PipelineEvent]:
+        """
+        Run searches and generate tasks, tips and warnings, yielding each group
+        as soon as its LLM call returns (tasks come before the tips search)
+        
+        Args:
+            goal: Clarified goal from Agent A1
+            activity: Activity name
+        
+        Yields:
+            "task", "tip" and "warning" events, then a "result" event
+        """
         # Search for workflow
         workflow_results = self.search_tool.search_workflow(
             activity=activity,
             task_type="workflow"
         )
         
-        # Search for tips
-        tips_results = self.search_tool.search_workflow(
-            activity=activity,
-            task_type="tips"
-        )
-        
         # Generate tasks with evidence
         tasks = self._generate_tasks(
             goal=goal,
             activity=activity,
             workflow_results=workflow_results
         )
+        for task in tasks:
+            yield PipelineEvent(stage="a2", type="task", data=task)
+        
+        # Search for tips
+        tips_results = self.search_tool.search_workflow(
+            activity=activity,
+            task_type="tips"
+        )
         
         # Generate pro tips with evidence
         tips = self._generate_tips(
@@ -111,20 +317,34 @@ Return ONLY structured JSON output, no additional text."""
             tips_results=tips_results,
             tasks=tasks
         )
+        for tip in tips or []:
+            yield PipelineEvent(stage="a2", type="tip", data=tip)
         
         # Generate warnings
         warnings = self._generate_warnings(goal, activity)
-        
-        return DomainResearcherOutput(
+        for warning in warnings or []:
+            yield PipelineEvent(stage="a2", type="warning", data=warning)
+        
+        # Degraded parts are served for this request only, never cached
+        degraded = (
+            getattr(workflow_results, "degraded", False)
+            or getattr(tips_results, "degraded", False)
+            or tips is None
+            or warnings is None
+        )
+        yield PipelineEvent(stage="a2", type="result", data=DomainResearcherOutput(
             domain=activity,
             tasks=tasks,
-            pro_tips=tips,
-            warnings=warnings
-        )
+            pro_tips=tips or [],
+            warnings=warnings or [],
+            degraded=degraded
+        ))
     
     def _extract_activity(self, goal: str) -> str:
         """
         Extract the main activity from goal
+        Known activities are matched locally (no LLM call); LLM answers are
+        canonicalized too, so "jogging" and "chạy bộ" share one template key.
         
         Args:
             goal: SMART goal
@@ -132,19 +352,26 @@ Return ONLY structured JSON output, no additional text."""
         Returns:
             Activity name (e.g., "running", "writing report")
         """
+        match = self.activity_index.match(goal)
+        if match is not None:
+            return match.label
+        
         prompt = ChatPromptTemplate.from_messages([
             ("system", "Extract the main activity from the goal. Return only the activity name, lowercase, 2-3 words max."),
             ("human", "Goal: {goal}")
         ])
         
         chain = prompt | self.llm
-        response = chain.invoke({"goal": goal})
+        response = self.llm_endpoint.call(chain.invoke, {"goal": goal})
         
         # Clean up response
         activity = response.content.strip().lower()
         # Remove articles and prepositions
         activity = " ".join([w for w in activity.split() if w not in ["a", "an", "the", "to", "for"]])
         
+        match = self.activity_index.match(activity) if activity else None
+        if match is not None:
+            return match.label
         return activity if activity else "activity"
     
     def _generate_tasks(
@@ -183,14 +410,8 @@ If search results are limited, use general best practices but note it.""")
         ])
         
         # Use structured output
-        from pydantic import BaseModel
-        from pydantic import Field
-        
-        class TaskList(BaseModel):
-            tasks: List[Task]
-        
         chain = prompt | self.llm.with_structured_output(TaskList)
-        result = chain.invoke({
+        result = self.llm_endpoint.call(chain.invoke, {
             "goal": goal,
             "activity": activity,
             "search_results": search_results_text
@@ -203,7 +424,7 @@ If search results are limited, use general best practices but note it.""")
         activity: str,
         tips_results: List[Dict],
         tasks: List[Task]
-    ) -> List[ProTip]:
+    ) -> Optional[List[ProTip]]:
         """
         Generate pro tips from search results
         
@@ -213,7 +434,8 @@ If search results are limited, use general best practices but note it.""")
             tasks: List of tasks to link tips to
         
         Returns:
-            List of ProTip objects
+            List of ProTip objects, or None if Gemini was unavailable
+            (degraded mode: tasks without tips rather than no plan)
         """
         if not tasks:
             return []
@@ -245,21 +467,16 @@ Include study evidence from search results.""")
         ])
         
         # Use structured output
-        from pydantic import BaseModel
-        
-        class TipList(BaseModel):
-            pro_tips: List[ProTip]
-        
         chain = prompt | self.llm.with_structured_output(TipList)
-        result = chain.invoke({
+        result = self.llm_endpoint.call(chain.invoke, {
             "activity": activity,
             "task_list": task_list_text,
             "search_results": search_results_text
-        })
+        }, fallback=lambda error: None)
         
-        return result.pro_tips
+        return None if result is None else result.pro_tips
     
-    def _generate_warnings(self, goal: str, activity: str) -> List[str]:
+    def _generate_warnings(self, goal: str, activity: str) -> Optional[List[str]]:
         """
         Generate common pitfalls and warnings
         
@@ -268,7 +485,7 @@ Include study evidence from search results.""")
             activity: Activity name
         
         Returns:
-            List of warning messages
+            List of warning messages, or None if Gemini was unavailable
         """
         prompt = ChatPromptTemplate.from_messages([
             ("system", "You are an expert on common mistakes people make when starting new activities."),
@@ -276,15 +493,10 @@ Include study evidence from search results.""")
         ])
         
         # Use structured output
-        from pydantic import BaseModel
-        
-        class WarningList(BaseModel):
-            warnings: List[str]
-        
         chain = prompt | self.llm.with_structured_output(WarningList)
-        result = chain.invoke({
+        result = self.llm_endpoint.call(chain.invoke, {
             "goal": goal,
             "activity": activity
-        })
+        }, fallback=lambda error: None)
         
-        return result.warnings
\ No newline at end of file
+        return None if result is None else result.warnings
\ No newline at end of file
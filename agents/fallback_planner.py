@@ -0,0 +1,207 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+from schemas.agent2_output import (
+    Task,
+    TaskEvidence,
+    ProTip,
+    TipEvidence,
+    DomainResearcherOutput
+)
+from schemas.final_plan import FinalPlan
+from schemas.time_types import DurationParseError, parse_duration
+from utils.template_store import TemplateStore
+from utils.activity_index import ActivityIndex, get_activity_index
+from utils.scheduling_policy import CompiledPolicy
+
+# Main work block length when the goal's duration cannot be read
+DEFAULT_WORK_MINUTES = 60
+
+# Longest main work block the rule engine schedules for one goal
+MAX_WORK_MINUTES = 180
+
+
+def duration_minutes(text: str, default: int = DEFAULT_WORK_MINUTES) -> int:
+    """
+    Read a free-text duration answer as minutes
+
+    Args:
+        text: Duration as the user wrote it (e.g., "1 hour", "1 tiếng 30 phút",
+            "PT45M"; read by parse_duration in lenient mode)
+        default: Minutes used when no duration is found
+
+    Returns:
+        Duration in minutes
+    """
+    try:
+        minutes = parse_duration(text or "", strict=False)
+    except DurationParseError:
+        return default
+    return minutes if minutes > 0 else default
+
+
+class LocalFallbackPlanner:
+    """
+    Deterministic local pipeline used when Gemini is unavailable
+    Pure Python - builds a valid FinalPlan from the collected info without
+    any LLM or search call: goals are used as written (A1), tasks come from
+    the A2 template store or a rule engine, and A3/A4 run on built-in
+    timing evidence. The plan is flagged as degraded in its metadata.
+    """
+
+    def __init__(
+        self,
+        agent_a1,
+        agent_a3,
+        agent_a4,
+        template_store: Optional[TemplateStore] = None,
+        activity_index: Optional[ActivityIndex] = None
+    ):
+        """
+        Initialize fallback planner
+
+        Args:
+            agent_a1: GoalClarifierAgent (only its local helpers are used)
+            agent_a3: BioOptimizerAgent
+            agent_a4: JSONFormatterAgent
+            template_store: Optional A2 template store; stale entries are used too
+            activity_index: Activity canonicalization index (default: shared
+                CANONICAL_ACTIVITIES index)
+        """
+        self.agent_a1 = agent_a1
+        self.agent_a3 = agent_a3
+        self.agent_a4 = agent_a4
+        self.template_store = template_store
+        self.activity_index = activity_index or get_activity_index()
+
+    def plan(self, bio_context: Dict[str, Any], reason: str = "", policy: Optional[CompiledPolicy] = None) -> FinalPlan:
+        """
+        Build a plan offline
+
+        Args:
+            bio_context: Collected info as returned by GoalClarifierAgent.chat
+            reason: Why the fallback is used (stored in the plan metadata)
+            policy: Scheduling policy for this plan (None = A3's)
+
+        Returns:
+            FinalPlan with metadata.degraded set
+        """
+        a1_output = self.agent_a1.local_goal_spec(bio_context)
+        goals_info = self.agent_a1._goals_info(bio_context)
+
+        tasks, tips = [], []
+        for n, goal_info in enumerate(goals_info, 1):
+            output = self.research_goal(goal_info)
+            prefix = f"g{n}_" if len(goals_info) > 1 else ""
+            goal_tasks, goal_tips = self._prefixed(output, prefix)
+            tasks.extend(goal_tasks)
+            tips.extend(goal_tips)
+
+        bio_profile = a1_output.user_bio_profile
+        agent_a3 = self.agent_a3 if policy is None else self.agent_a3.with_policy(policy)
+        a3_output = agent_a3.optimize_schedule(
+            tasks=tasks,
+            tips=tips,
+            bio_profile=bio_profile,
+            timing_research=agent_a3.local_timing_research(
+                activity=tasks[0].name if tasks else "activity",
+                bio_profile=bio_profile
+            )
+        )
+
+        plan = self.agent_a4.format_final_plan(
+            optimized_schedule=a3_output.optimized_schedule,
+            bio_insights=a3_output.bio_insights,
+            goal=a1_output.clarified_goal,
+            bio_profile=bio_profile,
+            user_id=a1_output.user_id
+        )
+        plan.metadata.degraded = True
+        plan.metadata.degraded_reason = reason
+        return plan
+
+    def research_goal(self, goal_info: Dict[str, Any]) -> DomainResearcherOutput:
+        """
+        Tasks and tips for one goal from the template store, else from rules
+
+        Args:
+            goal_info: One entry of all_goals_info (goal, estimated_duration, ...)
+
+        Returns:
+            DomainResearcherOutput
+        """
+        goal = goal_info.get("goal", "")
+        match = self.activity_index.match(goal)
+        if match is not None and self.template_store is not None:
+            entry = self.template_store.lookup(match.label)
+            if entry is not None:
+                return entry.output
+        return self._rule_based_output(goal, duration_minutes(goal_info.get("estimated_duration", "")))
+
+    def _rule_based_output(self, goal: str, work_minutes: int) -> DomainResearcherOutput:
+        """Generic prepare → work → review tasks following the 2-minute rule"""
+        work_minutes = min(work_minutes, MAX_WORK_MINUTES)
+        tasks = [
+            Task(
+                task_id="task_1",
+                name=f"Chuẩn bị: {goal}",
+                description="Chuẩn bị dụng cụ và không gian, bắt đầu trong 2 phút",
+                estimated_duration="PT5M",
+                difficulty="low",
+                evidence=TaskEvidence(
+                    source_url="https://jamesclear.com/how-to-stop-procrastinating",
+                    authority="James Clear",
+                    summary="The Two-Minute Rule: make the start so small it cannot be refused"
+                )
+            ),
+            Task(
+                task_id="task_2",
+                name=goal,
+                description="Phần việc chính, chia thành các block tập trung",
+                estimated_duration=f"PT{work_minutes}M",
+                difficulty="high",
+                evidence=TaskEvidence(
+                    source_url="https://francescocirillo.com/products/the-pomodoro-technique",
+                    authority="Francesco Cirillo",
+                    summary="Timeboxed focus blocks with short breaks sustain attention"
+                )
+            ),
+            Task(
+                task_id="task_3",
+                name=f"Tổng kết: {goal}",
+                description="Ghi lại kết quả và bước tiếp theo",
+                estimated_duration="PT15M",
+                difficulty="medium",
+                evidence=TaskEvidence(
+                    source_url="https://jamesclear.com/habit-tracker",
+                    authority="James Clear",
+                    summary="Tracking progress reinforces the habit loop"
+                )
+            ),
+        ]
+        tips = [
+            ProTip(
+                tip_id="tip_1",
+                content="Chỉ cần bắt đầu 2 phút đầu tiên, phần còn lại sẽ dễ hơn",
+                applies_to_task="task_2",
+                evidence=TipEvidence(
+                    source_url="https://jamesclear.com/how-to-stop-procrastinating",
+                    study_summary="Starting is the hardest part; a tiny first step lowers resistance",
+                    applicability="Any task that is being put off"
+                )
+            ),
+        ]
+        return DomainResearcherOutput(domain=goal, tasks=tasks, pro_tips=tips)
+
+    def _prefixed(self, output: DomainResearcherOutput, prefix: str) -> Tuple[List[Task], List[ProTip]]:
+        """Tasks and tips with IDs made unique across goals"""
+        if not prefix:
+            return list(output.tasks), list(output.pro_tips)
+        tasks = [task.model_copy(update={"task_id": prefix + task.task_id}) for task in output.tasks]
+        tips = [
+            tip.model_copy(update={
+                "tip_id": prefix + tip.tip_id,
+                "applies_to_task": prefix + tip.applies_to_task
+            })
+            for tip in output.pro_tips
+        ]
+        return tasks, tips
@@ -4,10 +4,41 @@ Bước 1: Break multiple goals from user input
 Bước 2: Clarify each goal (deadline, duration, energy)
 """
 import os
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Iterator
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
 from schemas.agent1_output import GoalClarifierOutput, UserBioProfile
+from schemas.pipeline_events import PipelineEvent, stage_result
+from utils.streaming import stream_text, complete_text
+from utils.resilience import get_endpoint
+from utils.profile_store import ProfileStore, ANONYMOUS_USER
+
+
+# Structured-output wrappers, defined once so pydantic builds their schemas at import
+class GoalsList(BaseModel):
+    goals: List[str] = Field(description="List of distinct goals from user input")
+
+
+class ExtractedInfo(BaseModel):
+    deadline: Optional[str] = Field(None, description="When it needs to be done")
+    estimated_duration: Optional[str] = Field(None, description="Estimated time")
+    energy_level: Optional[str] = Field(None, description="high/medium/low")
+
+
+def combine_goals(goals: List[str]) -> str:
+    """
+    Describe one or more goals as a single goal sentence
+    
+    Args:
+        goals: Goal names
+    
+    Returns:
+        The goal itself, or "Hoàn thành các mục tiêu: a; b" for several goals
+    """
+    if len(goals) == 1:
+        return goals[0]
+    return "Hoàn thành các mục tiêu: " + "; ".join(goals)
 
 
 class GoalClarifierAgent:
@@ -18,12 +49,23 @@ class GoalClarifierAgent:
     2. Clarify: Get deadline, duration, energy for each goal
     """
     
-    def __init__(self, model: str = "gemini-2.5-flash-lite"):
+    def __init__(self, model: str = "gemini-2.5-flash-lite", profile_store: Optional[ProfileStore] = None):
+        """
+        Initialize Goal Clarifier Agent
+        
+        Args:
+            model: Gemini model to use
+            profile_store: Optional store of returning users' profiles; known
+                bio fields and goal habits are not asked again
+        """
         self.llm = ChatGoogleGenerativeAI(
             model=model,
             temperature=0.7,
             api_key=os.getenv("GOOGLE_API_KEY")
         )
+        self.llm_endpoint = get_endpoint("gemini")
+        self.profile_store = profile_store
+        self.user_id = ANONYMOUS_USER
         
         # Phase 1: Break goals
         self.break_prompt = """You are a goal analyzer. Extract ALL distinct goals/tasks from the user's message.
@@ -67,12 +109,6 @@ RULES:
     
     def _break_goals(self, user_input: str) -> List[str]:
         """Phase 1: Break user input into multiple goals"""
-        from pydantic import BaseModel, Field
-        from typing import List as TypingList
-        
-        class GoalsList(BaseModel):
-            goals: TypingList[str] = Field(description="List of distinct goals from user input")
-        
         try:
             prompt = ChatPromptTemplate.from_messages([
                 ("system", self.break_prompt),
@@ -80,7 +116,7 @@ RULES:
             ])
             
             chain = prompt | self.llm.with_structured_output(GoalsList)
-            result = chain.invoke({})
+            result = self.llm_endpoint.call(chain.invoke, {})
             
             print(f"DEBUG: Broken goals: {result.goals}")
             return result.goals if result.goals else [user_input]
@@ -92,14 +128,6 @@ RULES:
     
     def _extract_info(self, user_input: str) -> Dict[str, Any]:
         """Extract clarification info for current goal"""
-        from pydantic import BaseModel, Field
-        from typing import Optional as TypingOptional
-        
-        class ExtractedInfo(BaseModel):
-            deadline: TypingOptional[str] = Field(None, description="When it needs to be done")
-            estimated_duration: TypingOptional[str] = Field(None, description="Estimated time")
-            energy_level: TypingOptional[str] = Field(None, description="high/medium/low")
-            
         extraction_prompt = f"""Current goal: "{self.goals_list[self.current_goal_idx] if self.goals_list else 'Unknown'}"
 
 Extract deadline, duration, and energy level from this user message.
@@ -115,18 +143,29 @@ User message: "{user_input}"""
             ])
             
             chain = prompt | self.llm.with_structured_output(ExtractedInfo)
-            result = chain.invoke({})
+            result = self.llm_endpoint.call(chain.invoke, {})
             
-            return {k: v for k, v in result.dict().items() if v is not None}
+            return result.model_dump(exclude_none=True)
         except Exception as e:
             print(f"DEBUG: Extraction error: {e}")
             return {}
     
-    def chat(self, user_input: str, context: Optional[Dict] = None) -> Dict[str, Any]:
+    def chat(
+        self,
+        user_input: str,
+        context: Optional[Dict] = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
         """
         Handle conversation with user
         Phase 1: Break goals (first turn)
         Phase 2: Clarify each goal
+        
+        Args:
+            user_input: User message
+            context: Info collected so far
+            on_token: Called with each chunk of an LLM-written reply as it
+                arrives (fixed replies are not streamed)
         """
         # Initialize or merge context
         if context:
@@ -138,16 +177,21 @@ User message: "{user_input}"""
         if not self.goals_list:
             self.goals_list = self._break_goals(user_input)
             self.current_goal_idx = 0
+            remembered = self._skip_known_goals()
+            if self.current_goal_idx >= len(self.goals_list):
+                return self._complete(self._remembered_text(remembered))
+            current_goal = self.goals_list[self.current_goal_idx]
             
             if len(self.goals_list) > 1:
                 response = f"Tuyệt vợi! Mình thấy bạn có {len(self.goals_list)} mục tiêu:\n"
                 for i, goal in enumerate(self.goals_list, 1):
                     response += f"  {i}. {goal}\n"
+                response += self._remembered_text(remembered)
                 response += f"\nHãy cùng làm rõ từng mục tiêu nhé! "
-                response += f"Bắt đầu với mục tiêu 1: **{self.goals_list[0]}**\n\n"
+                response += f"Bắt đầu với mục tiêu {self.current_goal_idx + 1}: **{current_goal}**\n\n"
                 response += "Bạn dự định hoàn thành vào **khi nào** và mất khoảng **bao lâu**?"
             else:
-                response = f"Tuyệt vợi! Bạn muốn: **{self.goals_list[0]}**\n\n"
+                response = f"Tuyệt vợi! Bạn muốn: **{current_goal}**\n\n"
                 response += "Bạn dự định hoàn thành vào **khi nào** và mất khoảng **bao lâu**?"
             
             self.conversation_history.append({"role": "assistant", "content": response})
@@ -185,24 +229,16 @@ User message: "{user_input}"""
             # Move to next goal
             self.current_goal_idx += 1
             self.collected_info = {}  # Reset for next goal
+            remembered = self._skip_known_goals()
             
             # Check if all goals done
             if self.current_goal_idx >= len(self.goals_list):
                 # All goals clarified
-                response = "Mình đã hiểu rõ. Để mình nghiên cứu cách tối ưu nhất cho bạn nhé!"
-                self.conversation_history.append({"role": "assistant", "content": response})
-                
-                return {
-                    "response": response,
-                    "context_complete": True,
-                    "collected_info": {
-                        "goals": self.goals_list,
-                        "all_goals_info": self.all_goals_info
-                    }
-                }
+                return self._complete(self._remembered_text(remembered))
             else:
                 # Next goal
-                response = f"Tiếp theo, hãy làm rõ mục tiêu {self.current_goal_idx + 1}: **{self.goals_list[self.current_goal_idx]}**\n\n"
+                response = self._remembered_text(remembered).lstrip("\n")
+                response += f"Tiếp theo, hãy làm rõ mục tiêu {self.current_goal_idx + 1}: **{self.goals_list[self.current_goal_idx]}**\n\n"
                 response += "Bạn dự định hoàn thành vào **khi nào**?"
                 self.conversation_history.append({"role": "assistant", "content": response})
                 
@@ -225,12 +261,14 @@ User message: "{user_input}"""
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", self.clarify_prompt),
-            ("human", f"{context_str}\n\nUser vừa nói: {user_input}\n\nHỏi ngắn gọn về thông tin còn thiếu.")
+            ("human", "{context}\n\nUser vừa nói: {user_input}\n\nHỏi ngắn gọn về thông tin còn thiếu.")
         ])
         
+        # Passed as variables: the collected-info dict contains braces
         chain = prompt | self.llm
-        response = chain.invoke({})
-        response_text = response.content
+        response_text = complete_text(
+            chain, {"context": context_str, "user_input": user_input}, on_token, self.llm_endpoint
+        )
         
         self.conversation_history.append({"role": "assistant", "content": response_text})
         
@@ -240,27 +278,94 @@ User message: "{user_input}"""
             "collected_info": self.collected_info.copy()
         }
     
+    def set_user(self, user_id: str):
+        """
+        Set the user the conversation is for (returning users skip known answers)
+        
+        Args:
+            user_id: Tenant key in the profile store
+        """
+        self.user_id = user_id or ANONYMOUS_USER
+    
+    def _skip_known_goals(self) -> List[Dict]:
+        """
+        Fill in remembered answers for the current goal and the ones after it
+        
+        Returns:
+            Goal infos taken from the profile store (stops at the first goal
+            that still needs questions)
+        """
+        remembered = []
+        while self.current_goal_idx < len(self.goals_list):
+            goal = self.goals_list[self.current_goal_idx]
+            habit = self._habit(goal)
+            if habit is None or not habit.deadline:
+                break
+            goal_info = {"goal": goal, **habit.model_dump()}
+            self.all_goals_info.append(goal_info)
+            remembered.append(goal_info)
+            self.current_goal_idx += 1
+        return remembered
+    
+    def _habit(self, goal: str):
+        """Remembered answers for a goal's activity, if any"""
+        if self.profile_store is None or self.user_id == ANONYMOUS_USER:
+            return None
+        return self.profile_store.habit(self.user_id, goal)
+    
+    def _remembered_text(self, remembered: List[Dict]) -> str:
+        """Tell the user which answers were reused"""
+        if not remembered:
+            return ""
+        text = "\nMình nhớ từ lần trước:\n"
+        for goal_info in remembered:
+            duration = f", khoảng {goal_info['estimated_duration']}" if goal_info["estimated_duration"] else ""
+            text += f"  ✓ {goal_info['goal']}: hoàn thành {goal_info['deadline']}{duration}\n"
+        return text
+    
+    def _complete(self, prefix: str = "") -> Dict[str, Any]:
+        """Final chat turn once every goal is clarified"""
+        response = prefix.lstrip("\n")
+        if response:
+            response += "\n"
+        response += "Mình đã hiểu rõ. Để mình nghiên cứu cách tối ưu nhất cho bạn nhé!"
+        self.conversation_history.append({"role": "assistant", "content": response})
+        
+        return {
+            "response": response,
+            "context_complete": True,
+            "collected_info": {
+                "goals": self.goals_list,
+                "all_goals_info": self.all_goals_info,
+                "user_id": self.user_id
+            }
+        }
+    
     def generate_goal_spec(self, user_request: str, bio_context: Dict) -> GoalClarifierOutput:
         """Generate final goal specification for all goals"""
+        return stage_result(self.generate_goal_spec_stream(user_request, bio_context))
+    
+    def generate_goal_spec_stream(self, user_request: str, bio_context: Dict) -> Iterator[PipelineEvent]:
+        """
+        Generate the goal specification, streaming the SMART goal as it is written
         
-        # Get all goals info
-        all_goals_info = bio_context.get("all_goals_info", [])
-        goals_list = bio_context.get("goals", [])
+        Args:
+            user_request: Original user request
+            bio_context: Collected info as returned by chat
         
-        if not all_goals_info and goals_list:
-            # Fallback: create from goals list
-            all_goals_info = [{"goal": g, "deadline": "tomorrow", "estimated_duration": "1 hour", "energy_level": "medium"} for g in goals_list]
+        Yields:
+            "token" events for the SMART goal, then a "result" event with the
+            GoalClarifierOutput
+        
+        Raises:
+            UpstreamError: If Gemini fails, times out or its circuit is open
+        """
+        all_goals_info = self._goals_info(bio_context)
         
         # Combine all goals into one description
-        if len(all_goals_info) == 1:
-            combined_goal = all_goals_info[0]["goal"]
-            main_deadline = all_goals_info[0].get("deadline", "tomorrow")
-            main_energy = all_goals_info[0].get("energy_level", "medium")
-        else:
-            goal_descriptions = [f"{i+1}. {g['goal']}" for i, g in enumerate(all_goals_info)]
-            combined_goal = "Hoàn thành các mục tiêu: " + "; ".join([g['goal'] for g in all_goals_info])
-            main_deadline = all_goals_info[0].get("deadline", "tomorrow")
-            main_energy = all_goals_info[0].get("energy_level", "medium")
+        combined_goal = combine_goals([g['goal'] for g in all_goals_info])
+        main_deadline = all_goals_info[0].get("deadline", "tomorrow")
+        main_energy = all_goals_info[0].get("energy_level", "medium")
         
         # Generate SMART goal
         prompt = ChatPromptTemplate.from_messages([
@@ -268,15 +373,82 @@ User message: "{user_input}"""
             ("human", f"Goals: {combined_goal}\nDeadline: {main_deadline}\nEnergy: {main_energy}")
         ])
         
-        try:
-            chain = prompt | self.llm
-            result = chain.invoke({})
-            clarified_goal = result.content.strip()
-        except:
-            clarified_goal = combined_goal
-        
-        # Create bio profile with defaults
-        bio_profile = UserBioProfile(
+        # Runs under the Gemini deadline and breaker; an UpstreamError reaches
+        # the pipeline, which switches to the local fallback
+        parts = []
+        for text in self.llm_endpoint.stream(stream_text, prompt | self.llm, {}):
+            parts.append(text)
+            yield PipelineEvent(stage="a1", type="token", data=text)
+        # An empty answer keeps the goals as written
+        clarified_goal = "".join(parts).strip() or combined_goal
+        
+        yield PipelineEvent(stage="a1", type="result", data=self._output(
+            clarified_goal, bio_context, all_goals_info, main_energy
+        ))
+    
+    def local_goal_spec(self, bio_context: Dict) -> GoalClarifierOutput:
+        """
+        Goal specification without the LLM (degraded mode)
+        The goals are used as written instead of being rewritten as a SMART goal.
+        
+        Args:
+            bio_context: Collected info as returned by chat
+        
+        Returns:
+            GoalClarifierOutput
+        """
+        all_goals_info = self._goals_info(bio_context)
+        return self._output(
+            combine_goals([g['goal'] for g in all_goals_info]),
+            bio_context,
+            all_goals_info,
+            all_goals_info[0].get("energy_level", "medium") if all_goals_info else "medium"
+        )
+    
+    def _output(self, clarified_goal: str, bio_context: Dict, all_goals_info: List[Dict], energy: str) -> GoalClarifierOutput:
+        """Build the A1 output and remember what was learned about the user"""
+        user_id = bio_context.get("user_id") or self.user_id
+        bio_profile = self._build_bio_profile(bio_context, energy)
+        if self.profile_store is not None and user_id != ANONYMOUS_USER:
+            # Only answers the user gave (not _goals_info's defaults) become habits
+            self.profile_store.learn(user_id, bio_context, bio_context.get("all_goals_info", []))
+        return GoalClarifierOutput(
+            clarified_goal=clarified_goal,
+            user_bio_profile=bio_profile,
+            conversation_complete=True,
+            user_id=user_id
+        )
+    
+    def _goals_info(self, bio_context: Dict) -> List[Dict]:
+        """Per-goal info from bio_context (defaults when only the goal list is known)"""
+        all_goals_info = bio_context.get("all_goals_info", [])
+        goals_list = bio_context.get("goals", [])
+        
+        if not all_goals_info and goals_list:
+            # Fallback: create from goals list
+            all_goals_info = [{"goal": g, "deadline": "tomorrow", "estimated_duration": "1 hour", "energy_level": "medium"} for g in goals_list]
+        return all_goals_info
+    
+    def remembered_bio(self, bio_context: Dict) -> Dict:
+        """
+        Bio fields the profile store remembers for the request's user
+        
+        Args:
+            bio_context: Collected info (its user_id, else the current user)
+        
+        Returns:
+            Known bio fields (empty for anonymous or unknown users)
+        """
+        user_id = bio_context.get("user_id") or self.user_id
+        if self.profile_store is None or user_id == ANONYMOUS_USER:
+            return {}
+        compiled = self.profile_store.compiled(user_id)
+        return compiled.bio_context if compiled is not None else {}
+    
+    def _build_bio_profile(self, bio_context: Dict, energy: str) -> UserBioProfile:
+        """Bio profile from collected info, then the stored profile, then defaults"""
+        bio_context = {**self.remembered_bio(bio_context), **bio_context}
+        return UserBioProfile(
             chronotype=bio_context.get("chronotype", "intermediate"),
             sleep_time=bio_context.get("sleep_time", "23:00"),
             wake_time=bio_context.get("wake_time", "07:00"),
@@ -288,15 +460,18 @@ User message: "{user_input}"""
             peak_hours=bio_context.get("peak_hours", ["09:00-11:00", "15:00-17:00"]),
             slump_hours=bio_context.get("slump_hours", []),
             fixed_commitments=bio_context.get("fixed_commitments", []),
-            energy_tomorrow=main_energy,
+            energy_tomorrow=energy,
             physical_constraints=bio_context.get("physical_constraints", [])
         )
+    
+    def provisional_goal(self) -> Optional[str]:
+        """
+        Goal known so far (from the first turn), before deadline and energy are clarified
         
-        return GoalClarifierOutput(
-            clarified_goal=clarified_goal,
-            user_bio_profile=bio_profile,
-            conversation_complete=True
-        )
+        Returns:
+            Combined goal sentence, or None before the first turn
+        """
+        return combine_goals(self.goals_list) if self.goals_list else None
     
     def reset(self):
         """Reset for new conversation"""
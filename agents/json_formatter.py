@@ -1,5 +1,7 @@
 import json
-from typing import Dict, Any, List
+import os
+from functools import lru_cache
+from typing import Dict, Any, List, Union
 from datetime import datetime
 from schemas.final_plan import (
     FinalPlan,
@@ -7,10 +9,35 @@ from schemas.final_plan import (
     EditableFields,
     RestPeriodEditable,
     UserContextSummary,
-    Metadata
+    Metadata,
+    PlanHorizon
+)
+from schemas.agent3_output import (
+    ScheduleItem,
+    BioInsights,
+    RationaleTiming,
+    AtomicDesign,
+    MultiDayOptimizerOutput
 )
-from schemas.agent3_output import ScheduleItem, BioInsights
 from schemas.agent1_output import UserBioProfile
+from schemas.time_types import TimeRange
+from utils.serialization import DEFAULT_BACKEND, get_serializer
+
+
+@lru_cache(maxsize=1024)
+def _evidence_text(rationale: RationaleTiming, design: AtomicDesign) -> str:
+    """Evidence string for a (rationale, design) pair; records are shared, so cache it"""
+    evidence_parts = [
+        f"Timing: {rationale.why_this_time}",
+        f"Principle: {design.principle}",
+        f"Trigger: {design.trigger}"
+    ]
+    
+    if rationale.evidence_url:
+        evidence_parts.append(f"Source: {rationale.evidence_url}")
+    
+    return " | ".join(evidence_parts)
+
 
 class JSONFormatterAgent:
     """
@@ -18,16 +45,23 @@ class JSONFormatterAgent:
     Pure Python module - converts Bio-Optimizer output to editable JSON format
     """
     
-    def __init__(self):
-        """Initialize JSON Formatter Agent"""
-        pass
+    def __init__(self, serializer: str = DEFAULT_BACKEND):
+        """
+        Initialize JSON Formatter Agent
+        
+        Args:
+            serializer: JSON backend for save/load ("pydantic", "orjson" or "json")
+        """
+        self.serializer = get_serializer(serializer)
     
     def format_final_plan(
         self,
         optimized_schedule: List[ScheduleItem],
         bio_insights: BioInsights,
         goal: str,
-        bio_profile: UserBioProfile
+        bio_profile: UserBioProfile,
+        plan_date: str = "",
+        user_id: str = "anonymous"
     ) -> FinalPlan:
         """
         Format optimized schedule into editable final plan
@@ -37,6 +71,8 @@ class JSONFormatterAgent:
             bio_insights: Bio insights from Agent A3
             goal: User's goal
             bio_profile: User's biological profile
+            plan_date: Day the plan is for (YYYY-MM-DD); empty means tomorrow
+            user_id: User the plan belongs to
         
         Returns:
             FinalPlan object ready for user review
@@ -44,8 +80,9 @@ class JSONFormatterAgent:
         # Create metadata
         metadata = Metadata(
             goal=goal,
-            user_id="anonymous",  # Can be customized
-            version="1.0"
+            user_id=user_id,
+            version="1.0",
+            plan_date=plan_date
         )
         
         # Create user context summary
@@ -67,6 +104,41 @@ class JSONFormatterAgent:
             calendar_ready=False
         )
     
+    def format_horizon(
+        self,
+        horizon: MultiDayOptimizerOutput,
+        goal: str,
+        bio_profile: UserBioProfile,
+        user_id: str = "anonymous"
+    ) -> PlanHorizon:
+        """
+        Format a multi-day A3 output into one editable plan per day
+        
+        Args:
+            horizon: Multi-day output from Agent A3
+            goal: User's goal
+            bio_profile: User's biological profile
+            user_id: User the plans belong to
+        
+        Returns:
+            PlanHorizon object ready for user review
+        """
+        return PlanHorizon(
+            goal=goal,
+            plans=[
+                self.format_final_plan(
+                    optimized_schedule=day_plan.optimized_schedule,
+                    bio_insights=day_plan.bio_insights,
+                    goal=goal,
+                    bio_profile=bio_profile,
+                    plan_date=day_plan.day.isoformat(),
+                    user_id=user_id
+                )
+                for day_plan in horizon.days
+            ],
+            unscheduled_task_refs=horizon.unscheduled_task_refs
+        )
+    
     def _create_context_summary(
         self,
         bio_profile: UserBioProfile,
@@ -139,16 +211,7 @@ class JSONFormatterAgent:
         Returns:
             Formatted evidence string
         """
-        evidence_parts = [
-            f"Timing: {item.rationale_timing.why_this_time}",
-            f"Principle: {item.atomic_design.principle}",
-            f"Trigger: {item.atomic_design.trigger}"
-        ]
-        
-        if item.rationale_timing.evidence_url:
-            evidence_parts.append(f"Source: {item.rationale_timing.evidence_url}")
-        
-        return " | ".join(evidence_parts)
+        return _evidence_text(item.rationale_timing, item.atomic_design)
     
     def _create_editable_fields(self, item: ScheduleItem) -> EditableFields:
         """
@@ -179,30 +242,35 @@ class JSONFormatterAgent:
     
     def save_to_file(
         self,
-        plan: FinalPlan,
-        filepath: str = "output/tomorrow_plan.json"
+        plan: Union[FinalPlan, PlanHorizon],
+        filepath: str = "output/tomorrow_plan.json",
+        compact: bool = False
     ) -> str:
         """
         Save final plan to JSON file
         
         Args:
-            plan: FinalPlan object
+            plan: FinalPlan or PlanHorizon object
             filepath: Output file path
+            compact: If True, write without indentation (for machine consumers)
         
         Returns:
             File path where plan was saved
         """
-        # Convert to dict
-        plan_dict = plan.dict()
+        # Time ranges are rendered back to "HH:MM-HH:MM" by the encoder
+        data = self.serializer.dumps(plan, compact=compact)
         
-        # Save to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(plan_dict, f, ensure_ascii=False, indent=2)
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with open(filepath, 'wb') as f:
+            f.write(data)
         
         print(f"✅ Plan saved to: {filepath}")
         return filepath
     
-    def load_from_file(self, filepath: str) -> FinalPlan:
+    def load_from_file(self, filepath: str) -> Union[FinalPlan, PlanHorizon]:
         """
         Load plan from JSON file
         
@@ -210,12 +278,21 @@ class JSONFormatterAgent:
             filepath: Input file path
         
         Returns:
-            FinalPlan object
+            PlanHorizon if the file holds a "plans" list (as written by
+            save_to_file for a horizon), otherwise FinalPlan
+        
+        Raises:
+            ValueError: If the file is not valid JSON or fails validation
         """
-        with open(filepath, 'r', encoding='utf-8') as f:
-            plan_dict = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = f.read()
         
-        return FinalPlan(**plan_dict)
+        # Horizons are the only plan files with a top-level "plans" key
+        document = json.loads(data)
+        model_cls = PlanHorizon if isinstance(document, dict) and "plans" in document else FinalPlan
+        
+        # Files may have been edited by hand: validate fully
+        return self.serializer.loads(data, model_cls)
     
     def approve_plan(
         self,
@@ -264,7 +341,8 @@ class JSONFormatterAgent:
                     if item.id == item_id:
                         # Apply allowed edits
                         if "time" in edit and item.editable_fields.can_move:
-                            item.time = edit["time"]
+                            item.time = TimeRange.parse(edit["time"])
+                            item.editable_fields.time = item.time
                         if "task" in edit and item.editable_fields.can_delete:
                             item.task = edit["task"]
                         if "duration" in edit and item.editable_fields.can_move:
@@ -276,7 +354,8 @@ class JSONFormatterAgent:
                 for i, rp in enumerate(plan.rest_periods):
                     if edit.get("extend", False) and rp.can_extend:
                         # Extend rest period (simplified logic)
-                        rp.duration = rp.duration + 5  # Add 5 minutes
+                        rp.time = rp.time.extend(5)  # Add 5 minutes
+                        rp.extended_minutes += 5
         
         return plan
     
@@ -302,6 +381,9 @@ class JSONFormatterAgent:
             ""
         ]
         
+        if plan.metadata.degraded:
+            lines[2:2] = [f"> ⚠️ Kế hoạch dự phòng (offline): {plan.metadata.degraded_reason or 'dịch vụ AI không khả dụng'}", ""]
+        
         for item in plan.editable_schedule:
             lines.append(f"**{item.time}** | {item.task}")
             lines.append(f"- *Trigger*: Được tối ưu theo thời gian sinh học")
@@ -0,0 +1,256 @@
+from typing import Dict, Any, List, Optional
+from agents.bio_optimizer import BURNOUT_WARNING
+from schemas.final_plan import (
+    FinalPlan,
+    EditableScheduleItem,
+    RestPeriodEditable
+)
+from schemas.time_types import MINUTES_PER_DAY, TimeRange
+from utils.scheduling_policy import CompiledPolicy, default_policy
+from utils.timeline import FocusStreak
+
+EDIT_ACTIONS = ("move", "delete", "extend", "done")
+
+
+class IncrementalReplanner:
+    """
+    Incremental replanning for an existing FinalPlan
+    Pure Python - applies one user edit and repairs only the affected part of
+    the schedule (no LLM or search calls)
+    """
+
+    def __init__(self, policy: Optional[CompiledPolicy] = None):
+        """
+        Initialize replanner
+
+        Args:
+            policy: Scheduling policy whose rest rules are applied (None =
+                default_policy(), as A3 uses)
+        """
+        self.policy = policy or default_policy()
+
+    def replan(self, plan: FinalPlan, edit: Dict[str, Any]) -> FinalPlan:
+        """
+        Apply one edit and reflow the affected run of tasks
+
+        Supported edits:
+            {"action": "move", "id": "atomic_2", "time": "09:00-09:25"}
+            {"action": "delete", "id": "atomic_2"}
+            {"action": "extend", "id": "atomic_2", "minutes": 10}
+            {"action": "done", "id": "atomic_2", "actual_minutes": 20}  # actual_minutes optional
+
+        Earlier tasks keep their place and later tasks that now overlap are
+        pushed back (never past midnight); rests are recomputed from the start
+        of the edited run until the schedule is unchanged again, and the
+        summary totals are updated. The input plan is not modified.
+
+        Args:
+            plan: Current plan
+            edit: Edit dict (see above)
+
+        Returns:
+            New FinalPlan with the edit applied
+
+        Raises:
+            ValueError: If the edit is invalid, would overlap a completed task
+                or would push a task or rest past midnight
+        """
+        action = edit.get("action")
+        if action not in EDIT_ACTIONS:
+            raise ValueError(f"Unknown edit action '{action}'. Choose from: {', '.join(EDIT_ACTIONS)}")
+
+        plan = plan.model_copy(deep=True)
+        items = sorted(plan.editable_schedule, key=lambda i: i.time.start)
+        owned_rests = self._match_rests(items, plan.rest_periods)
+        owned_ids = {id(rest) for rest in owned_rests.values()}
+        loose_rests = [rest for rest in plan.rest_periods if id(rest) not in owned_ids]
+
+        index = next((n for n, item in enumerate(items) if item.id == edit.get("id")), None)
+        if index is None:
+            raise ValueError(f"No schedule item with id '{edit.get('id')}'")
+        item = items[index]
+        if item.status == "done":
+            raise ValueError(f"Item '{item.id}' is already done")
+
+        # The reflow starts at the beginning of the edited item's run
+        anchor_item = items[self._run_start(items, owned_rests, index)]
+
+        if action == "delete":
+            if not item.editable_fields.can_delete:
+                raise ValueError(f"Item '{item.id}' cannot be deleted")
+            items.pop(index)
+            owned_rests.pop(item.id, None)
+        elif action == "move":
+            if not item.editable_fields.can_move:
+                raise ValueError(f"Item '{item.id}' cannot be moved")
+            self._set_time(item, TimeRange.parse(edit["time"]))
+            items.sort(key=lambda i: i.time.start)
+        elif action == "extend":
+            self._set_time(item, item.time.extend(int(edit.get("minutes", 5))))
+        else:  # done
+            item.status = "done"
+            item.editable_fields.can_move = False
+            item.editable_fields.can_delete = False
+            if "actual_minutes" in edit:
+                self._set_time(item, TimeRange(item.time.start, item.time.start + int(edit["actual_minutes"])))
+
+        edited_index = self._position(items, item)
+        anchor = self._position(items, anchor_item)
+        if anchor is None:  # the deleted item started its run
+            anchor = index
+        if action == "move":
+            anchor = min(anchor, self._run_start(items, owned_rests, edited_index))
+
+        self._reflow(items, owned_rests, anchor, edited_index)
+
+        plan.editable_schedule = items
+        plan.rest_periods = sorted(
+            list(owned_rests.values()) + loose_rests,
+            key=lambda rest: rest.time.start
+        )
+        self._update_summary(plan)
+        return plan
+
+    def _match_rests(
+        self,
+        items: List[EditableScheduleItem],
+        rests: List[RestPeriodEditable]
+    ) -> Dict[str, RestPeriodEditable]:
+        """
+        Attach each rest to the task it follows (rest starts when the task ends)
+
+        Args:
+            items: Schedule items sorted by start
+            rests: Rest periods
+
+        Returns:
+            Dict of item id → rest period
+        """
+        by_start = {}
+        for rest in rests:
+            by_start.setdefault(rest.time.start, rest)
+        owned = {}
+        for item in items:
+            rest = by_start.pop(item.time.end, None)
+            if rest is not None:
+                owned[item.id] = rest
+        return owned
+
+    def _position(self, items: List[EditableScheduleItem], target: EditableScheduleItem):
+        """Index of `target` in `items` by identity, or None"""
+        return next((n for n, item in enumerate(items) if item is target), None)
+
+    def _run_start(
+        self,
+        items: List[EditableScheduleItem],
+        owned_rests: Dict[str, RestPeriodEditable],
+        index: int
+    ) -> int:
+        """
+        Index of the first task in the run of back-to-back focus containing `index`
+
+        A run starts after the policy's full_rest idle minutes (a long rest or gap), where
+        every rest rule's focus count is back to zero.
+        """
+        while index > 0:
+            if items[index].time.start - items[index - 1].time.end >= self.policy.full_rest:
+                break
+            index -= 1
+        return index
+
+    def _reflow(
+        self,
+        items: List[EditableScheduleItem],
+        owned_rests: Dict[str, RestPeriodEditable],
+        start: int,
+        edited_index: Optional[int]
+    ):
+        """
+        Push overlapping tasks back and recompute rests, starting at `start`
+        Stops at the first untouched task that begins a new run after the
+        edited task, so the rest of the schedule is left as it was. Rests
+        get the length and rationale of the rule due now, plus the minutes
+        the user added to them.
+
+        Raises:
+            ValueError: If a completed task would have to move, or a task or
+                rest would end past midnight
+        """
+        if start > 0:
+            previous = items[start - 1]
+            rest = owned_rests.get(previous.id)
+            cursor = rest.time.end if rest else previous.time.end
+        else:
+            cursor = 0
+        streak = FocusStreak(self.policy.rest_rules)
+
+        for index in range(start, len(items)):
+            item = items[index]
+            if item.time.start < cursor:
+                if item.status == "done" or not item.editable_fields.can_move:
+                    raise ValueError(f"Edit would overlap fixed item '{item.id}' at {item.time}")
+                self._set_time(item, item.time.shift(cursor - item.time.start))
+                self._check_day(item.id, item.time)
+            else:
+                # Idle time before the task counts as rest
+                streak.rest(item.time.start - cursor)
+                # A new run past the edit with nothing shifted into it: unchanged from here on
+                past_edit = edited_index is None or index > edited_index
+                if index > start and streak.idle and past_edit:
+                    break
+
+            if index == edited_index:
+                self._check_day(item.id, item.time)
+
+            # Recompute this task's rest
+            existing = owned_rests.pop(item.id, None)
+            cursor = item.time.end
+            due = streak.add(item.time.duration)
+            if due is not None:
+                _, rest_minutes, reason = self.policy.rest_rules[due]
+                if existing is not None:
+                    # The rule due now decides the rest; only the user's own extension is kept
+                    existing.time = TimeRange(item.time.end, item.time.end + rest_minutes + existing.extended_minutes)
+                    existing.rationale = reason
+                    rest = existing
+                else:
+                    rest = RestPeriodEditable(
+                        time=TimeRange(item.time.end, item.time.end + rest_minutes),
+                        type="mandatory_break",
+                        rationale=reason,
+                        can_remove=False,
+                        can_extend=True
+                    )
+                self._check_day(f"rest after {item.id}", rest.time)
+                owned_rests[item.id] = rest
+                cursor = rest.time.end
+                streak.rest(rest.time.duration)
+
+    def _check_day(self, name: str, time: TimeRange):
+        """Reject a reflowed block that would end past midnight (events would land before the day starts)"""
+        if time.end > MINUTES_PER_DAY:
+            raise ValueError(f"Edit would push '{name}' past midnight ({time})")
+
+    def _set_time(self, item: EditableScheduleItem, time: TimeRange):
+        """Update a task's time and its editable fields together"""
+        item.time = time
+        item.editable_fields.time = time
+        item.editable_fields.duration = time.duration
+
+    def _update_summary(self, plan: FinalPlan):
+        """
+        Recompute summary totals from the edited plan
+
+        Args:
+            plan: Plan to update in place
+        """
+        total_focus = sum(item.time.duration for item in plan.editable_schedule)
+        total_rest = sum(rest.time.duration for rest in plan.rest_periods)
+
+        warning = ""
+        if total_focus > 90 and total_rest < 20:
+            warning = BURNOUT_WARNING
+
+        summary = plan.user_context_summary
+        summary.total_scheduled_hours = f"{total_focus} minutes"
+        summary.notes = f"Optimized for {summary.chronotype} chronotype. {warning}"
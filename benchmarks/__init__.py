@@ -0,0 +1 @@
+# Offline benchmarks for Atomic Task Planner
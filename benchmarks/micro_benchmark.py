@@ -0,0 +1,373 @@
+"""
+Micro-benchmarks for the pure-Python scheduling and formatting hot paths
+Times each function over synthetic inputs from 10 to 10,000 items, records
+tracemalloc allocations, fits a scaling exponent and fails (exit code 1) when a
+result regresses past a threshold against a baseline report.
+
+Run: python benchmarks/micro_benchmark.py --output bench/micro-HEAD.json
+Check: python benchmarks/micro_benchmark.py --baseline bench/micro-main.json --threshold 0.25
+"""
+import argparse
+import gc
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# BioOptimizerAgent builds its Gemini client eagerly; no LLM call is made here
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+from agents.batch_scheduler import BatchRequest, BatchScheduler, bio_energy_vector, schedule_kernel
+from agents.bio_optimizer import BioOptimizerAgent
+from agents.json_formatter import JSONFormatterAgent
+from schemas.final_plan import FinalPlan
+from utils.serialization import SERIALIZERS, get_serializer
+from utils.plan_archive import PlanArchive
+from utils.validators import check_schedule_conflicts
+from benchmarks.stats import environment_info, format_change, load_report, relative_change, save_report
+from benchmarks.synthetic import (
+    make_atomic,
+    make_conflict_items,
+    make_profile,
+    make_schedule,
+    make_tasks,
+    make_timing_research,
+    make_tips,
+)
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+
+def build_benchmarks() -> Dict[str, Callable[[int], Callable[[], Any]]]:
+    """
+    Map benchmark name → setup(n), where setup returns the zero-argument
+    callable to time. Setup cost is never measured.
+    """
+    optimizer = BioOptimizerAgent(use_mock_search=True)
+    formatter = JSONFormatterAgent()
+    profile = make_profile()
+    research = make_timing_research()
+
+    def generate_schedule(n: int):
+        tasks = make_tasks(n)
+        tips = make_tips(tasks)
+        return lambda: optimizer._generate_schedule(tasks, tips, profile, research)
+
+    def break_into_atomic_tasks(n: int):
+        tasks = make_tasks(n)
+        designs = [optimizer._apply_atomic_habits(t, research) for t in tasks]
+        return lambda: [
+            optimizer._break_into_atomic_tasks(t, d, profile)
+            for t, d in zip(tasks, designs)
+        ]
+
+    def place(n: int):
+        # One chunk into the first peak slot per call, like A3's per-task placement
+        queues = [[(None, a, [])] for a in make_atomic(n)]
+        slots = profile.peak_hours[:1]
+        return lambda: [list(optimizer._place(queue, slots)) for queue in queues]
+
+    def batch_schedule_kernel(n: int):
+        # n users' energy vectors and chunk durations
+        energy = [bio_energy_vector(profile)] * n
+        durations = [[25, 15, 5, 40, 25, 15, 2]] * n
+        return lambda: schedule_kernel(energy, durations)
+
+    def batch_optimize(n: int):
+        # n users with three tasks each, materialized
+        scheduler = BatchScheduler(optimizer)
+        tasks = make_tasks(3)
+        requests = [BatchRequest(tasks, make_tips(tasks), profile, research)] * n
+        return lambda: scheduler.optimize_batch(requests)
+
+    def batch_compact(n: int):
+        # Same, held as compact rows (no ScheduleItems built)
+        scheduler = BatchScheduler(optimizer)
+        tasks = make_tasks(3)
+        requests = [BatchRequest(tasks, make_tips(tasks), profile, research)] * n
+        return lambda: scheduler.compact_batch(requests)
+
+    def calculate_insights(n: int):
+        schedule = make_schedule(n)
+        return lambda: optimizer._calculate_insights(schedule)
+
+    def convert_to_editable(n: int):
+        schedule = make_schedule(n)
+        return lambda: formatter._convert_to_editable(schedule)
+
+    def schedule_conflicts(n: int):
+        items = make_conflict_items(n)
+        return lambda: check_schedule_conflicts(items)
+
+    def make_plan(n: int):
+        schedule = make_schedule(n)
+        return formatter.format_final_plan(
+            optimized_schedule=schedule,
+            bio_insights=optimizer._calculate_insights(schedule),
+            goal="Synthetic goal",
+            bio_profile=profile
+        )
+
+    def format_final_plan(n: int):
+        # Internal path: A3 items → editable items → FinalPlan (nested models pass through)
+        schedule = make_schedule(n)
+        insights = optimizer._calculate_insights(schedule)
+        return lambda: formatter.format_final_plan(schedule, insights, "Synthetic goal", profile)
+
+    def validate_final_plan(n: int):
+        # Trust boundary: a plan read back from JSON is fully validated
+        data = make_plan(n).model_dump(mode="json")
+        return lambda: FinalPlan.model_validate(data)
+
+    def serialize(backend: str):
+        def setup(n: int):
+            serializer, plan = get_serializer(backend), make_plan(n)
+            return lambda: serializer.dumps(plan)
+        return setup
+
+    def deserialize(backend: str):
+        def setup(n: int):
+            serializer, plan = get_serializer(backend), make_plan(n)
+            data = serializer.dumps(plan)
+            return lambda: serializer.loads(data, type(plan))
+        return setup
+
+    def archive_month_query(n: int):
+        # n archived plans from 10 users; time one user's focus blocks for a month
+        archive, plan = PlanArchive(), make_plan(10)
+        for i in range(n):
+            plan.metadata.user_id = f"user_{i % 10}"
+            plan.metadata.plan_date = (date(2026, 1, 1) + timedelta(days=i // 10)).isoformat()
+            archive.append(plan)
+        return lambda: archive.items("user_0", "2026-01-01", "2026-01-31", kind="focus")
+
+    def parse_durations(n: int):
+        # LLM-style durations: a few distinct strings repeated (memoized after the first)
+        durations = [f"PT{1 + i % 3}H{i % 60}M" if i % 2 else f"PT{i % 90 + 1}M" for i in range(200)]
+        texts = [durations[i % len(durations)] for i in range(n)]
+        return lambda: [optimizer._parse_duration(text) for text in texts]
+
+    serializer_benchmarks = {}
+    for backend in SERIALIZERS:
+        try:
+            get_serializer(backend)
+        except ImportError:
+            continue  # optional backend not installed
+        serializer_benchmarks[f"serialize.{backend}.dumps"] = serialize(backend)
+        serializer_benchmarks[f"serialize.{backend}.loads"] = deserialize(backend)
+
+    return {
+        "bio._generate_schedule": generate_schedule,
+        "bio._break_into_atomic_tasks": break_into_atomic_tasks,
+        "bio._place": place,
+        "bio._calculate_insights": calculate_insights,
+        "bio._parse_duration": parse_durations,
+        "batch.schedule_kernel": batch_schedule_kernel,
+        "batch.optimize_batch": batch_optimize,
+        "batch.compact_batch": batch_compact,
+        "formatter._convert_to_editable": convert_to_editable,
+        "formatter.format_final_plan": format_final_plan,
+        "schema.validate_final_plan": validate_final_plan,
+        "validators.check_schedule_conflicts": schedule_conflicts,
+        "archive.items_month": archive_month_query,
+        **serializer_benchmarks,
+    }
+
+
+def time_callable(fn: Callable[[], Any], budget_s: float, max_rounds: int) -> Dict[str, Any]:
+    """
+    Time `fn` for as many rounds as fit in the budget (at least one)
+
+    Returns:
+        Dict with rounds, min_ms, median_ms and mean_ms
+    """
+    samples: List[float] = []
+    gc.collect()
+    deadline = time.perf_counter() + budget_s
+    while len(samples) < max_rounds:
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() >= deadline and len(samples) >= 1:
+            break
+    return {
+        "rounds": len(samples),
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+
+def measure_allocations(fn: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Run `fn` once under tracemalloc
+
+    Returns:
+        Dict with peak_kib (transient peak) and alloc_blocks (blocks still
+        held by the result)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_size, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return {
+        "peak_kib": round((peak - start_size) / 1024, 2),
+        "alloc_blocks": max(0, blocks),
+    }
+
+
+def scaling_exponent(sizes: List[int], medians: List[float]) -> float:
+    """Least-squares slope of log(time) vs log(n): ~1 linear, ~2 quadratic"""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, medians) if t > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denom = sum((x - mean_x) ** 2 for x, _ in points)
+    if not denom:
+        return 0.0
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in points) / denom, 2)
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every selected benchmark at every size"""
+    benchmarks = build_benchmarks()
+    selected = [
+        name for name in benchmarks
+        if not args.only or any(key in name for key in args.only)
+    ]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    scaling: Dict[str, float] = {}
+    for name in selected:
+        results[name] = {}
+        for n in args.sizes:
+            fn = benchmarks[name](n)
+            fn()  # warm caches and lazy imports
+            timing = time_callable(fn, args.budget, args.max_rounds)
+            allocations = {} if args.no_memory else measure_allocations(fn)
+            results[name][str(n)] = {
+                **timing,
+                "per_item_us": round(timing["median_ms"] * 1000 / n, 4),
+                **allocations,
+            }
+            print(f"   {name:<38} n={n:<6} median {timing['median_ms']:>10.3f} ms"
+                  f"  ({timing['rounds']} rounds)", file=sys.stderr)
+        scaling[name] = scaling_exponent(
+            args.sizes, [results[name][str(n)]["median_ms"] for n in args.sizes]
+        )
+
+    return {
+        "environment": environment_info(),
+        "config": {
+            "sizes": args.sizes,
+            "budget_s": args.budget,
+            "max_rounds": args.max_rounds,
+        },
+        "results": results,
+        "scaling": scaling,
+    }
+
+
+def find_regressions(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    noise_floor_ms: float
+) -> List[str]:
+    """
+    Compare a report with a baseline
+
+    Args:
+        report: Current report
+        baseline: Baseline report
+        threshold: Allowed relative slowdown / memory growth (0.25 = 25%)
+        noise_floor_ms: Ignore timings where both runs are below this
+
+    Returns:
+        Human-readable list of regressions (empty when all checks pass)
+    """
+    regressions = []
+    for name, sizes in report["results"].items():
+        for size, current in sizes.items():
+            base = baseline.get("results", {}).get(name, {}).get(size)
+            if not base:
+                continue
+            if max(current["median_ms"], base["median_ms"]) >= noise_floor_ms:
+                change = relative_change(current["median_ms"], base["median_ms"])
+                if change is not None and change > threshold:
+                    regressions.append(f"{name} n={size}: time {format_change(change)}")
+            if "peak_kib" in current and "peak_kib" in base:
+                change = relative_change(current["peak_kib"], base["peak_kib"])
+                if change is not None and change > threshold:
+                    regressions.append(f"{name} n={size}: peak memory {format_change(change)}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any], baseline: Dict[str, Any] = None):
+    """Print scaling curves, with deltas when a baseline is given"""
+    env = report["environment"]
+    print("\n" + "="*88)
+    print(f"🔬 MICRO-BENCHMARKS @ {env['commit']}{' (dirty)' if env['dirty'] else ''}")
+    print("="*88)
+    for name, sizes in report["results"].items():
+        print(f"\n   {name}  (scaling exponent {report['scaling'][name]})")
+        for size, r in sizes.items():
+            row = f"     n={size:<6} median {r['median_ms']:>10.3f} ms  {r['per_item_us']:>9.3f} µs/item"
+            if "peak_kib" in r:
+                row += f"  peak {r['peak_kib']:>9.1f} KiB  blocks {r['alloc_blocks']:>8}"
+            base = (baseline or {}).get("results", {}).get(name, {}).get(size)
+            if base:
+                row += f"  ({format_change(relative_change(r['median_ms'], base['median_ms']))})"
+            print(row)
+    print("\n" + "="*88)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='ATP micro-benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Input sizes')
+    parser.add_argument('--only', nargs='+', help='Run benchmarks whose name contains any of these')
+    parser.add_argument('--budget', type=float, default=0.5, help='Seconds of timing per benchmark/size')
+    parser.add_argument('--max-rounds', type=int, default=200, help='Upper bound on timed rounds')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', help='Write JSON report to this path')
+    parser.add_argument('--baseline', help='Baseline JSON report for regression checks')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative regression')
+    parser.add_argument('--noise-floor-ms', type=float, default=0.05, help='Ignore timings below this')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    baseline = load_report(args.baseline) if args.baseline else None
+    print_report(report, baseline)
+
+    if args.output:
+        print(f"\n💾 Saved report to: {save_report(report, args.output)}")
+
+    if baseline:
+        regressions = find_regressions(report, baseline, args.threshold, args.noise_floor_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
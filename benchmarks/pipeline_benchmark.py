@@ -0,0 +1,317 @@
+"""
+Offline end-to-end benchmark for the A1 → A4 pipeline
+Replays recorded Gemini/Tavily responses with injected latency and reports
+throughput, per-stage p50/p95/p99 and memory peaks.
+
+Run: python benchmarks/pipeline_benchmark.py --repeat 5 --llm-latency-ms 300 --output bench/HEAD.json
+Compare: python benchmarks/pipeline_benchmark.py --baseline bench/main.json
+"""
+import argparse
+import contextlib
+import io
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Agents build their Gemini clients eagerly; replay doubles replace them right after
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+from main import AtomicTaskPlanner
+from utils.template_store import TemplateStore
+from utils.resilience import get_endpoint, resilience_metrics
+from benchmarks.replay import (
+    FIXTURES_DIR,
+    InjectedLatency,
+    ReplayLLM,
+    ReplaySearchTool,
+    load_fixture,
+    load_requests,
+)
+from benchmarks.stats import (
+    environment_info,
+    format_change,
+    load_report,
+    relative_change,
+    save_report,
+    summarize,
+)
+
+# (stage name, planner attribute, agent method)
+STAGES = [
+    ("a1_goal_spec", "agent_a1", "generate_goal_spec"),
+    ("a2_research", "agent_a2", "research_domain"),
+    ("a3_optimize", "agent_a3", "optimize_schedule"),
+    ("a4_format", "agent_a4", "format_final_plan"),
+]
+
+# Time-to-first-output marks recorded with --stream (event type → stage name)
+STREAM_MARKS = {"task": "first_task", "schedule_item": "first_item"}
+
+
+class StageTimer:
+    """Thread-safe collector of per-stage latency samples"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.enabled = True
+
+    def record(self, stage: str, elapsed_ms: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.samples[stage].append(elapsed_ms)
+
+    def wrap(self, stage: str, fn):
+        """Wrap a callable so every call is timed under `stage`"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, (time.perf_counter() - start) * 1000)
+        return timed
+
+
+class OfflinePlanner:
+    """AtomicTaskPlanner wired to replay doubles and instrumented per stage"""
+
+    def __init__(self, timer: StageTimer, args: argparse.Namespace, seed: int, template_store: TemplateStore = None):
+        self.timer = timer
+        self.planner = AtomicTaskPlanner(use_mock_search=True, template_store=template_store)
+        self.llm = ReplayLLM(latency=InjectedLatency(args.llm_latency_ms, args.jitter, seed))
+        self.search = ReplaySearchTool(latency=InjectedLatency(args.search_latency_ms, args.jitter, seed + 1))
+
+        for agent_attr in ("agent_a1", "agent_a2", "agent_a3"):
+            agent = getattr(self.planner, agent_attr)
+            agent.llm = self.llm
+            if hasattr(agent, "search_tool"):
+                agent.search_tool = self.search
+
+        for stage, agent_attr, method in STAGES:
+            agent = getattr(self.planner, agent_attr)
+            setattr(agent, method, timer.wrap(stage, getattr(agent, method)))
+
+        self.stream = args.stream
+        self.local = args.local
+        self.output_dir = tempfile.mkdtemp(prefix="atp-bench-")
+
+    def run(self, request: Dict[str, Any], fixtures: Dict[str, Dict[str, Any]]) -> float:
+        """Run one request end to end, returning its latency in ms"""
+        fixture = fixtures[request["fixture"]]
+        self.llm.use(fixture)
+        self.search.use(fixture)
+
+        start = time.perf_counter()
+        if self.local:
+            plan = self.planner.run_local_pipeline(request["user_request"], request.get("bio_context", {}))
+        elif self.stream:
+            plan = self._run_stream(request, start)
+        else:
+            plan = self.planner.run_pipeline(request["user_request"], request.get("bio_context", {}))
+
+        serialize_start = time.perf_counter()
+        self.planner.agent_a4.save_to_file(
+            plan, os.path.join(self.output_dir, f"{request['request_id']}.json")
+        )
+        end = time.perf_counter()
+        self.timer.record("a4_serialize", (end - serialize_start) * 1000)
+        return (end - start) * 1000
+
+
+    def _run_stream(self, request: Dict[str, Any], start: float):
+        """Run through stream_pipeline, timing the first task and first schedule item"""
+        first = {}
+        for event in self.planner.stream_pipeline(request["user_request"], request.get("bio_context", {})):
+            stage = STREAM_MARKS.get(event.type)
+            if stage and stage not in first:
+                first[stage] = True
+                self.timer.record(stage, (time.perf_counter() - start) * 1000)
+        return event.data
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run warmup, timed and memory passes and build the report"""
+    requests = load_requests(args.requests)
+    fixtures = {
+        name: load_fixture(name, args.fixtures)
+        for name in sorted({r["fixture"] for r in requests})
+    }
+
+    if args.hedge_min_delay_ms is not None:
+        get_endpoint("gemini").policy.min_hedge_delay_s = args.hedge_min_delay_ms / 1000.0
+
+    timer = StageTimer()
+    # One store shared by all workers; the warmup pass fills it
+    template_store = TemplateStore() if args.templates else None
+    planners = [
+        OfflinePlanner(timer, args, seed=args.seed + 2 * i, template_store=template_store)
+        for i in range(args.workers)
+    ]
+    idle: "queue.Queue[OfflinePlanner]" = queue.Queue()
+    for planner in planners:
+        idle.put(planner)
+
+    def run_one(request: Dict[str, Any]) -> float:
+        planner = idle.get()
+        try:
+            return planner.run(request, fixtures)
+        finally:
+            idle.put(planner)
+
+    # Warmup (imports, pydantic schema caches) is not recorded
+    timer.enabled = False
+    for _ in range(args.warmup):
+        for planner in planners:
+            for request in requests:
+                planner.run(request, fixtures)
+    timer.enabled = True
+
+    workload = [r for _ in range(args.repeat) for r in requests]
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        end_to_end = list(pool.map(run_one, workload))
+    wall_seconds = time.perf_counter() - wall_start
+
+    memory: Dict[str, Any] = {}
+    if not args.no_memory:
+        timer.enabled = False
+        peaks = []
+        planner = planners[0]
+        tracemalloc.start()
+        try:
+            for request in requests:
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                planner.run(request, fixtures)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append((peak - baseline) / 1024)
+        finally:
+            tracemalloc.stop()
+        memory = {
+            "peak_kib_max": round(max(peaks), 1),
+            "peak_kib_mean": round(sum(peaks) / len(peaks), 1),
+        }
+
+    llm_calls = sum(p.llm.calls for p in planners)
+    search_calls = sum(p.search.calls for p in planners)
+    runs = len(end_to_end) + args.warmup * len(requests) * len(planners) + (0 if args.no_memory else len(requests))
+
+    return {
+        "environment": environment_info(),
+        "config": {
+            "requests": os.path.relpath(args.requests),
+            "request_count": len(requests),
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "workers": args.workers,
+            "llm_latency_ms": args.llm_latency_ms,
+            "search_latency_ms": args.search_latency_ms,
+            "jitter": args.jitter,
+            "seed": args.seed,
+            "templates": args.templates,
+            "stream": args.stream,
+            "local": args.local,
+            "hedge_min_delay_ms": args.hedge_min_delay_ms,
+        },
+        "throughput_plans_per_s": round(len(end_to_end) / wall_seconds, 3) if wall_seconds else 0.0,
+        "end_to_end": summarize(end_to_end),
+        "stages": {stage: summarize(samples) for stage, samples in timer.samples.items()},
+        "upstream_calls_per_plan": {
+            "llm": round(llm_calls / runs, 2) if runs else 0.0,
+            "search": round(search_calls / runs, 2) if runs else 0.0,
+        },
+        "memory": memory,
+        "resilience": resilience_metrics(),
+    }
+
+
+def print_report(report: Dict[str, Any], baseline: Dict[str, Any] = None):
+    """Print a human-readable report, with deltas when a baseline is given"""
+    env = report["environment"]
+    print("\n" + "="*72)
+    print(f"📊 PIPELINE BENCHMARK @ {env['commit']}{' (dirty)' if env['dirty'] else ''}")
+    print("="*72)
+
+    def line(name: str, stats: Dict[str, float], base: Dict[str, float] = None):
+        row = f"   {name:<14} p50 {stats['p50_ms']:>9.2f}  p95 {stats['p95_ms']:>9.2f}  p99 {stats['p99_ms']:>9.2f} ms"
+        if base:
+            row += f"   (p50 {format_change(relative_change(stats['p50_ms'], base['p50_ms']))},"
+            row += f" p95 {format_change(relative_change(stats['p95_ms'], base['p95_ms']))})"
+        print(row)
+
+    base_stages = (baseline or {}).get("stages", {})
+    for stage in [s[0] for s in STAGES] + ["a4_serialize"] + list(STREAM_MARKS.values()):
+        if stage in report["stages"]:
+            line(stage, report["stages"][stage], base_stages.get(stage))
+    line("end_to_end", report["end_to_end"], (baseline or {}).get("end_to_end"))
+
+    throughput = report["throughput_plans_per_s"]
+    row = f"\n   Throughput: {throughput} plans/s"
+    if baseline:
+        row += f" ({format_change(relative_change(throughput, baseline['throughput_plans_per_s']))})"
+    print(row)
+    calls = report["upstream_calls_per_plan"]
+    print(f"   Upstream calls per plan: {calls['llm']} LLM, {calls['search']} search")
+    if report["memory"]:
+        mem = report["memory"]
+        row = f"   Memory peak: {mem['peak_kib_max']} KiB max, {mem['peak_kib_mean']} KiB mean"
+        if baseline and baseline.get("memory"):
+            row += f" ({format_change(relative_change(mem['peak_kib_max'], baseline['memory']['peak_kib_max']))})"
+        print(row)
+    for name, metrics in report.get("resilience", {}).items():
+        print(f"   Resilience {name}: {metrics['calls']} calls, {metrics['hedges']} hedges "
+              f"({metrics['hedge_wins']} won), {metrics['timeouts']} timeouts, "
+              f"{metrics['fallbacks']} fallbacks, circuit {metrics['circuit']}")
+    if baseline:
+        print(f"\n   Baseline: {baseline['environment']['commit']} ({baseline['environment']['timestamp']})")
+    print("="*72)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Offline ATP pipeline benchmark')
+    parser.add_argument('--requests', default=os.path.join(FIXTURES_DIR, 'requests.jsonl'),
+                        help='requests.jsonl-style input file')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Directory of recorded fixtures')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the inputs')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed passes before measuring')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent pipelines (threads)')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='Injected mean LLM latency')
+    parser.add_argument('--search-latency-ms', type=float, default=0.0, help='Injected mean search latency')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Log-normal sigma applied to latencies')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency jitter')
+    parser.add_argument('--templates', action='store_true', help='Share an A2 template store (warm path)')
+    parser.add_argument('--hedge-min-delay-ms', type=float, default=None,
+                        help='Lower the Gemini endpoint\'s minimum hedge delay (default policy: 2000 ms)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Run through stream_pipeline and report time to first task/schedule item')
+    parser.add_argument('--local', action='store_true',
+                        help='Run the degraded local fallback pipeline (no LLM or search calls)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', help='Write JSON report to this path')
+    parser.add_argument('--baseline', help='Compare against a previous JSON report')
+    args = parser.parse_args()
+
+    # Agents print progress; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = run_benchmark(args)
+
+    baseline = load_report(args.baseline) if args.baseline else None
+    print_report(report, baseline)
+
+    if args.output:
+        print(f"\n💾 Saved report to: {save_report(report, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
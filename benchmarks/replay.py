@@ -0,0 +1,153 @@
+"""
+Replay doubles for Gemini and Tavily
+Serve recorded responses from fixture files with configurable injected latency,
+so the pipeline can be benchmarked without network access.
+"""
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Free-text LLM calls are told apart by the start of their system prompt
+TEXT_CALL_KINDS = {
+    "Convert goals into a SMART goal": "smart_goal",
+    "Extract the main activity": "activity",
+    "You are a friendly coach": "clarify",
+}
+
+
+def load_fixture(name: str, fixtures_dir: str = FIXTURES_DIR) -> Dict[str, Any]:
+    """
+    Load a recorded response fixture
+
+    Args:
+        name: Fixture name (file name without .json)
+        fixtures_dir: Directory holding fixture files
+
+    Returns:
+        Fixture dict with "text", "structured" and "search" sections
+    """
+    with open(os.path.join(fixtures_dir, f"{name}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_requests(filepath: str) -> List[Dict[str, Any]]:
+    """
+    Load requests.jsonl-style benchmark inputs (one JSON object per line)
+
+    Args:
+        filepath: Path to JSONL file
+
+    Returns:
+        List of request dicts
+    """
+    requests = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                requests.append(json.loads(line))
+    return requests
+
+
+class InjectedLatency:
+    """Seeded latency generator: mean delay plus optional multiplicative jitter"""
+
+    def __init__(self, mean_ms: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.mean_ms = mean_ms
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+
+    def sleep(self):
+        """Block for one sampled delay"""
+        if self.mean_ms <= 0:
+            return
+        delay = self.mean_ms
+        if self.jitter > 0:
+            # Log-normal keeps delays positive and gives a realistic long tail
+            delay *= self._rng.lognormvariate(0.0, self.jitter)
+        time.sleep(delay / 1000.0)
+
+
+class ReplayLLM:
+    """
+    Stand-in for ChatGoogleGenerativeAI
+    Supports `prompt | llm` and `prompt | llm.with_structured_output(Model)`.
+    """
+
+    def __init__(self, fixture: Optional[Dict[str, Any]] = None, latency: Optional[InjectedLatency] = None):
+        self.fixture = fixture or {}
+        self.latency = latency or InjectedLatency()
+        self.calls = 0
+
+    def use(self, fixture: Dict[str, Any]):
+        """Switch to another recorded fixture"""
+        self.fixture = fixture
+
+    def __call__(self, prompt_value: Any) -> AIMessage:
+        self.calls += 1
+        self.latency.sleep()
+        kind = self._resolve_kind(prompt_value)
+        return AIMessage(content=self.fixture.get("text", {}).get(kind, ""))
+
+    def stream(self, prompt_value: Any):
+        """Yield the recorded answer word by word, like a token stream"""
+        message = self(prompt_value)
+        for i, word in enumerate(message.content.split(" ")):
+            yield AIMessage(content=word if i == 0 else f" {word}")
+
+    def with_structured_output(self, schema: Any, **kwargs):
+        """Return a callable that replays the recorded payload for `schema`"""
+        def invoke(prompt_value: Any):
+            self.calls += 1
+            self.latency.sleep()
+            payload = self.fixture.get("structured", {}).get(schema.__name__)
+            if payload is None:
+                raise KeyError(f"No recorded response for {schema.__name__}")
+            return schema.model_validate(payload)
+        return invoke
+
+    def _resolve_kind(self, prompt_value: Any) -> str:
+        messages = prompt_value.to_messages() if hasattr(prompt_value, "to_messages") else []
+        system = messages[0].content if messages else ""
+        for prefix, kind in TEXT_CALL_KINDS.items():
+            if system.startswith(prefix):
+                return kind
+        return "default"
+
+
+class ReplaySearchTool:
+    """Stand-in for WebSearchTool serving recorded Tavily results"""
+
+    def __init__(self, fixture: Optional[Dict[str, Any]] = None, latency: Optional[InjectedLatency] = None):
+        self.fixture = fixture or {}
+        self.latency = latency or InjectedLatency()
+        self.calls = 0
+
+    def use(self, fixture: Dict[str, Any]):
+        """Switch to another recorded fixture"""
+        self.fixture = fixture
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict:
+        """Replay a free-form query"""
+        self.calls += 1
+        self.latency.sleep()
+        results = self.fixture.get("search", {}).get("query", [])
+        return {"results": results[:max_results]}
+
+    def search_workflow(self, activity: str, task_type: str = "workflow") -> List[Dict]:
+        """Replay a workflow/tips/timing search"""
+        self.calls += 1
+        self.latency.sleep()
+        return list(self.fixture.get("search", {}).get(task_type, []))
+
+    def get_reliable_sources(self) -> List[str]:
+        return []
+
+    def format_search_result(self, result: Dict) -> Dict:
+        return result
@@ -0,0 +1,107 @@
+"""
+Shared statistics and reporting helpers for the benchmark scripts
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Linear-interpolated percentile
+
+    Args:
+        samples: Sample values
+        pct: Percentile in [0, 100]
+
+    Returns:
+        Percentile value (0.0 for no samples)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples
+
+    Args:
+        samples_ms: Latencies in milliseconds
+
+    Returns:
+        Dict with count, mean, p50, p95, p99 and max
+    """
+    count = len(samples_ms)
+    return {
+        "count": count,
+        "mean_ms": round(sum(samples_ms) / count, 3) if count else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3) if count else 0.0,
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """
+    Describe the run so results can be compared across commits
+
+    Returns:
+        Dict with git commit, dirty flag, python and platform versions
+    """
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10
+            ).stdout.strip()
+        except Exception:
+            return ""
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def save_report(report: Dict[str, Any], filepath: str) -> str:
+    """Write a benchmark report as JSON"""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return filepath
+
+
+def load_report(filepath: str) -> Dict[str, Any]:
+    """Read a benchmark report written by save_report"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def relative_change(current: float, baseline: float) -> Optional[float]:
+    """Relative change of current vs baseline (None if baseline is zero)"""
+    if not baseline:
+        return None
+    return (current - baseline) / baseline
+
+
+def format_change(change: Optional[float]) -> str:
+    """Render a relative change as a signed percentage"""
+    if change is None:
+        return "n/a"
+    return f"{change * 100:+.1f}%"
@@ -0,0 +1,144 @@
+"""
+Synthetic, deterministic inputs for the micro-benchmarks
+"""
+import random
+from typing import Dict, List
+
+from schemas.agent1_output import UserBioProfile
+from schemas.agent2_output import Task, TaskEvidence, ProTip, TipEvidence
+from schemas.agent3_output import ScheduleItem, RestPeriod, RationaleTiming, AtomicDesign
+from utils.validators import minutes_to_time
+
+DIFFICULTIES = ["low", "medium", "high"]
+DURATIONS = ["PT2M", "PT5M", "PT15M", "PT30M", "PT50M", "PT75M"]
+
+
+def make_profile(chronotype: str = "lark") -> UserBioProfile:
+    """A typical bio profile with two peak windows"""
+    return UserBioProfile(
+        chronotype=chronotype,
+        sleep_time="23:00",
+        wake_time="06:00",
+        meal_times={"breakfast": "07:00", "lunch": "12:00", "dinner": "19:00"},
+        peak_hours=["06:00-08:00", "17:00-19:00"],
+        slump_hours=["13:00-14:00"],
+        fixed_commitments=["09:00-17:00: Work"],
+        energy_tomorrow="high",
+        physical_constraints=[]
+    )
+
+
+def make_tasks(n: int, seed: int = 0) -> List[Task]:
+    """n tasks with mixed difficulty and duration"""
+    rng = random.Random(seed)
+    return [
+        Task(
+            task_id=f"task_{i + 1}",
+            name=f"Task {i + 1}",
+            description=f"Synthetic task number {i + 1}",
+            estimated_duration=rng.choice(DURATIONS),
+            difficulty=DIFFICULTIES[i % 3],
+            evidence=TaskEvidence(
+                source_url="https://example.com/evidence",
+                authority="Benchmark",
+                summary="Synthetic evidence"
+            )
+        )
+        for i in range(n)
+    ]
+
+
+def make_tips(tasks: List[Task]) -> List[ProTip]:
+    """One tip for every other task"""
+    return [
+        ProTip(
+            tip_id=f"tip_{i + 1}",
+            content=f"Tip for {task.task_id}",
+            applies_to_task=task.task_id,
+            evidence=TipEvidence(
+                source_url="https://example.com/tip",
+                study_summary="Synthetic study",
+                applicability="Always"
+            )
+        )
+        for i, task in enumerate(tasks[::2])
+    ]
+
+
+def make_timing_research() -> Dict:
+    """Timing research dict as produced by BioOptimizerAgent._research_biological_timing"""
+    return {
+        "activity": "benchmark",
+        "chronotype": "lark",
+        "timing_results": [{"url": "https://example.com/timing"}],
+        "ultradian_results": [{"url": "https://example.com/ultradian"}],
+    }
+
+
+def make_atomic(n: int) -> List[Dict]:
+    """n atomic task dicts as produced by _break_into_atomic_tasks"""
+    return [
+        {
+            "name": f"Atomic {i + 1}",
+            "description": "Synthetic atomic task",
+            "principle": "make it obvious",
+            "trigger": "Scheduled time at desk",
+            "friction_reduction": "Clear workspace beforehand",
+            "duration": (5, 15, 25, 40)[i % 4]
+        }
+        for i in range(n)
+    ]
+
+
+def make_schedule(n: int) -> List:
+    """n schedule items alternating focus blocks and rest periods"""
+    schedule = []
+    for i in range(n):
+        start = (i * 7) % (24 * 60 - 30)
+        time_range = f"{minutes_to_time(start)}-{minutes_to_time(start + 25)}"
+        if i % 2:
+            schedule.append(RestPeriod(
+                task_id=f"rest_{i}",
+                scheduled_time=time_range,
+                duration_minutes=5,
+                rationale_timing=RationaleTiming(
+                    why_this_time="Pomodoro short break for cognitive recovery",
+                    evidence_url="https://example.com/ultradian",
+                    chronotype_match="all"
+                )
+            ))
+        else:
+            schedule.append(ScheduleItem(
+                task_id=f"atomic_{i}",
+                original_task_ref=f"task_{i}",
+                name=f"Atomic {i}",
+                description="Synthetic atomic task",
+                scheduled_time=time_range,
+                rationale_timing=RationaleTiming(
+                    why_this_time="Peak performance window - optimal for deep work",
+                    evidence_url="https://example.com/timing",
+                    chronotype_match="lark"
+                ),
+                atomic_design=AtomicDesign(
+                    principle="temptation bundling",
+                    trigger="Peak performance window",
+                    friction_reduction="Eliminate all distractions"
+                ),
+                attached_tips=["tip_1"],
+                duration_minutes=25,
+                type="focus"
+            ))
+    return schedule
+
+
+def make_conflict_items(n: int, seed: int = 0) -> List[Dict]:
+    """n editable-schedule dicts with random (partly overlapping) time ranges"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        start = rng.randrange(0, 24 * 60 - 60)
+        items.append({
+            "time": f"{minutes_to_time(start)}-{minutes_to_time(start + rng.choice((5, 15, 25, 50)))}",
+            "task": f"Task {i + 1}"
+        })
+    return items
@@ -1,12 +1,25 @@
 import os
 from dotenv import load_dotenv
-from typing import Dict, Any
+from concurrent.futures import Future
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, Iterator, List, Callable
 
 # Import agents
 from agents.goal_clarifier import GoalClarifierAgent
 from agents.domain_researcher import DomainResearcherAgent
 from agents.bio_optimizer import BioOptimizerAgent
 from agents.json_formatter import JSONFormatterAgent
+from agents.fallback_planner import LocalFallbackPlanner
+from utils.template_store import TemplateStore
+from utils.profile_store import ProfileStore
+from utils.plan_archive import PlanArchive
+from utils.resilience import UpstreamError
+from utils.free_busy import FreeBusyIngestor
+from utils.stage_store import STAGE_MODELS, StageStore
+from utils.scheduling_policy import CompiledPolicy
+from schemas.pipeline_events import PipelineEvent
+from schemas.agent1_output import UserBioProfile
+from schemas.time_types import TimeRange
 
 # Load environment variables
 load_dotenv()
@@ -18,13 +31,32 @@ class AtomicTaskPlanner:
     Runs the complete pipeline: A1 → A2 → A3 → A4
     """
     
-    def __init__(self, use_mock_search: bool = False, model: str = "gemini-2.0-flash-exp"):
+    def __init__(
+        self,
+        use_mock_search: bool = False,
+        model: str = "gemini-2.0-flash-exp",
+        template_store: Optional[TemplateStore] = None,
+        profile_store: Optional[ProfileStore] = None,
+        plan_archive: Optional[PlanArchive] = None,
+        free_busy: Optional[FreeBusyIngestor] = None,
+        stage_store: Optional[StageStore] = None,
+        scheduling_policy: Optional[CompiledPolicy] = None
+    ):
         """
         Initialize ATP system
         
         Args:
             use_mock_search: If True, use mock search for testing
             model: Gemini model to use
+            template_store: Optional A2 template store shared across runs
+            profile_store: Optional store of returning users' profiles
+            plan_archive: Optional append-only archive of every saved plan
+            free_busy: Optional reader of the user's calendar busy time;
+                meetings are removed from A3's slots
+            stage_store: Optional content-addressed store of A1/A2/A3
+                outputs; re-runs reuse every stage whose inputs are unchanged
+            scheduling_policy: Optional A3 chunking/rest/slot policy (None =
+                the ATP_SCHEDULING_POLICY file or the built-in defaults)
         """
         print("🚀 Initializing Atomic Task Planner...")
         
@@ -34,19 +66,378 @@ class AtomicTaskPlanner:
             print("Set it in .env file or as environment variable")
         
         # Initialize agents
-        self.agent_a1 = GoalClarifierAgent(model=model)
+        self.agent_a1 = GoalClarifierAgent(model=model, profile_store=profile_store)
         self.agent_a2 = DomainResearcherAgent(
             model=model,
-            use_mock_search=use_mock_search
+            use_mock_search=use_mock_search,
+            template_store=template_store
         )
         self.agent_a3 = BioOptimizerAgent(
             model=model,
-            use_mock_search=use_mock_search
+            use_mock_search=use_mock_search,
+            policy=scheduling_policy
         )
         self.agent_a4 = JSONFormatterAgent()
+        self.plan_archive = plan_archive
+        self.free_busy = free_busy
+        self.stage_store = stage_store
+        self.fallback_planner = LocalFallbackPlanner(
+            self.agent_a1,
+            self.agent_a3,
+            self.agent_a4,
+            template_store=template_store,
+            activity_index=self.agent_a2.activity_index
+        )
         
         print("✅ All agents initialized successfully")
-    
+
+    def run_pipeline(
+        self,
+        user_request: str,
+        bio_context: Dict[str, Any],
+        speculation: Optional[Future] = None,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None,
+        policy: Optional[CompiledPolicy] = None,
+        fallback: bool = True
+    ):
+        """
+        Run A1 → A4 non-interactively for an already clarified request
+
+        Args:
+            user_request: Original user request
+            bio_context: Collected info as returned by GoalClarifierAgent.chat
+                (goals, all_goals_info and optional bio fields)
+            speculation: Optional A2 research started by start_speculation
+            checkpoint: Stage outputs saved by an earlier attempt ("a1", "a2",
+                "a3"); those stages are skipped, and new outputs are added in place
+            on_checkpoint: Called with checkpoint after each new stage output
+            policy: Scheduling policy for this run only (e.g., the tenant's;
+                None = the planner's)
+            fallback: Switch to run_local_pipeline when Gemini is unavailable
+                (False = raise, for callers that retry, e.g. the batch planner)
+
+        Returns:
+            FinalPlan object (not saved to disk); if Gemini is unavailable, a
+            degraded plan from run_local_pipeline
+
+        Raises:
+            UpstreamError: If Gemini is unavailable and fallback is False
+        """
+        checkpoint = {} if checkpoint is None else checkpoint
+        agent_a3 = self.agent_a3 if policy is None else self.agent_a3.with_policy(policy)
+        try:
+            a1_output = self._run_stage(
+                "a1", (user_request, bio_context, self.agent_a1.remembered_bio(bio_context)),
+                lambda: self.agent_a1.generate_goal_spec(user_request, bio_context),
+                checkpoint, on_checkpoint
+            )
+
+            a2_output = self._run_stage(
+                "a2", (a1_output.clarified_goal,),
+                lambda: self.agent_a2.research_domain(
+                    goal=a1_output.clarified_goal,
+                    bio_context=a1_output.user_bio_profile.model_dump(mode="json"),
+                    speculation=speculation
+                ),
+                checkpoint, on_checkpoint
+            )
+
+            free_slots = self._tomorrow_free_slots(a1_output.user_bio_profile, agent_a3)
+            a3_output = self._run_stage(
+                "a3", (a2_output, a1_output.user_bio_profile, free_slots, agent_a3.policy.fingerprint),
+                lambda: agent_a3.optimize_schedule(
+                    tasks=a2_output.tasks,
+                    tips=a2_output.pro_tips,
+                    bio_profile=a1_output.user_bio_profile,
+                    free_slots=free_slots
+                ),
+                checkpoint, on_checkpoint
+            )
+        except UpstreamError as e:
+            if not fallback:
+                raise
+            print(f"⚠️  {e} - switching to the local fallback pipeline")
+            return self.run_local_pipeline(user_request, bio_context, reason=str(e), policy=policy)
+
+        return self.agent_a4.format_final_plan(
+            optimized_schedule=a3_output.optimized_schedule,
+            bio_insights=a3_output.bio_insights,
+            goal=a1_output.clarified_goal,
+            bio_profile=a1_output.user_bio_profile,
+            user_id=a1_output.user_id
+        )
+
+    def _run_stage(
+        self,
+        stage: str,
+        inputs: tuple,
+        compute: Callable[[], Any],
+        checkpoint: Dict[str, Any],
+        on_checkpoint: Optional[Callable[[Dict[str, Any]], None]]
+    ):
+        """
+        Stage output from the checkpoint, the stage store, or a fresh run
+        
+        Args:
+            stage: "a1", "a2" or "a3"
+            inputs: Everything the stage output depends on (stage store key)
+            compute: Runs the stage
+            checkpoint: This run's checkpoint (updated in place)
+            on_checkpoint: Called with checkpoint after a new output is added
+        
+        Returns:
+            Stage output model
+        """
+        if stage in checkpoint:
+            return STAGE_MODELS[stage].model_validate(checkpoint[stage])
+        
+        output = None
+        if self.stage_store is not None:
+            key = self.stage_store.key(stage, *inputs)
+            output = self.stage_store.get(stage, key)
+        if output is None:
+            output = compute()
+            # Degraded outputs are only good for this run
+            if self.stage_store is not None and not getattr(output, "degraded", False):
+                self.stage_store.put(stage, key, output)
+        
+        checkpoint[stage] = output.model_dump(mode="json")
+        if on_checkpoint is not None:
+            on_checkpoint(checkpoint)
+        return output
+
+    def run_local_pipeline(
+        self,
+        user_request: str,
+        bio_context: Dict[str, Any],
+        reason: str = "",
+        policy: Optional[CompiledPolicy] = None
+    ):
+        """
+        Build a plan without any network call (degraded mode)
+        
+        Goals are used as written, tasks come from the A2 template store or
+        a rule engine, and scheduling uses built-in timing evidence.
+        
+        Args:
+            user_request: Original user request
+            bio_context: Collected info as returned by GoalClarifierAgent.chat
+            reason: Why the fallback is used (stored in the plan metadata)
+            policy: Scheduling policy for this run only (None = the planner's)
+        
+        Returns:
+            FinalPlan object with metadata.degraded set (not saved to disk)
+        """
+        if not bio_context.get("goals") and not bio_context.get("all_goals_info"):
+            bio_context = {**bio_context, "goals": [user_request]}
+        return self.fallback_planner.plan(bio_context, reason=reason or "offline mode", policy=policy)
+
+    def stream_pipeline(
+        self,
+        user_request: str,
+        bio_context: Dict[str, Any],
+        speculation: Optional[Future] = None
+    ) -> Iterator[PipelineEvent]:
+        """
+        Run A1 → A4 like run_pipeline, yielding partial results as they are ready
+        
+        Each stage starts with a "started" event and ends with a "result"
+        event carrying its output; in between come SMART-goal tokens (A1),
+        tasks, tips and warnings (A2) and schedule items as they are placed
+        (A3). The last event is the A4 result with the FinalPlan.
+        
+        Args:
+            user_request: Original user request
+            bio_context: Collected info as returned by GoalClarifierAgent.chat
+            speculation: Optional A2 research started by start_speculation
+        
+        Yields:
+            PipelineEvent objects in pipeline order
+        """
+        yield PipelineEvent(stage="a1", type="started")
+        for event in self.agent_a1.generate_goal_spec_stream(user_request, bio_context):
+            yield event
+        a1_output = event.data
+        
+        yield PipelineEvent(stage="a2", type="started")
+        for event in self.agent_a2.research_domain_stream(
+            goal=a1_output.clarified_goal,
+            bio_context=a1_output.user_bio_profile.model_dump(mode="json"),
+            speculation=speculation
+        ):
+            yield event
+        a2_output = event.data
+        
+        yield PipelineEvent(stage="a3", type="started")
+        for event in self.agent_a3.optimize_schedule_stream(
+            tasks=a2_output.tasks,
+            tips=a2_output.pro_tips,
+            bio_profile=a1_output.user_bio_profile,
+            free_slots=self._tomorrow_free_slots(a1_output.user_bio_profile)
+        ):
+            yield event
+        a3_output = event.data
+        
+        yield PipelineEvent(stage="a4", type="started")
+        yield PipelineEvent(stage="a4", type="result", data=self.agent_a4.format_final_plan(
+            optimized_schedule=a3_output.optimized_schedule,
+            bio_insights=a3_output.bio_insights,
+            goal=a1_output.clarified_goal,
+            bio_profile=a1_output.user_bio_profile,
+            user_id=a1_output.user_id
+        ))
+
+    def _calendar_free_slots(
+        self,
+        bio_profile: UserBioProfile,
+        days: List[date],
+        agent_a3: Optional[BioOptimizerAgent] = None
+    ) -> Optional[Dict[date, List[TimeRange]]]:
+        """
+        Per-day free-time index from the calendar (one free/busy read for all days)
+        
+        Args:
+            bio_profile: Profile whose slots are intersected with free time
+            days: Days to plan
+            agent_a3: A3 agent whose policy gives the slots (None = the planner's)
+        
+        Returns:
+            Dict of day → free slots, or None without a calendar
+        """
+        if self.free_busy is None:
+            return None
+        agent_a3 = agent_a3 or self.agent_a3
+        return self.free_busy.free_slots(days, agent_a3._get_available_time_slots(bio_profile))
+
+    def _tomorrow_free_slots(
+        self,
+        bio_profile: UserBioProfile,
+        agent_a3: Optional[BioOptimizerAgent] = None
+    ) -> Optional[List[TimeRange]]:
+        """Free slots for tomorrow's plan, or None without a calendar"""
+        tomorrow = date.today() + timedelta(days=1)
+        free_slots = self._calendar_free_slots(bio_profile, [tomorrow], agent_a3)
+        return None if free_slots is None else free_slots[tomorrow]
+
+    def start_speculation(self) -> Optional[Future]:
+        """
+        Start A2 research for the goals A1 has broken out so far
+        
+        Runs in the background while the user answers the remaining
+        clarification questions. A2 keeps the result if the final goal maps
+        to the same activity and discards it otherwise.
+        
+        Returns:
+            Future to pass to run_pipeline/stream_pipeline, or None if A1 has
+            no goals yet
+        """
+        goal = self.agent_a1.provisional_goal()
+        if goal is None:
+            return None
+        return self.agent_a2.speculate(goal)
+
+    def run_horizon_pipeline(self, user_request: str, bio_context: Dict[str, Any], days: int = 7):
+        """
+        Run A1 → A4 once and plan the goal over several days
+        
+        Args:
+            user_request: Original user request
+            bio_context: Collected info as returned by GoalClarifierAgent.chat
+            days: Number of days to plan, starting tomorrow
+        
+        Returns:
+            PlanHorizon object (not saved to disk)
+        """
+        a1_output = self.agent_a1.generate_goal_spec(user_request, bio_context)
+        
+        a2_output = self.agent_a2.research_domain(
+            goal=a1_output.clarified_goal,
+            bio_context=a1_output.user_bio_profile.model_dump(mode="json")
+        )
+        
+        start_date = date.today() + timedelta(days=1)
+        horizon = self.agent_a3.optimize_horizon(
+            tasks=a2_output.tasks,
+            tips=a2_output.pro_tips,
+            bio_profile=a1_output.user_bio_profile,
+            days=days,
+            start_date=start_date,
+            free_slots=self._calendar_free_slots(
+                a1_output.user_bio_profile,
+                [start_date + timedelta(days=offset) for offset in range(days)]
+            )
+        )
+        
+        return self.agent_a4.format_horizon(
+            horizon=horizon,
+            goal=a1_output.clarified_goal,
+            bio_profile=a1_output.user_bio_profile,
+            user_id=a1_output.user_id
+        )
+
+    def _render_event(self, event: PipelineEvent, bio_context: Dict[str, Any]):
+        """
+        Print one streaming pipeline event for the interactive terminal UI
+        
+        Args:
+            event: Event from stream_pipeline
+            bio_context: Info collected by A1 (for the goal list)
+        """
+        headers = {
+            "a1": None,
+            "a2": "[A2] DOMAIN RESEARCHER - Tìm kiếm workflow và tips",
+            "a3": "[A3] BIO-OPTIMIZER - Tối ưu sinh học và lịch trình",
+            "a4": "[A4] JSON FORMATTER - Tạo file kế hoạch",
+        }
+        
+        if event.type == "started":
+            if headers[event.stage]:
+                print("\n" + "="*60)
+                print(headers[event.stage])
+                print("="*60)
+            if event.stage == "a1":
+                print("\n🎯 Mục tiêu SMART: ", end="", flush=True)
+            elif event.stage == "a2":
+                print("\nĐang nghiên cứu...")
+            elif event.stage == "a3":
+                print("\nĐang tối ưu lịch trình...\n")
+        elif event.type == "token":
+            print(event.data, end="", flush=True)
+        elif event.type == "task":
+            print(f"   📋 {event.data.name} ({event.data.estimated_duration}, {event.data.difficulty})")
+        elif event.type == "tip":
+            print(f"   💡 {event.data.content}")
+        elif event.type == "warning":
+            print(f"   ⚠️  {event.data}")
+        elif event.type in ("schedule_item", "rest"):
+            icon = "☕" if event.type == "rest" else "⏱️ "
+            print(f"   {icon} {event.data.scheduled_time}  {event.data.name}")
+        elif event.type == "result" and event.stage == "a1":
+            a1_output = event.data
+            print()
+            goals_list = bio_context.get('goals', [])
+            if len(goals_list) > 1:
+                print(f"\n📌 Đã làm rõ {len(goals_list)} mục tiêu:")
+                for i, goal in enumerate(goals_list, 1):
+                    print(f"   {i}. {goal}")
+            print(f"\n🧬 Chronotype: {a1_output.user_bio_profile.chronotype}")
+            print(f"⏰ Peak hours: {', '.join(str(p) for p in a1_output.user_bio_profile.peak_hours)}")
+            print(f"⚡ Energy: {a1_output.user_bio_profile.energy_tomorrow}")
+        elif event.type == "result" and event.stage == "a2":
+            a2_output = event.data
+            print(f"\n📚 Domain: {a2_output.domain}")
+            print(f"📋 Tasks: {len(a2_output.tasks)} tasks")
+            print(f"💡 Tips: {len(a2_output.pro_tips)} pro tips")
+        elif event.type == "insights":
+            print(f"\n⏱️  Focus time: {event.data.total_focus_time}")
+            print(f"☕ Rest time: {event.data.total_rest_time}")
+            print(f"🎯 Match score: {event.data.energy_curve_match}")
+            if event.data.warning:
+                print(f"\n⚠️  {event.data.warning}")
+        elif event.type == "result" and event.stage == "a3":
+            print(f"📅 Scheduled items: {len(event.data.optimized_schedule)}")
+
     def run_interactive_mode(self):
         """
         Run ATP in interactive mode - collects user info through conversation
@@ -73,17 +464,37 @@ class AtomicTaskPlanner:
         
         # Reset agent for new conversation
         self.agent_a1.reset()
+        if self.agent_a1.profile_store is not None:
+            user_id = input("🪪 Tên người dùng (Enter để bỏ qua): ").strip()
+            self.agent_a1.set_user(user_id)
         
         bio_context = {}
         conversation_complete = False
+        speculation = None
         
         while not conversation_complete:
-            result = self.agent_a1.chat(user_request, bio_context)
+            # Coach replies written by the LLM are printed as they stream in
+            streamed = []
+            
+            def print_token(text: str):
+                if not streamed:
+                    print("\n🤖 Coach: ", end="", flush=True)
+                streamed.append(text)
+                print(text, end="", flush=True)
+            
+            result = self.agent_a1.chat(user_request, bio_context, on_token=print_token)
             
             # IMPORTANT: Update bio_context with collected info from this turn
             bio_context = result['collected_info']
             
-            print(f"\n🤖 Coach: {result['response']}")
+            # Goals are known after the first turn: research them while the user answers
+            if speculation is None:
+                speculation = self.start_speculation()
+            
+            if streamed:
+                print()
+            else:
+                print(f"\n🤖 Coach: {result['response']}")
             
             if result['context_complete']:
                 conversation_complete = True
@@ -100,75 +511,20 @@ class AtomicTaskPlanner:
             print("❌ Không có đủ thông tin. Vui lòng bắt đầu lại.")
             return
         
-        print("\nĐang tạo mục tiêu SMART...")
-        a1_output = self.agent_a1.generate_goal_spec(user_request, bio_context)
-        
-        # Display results
-        goals_list = bio_context.get('goals', [])
-        if len(goals_list) > 1:
-            print(f"\n📌 Đã làm rõ {len(goals_list)} mục tiêu:")
-            for i, goal in enumerate(goals_list, 1):
-                print(f"   {i}. {goal}")
-        print(f"\n🎯 Mục tiêu SMART: {a1_output.clarified_goal}")
-        print(f"\n🧬 Chronotype: {a1_output.user_bio_profile.chronotype}")
-        print(f"⏰ Peak hours: {', '.join(a1_output.user_bio_profile.peak_hours)}")
-        print(f"⚡ Energy: {a1_output.user_bio_profile.energy_tomorrow}")
-        
-        # Run Agent A2: Domain Researcher
-        print("\n" + "="*60)
-        print("[A2] DOMAIN RESEARCHER - Tìm kiếm workflow và tips")
-        print("="*60)
-        print("\nĐang nghiên cứu...")
-        
-        a2_output = self.agent_a2.research_domain(
-            goal=a1_output.clarified_goal,
-            bio_context=a1_output.user_bio_profile.dict()
-        )
-        
-        print(f"\n📚 Domain: {a2_output.domain}")
-        print(f"📋 Tasks: {len(a2_output.tasks)} tasks")
-        print(f"💡 Tips: {len(a2_output.pro_tips)} pro tips")
-        
-        if a2_output.warnings:
-            print(f"\n⚠️  Warnings:")
-            for warning in a2_output.warnings:
-                print(f"   - {warning}")
-        
-        # Run Agent A3: Bio-Optimizer
-        print("\n" + "="*60)
-        print("[A3] BIO-OPTIMIZER - Tối ưu sinh học và lịch trình")
-        print("="*60)
-        print("\nĐang tối ưu lịch trình...")
-        
-        a3_output = self.agent_a3.optimize_schedule(
-            tasks=a2_output.tasks,
-            tips=a2_output.pro_tips,
-            bio_profile=a1_output.user_bio_profile
-        )
-        
-        print(f"\n📅 Scheduled items: {len(a3_output.optimized_schedule)}")
-        print(f"⏱️  Focus time: {a3_output.bio_insights.total_focus_time}")
-        print(f"☕ Rest time: {a3_output.bio_insights.total_rest_time}")
-        print(f"🎯 Match score: {a3_output.bio_insights.energy_curve_match}")
-        
-        if a3_output.bio_insights.warning:
-            print(f"\n⚠️  {a3_output.bio_insights.warning}")
-        
-        # Run Agent A4: JSON Formatter
-        print("\n" + "="*60)
-        print("[A4] JSON FORMATTER - Tạo file kế hoạch")
-        print("="*60)
-        
-        final_plan = self.agent_a4.format_final_plan(
-            optimized_schedule=a3_output.optimized_schedule,
-            bio_insights=a3_output.bio_insights,
-            goal=a1_output.clarified_goal,
-            bio_profile=a1_output.user_bio_profile
-        )
+        # Run A1 (SMART goal) → A4, printing partial results as they arrive
+        try:
+            for event in self.stream_pipeline(user_request, bio_context, speculation=speculation):
+                self._render_event(event, bio_context)
+            final_plan = event.data
+        except UpstreamError as e:
+            print(f"\n⚠️  Dịch vụ AI không khả dụng ({e}) - dùng kế hoạch dự phòng offline")
+            final_plan = self.run_local_pipeline(user_request, bio_context, reason=str(e))
         
         # Save to file
         output_path = "output/tomorrow_plan.json"
         self.agent_a4.save_to_file(final_plan, output_path)
+        if self.plan_archive is not None:
+            self.plan_archive.append(final_plan)
         
         # Generate markdown summary
         summary = self.agent_a4.generate_summary_markdown(final_plan)
@@ -192,6 +548,20 @@ class AtomicTaskPlanner:
         return final_plan
 
 
+def calendar_free_busy() -> Optional[FreeBusyIngestor]:
+    """
+    Free/busy reader for the signed-in Google Calendar user
+    
+    Returns:
+        FreeBusyIngestor, or None when no calendar token exists yet (the
+        first sign-in happens in standalone/calendar_sync.py)
+    """
+    from standalone.calendar_sync import CalendarSyncTool, GOOGLE_CALENDAR_AVAILABLE
+    if not GOOGLE_CALENDAR_AVAILABLE or not os.path.exists(CalendarSyncTool.TOKEN_FILE):
+        return None
+    return CalendarSyncTool().free_busy()
+
+
 def main():
     """Main entry point"""
     print("""
@@ -208,7 +578,10 @@ def main():
     # Initialize ATP
     atp = AtomicTaskPlanner(
         use_mock_search=False,  # Set to True for testing without Tavily API
-        model="gemini-2.5-flash-lite"  # Using Gemini 2.5 Flash Lite
+        model="gemini-2.5-flash-lite",  # Using Gemini 2.5 Flash Lite
+        profile_store=ProfileStore(os.getenv("ATP_PROFILE_DB", "output/profiles.db")),
+        plan_archive=PlanArchive(os.getenv("ATP_PLAN_ARCHIVE", "output/plans.db")),
+        free_busy=calendar_free_busy()
     )
     
     # Run interactive mode
@@ -2,11 +2,20 @@
 from .agent1_output import GoalClarifierOutput
 from .agent2_output import DomainResearcherOutput
 from .agent3_output import BioOptimizerOutput
-from .final_plan import FinalPlan
+from .final_plan import FinalPlan, PlanHorizon
+from .time_types import TimeOfDay, TimeRange
+from .compact_schedule import CompactSchedule, RecordPool
+from .pipeline_events import PipelineEvent
 
 __all__ = [
     "GoalClarifierOutput",
     "DomainResearcherOutput",
     "BioOptimizerOutput",
     "FinalPlan",
+    "PlanHorizon",
+    "TimeOfDay",
+    "TimeRange",
+    "CompactSchedule",
+    "RecordPool",
+    "PipelineEvent",
 ]
\ No newline at end of file
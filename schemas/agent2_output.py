@@ -34,4 +34,5 @@ class DomainResearcherOutput(BaseModel):
     domain: str = Field(description="Domain/activity name")
     tasks: List[Task] = Field(description="List of tasks with evidence")
     pro_tips: List[ProTip] = Field(description="List of professional tips")
-    warnings: List[str] = Field(default_factory=list, description="Common pitfalls to avoid")
\ No newline at end of file
+    warnings: List[str] = Field(default_factory=list, description="Common pitfalls to avoid")
+    degraded: bool = Field(default=False, description="True if a search or LLM call fell back to degraded mode (never cached)")
\ No newline at end of file
@@ -1,14 +1,20 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date
+from typing import List, Dict, Any, Union
+from .time_types import TimeRange
 
 class RationaleTiming(BaseModel):
-    """Rationale for timing assignment"""
+    """Rationale for timing assignment (immutable, shared between items)"""
+    model_config = ConfigDict(frozen=True)
+
     why_this_time: str = Field(description="Why this time was chosen")
     evidence_url: str = Field(description="URL of supporting evidence")
     chronotype_match: str = Field(description="lark|owl|intermediate")
 
 class AtomicDesign(BaseModel):
-    """Atomic habits design principles"""
+    """Atomic habits design principles (immutable, shared between items)"""
+    model_config = ConfigDict(frozen=True)
+
     principle: str = Field(description="Atomic habit principle applied")
     trigger: str = Field(description="Trigger for the habit")
     friction_reduction: str = Field(description="How friction is reduced")
@@ -19,7 +25,7 @@ class ScheduleItem(BaseModel):
     original_task_ref: str = Field(default="", description="Reference to original task")
     name: str = Field(description="Task name")
     description: str = Field(description="Task description")
-    scheduled_time: str = Field(description="Scheduled time range (HH:MM-HH:MM)")
+    scheduled_time: TimeRange = Field(description="Scheduled time range (HH:MM-HH:MM)")
     rationale_timing: RationaleTiming = Field(description="Timing rationale")
     atomic_design: AtomicDesign = Field(description="Atomic habit design")
     attached_tips: List[str] = Field(default_factory=list, description="Tip IDs attached")
@@ -31,7 +37,7 @@ class RestPeriod(BaseModel):
     task_id: str = Field(description="Unique identifier")
     name: str = Field(default="Rest period")
     description: str = Field(default="Rest and recovery")
-    scheduled_time: str = Field(description="Scheduled time range")
+    scheduled_time: TimeRange = Field(description="Scheduled time range")
     duration_minutes: int = Field(description="Duration in minutes")
     type: str = Field(default="rest")
     rationale_timing: RationaleTiming = Field(description="Why rest is needed here")
@@ -45,5 +51,19 @@ class BioInsights(BaseModel):
 
 class BioOptimizerOutput(BaseModel):
     """Output from Bio-Optimizer Agent (A3)"""
-    optimized_schedule: List[ScheduleItem] = Field(description="List of scheduled tasks and rest periods")
-    bio_insights: BioInsights = Field(description="Insights about the schedule")
\ No newline at end of file
+    optimized_schedule: List[Union[ScheduleItem, RestPeriod]] = Field(description="List of scheduled tasks and rest periods")
+    bio_insights: BioInsights = Field(description="Insights about the schedule")
+
+class DayPlan(BaseModel):
+    """One day of a multi-day horizon"""
+    day: date = Field(description="Calendar date (YYYY-MM-DD)")
+    optimized_schedule: List[Union[ScheduleItem, RestPeriod]] = Field(description="Scheduled tasks and rest periods for this day")
+    bio_insights: BioInsights = Field(description="Insights about this day")
+    focus_budget: int = Field(description="Focus minutes allowed after carried fatigue")
+    carried_fatigue: int = Field(default=0, description="Fatigue (focus-minute equivalent) carried in from the previous day")
+
+class MultiDayOptimizerOutput(BaseModel):
+    """Output from Bio-Optimizer Agent (A3) over several days"""
+    start_date: date = Field(description="First day of the horizon")
+    days: List[DayPlan] = Field(description="One plan per day")
+    unscheduled_task_refs: List[str] = Field(default_factory=list, description="Tasks that did not fit in the horizon")
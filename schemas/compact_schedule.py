@@ -0,0 +1,279 @@
+"""
+Memory-lean schedule representation for batch runs
+Rationale/design records are interned once in a RecordPool and referenced by
+id; the per-item fields live in array-backed columns. Full pydantic models are
+only materialized when a schedule is serialized or handed to A4.
+"""
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .agent3_output import AtomicDesign, RationaleTiming, RestPeriod, ScheduleItem
+from .time_types import TimeRange
+
+KINDS = ("focus", "rest", "meal", "commute")
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_NO_DESIGN = -1
+_NO_TIPS: Tuple[str, ...] = ()
+
+# Distinct records kept by SHARED_RECORDS (least recently used evicted first)
+SHARED_RECORDS_LIMIT = 4096
+
+Record = Union[RationaleTiming, AtomicDesign]
+
+
+class RecordPool:
+    """
+    Interning table for the immutable records shared by schedule items
+    An unbounded pool keeps every record, so its ids stay valid for the pool's
+    lifetime (each CompactSchedule owns one by default). A bounded pool is an
+    LRU cache: ids of evicted records become invalid, so use it for
+    rationale()/design() only.
+    """
+
+    def __init__(self, max_records: Optional[int] = None):
+        """
+        Initialize record pool
+
+        Args:
+            max_records: Distinct records to keep (None = unbounded)
+        """
+        self.max_records = max_records
+        self._records: Dict[int, Record] = {}
+        self._ids: "OrderedDict[tuple, int]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(record: Record) -> tuple:
+        if isinstance(record, RationaleTiming):
+            return ("rationale", record.why_this_time, record.evidence_url, record.chronotype_match)
+        return ("design", record.principle, record.trigger, record.friction_reduction)
+
+    def _lookup(self, key: tuple, factory) -> Tuple[int, Record]:
+        record_id = self._ids.get(key)
+        if record_id is not None and self.max_records is None:
+            return record_id, self._records[record_id]
+        with self._lock:
+            record_id = self._ids.get(key)
+            if record_id is None:
+                record_id = self._next_id
+                self._next_id += 1
+                self._records[record_id] = factory()
+                self._ids[key] = record_id
+                if self.max_records is not None and len(self._ids) > self.max_records:
+                    _, evicted = self._ids.popitem(last=False)
+                    del self._records[evicted]
+            elif self.max_records is not None:
+                self._ids.move_to_end(key)
+            return record_id, self._records[record_id]
+
+    def rationale(self, why_this_time: str, evidence_url: str, chronotype_match: str) -> RationaleTiming:
+        """Return the shared RationaleTiming for these fields, creating it once"""
+        return self._lookup(
+            ("rationale", why_this_time, evidence_url, chronotype_match),
+            lambda: RationaleTiming(
+                why_this_time=why_this_time,
+                evidence_url=evidence_url,
+                chronotype_match=chronotype_match
+            )
+        )[1]
+
+    def design(self, principle: str, trigger: str, friction_reduction: str) -> AtomicDesign:
+        """Return the shared AtomicDesign for these fields, creating it once"""
+        return self._lookup(
+            ("design", principle, trigger, friction_reduction),
+            lambda: AtomicDesign(
+                principle=principle,
+                trigger=trigger,
+                friction_reduction=friction_reduction
+            )
+        )[1]
+
+    def intern(self, record: Record) -> int:
+        """Return the id of an equal pooled record, adding it if new"""
+        return self._lookup(self._key(record), lambda: record)[0]
+
+    def get(self, record_id: int) -> Record:
+        """Return the record with this id (KeyError once a bounded pool evicted it)"""
+        return self._records[record_id]
+
+    def clear(self):
+        """Drop all pooled records (schedules built on this pool become invalid)"""
+        with self._lock:
+            self._records.clear()
+            self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+# Process-wide LRU cache so A3 builds one record object per distinct
+# rationale/design across every plan in a batch, without growing forever
+SHARED_RECORDS = RecordPool(max_records=SHARED_RECORDS_LIMIT)
+
+
+class CompactSchedule:
+    """
+    Column-oriented schedule: one row per ScheduleItem/RestPeriod
+    Times, durations, kinds and record ids are stored in typed arrays; strings
+    are interned so repeated names and descriptions are stored once.
+    """
+
+    __slots__ = (
+        "pool", "task_ids", "refs", "names", "descriptions", "tips",
+        "starts", "ends", "durations", "kinds", "rationale_ids", "design_ids",
+    )
+
+    def __init__(self, pool: Optional[RecordPool] = None):
+        self.pool = pool if pool is not None else RecordPool()
+        self.task_ids: List[str] = []
+        self.refs: List[str] = []
+        self.names: List[str] = []
+        self.descriptions: List[str] = []
+        self.tips: List[Tuple[str, ...]] = []
+        self.starts = array("H")
+        self.ends = array("H")
+        self.durations = array("H")
+        self.kinds = array("B")
+        self.rationale_ids = array("i")
+        self.design_ids = array("i")
+
+    @classmethod
+    def from_items(
+        cls,
+        items: Iterable[Union[ScheduleItem, RestPeriod]],
+        pool: Optional[RecordPool] = None
+    ) -> "CompactSchedule":
+        """
+        Build a compact schedule from A3 items
+
+        Args:
+            items: ScheduleItem / RestPeriod objects
+            pool: Unbounded record pool to intern into, e.g. one per batch run
+                (default: a new pool owned by this schedule)
+
+        Returns:
+            CompactSchedule object
+        """
+        schedule = cls(pool)
+        for item in items:
+            schedule.append(item)
+        return schedule
+
+    def append(self, item: Union[ScheduleItem, RestPeriod]):
+        """Add one item as a row"""
+        design = getattr(item, "atomic_design", None)
+        self.append_row(
+            task_id=item.task_id,
+            original_task_ref=getattr(item, "original_task_ref", ""),
+            name=item.name,
+            description=item.description,
+            scheduled_time=item.scheduled_time,
+            duration_minutes=item.duration_minutes,
+            kind=item.type,
+            rationale_id=self.pool.intern(item.rationale_timing),
+            design_id=self.pool.intern(design) if design is not None else _NO_DESIGN,
+            attached_tips=getattr(item, "attached_tips", ()),
+        )
+
+    def append_row(
+        self,
+        task_id: str,
+        original_task_ref: str,
+        name: str,
+        description: str,
+        scheduled_time: TimeRange,
+        duration_minutes: int,
+        kind: str,
+        rationale_id: int,
+        design_id: int = _NO_DESIGN,
+        attached_tips: Iterable[str] = ()
+    ):
+        """Add one row from raw fields (record ids must come from self.pool)"""
+        self.task_ids.append(task_id)
+        self.refs.append(sys.intern(original_task_ref))
+        self.names.append(sys.intern(name))
+        self.descriptions.append(sys.intern(description))
+        self.tips.append(tuple(attached_tips) or _NO_TIPS)
+        self.starts.append(scheduled_time.start)
+        self.ends.append(scheduled_time.end)
+        self.durations.append(duration_minutes)
+        self.kinds.append(_KIND_CODES[kind])
+        self.rationale_ids.append(rationale_id)
+        self.design_ids.append(design_id)
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def _materialize_row(self, i: int) -> Union[ScheduleItem, RestPeriod]:
+        kind = KINDS[self.kinds[i]]
+        design_id = self.design_ids[i]
+        scheduled_time = TimeRange(self.starts[i], self.ends[i])
+        rationale = self.pool.get(self.rationale_ids[i])
+        if design_id == _NO_DESIGN:
+            # Stored data was validated on the way in; skip re-validation
+            return RestPeriod.model_construct(
+                task_id=self.task_ids[i],
+                name=self.names[i],
+                description=self.descriptions[i],
+                scheduled_time=scheduled_time,
+                duration_minutes=self.durations[i],
+                type=kind,
+                rationale_timing=rationale
+            )
+        return ScheduleItem.model_construct(
+            task_id=self.task_ids[i],
+            original_task_ref=self.refs[i],
+            name=self.names[i],
+            description=self.descriptions[i],
+            scheduled_time=scheduled_time,
+            rationale_timing=rationale,
+            atomic_design=self.pool.get(design_id),
+            attached_tips=list(self.tips[i]),
+            duration_minutes=self.durations[i],
+            type=kind
+        )
+
+    def materialize(self) -> List[Union[ScheduleItem, RestPeriod]]:
+        """
+        Expand rows back into pydantic models
+
+        Returns:
+            List of ScheduleItem / RestPeriod objects sharing pooled records
+        """
+        return [self._materialize_row(i) for i in range(len(self))]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Render rows as JSON-ready dicts without building item models
+
+        Returns:
+            List of dicts matching ScheduleItem/RestPeriod.model_dump(mode="json")
+        """
+        record_dicts: Dict[int, Dict[str, str]] = {}
+
+        def record(record_id: int) -> Dict[str, str]:
+            if record_id not in record_dicts:
+                record_dicts[record_id] = self.pool.get(record_id).model_dump()
+            return record_dicts[record_id]
+
+        rows = []
+        for i in range(len(self)):
+            row = {
+                "task_id": self.task_ids[i],
+                "name": self.names[i],
+                "description": self.descriptions[i],
+                "scheduled_time": str(TimeRange(self.starts[i], self.ends[i])),
+                "duration_minutes": self.durations[i],
+                "type": KINDS[self.kinds[i]],
+                "rationale_timing": record(self.rationale_ids[i]),
+            }
+            if self.design_ids[i] != _NO_DESIGN:
+                row["original_task_ref"] = self.refs[i]
+                row["atomic_design"] = record(self.design_ids[i])
+                row["attached_tips"] = list(self.tips[i])
+            rows.append(row)
+        return rows
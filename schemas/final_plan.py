@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
 from datetime import datetime
+from .time_types import TimeRange
 
 class EditableFields(BaseModel):
     """Fields that user can edit"""
-    time: str = Field(description="Scheduled time range")
+    time: TimeRange = Field(description="Scheduled time range")
     duration: int = Field(description="Duration in minutes")
     can_move: bool = Field(default=True, description="Can move this item")
     can_delete: bool = Field(default=True, description="Can delete this item")
@@ -13,19 +14,21 @@ class EditableFields(BaseModel):
 class EditableScheduleItem(BaseModel):
     """Editable schedule item for user review"""
     id: str = Field(description="Unique identifier")
-    time: str = Field(description="Scheduled time range (HH:MM-HH:MM)")
+    time: TimeRange = Field(description="Scheduled time range (HH:MM-HH:MM)")
     task: str = Field(description="Task name")
     evidence: str = Field(description="Evidence for this task")
     tips: List[str] = Field(default_factory=list, description="Tips attached")
     editable_fields: EditableFields = Field(description="Editable fields configuration")
+    status: str = Field(default="planned", description="planned|done")
 
 class RestPeriodEditable(BaseModel):
     """Editable rest period"""
-    time: str = Field(description="Scheduled time range")
+    time: TimeRange = Field(description="Scheduled time range")
     type: str = Field(default="mandatory_break")
     rationale: str = Field(description="Why this rest is needed")
     can_remove: bool = Field(default=False)
     can_extend: bool = Field(default=True)
+    extended_minutes: int = Field(default=0, description="Minutes the user added to this rest")
 
 class UserContextSummary(BaseModel):
     """Summary of user context"""
@@ -39,6 +42,9 @@ class Metadata(BaseModel):
     goal: str = Field(description="The goal")
     user_id: str = Field(default="anonymous")
     version: str = Field(default="1.0")
+    plan_date: str = Field(default="", description="Day the plan is for (YYYY-MM-DD); empty means tomorrow")
+    degraded: bool = Field(default=False, description="True if built offline by the local fallback pipeline")
+    degraded_reason: str = Field(default="", description="Why the local fallback was used")
 
 class FinalPlan(BaseModel):
     """Final plan output from JSON Formatter (A4)"""
@@ -46,4 +52,11 @@ class FinalPlan(BaseModel):
     user_context_summary: UserContextSummary = Field(description="User context summary")
     editable_schedule: List[EditableScheduleItem] = Field(description="Editable schedule items")
     rest_periods: List[RestPeriodEditable] = Field(description="Rest periods")
-    calendar_ready: bool = Field(default=False, description="True after user approval")
\ No newline at end of file
+    calendar_ready: bool = Field(default=False, description="True after user approval")
+
+class PlanHorizon(BaseModel):
+    """Several daily plans produced from one pipeline run"""
+    goal: str = Field(description="The goal")
+    plans: List[FinalPlan] = Field(description="One plan per day, in date order")
+    unscheduled_task_refs: List[str] = Field(default_factory=list, description="Tasks that did not fit in the horizon")
+    calendar_ready: bool = Field(default=False, description="True after user approval")
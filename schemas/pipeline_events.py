@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import Any, Iterable
+
+# Stages in pipeline order
+STAGES = ("a1", "a2", "a3", "a4")
+
+# started: stage began | token: LLM text chunk | task/tip/warning: A2 partial
+# result | schedule_item/rest: A3 placement | insights: A3 totals |
+# result: the stage's complete output (last event of every stage)
+EVENT_TYPES = ("started", "token", "task", "tip", "warning", "schedule_item", "rest", "insights", "result")
+
+
+class PipelineEvent(BaseModel):
+    """One progressive update from a streaming pipeline run"""
+    stage: str = Field(description="a1|a2|a3|a4")
+    type: str = Field(description="One of EVENT_TYPES")
+    data: Any = Field(default=None, description="Partial result (token text, Task, ScheduleItem, ...) or stage output")
+
+    def to_json(self) -> str:
+        """One JSON line for NDJSON/SSE clients"""
+        return self.model_dump_json()
+
+
+def stage_result(events: Iterable[PipelineEvent]) -> Any:
+    """
+    Drain an event stream and return the output of its last stage
+
+    Args:
+        events: Events from a *_stream method
+
+    Returns:
+        Data of the last "result" event (None if there was none)
+    """
+    result = None
+    for event in events:
+        if event.type == "result":
+            result = event.data
+    return result
@@ -0,0 +1,375 @@
+"""
+Compiled time types for schedules
+"HH:MM" and "HH:MM-HH:MM" strings are parsed once at the schema boundary into
+minutes since midnight, compared as integers, and rendered back to strings only
+when serialized to JSON. A range pinned to a date or timezone is written as
+{"start", "end", "day", "tz"} instead, so the pin survives a round-trip. ISO 8601 durations ("PT1H30M") are read as minutes by
+parse_duration.
+"""
+import math
+import re
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+from typing import Any, Optional, Tuple, Union
+
+import pytz
+from pydantic_core import core_schema
+
+MINUTES_PER_DAY = 24 * 60
+
+_TIME_PATTERN = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*$")
+_RANGE_PATTERN = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+
+# ISO 8601 duration with fixed-length units only (weeks, days, hours,
+# minutes, seconds; years and months vary in length); the last component
+# may have a fraction
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_DURATION_PATTERN = re.compile(
+    rf"^P(?!$)(?:{_NUMBER}W)?(?:{_NUMBER}D)?(?:T(?=\d)(?:{_NUMBER}H)?(?:{_NUMBER}M)?(?:{_NUMBER}S)?)?$"
+)
+_DURATION_SECONDS = (7 * 86400, 86400, 3600, 60, 1)
+
+# Lenient mode: "P30M"/"P1H" without the T, and free text ("1 hour", "1.5 giờ",
+# "2 tiếng", "45 phút", "30 min", "90 s")
+_MISSING_T = re.compile(r"^(P(?:\d+(?:[.,]\d+)?[WD])*)(?=\d+(?:[.,]\d+)?[HMS])")
+_DURATION_TEXT = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*(h|hr|hrs|hour|hours|giờ|tiếng|m|min|mins|minute|minutes|phút|s|sec|secs|second|seconds|giây)\b"
+)
+_TEXT_UNIT_SECONDS = {
+    **dict.fromkeys(("h", "hr", "hrs", "hour", "hours", "giờ", "tiếng"), 3600),
+    **dict.fromkeys(("m", "min", "mins", "minute", "minutes", "phút"), 60),
+    **dict.fromkeys(("s", "sec", "secs", "second", "seconds", "giây"), 1),
+}
+
+
+class TimeParseError(ValueError):
+    """Raised when a time or time range string is malformed"""
+
+
+class DurationParseError(ValueError):
+    """Raised when a duration cannot be read"""
+
+
+def _to_minutes(hours: str, minutes: str, raw: Any) -> int:
+    h, m = int(hours), int(minutes)
+    if m > 59 or h > 24 or (h == 24 and m):
+        raise TimeParseError(f"Invalid time: {raw!r}")
+    return h * 60 + m
+
+
+def parse_minutes(value: Any) -> int:
+    """
+    Parse "HH:MM" into minutes since midnight
+
+    Args:
+        value: Time string, or an int already in minutes
+
+    Returns:
+        Minutes since midnight (0-1440)
+
+    Raises:
+        TimeParseError: If the value is not a valid time
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        if not 0 <= value <= MINUTES_PER_DAY:
+            raise TimeParseError(f"Minutes must be within 0-{MINUTES_PER_DAY}, got {value!r}")
+        return int(value)
+    match = _TIME_PATTERN.match(value) if isinstance(value, str) else None
+    if not match:
+        raise TimeParseError(f"Expected HH:MM, got {value!r}")
+    return _to_minutes(match.group(1), match.group(2), value)
+
+
+def format_minutes(minutes: int) -> str:
+    """
+    Render minutes since midnight as "HH:MM" (wrapping past midnight)
+
+    Args:
+        minutes: Minutes since midnight
+
+    Returns:
+        Time string in HH:MM format
+    """
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_duration(value: Any, strict: bool = True) -> int:
+    """
+    Read an ISO 8601 duration as whole minutes (memoized per string)
+
+    Strict mode accepts only ISO 8601 with fixed-length units
+    ("PT30M", "PT1H30M", "PT90S", "P1DT2H", "PT1.5H"). Lenient mode, for LLM
+    and user input, also accepts lowercase and surrounding spaces, a missing
+    "T" ("P30M" is 30 minutes, not months), bare numbers as minutes ("45") and
+    free text ("1 hour", "1 tiếng 30 phút"). Seconds round up to the next
+    minute, so a duration is never scheduled short.
+
+    Args:
+        value: Duration string, or an int already in minutes
+        strict: Reject anything that is not ISO 8601
+
+    Returns:
+        Duration in minutes
+
+    Raises:
+        DurationParseError: If the value is not a readable duration
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    if not isinstance(value, str):
+        raise DurationParseError(f"Expected an ISO 8601 duration like PT1H30M, got {value!r}")
+    return _parse_duration_text(value, strict)
+
+
+@lru_cache(maxsize=4096)
+def _parse_duration_text(text: str, strict: bool) -> int:
+    """parse_duration for strings; errors are not cached"""
+    raw = text
+    if not strict:
+        text = text.strip().upper()
+        if "T" not in text:
+            text = _MISSING_T.sub(r"\1T", text)
+    match = _DURATION_PATTERN.match(text)
+    if match:
+        parts = match.groups()
+        fractions = [n for n, part in enumerate(parts) if part and ("." in part or "," in part)]
+        if fractions and any(parts[fractions[0] + 1:]):
+            raise DurationParseError(f"Only the last component of a duration may have a fraction: {raw!r}")
+        seconds = sum(
+            float(part.replace(",", ".")) * unit
+            for part, unit in zip(parts, _DURATION_SECONDS) if part
+        )
+        return math.ceil(round(seconds, 6) / 60)
+    if not strict:
+        if re.fullmatch(r"\d+", text):
+            return int(text)
+        found = _DURATION_TEXT.findall(text.lower())
+        if found:
+            seconds = sum(float(amount.replace(",", ".")) * _TEXT_UNIT_SECONDS[unit] for amount, unit in found)
+            return math.ceil(round(seconds, 6) / 60)
+    raise DurationParseError(f"Expected an ISO 8601 duration like PT1H30M, got {raw!r}")
+
+
+def _as_date(value: Union[date, str, None]) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class TimeOfDay(int):
+    """Minutes since midnight that renders as "HH:MM" """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, value: Any) -> "TimeOfDay":
+        """Parse "HH:MM" (or minutes) into a TimeOfDay"""
+        if isinstance(value, cls):
+            return value
+        return cls(parse_minutes(value))
+
+    def __str__(self) -> str:
+        return format_minutes(self)
+
+    def __repr__(self) -> str:
+        return f"TimeOfDay({format_minutes(self)!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls.parse,
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json")
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: Any, handler: Any) -> dict:
+        return {"type": "string", "pattern": r"^\d{1,2}:\d{2}$", "examples": ["07:30"]}
+
+
+class TimeRange:
+    """
+    Time interval in minutes since midnight, optionally pinned to a date and timezone
+    Ranges whose end is before their start cross midnight ("23:00-01:00").
+    """
+
+    __slots__ = ("start", "end", "day", "tz")
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        day: Union[date, str, None] = None,
+        tz: Optional[str] = None
+    ):
+        if end < start:
+            end += MINUTES_PER_DAY
+        self.start = int(start)
+        self.end = int(end)
+        self.day = _as_date(day)
+        self.tz = tz
+
+    @classmethod
+    def parse(cls, value: Any) -> "TimeRange":
+        """
+        Parse a time range
+
+        Args:
+            value: "HH:MM-HH:MM" string, TimeRange, (start, end) pair or
+                {"start": ..., "end": ...} dict with optional "day" and "tz"
+
+        Returns:
+            TimeRange object
+
+        Raises:
+            TimeParseError: If the value is not a valid time range
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            match = _RANGE_PATTERN.match(value)
+            if not match:
+                raise TimeParseError(f"Expected HH:MM-HH:MM, got {value!r}")
+            return cls(
+                _to_minutes(match.group(1), match.group(2), value),
+                _to_minutes(match.group(3), match.group(4), value)
+            )
+        if isinstance(value, dict) and "start" in value and "end" in value:
+            try:
+                day = _as_date(value.get("day"))
+            except (TypeError, ValueError):
+                raise TimeParseError(f"Expected day as YYYY-MM-DD, got {value.get('day')!r}")
+            return cls(parse_minutes(value["start"]), parse_minutes(value["end"]), day, value.get("tz"))
+        if isinstance(value, (tuple, list)) and len(value) == 2:
+            return cls(parse_minutes(value[0]), parse_minutes(value[1]))
+        raise TimeParseError(f"Expected HH:MM-HH:MM, got {value!r}")
+
+    @property
+    def duration(self) -> int:
+        """Length in minutes"""
+        return self.end - self.start
+
+    @property
+    def start_time(self) -> str:
+        """Start rendered as "HH:MM" """
+        return format_minutes(self.start)
+
+    @property
+    def end_time(self) -> str:
+        """End rendered as "HH:MM" """
+        return format_minutes(self.end)
+
+    def contains(self, minute: int) -> bool:
+        """True if `minute` lies within the range (both ends inclusive)"""
+        return self.start <= minute <= self.end
+
+    def overlaps(self, other: "TimeRange") -> bool:
+        """True if the two ranges share any time (touching ends do not overlap)"""
+        return self.start < other.end and other.start < self.end
+
+    def shift(self, minutes: int) -> "TimeRange":
+        """Return the range moved by `minutes`"""
+        return TimeRange(self.start + minutes, self.end + minutes, self.day, self.tz)
+
+    def extend(self, minutes: int) -> "TimeRange":
+        """Return the range with its end moved by `minutes`"""
+        return TimeRange(self.start, max(self.start, self.end + minutes), self.day, self.tz)
+
+    def on(self, day: Union[date, str], tz: Optional[str] = None) -> "TimeRange":
+        """Return the range pinned to a calendar date (and timezone)"""
+        return TimeRange(self.start, self.end, day, tz or self.tz)
+
+    def to_datetimes(
+        self,
+        day: Union[date, str, None] = None,
+        tz: Optional[str] = None
+    ) -> Tuple[datetime, datetime]:
+        """
+        Materialize the range as datetimes
+
+        Args:
+            day: Calendar date (defaults to the pinned date)
+            tz: Timezone name (defaults to the pinned timezone); naive if None
+
+        Returns:
+            Tuple of (start_datetime, end_datetime)
+        """
+        day = _as_date(day) or self.day
+        if day is None:
+            raise ValueError("TimeRange has no date; pass `day`")
+        tz = tz or self.tz
+        midnight = datetime(day.year, day.month, day.day)
+        start = midnight + timedelta(minutes=self.start)
+        end = midnight + timedelta(minutes=self.end)
+        if tz:
+            zone = pytz.timezone(tz)
+            start, end = zone.localize(start), zone.localize(end)
+        return start, end
+
+    def _key(self) -> tuple:
+        return (self.day or date.min, self.start, self.end)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, TimeRange):
+            return NotImplemented
+        return self._key() == other._key() and self.tz == other.tz
+
+    def __lt__(self, other: "TimeRange") -> bool:
+        return self._key() < other._key()
+
+    def __le__(self, other: "TimeRange") -> bool:
+        return self._key() <= other._key()
+
+    def __hash__(self) -> int:
+        return hash((self._key(), self.tz))
+
+    def __str__(self) -> str:
+        return f"{format_minutes(self.start)}-{format_minutes(self.end)}"
+
+    def to_json(self) -> Union[str, dict]:
+        """
+        JSON form: "HH:MM-HH:MM", or a dict when pinned to a date or timezone
+
+        Returns:
+            Range string, or {"start", "end", "day", "tz"} for pinned ranges
+        """
+        if self.day is None and self.tz is None:
+            return str(self)
+        return {
+            "start": format_minutes(self.start),
+            "end": format_minutes(self.end),
+            "day": self.day.isoformat() if self.day else None,
+            "tz": self.tz
+        }
+
+    def __repr__(self) -> str:
+        extra = f", day={self.day.isoformat()!r}" if self.day else ""
+        extra += f", tz={self.tz!r}" if self.tz else ""
+        return f"TimeRange({str(self)!r}{extra})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls.parse,
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.to_json, when_used="json")
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: Any, handler: Any) -> dict:
+        return {
+            "anyOf": [
+                {"type": "string", "pattern": r"^\d{1,2}:\d{2}-\d{1,2}:\d{2}$"},
+                {
+                    "type": "object",
+                    "properties": {
+                        "start": {"type": "string"},
+                        "end": {"type": "string"},
+                        "day": {"type": ["string", "null"], "format": "date"},
+                        "tz": {"type": ["string", "null"]}
+                    },
+                    "required": ["start", "end"]
+                }
+            ],
+            "examples": ["08:00-10:00"]
+        }
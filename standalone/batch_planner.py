@@ -0,0 +1,350 @@
+"""
+Batch Planner
+Plans tomorrow for many users at once from a durable local job queue.
+
+Users are sharded across worker processes (one per core by default), so
+CPU-bound stages (pydantic validation, scheduling, serialization) run in
+parallel. Inside each process an asyncio loop keeps several jobs in flight,
+running their LLM and search calls in threads. Stage outputs are
+checkpointed in the queue: a crashed run resumes where it stopped and
+retried jobs skip the stages that already succeeded. An upstream outage
+fails the job for a retry instead of completing it with an offline plan.
+Outage retries wait (doubling from --retry-delay, the Gemini circuit's
+cool-down by default) so they do not burn every attempt while the circuit
+is open; use --local to build offline plans on purpose.
+
+Run: python standalone/batch_planner.py --input users.jsonl --batch nightly-2026-10-19
+Resume: python standalone/batch_planner.py --batch nightly-2026-10-19
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_queue import DEFAULT_LEASE_S, Job, JobQueue
+from utils.plan_archive import PlanArchive
+from utils.resilience import DEFAULT_POLICIES, UpstreamError
+from utils.scheduling_policy import load_policy
+from utils.serialization import get_serializer
+from utils.stage_store import StageStore
+
+DEFAULT_QUEUE = "output/jobs.db"
+
+# Jobs in flight per worker process (their LLM/search calls overlap)
+DEFAULT_CONCURRENCY = 4
+
+# First wait before retrying a job that hit an upstream outage (doubles per
+# attempt); at least the circuit's cool-down, or the retry fails fast again
+DEFAULT_RETRY_DELAY_S = DEFAULT_POLICIES["gemini"].reset_timeout_s
+
+
+def default_planner():
+    """
+    Planner used by each worker process (built once per process)
+
+    Returns:
+        AtomicTaskPlanner configured from the environment
+    """
+    from main import AtomicTaskPlanner
+    return AtomicTaskPlanner(
+        use_mock_search=os.getenv("USE_MOCK_SEARCH", "False") == "True",
+        model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite"),
+        stage_store=StageStore(os.getenv("ATP_STAGE_STORE", "output/stages"))
+    )
+
+
+class BatchWorker:
+    """One worker process: leases jobs and runs them on an asyncio loop"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        planner: Any,
+        index: int = 0,
+        workers: int = 1,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        lease_s: float = DEFAULT_LEASE_S,
+        batch: Optional[str] = None,
+        local: bool = False,
+        archive: Optional[PlanArchive] = None,
+        retry_delay_s: float = DEFAULT_RETRY_DELAY_S
+    ):
+        """
+        Initialize batch worker
+
+        Args:
+            queue: Shared job queue
+            planner: AtomicTaskPlanner of this process
+            index: Worker index (its shard of users)
+            workers: Number of workers (shards)
+            concurrency: Jobs in flight at once
+            lease_s: Lease length; leases are renewed every third of it
+            batch: Only run jobs of this batch (None = any batch)
+            local: Use the offline fallback pipeline (no LLM/search calls)
+            archive: Optional plan archive for finished plans
+            retry_delay_s: First delay before retrying an UpstreamError
+                (doubled per attempt)
+        """
+        self.queue = queue
+        self.planner = planner
+        self.shard = (index, workers)
+        self.concurrency = concurrency
+        self.lease_s = lease_s
+        self.batch = batch
+        self.local = local
+        self.archive = archive
+        self.retry_delay_s = retry_delay_s
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        self.serializer = get_serializer()
+        self.stats = {"done": 0, "retried": 0, "failed": 0}
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run jobs until the queue has none left for this worker (waiting for
+        delayed retries)
+
+        Returns:
+            Stats dict (owner, done, retried, failed)
+        """
+        running: Dict[int, asyncio.Task] = {}
+        heartbeat = asyncio.create_task(self._heartbeat(running))
+        try:
+            while True:
+                if len(running) < self.concurrency:
+                    for job in self.queue.lease(
+                        self.owner, self.concurrency - len(running), self.lease_s, self.shard, self.batch
+                    ):
+                        running[job.job_id] = asyncio.create_task(self._run_job(job))
+                retry_wait = self.queue.retry_wait(self.batch)
+                if not running:
+                    if retry_wait is None:
+                        break
+                    await asyncio.sleep(retry_wait)
+                    continue
+                finished, _ = await asyncio.wait(
+                    running.values(), timeout=retry_wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for job_id in [job_id for job_id, task in running.items() if task in finished]:
+                    del running[job_id]
+        finally:
+            heartbeat.cancel()
+        return {"owner": self.owner, **self.stats}
+
+    async def _run_job(self, job: Job):
+        """Plan one user, checkpointing stage outputs and recording the outcome"""
+        if "user_request" not in job.payload:
+            self.queue.fail(job.job_id, self.owner, "payload has no user_request", retry=False)
+            self.stats["failed"] += 1
+            return
+
+        # Optional per-tenant scheduling policy file (e.g., an A/B arm)
+        try:
+            policy = load_policy(job.payload["policy"]) if job.payload.get("policy") else None
+        except (OSError, ValueError) as e:
+            self.queue.fail(job.job_id, self.owner, f"bad scheduling policy: {e}", retry=False)
+            self.stats["failed"] += 1
+            return
+
+        bio_context = {**job.payload.get("bio_context", {}), "user_id": job.user_id}
+        try:
+            if self.local:
+                plan = self.planner.run_local_pipeline(
+                    job.payload["user_request"], bio_context, reason="batch --local", policy=policy
+                )
+            else:
+                plan = await asyncio.to_thread(
+                    self.planner.run_pipeline,
+                    job.payload["user_request"],
+                    bio_context,
+                    checkpoint=dict(job.checkpoint),
+                    on_checkpoint=lambda data: self.queue.checkpoint(job.job_id, self.owner, data),
+                    policy=policy,
+                    # Outages are retried through the queue, not planned offline
+                    fallback=False
+                )
+            result = self.serializer.dumps(plan, compact=True)
+        except Exception as e:
+            # During an outage the circuit fails fast: wait it out before the next attempt
+            delay_s = self.retry_delay_s * 2 ** (job.attempts - 1) if isinstance(e, UpstreamError) else 0.0
+            self.queue.fail(job.job_id, self.owner, f"{type(e).__name__}: {e}", delay_s=delay_s)
+            self.stats["retried" if job.attempts < self.queue.max_attempts else "failed"] += 1
+            print(f"⚠️  {job.user_id} (attempt {job.attempts}): {e}")
+            return
+
+        if self.queue.complete(job.job_id, self.owner, result):
+            self.stats["done"] += 1
+            if self.archive is not None:
+                self.archive.append(plan)
+
+    async def _heartbeat(self, running: Dict[int, asyncio.Task]):
+        """Renew the leases of running jobs"""
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            if running:
+                self.queue.heartbeat(list(running), self.owner, self.lease_s)
+
+
+def _run_worker(options: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Worker process entry point"""
+    queue = JobQueue(options["queue_path"], max_attempts=options["max_attempts"])
+    archive = PlanArchive(options["archive_path"]) if options["archive_path"] else None
+    worker = BatchWorker(
+        queue,
+        options["planner_factory"](),
+        index=index,
+        workers=options["workers"],
+        concurrency=options["concurrency"],
+        lease_s=options["lease_s"],
+        batch=options["batch"],
+        local=options["local"],
+        archive=archive,
+        retry_delay_s=options["retry_delay_s"]
+    )
+    try:
+        return asyncio.run(worker.run())
+    finally:
+        queue.close()
+        if archive is not None:
+            archive.close()
+
+
+class BatchPlanner:
+    """Enqueues users and shards the batch across worker processes"""
+
+    def __init__(
+        self,
+        queue_path: str = DEFAULT_QUEUE,
+        workers: Optional[int] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        lease_s: float = DEFAULT_LEASE_S,
+        max_attempts: int = 3,
+        planner_factory: Callable[[], Any] = default_planner,
+        archive_path: Optional[str] = None,
+        local: bool = False,
+        retry_delay_s: float = DEFAULT_RETRY_DELAY_S
+    ):
+        """
+        Initialize batch planner
+
+        Args:
+            queue_path: SQLite job queue file (keep it to resume a batch)
+            workers: Worker processes (default: one per core)
+            concurrency: Jobs in flight per worker
+            lease_s: Seconds before a crashed worker's jobs are retried
+            max_attempts: Attempts per job before it is marked failed
+            planner_factory: Module-level function building one planner per
+                process (must be picklable)
+            archive_path: Optional plan archive file for finished plans
+            local: Use the offline fallback pipeline
+            retry_delay_s: First delay before retrying a job that hit an
+                upstream outage (doubled per attempt)
+        """
+        self.queue = JobQueue(queue_path, max_attempts=max_attempts)
+        self.workers = workers or os.cpu_count() or 1
+        self.options = {
+            "queue_path": queue_path,
+            "workers": self.workers,
+            "concurrency": concurrency,
+            "lease_s": lease_s,
+            "max_attempts": max_attempts,
+            "planner_factory": planner_factory,
+            "archive_path": archive_path,
+            "local": local,
+            "retry_delay_s": retry_delay_s,
+            "batch": None,
+        }
+
+    def enqueue(self, batch: str, requests: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add users to a batch
+
+        Args:
+            batch: Batch name
+            requests: Dicts with user_id, user_request, bio_context and an
+                optional policy (scheduling policy file, e.g. per tenant)
+
+        Returns:
+            Number of jobs added
+        """
+        return self.queue.enqueue(
+            batch,
+            ((request.get("user_id", "anonymous"), request) for request in requests)
+        )
+
+    def run(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """
+        Run (or resume) a batch on the worker processes
+
+        Args:
+            batch: Batch to run (None = every pending job)
+
+        Returns:
+            Jobs per status for the batch
+        """
+        options = {**self.options, "batch": batch}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(_run_worker, options, index) for index in range(self.workers)]
+            for future in futures:
+                stats = future.result()
+                print(f"   {stats['owner']}: {stats['done']} done, {stats['retried']} retried, {stats['failed']} failed")
+        return self.queue.counts(batch)
+
+
+def load_users(filepath: str) -> List[Dict[str, Any]]:
+    """
+    Load batch input (one JSON object per line: user_id, user_request,
+    bio_context, optional policy file)
+
+    Args:
+        filepath: Path to JSONL file
+
+    Returns:
+        List of request dicts
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    """Main function for batch planner"""
+    parser = argparse.ArgumentParser(description='Plan tomorrow for many users from a durable job queue')
+    parser.add_argument('--input', help='JSONL file of users to enqueue (omit to resume)')
+    parser.add_argument('--batch', required=True, help='Batch name')
+    parser.add_argument('--queue', default=os.getenv('ATP_JOB_QUEUE', DEFAULT_QUEUE), help='Job queue file')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per core)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Jobs in flight per worker')
+    parser.add_argument('--archive', default=os.getenv('ATP_PLAN_ARCHIVE'), help='Plan archive file for finished plans')
+    parser.add_argument('--local', action='store_true', help='Offline fallback pipeline (no LLM/search calls)')
+    parser.add_argument('--retry-delay', type=float, default=DEFAULT_RETRY_DELAY_S,
+                        help='Seconds before the first retry after an upstream outage (doubles per attempt)')
+    args = parser.parse_args()
+
+    planner = BatchPlanner(
+        args.queue,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        archive_path=args.archive,
+        local=args.local,
+        retry_delay_s=args.retry_delay
+    )
+    if args.input:
+        print(f"📥 Enqueued {planner.enqueue(args.batch, load_users(args.input))} users into {args.batch}")
+
+    print(f"\n🚀 Running {args.batch} on {planner.workers} worker process(es)")
+    start = time.perf_counter()
+    counts = planner.run(args.batch)
+    print(f"\n✅ {counts['done']} done, {counts['failed']} failed, {counts['queued'] + counts['leased']} pending "
+          f"in {time.perf_counter() - start:.1f}s")
+    for user_id, error in planner.queue.errors(args.batch).items():
+        print(f"❌ {user_id}: {error}")
+
+
+if __name__ == "__main__":
+    main()
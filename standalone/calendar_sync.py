@@ -1,10 +1,19 @@
 import json
 import os
+import sys
 import argparse
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import pytz
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schemas.time_types import TimeRange
+from utils.credential_pool import CredentialPool
+from utils.event_mirror import EventChange, EventMirror
+from utils.free_busy import FreeBusyIngestor
+
 # Google Calendar imports
 try:
     from google.oauth2.credentials import Credentials
@@ -26,23 +35,59 @@ class CalendarSyncTool:
     SCOPES = ['https://www.googleapis.com/auth/calendar']
     TOKEN_FILE = 'token.json'
     CREDENTIALS_FILE = 'credentials.json'
+    BATCH_SIZE = 50  # Google recommends at most 50 calls per batch request
     
-    def __init__(self, credentials_file: str = None, token_file: str = None):
+    def __init__(
+        self,
+        credentials_file: str = None,
+        token_file: str = None,
+        event_mirror: Optional[EventMirror] = None,
+        http: Any = None
+    ):
         """
         Initialize Calendar Sync Tool
         
         Args:
             credentials_file: Path to OAuth credentials file
             token_file: Path to token file
+            event_mirror: Local mirror of ATP events (enables reconcile)
+            http: Authorized HTTP client (e.g., CredentialPool.authorized_http);
+                skips the token file and OAuth flow
         """
         self.credentials_file = credentials_file or self.CREDENTIALS_FILE
         self.token_file = token_file or self.TOKEN_FILE
+        self.event_mirror = event_mirror
         self.service = None
         self.pending_sync = []
         
-        if GOOGLE_CALENDAR_AVAILABLE:
+        if http is not None:
+            self._build_service(http=http)
+        elif GOOGLE_CALENDAR_AVAILABLE:
             self._authenticate()
     
+    @classmethod
+    def for_user(
+        cls,
+        pool: CredentialPool,
+        user_id: str,
+        event_mirror: Optional[EventMirror] = None
+    ) -> Optional['CalendarSyncTool']:
+        """
+        Sync tool for one user of a credential pool (no file read or OAuth flow)
+        
+        Args:
+            pool: Credential pool holding the user's token
+            user_id: User ID
+            event_mirror: Local mirror of ATP events
+        
+        Returns:
+            CalendarSyncTool, or None if the user has no valid token
+        """
+        http = pool.authorized_http(user_id)
+        if http is None:
+            return None
+        return cls(event_mirror=event_mirror, http=http)
+    
     def _authenticate(self):
         """Authenticate with Google Calendar API"""
         creds = None
@@ -73,11 +118,57 @@ class CalendarSyncTool:
                 token.write(creds.to_json())
         
         # Build service
-        try:
-            self.service = build('calendar', 'v3', credentials=creds)
+        if self._build_service(credentials=creds):
             print("✅ Successfully authenticated with Google Calendar")
+    
+    def _build_service(self, **auth) -> bool:
+        """
+        Build the Calendar v3 service
+        
+        Args:
+            **auth: credentials=... or http=... for googleapiclient's build
+        
+        Returns:
+            True if the service was built
+        """
+        try:
+            self.service = build('calendar', 'v3', cache_discovery=False, **auth)
+            return True
         except Exception as e:
             print(f"Error building Calendar service: {e}")
+            return False
+    
+    def free_busy(self, user_id: str = "anonymous", timezone: str = "Asia/Ho_Chi_Minh") -> Optional[FreeBusyIngestor]:
+        """
+        Read-only free/busy reader on this tool's authenticated service
+        
+        Args:
+            user_id: User the calendar belongs to
+            timezone: Timezone of the plan's times
+        
+        Returns:
+            FreeBusyIngestor, or None if the service is not available
+        """
+        if not self.service:
+            return None
+        return FreeBusyIngestor(self.service, user_id=user_id, timezone=timezone)
+    
+    def reconcile(self, user_id: str = None) -> List[EventChange]:
+        """
+        Find ATP events the user moved or deleted since the last reconcile
+        
+        Only changes since the stored sync token are fetched.
+        
+        Args:
+            user_id: User ID for tracking
+        
+        Returns:
+            Moves and deletions (empty without a service or event mirror)
+        """
+        if not self.service or not self.event_mirror:
+            print("Error: Calendar service or event mirror not available")
+            return []
+        return self.event_mirror.sync(self.service, user_id or "anonymous")
     
     def load_plan(self, filepath: str) -> Dict:
         """
@@ -111,8 +202,11 @@ class CalendarSyncTool:
         """
         Create Google Calendar events from plan
         
+        All events of all days are sent together in batched requests.
+        
         Args:
-            plan: Approved plan dictionary
+            plan: Approved plan dictionary, or a horizon ({"plans": [...]})
+                with one plan per day
             user_id: User ID for tracking
         
         Returns:
@@ -122,37 +216,158 @@ class CalendarSyncTool:
             print("Error: Calendar service not available")
             return []
         
-        results = []
-        
         # Get timezone (default to Vietnam)
         timezone = "Asia/Ho_Chi_Minh"
         
-        # Get tomorrow's date
+        # Plans without a date are for tomorrow
         tomorrow = datetime.now(pytz.timezone(timezone)) + timedelta(days=1)
-        date_str = tomorrow.strftime("%Y-%m-%d")
+        default_date = tomorrow.strftime("%Y-%m-%d")
+        
+        entries = []
+        for day_plan in plan.get("plans", [plan]):
+            date_str = day_plan.get("metadata", {}).get("plan_date") or default_date
+            
+            # Events for schedule items
+            for item in day_plan.get("editable_schedule", []):
+                entries.append(self._prepare_entry(
+                    "task", item, date_str, lambda: self._build_schedule_event(item, date_str, timezone)
+                ))
+            
+            # Events for rest periods
+            for rest in day_plan.get("rest_periods", []):
+                entries.append(self._prepare_entry(
+                    "rest", rest, date_str, lambda: self._build_rest_event(rest, date_str, timezone)
+                ))
+        
+        results = self._insert_events(entries)
+        if self.event_mirror:
+            self.event_mirror.record(
+                user_id or "anonymous",
+                [entry['event'] for entry in entries if entry.get('event')]
+            )
+        return results
+    
+    def _prepare_entry(self, kind: str, source: Dict, date_str: str, build) -> Dict:
+        """
+        Build one event body, capturing build errors instead of raising
+        
+        Args:
+            kind: "task" or "rest"
+            source: Plan item the event is built from
+            date_str: Date string (YYYY-MM-DD)
+            build: Zero-argument callable returning the event body
+        
+        Returns:
+            Entry dict with kind, source, date, and body or error
+        """
+        entry = {'kind': kind, 'source': source, 'date': date_str, 'body': None, 'error': None}
+        try:
+            entry['body'] = build()
+        except Exception as e:
+            entry['error'] = str(e)
+        return entry
+    
+    def _insert_events(self, entries: List[Dict]) -> List[Dict]:
+        """
+        Insert prepared events, batching requests when the client supports it
         
-        # Create events for schedule items
-        for item in plan.get("editable_schedule", []):
-            result = self._create_schedule_event(item, date_str, timezone)
-            if result:
-                results.append(result)
+        Args:
+            entries: Entries from _prepare_entry
         
-        # Create events for rest periods
-        for rest in plan.get("rest_periods", []):
-            result = self._create_rest_event(rest, date_str, timezone)
-            if result:
-                results.append(result)
+        Returns:
+            List of event results, in entry order
+        """
+        responses = [None] * len(entries)
+        pending = [i for i, entry in enumerate(entries) if entry['error'] is None]
+        
+        if hasattr(self.service, 'new_batch_http_request'):
+            for chunk_start in range(0, len(pending), self.BATCH_SIZE):
+                batch = self.service.new_batch_http_request()
+                for i in pending[chunk_start:chunk_start + self.BATCH_SIZE]:
+                    def callback(request_id, response, exception, i=i):
+                        responses[i] = (response, exception)
+                    batch.add(
+                        self.service.events().insert(calendarId='primary', body=entries[i]['body']),
+                        callback=callback
+                    )
+                try:
+                    batch.execute()
+                except Exception as e:
+                    for i in pending[chunk_start:chunk_start + self.BATCH_SIZE]:
+                        if responses[i] is None:
+                            responses[i] = (None, e)
+        else:
+            for i in pending:
+                try:
+                    responses[i] = (self.service.events().insert(
+                        calendarId='primary',
+                        body=entries[i]['body']
+                    ).execute(), None)
+                except Exception as e:
+                    responses[i] = (None, e)
         
+        results = []
+        for entry, response in zip(entries, responses):
+            created_event, exception = response or (None, entry['error'])
+            entry['event'] = created_event
+            results.append(self._event_result(entry, created_event, exception))
         return results
     
-    def _create_schedule_event(
+    def _event_result(self, entry: Dict, created_event: Dict, exception: Any) -> Dict:
+        """
+        Turn an insert response into a result dict (and record failures)
+        
+        Args:
+            entry: Entry from _prepare_entry
+            created_event: Created event resource, or None on failure
+            exception: Error raised for this event, or None
+        
+        Returns:
+            Event creation result
+        """
+        source = entry['source']
+        time_range = source.get("time", "")
+        
+        if entry['kind'] == 'rest':
+            if exception is not None:
+                print(f"❌ Error creating rest event: {exception}")
+                return {'success': False, 'type': 'rest', 'error': str(exception)}
+            print(f"✅ Created rest period at {time_range}")
+            return {
+                'success': True,
+                'type': 'rest',
+                'time': time_range,
+                'date': entry['date'],
+                'event_id': created_event.get('id', '')
+            }
+        
+        if exception is not None:
+            print(f"❌ Error creating event: {exception}")
+            self.pending_sync.append({
+                'item': source,
+                'date': entry['date'],
+                'error': str(exception)
+            })
+            return {'success': False, 'task': source.get('task', ''), 'error': str(exception)}
+        
+        print(f"✅ Created event: {source.get('task', 'Task')} on {entry['date']} at {time_range}")
+        return {
+            'success': True,
+            'task': source.get('task', ''),
+            'time': time_range,
+            'date': entry['date'],
+            'event_id': created_event.get('id', ''),
+            'link': created_event.get('htmlLink', '')
+        }
+    
+    def _build_schedule_event(
         self,
         item: Dict,
         date_str: str,
         timezone: str
     ) -> Dict:
         """
-        Create a calendar event for a schedule item
+        Build the calendar event body for a schedule item
         
         Args:
             item: Schedule item dictionary
@@ -160,91 +375,48 @@ class CalendarSyncTool:
             timezone: Timezone string
         
         Returns:
-            Event creation result
+            Event body for events().insert
         """
-        try:
-            # Parse time range
-            time_range = item.get("time", "08:00-08:30")
-            start_str, end_str = time_range.split("-")
-            
-            # Create datetime objects
-            start_datetime = datetime.strptime(
-                f"{date_str} {start_str}", "%Y-%m-%d %H:%M"
-            )
-            end_datetime = datetime.strptime(
-                f"{date_str} {end_str}", "%Y-%m-%d %H:%M"
-            )
-            
-            # Format for Google Calendar
-            start = start_datetime.isoformat()
-            end = end_datetime.isoformat()
-            
-            # Build event
-            event = {
-                'summary': f"[ATP] {item.get('task', 'Task')}",
-                'description': self._build_event_description(item),
-                'start': {
-                    'dateTime': start,
-                    'timeZone': timezone,
-                },
-                'end': {
-                    'dateTime': end,
-                    'timeZone': timezone,
-                },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'popup', 'minutes': 10},
-                        {'method': 'email', 'minutes': 60}
-                    ]
-                },
-                'colorId': self._get_color_id(item),
-                'extendedProperties': {
-                    'private': {
-                        'atomicTaskId': item.get('id', ''),
-                        'parentGoal': item.get('task', ''),
-                        'isAtomic': 'true'
-                    }
+        # Parse time range (ranges crossing midnight end on the next day)
+        time_range = item.get("time", "08:00-08:30")
+        start_datetime, end_datetime = TimeRange.parse(time_range).to_datetimes(date_str)
+        
+        return {
+            'summary': f"[ATP] {item.get('task', 'Task')}",
+            'description': self._build_event_description(item),
+            'start': {
+                'dateTime': start_datetime.isoformat(),
+                'timeZone': timezone,
+            },
+            'end': {
+                'dateTime': end_datetime.isoformat(),
+                'timeZone': timezone,
+            },
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'popup', 'minutes': 10},
+                    {'method': 'email', 'minutes': 60}
+                ]
+            },
+            'colorId': self._get_color_id(item),
+            'extendedProperties': {
+                'private': {
+                    'atomicTaskId': item.get('id', ''),
+                    'parentGoal': item.get('task', ''),
+                    'isAtomic': 'true'
                 }
             }
-            
-            # Create event
-            created_event = self.service.events().insert(
-                calendarId='primary',
-                body=event
-            ).execute()
-            
-            print(f"✅ Created event: {item.get('task', 'Task')} at {time_range}")
-            
-            return {
-                'success': True,
-                'task': item.get('task', ''),
-                'time': time_range,
-                'event_id': created_event.get('id', ''),
-                'link': created_event.get('htmlLink', '')
-            }
-        
-        except Exception as e:
-            print(f"❌ Error creating event: {e}")
-            self.pending_sync.append({
-                'item': item,
-                'date': date_str,
-                'error': str(e)
-            })
-            return {
-                'success': False,
-                'task': item.get('task', ''),
-                'error': str(e)
-            }
+        }
     
-    def _create_rest_event(
+    def _build_rest_event(
         self,
         rest: Dict,
         date_str: str,
         timezone: str
     ) -> Dict:
         """
-        Create a calendar event for a rest period
+        Build the calendar event body for a rest period
         
         Args:
             rest: Rest period dictionary
@@ -252,61 +424,31 @@ class CalendarSyncTool:
             timezone: Timezone string
         
         Returns:
-            Event creation result
+            Event body for events().insert
         """
-        try:
-            time_range = rest.get("time", "08:30-08:35")
-            start_str, end_str = time_range.split("-")
-            
-            start_datetime = datetime.strptime(
-                f"{date_str} {start_str}", "%Y-%m-%d %H:%M"
-            )
-            end_datetime = datetime.strptime(
-                f"{date_str} {end_str}", "%Y-%m-%d %H:%M"
-            )
-            
-            event = {
-                'summary': f"☕ Rest: {rest.get('type', 'Break')}",
-                'description': f"{rest.get('rationale', '')}\n\n(Mandatory rest period for recovery)",
-                'start': {
-                    'dateTime': start_datetime.isoformat(),
-                    'timeZone': timezone,
-                },
-                'end': {
-                    'dateTime': end_datetime.isoformat(),
-                    'timeZone': timezone,
-                },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'popup', 'minutes': 0}
-                    ]
-                },
-                'colorId': '9',  # Blue for rest
-                'transparency': 'transparent'  # Show as free time
-            }
-            
-            created_event = self.service.events().insert(
-                calendarId='primary',
-                body=event
-            ).execute()
-            
-            print(f"✅ Created rest period at {time_range}")
-            
-            return {
-                'success': True,
-                'type': 'rest',
-                'time': time_range,
-                'event_id': created_event.get('id', '')
-            }
-        
-        except Exception as e:
-            print(f"❌ Error creating rest event: {e}")
-            return {
-                'success': False,
-                'type': 'rest',
-                'error': str(e)
-            }
+        time_range = rest.get("time", "08:30-08:35")
+        start_datetime, end_datetime = TimeRange.parse(time_range).to_datetimes(date_str)
+        
+        return {
+            'summary': f"☕ Rest: {rest.get('type', 'Break')}",
+            'description': f"{rest.get('rationale', '')}\n\n(Mandatory rest period for recovery)",
+            'start': {
+                'dateTime': start_datetime.isoformat(),
+                'timeZone': timezone,
+            },
+            'end': {
+                'dateTime': end_datetime.isoformat(),
+                'timeZone': timezone,
+            },
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'popup', 'minutes': 0}
+                ]
+            },
+            'colorId': '9',  # Blue for rest
+            'transparency': 'transparent'  # Show as free time
+        }
     
     def _build_event_description(self, item: Dict) -> str:
         """
@@ -413,6 +555,36 @@ class CalendarSyncTool:
         return '\n'.join(lines)
 
 
+def reconcile_users(
+    pool: CredentialPool,
+    user_ids: List[str],
+    event_mirror: EventMirror,
+    workers: int = 8
+) -> Dict[str, List[EventChange]]:
+    """
+    Reconcile many users' calendars with pooled credentials
+    
+    Args:
+        pool: Credential pool (start() it for long batches)
+        user_ids: Users to reconcile
+        event_mirror: Shared event mirror
+        workers: Worker threads (each reuses one HTTP connection pool)
+    
+    Returns:
+        Dict of user ID → changes (users without a valid token are left out)
+    """
+    def reconcile(user_id):
+        tool = CalendarSyncTool.for_user(pool, user_id, event_mirror)
+        return user_id, tool.reconcile(user_id) if tool else None
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return {
+            user_id: changes
+            for user_id, changes in executor.map(reconcile, user_ids)
+            if changes is not None
+        }
+
+
 def main():
     """Main function for calendar sync tool"""
     parser = argparse.ArgumentParser(
@@ -420,7 +592,6 @@ def main():
     )
     parser.add_argument(
         '--input',
-        required=True,
         help='Path to approved JSON plan file'
     )
     parser.add_argument(
@@ -436,22 +607,67 @@ def main():
         action='store_true',
         help='Simulate sync without creating events'
     )
+    parser.add_argument(
+        '--reconcile',
+        action='store_true',
+        help='Report ATP events moved or deleted in the calendar since the last reconcile'
+    )
+    parser.add_argument(
+        '--mirror',
+        default=os.getenv('ATP_EVENT_MIRROR', 'output/calendar_mirror.db'),
+        help='Path to the local event mirror (default: output/calendar_mirror.db)'
+    )
+    parser.add_argument(
+        '--token-dir',
+        help='Directory of per-user token files ({user}.json); with --reconcile, '
+             'reconciles every user in it (or the comma-separated --user list)'
+    )
     
     args = parser.parse_args()
+    if not args.input and not args.reconcile:
+        parser.error('--input is required unless --reconcile is given')
+    
+    if args.reconcile and args.token_dir:
+        pool = CredentialPool(args.token_dir)
+        pool.start()
+        user_ids = [user for user in (args.user or '').split(',') if user] or [
+            name[:-len('.json')] for name in sorted(os.listdir(args.token_dir)) if name.endswith('.json')
+        ]
+        print(f"\n🔄 Reconciling calendars for {len(user_ids)} user(s)")
+        all_changes = reconcile_users(pool, user_ids, EventMirror(args.mirror))
+        pool.stop()
+        for user_id, changes in all_changes.items():
+            print(f"   {user_id}: {len(changes)} change(s)")
+        print(f"✅ {sum(len(c) for c in all_changes.values())} change(s), {len(user_ids) - len(all_changes)} user(s) skipped")
+        return
     
     # Initialize sync tool
     sync_tool = CalendarSyncTool(
-        credentials_file=args.credentials
+        credentials_file=args.credentials,
+        event_mirror=EventMirror(args.mirror)
     )
     
+    if args.reconcile:
+        print(f"\n🔄 Reconciling calendar for user: {args.user or 'anonymous'}")
+        changes = sync_tool.reconcile(args.user)
+        for change in changes:
+            if change.kind == 'moved':
+                print(f"↔️  {change.atomic_task_id}: moved {change.shift_minutes:+d} min")
+            else:
+                print(f"🗑️  {change.atomic_task_id}: deleted")
+        print(f"✅ {len(changes)} change(s) since the last reconcile")
+        return
+    
     # Load plan
     print(f"\n📂 Loading plan from: {args.input}")
     plan = sync_tool.load_plan(args.input)
     
     if args.dry_run:
+        day_plans = plan.get('plans', [plan])
         print("\n🔍 Dry run mode - no events will be created")
-        print(f"Plan contains {len(plan.get('editable_schedule', []))} tasks")
-        print(f"And {len(plan.get('rest_periods', []))} rest periods")
+        print(f"Plan covers {len(day_plans)} day(s)")
+        print(f"Plan contains {sum(len(p.get('editable_schedule', [])) for p in day_plans)} tasks")
+        print(f"And {sum(len(p.get('rest_periods', [])) for p in day_plans)} rest periods")
         return
     
     # Create events
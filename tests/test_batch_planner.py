@@ -0,0 +1,276 @@
+"""
+Test Batch Planner and Job Queue - Offline
+Run: python tests/test_batch_planner.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import asyncio
+import functools
+import tempfile
+import time
+
+from main import AtomicTaskPlanner
+from schemas.final_plan import FinalPlan
+from standalone.batch_planner import BatchPlanner, BatchWorker
+from utils.job_queue import JobQueue
+from utils.resilience import CircuitOpenError, DeadlineExceeded
+from benchmarks.synthetic import make_timing_research
+
+
+def create_request(user_id: str, goal: str = "Chạy bộ 5km") -> dict:
+    return {
+        "user_id": user_id,
+        "user_request": f"Mai tôi muốn {goal.lower()}",
+        "bio_context": {
+            "goals": [goal],
+            "all_goals_info": [{"goal": goal, "deadline": "18:00", "estimated_duration": "45 phút", "energy_level": "high"}],
+            "chronotype": "lark",
+        },
+    }
+
+
+def offline_planner() -> AtomicTaskPlanner:
+    """Planner whose LLM stages are replaced by the local fallback (picklable factory)"""
+    planner = AtomicTaskPlanner(use_mock_search=True)
+    fallback = planner.fallback_planner
+    planner.agent_a1.generate_goal_spec = lambda user_request, bio_context: planner.agent_a1.local_goal_spec(bio_context)
+    planner.agent_a2.research_domain = lambda goal, bio_context, speculation=None: fallback.research_goal({"goal": goal})
+    planner.agent_a3.optimize_schedule = functools.partial(
+        planner.agent_a3.optimize_schedule, timing_research=make_timing_research()
+    )
+    return planner
+
+
+def test_leases_and_retries():
+    """Leases expire, failed jobs retry and the last attempt fails for good"""
+    print("\n" + "="*60)
+    print("🎫 TEST: Leases and Retries")
+    print("="*60)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"), max_attempts=2)
+    queue.enqueue("nightly", [(f"user{i}", {"user_request": "x"}) for i in range(4)])
+    queue.enqueue("other", [("zed", {"user_request": "y"})])
+
+    first = queue.lease("w1", limit=2, lease_s=0.05, batch="nightly")
+    second = queue.lease("w2", limit=10, lease_s=60, batch="nightly")
+    assert len(first) == 2 and len(second) == 2
+    assert not {j.job_id for j in first} & {j.job_id for j in second}
+    print("   ✅ No job leased twice")
+
+    assert queue.checkpoint(first[0].job_id, "w1", {"a1": {"done": True}})
+    time.sleep(0.1)
+    stolen = queue.lease("w3", limit=10, batch="nightly")
+    assert sorted(j.job_id for j in stolen) == sorted(j.job_id for j in first)
+    assert stolen[0].attempts == 2 and stolen[0].checkpoint == {"a1": {"done": True}}
+    assert not queue.complete(first[0].job_id, "w1", b"late")
+    print("   ✅ Expired lease re-leased with its checkpoint; the old owner is fenced off")
+
+    assert queue.fail(second[0].job_id, "w2", "timeout")
+    assert queue.lease("w2", limit=10, batch="nightly")[0].job_id == second[0].job_id
+    assert queue.fail(second[0].job_id, "w2", "timeout again")
+    assert queue.complete(stolen[0].job_id, "w3", b"{}")
+    assert queue.counts("nightly") == {"queued": 0, "leased": 2, "done": 1, "failed": 1}
+    assert queue.errors("nightly") == {second[0].user_id: "timeout again"}
+    assert queue.counts("other")["queued"] == 1
+    print("   ✅ Retried once, then failed; other batches untouched")
+
+
+def test_shard_preference():
+    """Workers take their own users first, then steal"""
+    print("\n" + "="*60)
+    print("🧩 TEST: Shard Preference")
+    print("="*60)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    queue.enqueue("b", [(f"user{i}", {}) for i in range(40)])
+    own = queue.lease("w0", limit=5, shard=(0, 2))
+    mine = queue._db.execute(
+        "SELECT COUNT(*) FROM jobs WHERE user_hash % 2 = 0"
+    ).fetchone()[0]
+    rows = dict(queue._db.execute("SELECT job_id, user_hash % 2 FROM jobs").fetchall())
+    assert all(rows[job.job_id] == 0 for job in own)
+    rest = queue.lease("w0", limit=40, shard=(0, 2))
+    assert [rows[job.job_id] for job in rest] == [0] * (mine - 5) + [1] * (40 - mine)
+    print(f"   ✅ {mine} own-shard jobs first, then {40 - mine} stolen")
+
+
+def test_resume_from_checkpoint():
+    """A retried job skips the stages its crashed attempt finished"""
+    print("\n" + "="*60)
+    print("💾 TEST: Resume from Checkpoint")
+    print("="*60)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    requests = [create_request("minh"), create_request("lan", "Viết báo cáo")]
+    queue.enqueue("nightly", [(request["user_id"], request) for request in requests])
+
+    planner = offline_planner()
+    calls = {"a1": 0, "a2": 0}
+    generate_goal_spec = planner.agent_a1.generate_goal_spec
+    research_domain = planner.agent_a2.research_domain
+
+    def counted_a1(*args, **kwargs):
+        calls["a1"] += 1
+        return generate_goal_spec(*args, **kwargs)
+
+    def crashing_a2(*args, **kwargs):
+        calls["a2"] += 1
+        if calls["a2"] <= 2:
+            raise RuntimeError("worker crashed")
+        return research_domain(*args, **kwargs)
+
+    planner.agent_a1.generate_goal_spec = counted_a1
+    planner.agent_a2.research_domain = crashing_a2
+
+    stats = asyncio.run(BatchWorker(queue, planner, concurrency=2, batch="nightly").run())
+    assert stats["done"] == 2 and stats["retried"] == 2
+    assert calls == {"a1": 2, "a2": 4}
+    print("   ✅ 2 crashed attempts retried; A1 ran once per user")
+
+    plan = FinalPlan.model_validate_json(queue.result(1))
+    assert plan.metadata.user_id == "minh" and plan.editable_schedule
+    print("   ✅ Result stored as a FinalPlan")
+
+
+def test_outage_retried():
+    """Upstream outages fail the job for a retry instead of completing it offline"""
+    print("\n" + "="*60)
+    print("🌩️  TEST: Outage Retried")
+    print("="*60)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"), max_attempts=2)
+    requests = [create_request("minh"), create_request("lan", "Viết báo cáo")]
+    queue.enqueue("nightly", [(request["user_id"], request) for request in requests])
+
+    planner = offline_planner()
+    research_domain = planner.agent_a2.research_domain
+    outages = {"chạy bộ": 1, "báo cáo": 5}
+
+    def flaky_a2(goal, bio_context, speculation=None):
+        name = next(name for name in outages if name in goal.lower())
+        if outages[name]:
+            outages[name] -= 1
+            raise DeadlineExceeded("gemini: no response within 60s")
+        return research_domain(goal, bio_context)
+
+    planner.agent_a2.research_domain = flaky_a2
+    stats = asyncio.run(BatchWorker(queue, planner, batch="nightly", retry_delay_s=0.01).run())
+    assert stats == {"owner": stats["owner"], "done": 1, "retried": 2, "failed": 1}, stats
+    plan = FinalPlan.model_validate_json(queue.result(1))
+    assert not plan.metadata.degraded
+    assert queue.counts("nightly")["failed"] == 1 and "DeadlineExceeded" in queue.errors("nightly")["lan"]
+    print("   ✅ Outage retried, then failed; no offline plan marked done")
+
+
+class OutagePlanner:
+    """Planner whose circuit is open for the first `down_s` seconds"""
+
+    def __init__(self, planner, down_s: float):
+        self.planner = planner
+        self.until = time.monotonic() + down_s
+        self.attempts = 0
+
+    def run_pipeline(self, user_request, bio_context, **kwargs):
+        self.attempts += 1
+        if time.monotonic() < self.until:
+            raise CircuitOpenError("gemini: circuit open")
+        return self.planner.run_pipeline(user_request, bio_context, **kwargs)
+
+
+def test_outage_backoff():
+    """Retries after an open circuit wait instead of using up every attempt at once"""
+    print("\n" + "="*60)
+    print("⏳ TEST: Outage Backoff")
+    print("="*60)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    queue.enqueue("nightly", [("minh", create_request("minh"))])
+    planner = OutagePlanner(offline_planner(), down_s=0.15)
+    start = time.perf_counter()
+    stats = asyncio.run(BatchWorker(queue, planner, batch="nightly", retry_delay_s=0.1).run())
+    assert stats["done"] == 1 and stats["retried"] == 2 and planner.attempts == 3, stats
+    assert time.perf_counter() - start >= 0.3
+    assert not FinalPlan.model_validate_json(queue.result(1)).metadata.degraded
+    print("   ✅ Retried after 0.1s and 0.2s; planned once the circuit closed")
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    queue.enqueue("nightly", [("lan", create_request("lan"))])
+    worker = BatchWorker(queue, OutagePlanner(offline_planner(), down_s=60), batch="nightly", retry_delay_s=0.05)
+    start = time.perf_counter()
+    stats = asyncio.run(worker.run())
+    assert stats["failed"] == 1 and time.perf_counter() - start >= 0.15
+    assert queue.retry_wait("nightly") is None and "CircuitOpenError" in queue.errors("nightly")["lan"]
+    print("   ✅ A long outage fails the job after the backed-off attempts")
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    queue.enqueue("b", [("zed", {})])
+    job = queue.lease("w", batch="b")[0]
+    queue.fail(job.job_id, "w", "outage", delay_s=60)
+    assert queue.lease("w", batch="b") == [] and 59 < queue.retry_wait("b") <= 60
+    print("   ✅ Delayed retries are not leased early")
+
+
+def test_process_pool():
+    """A batch is sharded across worker processes"""
+    print("\n" + "="*60)
+    print("⚙️  TEST: Process Pool")
+    print("="*60)
+
+    directory = tempfile.mkdtemp()
+    batch = BatchPlanner(
+        os.path.join(directory, "jobs.db"),
+        workers=2,
+        planner_factory=offline_planner,
+        archive_path=os.path.join(directory, "plans.db")
+    )
+    batch.enqueue("nightly", [create_request(f"user{i}") for i in range(12)])
+    batch.enqueue("nightly", [{"user_id": "broken"}])
+    counts = batch.run("nightly")
+    assert counts == {"queued": 0, "leased": 0, "done": 12, "failed": 1}, counts
+    assert batch.queue.errors("nightly") == {"broken": "payload has no user_request"}
+    print("   ✅ 12 plans on 2 processes; invalid input failed without retries")
+
+    counts = batch.run("nightly")
+    assert counts["done"] == 12
+    print("   ✅ Re-running a finished batch does nothing")
+
+
+def main():
+    """Run all batch planner tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Batch Planner")
+    print("="*70)
+
+    tests = [
+        ("Leases and Retries", test_leases_and_retries),
+        ("Shard Preference", test_shard_preference),
+        ("Resume from Checkpoint", test_resume_from_checkpoint),
+        ("Outage Retried", test_outage_retried),
+        ("Outage Backoff", test_outage_backoff),
+        ("Process Pool", test_process_pool),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
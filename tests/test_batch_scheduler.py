@@ -0,0 +1,182 @@
+"""
+Test Batched Scheduling Kernel - Offline
+Run: python tests/test_batch_scheduler.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import random
+
+from agents.batch_scheduler import (
+    FOCUS,
+    REST,
+    BatchRequest,
+    BatchScheduler,
+    CompactOutput,
+    bio_energy_vector,
+    default_backend,
+    np,
+    schedule_kernel,
+)
+from agents.bio_optimizer import BioOptimizerAgent
+from schemas.agent1_output import UserBioProfile
+from schemas.time_types import format_minutes
+from utils.scheduling_policy import DEFAULT_POLICY, CompiledPolicy, SchedulingPolicy
+from benchmarks.synthetic import make_profile, make_tasks, make_tips, make_timing_research
+
+PROFILES = [
+    make_profile(),
+    UserBioProfile(
+        chronotype="owl", sleep_time="01:00", wake_time="09:00", meal_times={},
+        peak_hours=["10:00-12:00", "15:00-15:30", "20:00-23:00"], energy_tomorrow="low"
+    ),
+    UserBioProfile(
+        chronotype="intermediate", sleep_time="23:00", wake_time="07:00", meal_times={},
+        peak_hours=[], energy_tomorrow="medium"
+    ),
+]
+
+# Per-tenant policy: short blocks, one rest rule, different fallback slots
+SHORT_BLOCKS = CompiledPolicy(SchedulingPolicy(
+    name="short-blocks",
+    chunking={"low": {"max_minutes": 30}, "high": {"max_minutes": 20}},
+    rest_rules=[{"focus_minutes": 40, "rest_minutes": 10, "reason": "Short block break"}],
+    fallback_slots=["05:00-06:30", "13:00-13:45", "21:00-22:00"],
+    min_peak_slots=4,
+    max_slots=4
+))
+
+
+def create_requests(n: int):
+    """Users with mixed profiles, task counts and long low-difficulty tasks"""
+    rng = random.Random(7)
+    requests = []
+    for i in range(n):
+        tasks = make_tasks(rng.randint(0, 8), seed=i)
+        for task in tasks:
+            if rng.random() < 0.3:
+                task.estimated_duration = f"PT{rng.choice([3, 90, 120])}M"
+        requests.append(BatchRequest(tasks, make_tips(tasks), PROFILES[i % len(PROFILES)], make_timing_research()))
+    return requests
+
+
+def test_matches_optimize_schedule():
+    """Every backend reproduces optimize_schedule user by user"""
+    print("\n" + "="*60)
+    print("🧮 TEST: Matches optimize_schedule")
+    print("="*60)
+
+    requests = create_requests(60)
+    backends = ["python"] + (["numpy"] if np is not None else [])
+    for policy, rest_reason in ((DEFAULT_POLICY, "Ultradian"), (SHORT_BLOCKS, "Short block")):
+        agent = BioOptimizerAgent(use_mock_search=True, policy=policy)
+        expected = [
+            agent.optimize_schedule(r.tasks, r.tips, r.bio_profile, timing_research=r.timing_research)
+            for r in requests
+        ]
+        assert any(rest_reason in item.rationale_timing.why_this_time for output in expected for item in output.optimized_schedule)
+
+        for backend in backends:
+            outputs = BatchScheduler(agent, backend=backend).optimize_batch(requests)
+            assert outputs == expected
+            print(f"   ✅ {policy.name} policy, {backend}: {len(outputs)} users identical (rests, rationales, insights)")
+    if np is None:
+        print("   ⏭️  numpy not installed; numpy backend skipped")
+
+    assert default_backend() == "python"
+    print("   ✅ Python is the default backend; numpy only on request")
+
+
+def test_compiled_vectors():
+    """Slots come from the compiled energy vector"""
+    print("\n" + "="*60)
+    print("📈 TEST: Compiled Vectors")
+    print("="*60)
+
+    energy = [bio_energy_vector(profile) for profile in PROFILES]
+    batch = schedule_kernel(energy, [[25] * 8] * 3, backend="python")
+
+    def focus_starts(row):
+        return [format_minutes(batch.starts[i]) for i in batch.placements(row) if batch.kinds[i] == FOCUS]
+
+    # Peak windows merged with the overlapping fallback slots, peaks filled first
+    assert focus_starts(0) == ["06:00", "06:30", "07:00", "07:30", "16:00", "16:30", "17:00", "17:30"]
+    assert [batch.peak[i] for i in batch.placements(0) if batch.kinds[i] == FOCUS] == [True] * 4 + [False] * 2 + [True] * 2
+    assert focus_starts(2) == ["06:00", "06:30", "11:00", "11:30", "14:00", "14:30", "16:00", "16:30"]
+    print("   ✅ Peak windows from the vector, fallback slots when fewer than three")
+
+    last = batch.offsets[1] - 1
+    assert batch.kinds[last] == REST and batch.ends[last] - batch.starts[last] == 20
+    assert batch.focus_total == [200, 200, 200] and batch.rest_total[0] == 50 and batch.match[0] == 20
+    print("   ✅ Ultradian rest, rest and insight totals per user")
+
+    try:
+        schedule_kernel(energy, [[25]])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Mismatched inputs should raise ValueError")
+    try:
+        schedule_kernel(energy, [[25]] * 3, backend="fortran")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unknown backend should raise ValueError")
+    print("   ✅ Mismatched inputs and unknown backends rejected")
+
+
+def test_compact_batch():
+    """The batch path holds compact rows until an output is materialized"""
+    print("\n" + "="*60)
+    print("🗜️  TEST: Compact Batch")
+    print("="*60)
+
+    requests = create_requests(30)
+    scheduler = BatchScheduler(BioOptimizerAgent(use_mock_search=True))
+    compact = scheduler.compact_batch(requests)
+    assert all(isinstance(output, CompactOutput) for output in compact)
+    pool = compact[0].schedule.pool
+    assert all(output.schedule.pool is pool for output in compact) and len(pool) < 20
+    print(f"   ✅ {sum(len(o.schedule) for o in compact)} rows for {len(compact)} users, {len(pool)} pooled records")
+
+    expected = scheduler.optimize_batch(requests)
+    assert [output.materialize() for output in compact] == expected
+    assert compact[0].schedule.to_dicts() == [item.model_dump(mode="json") for item in expected[0].optimized_schedule]
+    print("   ✅ Materialized and to_dicts() outputs match optimize_batch")
+
+
+def main():
+    """Run all batch scheduler tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Batched Scheduling Kernel")
+    print("="*70)
+
+    tests = [
+        ("Matches optimize_schedule", test_matches_optimize_schedule),
+        ("Compiled Vectors", test_compiled_vectors),
+        ("Compact Batch", test_compact_batch),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Test Compact Schedule Storage - Pure Python
+Run: python tests/test_compact_schedule.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracemalloc
+
+from schemas.compact_schedule import CompactSchedule, RecordPool, SHARED_RECORDS, SHARED_RECORDS_LIMIT
+from benchmarks.synthetic import make_schedule
+
+
+def test_roundtrip():
+    """Materialized items equal the originals"""
+    print("\n" + "="*60)
+    print("🔁 TEST: Compact Round-trip")
+    print("="*60)
+
+    items = make_schedule(50)
+    compact = CompactSchedule.from_items(items, RecordPool())
+    assert len(compact) == len(items)
+
+    restored = compact.materialize()
+    assert [type(i) for i in restored] == [type(i) for i in items]
+    assert [i.model_dump(mode="json") for i in restored] == [i.model_dump(mode="json") for i in items]
+    print(f"   ✅ {len(items)} items restored unchanged")
+
+    assert compact.to_dicts() == [i.model_dump(mode="json") for i in items]
+    print("   ✅ to_dicts() matches model_dump(mode='json')")
+
+
+def test_records_are_shared():
+    """Equal rationale/design records are stored once"""
+    print("\n" + "="*60)
+    print("🧩 TEST: Shared Records")
+    print("="*60)
+
+    pool = RecordPool()
+    compact = CompactSchedule.from_items(make_schedule(200) + make_schedule(200), pool)
+    print(f"   {len(compact)} rows → {len(pool)} pooled records")
+    assert len(pool) < 10
+
+    restored = compact.materialize()
+    assert restored[0].rationale_timing is restored[len(restored) // 2].rationale_timing
+    print("   ✅ Materialized items reference the same record objects")
+
+    a = SHARED_RECORDS.design("2-minute rule", "After coffee", "Keep it visible")
+    b = SHARED_RECORDS.design("2-minute rule", "After coffee", "Keep it visible")
+    assert a is b
+    print("   ✅ SHARED_RECORDS returns one instance per distinct design")
+
+
+def test_bounded_pool():
+    """The shared pool evicts least recently used records; schedules own their ids"""
+    print("\n" + "="*60)
+    print("📏 TEST: Bounded Pool")
+    print("="*60)
+
+    pool = RecordPool(max_records=3)
+    kept = pool.design("2-minute rule", "After coffee", "Keep it visible")
+    first_id = pool.intern(kept)
+    for i in range(10):
+        pool.rationale(f"Reason {i}", "https://example.com", "lark")
+        assert pool.design("2-minute rule", "After coffee", "Keep it visible") is kept
+    assert len(pool) == 3 and pool.get(first_id) is kept
+    print("   ✅ 10 new records kept the pool at 3; the recently used record survived")
+
+    evicted = pool.intern(pool.rationale("Reason 0", "https://example.com", "lark"))
+    for i in range(3):
+        pool.rationale(f"Other {i}", "https://example.com", "lark")
+    try:
+        pool.get(evicted)
+    except KeyError:
+        print("   ✅ Evicted ids are invalid")
+    else:
+        raise AssertionError("Evicted record id should raise KeyError")
+
+    assert SHARED_RECORDS.max_records == SHARED_RECORDS_LIMIT
+    items = make_schedule(20)
+    compact = CompactSchedule.from_items(items)
+    assert compact.pool is not SHARED_RECORDS
+    assert compact.materialize()[0].rationale_timing is items[0].rationale_timing
+    print("   ✅ Schedules intern into their own pool and still share record objects")
+
+
+def test_memory_footprint():
+    """Compact rows use less memory than pydantic items"""
+    print("\n" + "="*60)
+    print("💾 TEST: Memory Footprint")
+    print("="*60)
+
+    n = 2000
+    tracemalloc.start()
+    items = make_schedule(n)
+    models_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    compact = CompactSchedule.from_items(items, RecordPool())
+    compact_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"   Models: {models_bytes / 1024:.0f} KiB | Compact: {compact_bytes / 1024:.0f} KiB")
+    assert compact_bytes < models_bytes / 2
+    print("   ✅ Compact schedule is under half the size")
+
+
+def main():
+    """Run all compact schedule tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Compact Schedule Storage")
+    print("="*70)
+
+    tests = [
+        ("Compact Round-trip", test_roundtrip),
+        ("Shared Records", test_records_are_shared),
+        ("Bounded Pool", test_bounded_pool),
+        ("Memory Footprint", test_memory_footprint),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Test OAuth Credential Pool - with Fake Tokens
+Run: python tests/test_credential_pool.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from google.oauth2.credentials import Credentials
+
+from standalone.calendar_sync import CalendarSyncTool
+from utils.credential_pool import CredentialPool
+from utils.resilience import EndpointPolicy, ResilientEndpoint, UpstreamError
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FakeCredentials:
+    """Credentials double whose refresh extends the expiry by an hour"""
+
+    def __init__(self, info):
+        self.token = info["token"]
+        self.expiry = datetime.fromisoformat(info["expiry"])
+        self.fail = info.get("fail", False)
+        self.transports = []
+
+    def refresh(self, request):
+        time.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("invalid_grant")
+        self.transports.append(request)
+        self.token += "+"
+        self.expiry = utcnow() + timedelta(hours=1)
+
+    def to_json(self):
+        return json.dumps({"token": self.token, "expiry": self.expiry.isoformat()})
+
+
+def create_pool(tokens):
+    """Pool over a temp token dir; tokens maps user → minutes until expiry"""
+    token_dir = tempfile.mkdtemp()
+    for user_id, minutes in tokens.items():
+        with open(os.path.join(token_dir, f"{user_id}.json"), "w") as f:
+            json.dump({
+                "token": f"t-{user_id}",
+                "expiry": (utcnow() + timedelta(minutes=minutes)).isoformat(),
+                "fail": user_id.startswith("revoked"),
+            }, f)
+    transports = []
+
+    def transport_factory():
+        transports.append(object())
+        return transports[-1]
+
+    pool = CredentialPool(token_dir, loader=FakeCredentials, transport_factory=transport_factory)
+    return pool, transports
+
+
+def test_hot_path():
+    """Tokens are read once and served from memory"""
+    print("\n" + "="*60)
+    print("⚡ TEST: Hot Path")
+    print("="*60)
+
+    pool, transports = create_pool({f"user{i}": 60 for i in range(50)})
+    for _ in range(20):
+        for i in range(50):
+            assert pool.get(f"user{i}").token == f"t-user{i}"
+    assert pool.loads == 50 and pool.refreshes == 0 and transports == []
+    print("   ✅ 1,000 lookups: 50 file reads, no refresh")
+
+    assert pool.get("nobody") is None
+    print("   ✅ Users without a token are skipped (no OAuth flow)")
+
+
+def test_expired_refreshed_once():
+    """Concurrent callers share one refresh of an expired token"""
+    print("\n" + "="*60)
+    print("🔑 TEST: Expired Token")
+    print("="*60)
+
+    pool, transports = create_pool({"minh": -5, "revoked": -5})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: pool.get("minh").token, range(16)))
+    assert set(tokens) == {"t-minh+"} and pool.refreshes == 1
+    with open(os.path.join(pool.token_dir, "minh.json")) as f:
+        assert json.load(f)["token"] == "t-minh+"
+    print("   ✅ 16 concurrent gets, 1 refresh, token file updated")
+
+    assert pool.get("revoked") is None
+    print("   ✅ Failed refresh returns None")
+
+
+def test_background_refresh():
+    """Tokens expiring soon are refreshed ahead of time on shared transports"""
+    print("\n" + "="*60)
+    print("🔄 TEST: Background Refresh")
+    print("="*60)
+
+    pool, transports = create_pool({"soon1": 2, "soon2": 3, "later": 60})
+    for user_id in ("soon1", "soon2", "later"):
+        pool.get(user_id)
+    assert pool.refreshes == 0
+
+    pool.start(interval_s=0.01)
+    deadline = time.time() + 2
+    while pool.refreshes < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+    assert pool.refreshes == 2 and pool.get("later").token == "t-later"
+    assert len(transports) == 1
+    assert pool.get("soon1").transports == pool.get("soon2").transports == transports
+    print("   ✅ 2 tokens refreshed before expiry on 1 transport")
+
+    assert pool.refresh_due() == 0
+    print("   ✅ Nothing left to refresh")
+
+
+def test_sync_tool_for_user():
+    """CalendarSyncTool built from the pool without token.json"""
+    print("\n" + "="*60)
+    print("📅 TEST: Sync Tool from Pool")
+    print("="*60)
+
+    pool = CredentialPool(token_dir=None)
+    pool.add("minh", Credentials(token="t", expiry=utcnow() + timedelta(hours=1)))
+    tool = CalendarSyncTool.for_user(pool, "minh")
+    assert tool is not None and tool.service is not None
+    assert CalendarSyncTool.for_user(pool, "lan") is None
+    print("   ✅ Service built from pooled credentials")
+
+    same_thread = [pool.authorized_http("minh").http.current() for _ in range(3)]
+    other_thread = []
+    worker = threading.Thread(target=lambda: other_thread.append(pool.authorized_http("minh").http.current()))
+    worker.start()
+    worker.join()
+    assert same_thread[0] is same_thread[1] is same_thread[2] and other_thread[0] is not same_thread[0]
+    print("   ✅ One HTTP connection pool per worker thread")
+
+
+class CheckingHttp:
+    """Fake httplib2.Http that records requests overlapping on one instance"""
+    created = []
+    overlaps = []
+
+    def __init__(self):
+        self.active = 0
+        self.lock = threading.Lock()
+        self.timeout = None
+        CheckingHttp.created.append(self)
+
+    def request(self, uri, method="GET", **kwargs):
+        with self.lock:
+            self.active += 1
+            if self.active > 1:
+                CheckingHttp.overlaps.append(uri)
+        time.sleep(0.03 if "slow" in uri else 0.001)
+        with self.lock:
+            self.active -= 1
+
+        class Response(dict):
+            status = 200
+        return Response(), b"{}"
+
+
+def test_concurrent_calendar_calls():
+    """Hedged and timed-out Calendar attempts never share an Http"""
+    print("\n" + "="*60)
+    print("🧵 TEST: Concurrent Calendar Calls")
+    print("="*60)
+
+    pool = CredentialPool(token_dir=None, http_factory=CheckingHttp)
+    pool.add("minh", Credentials(token="t", expiry=utcnow() + timedelta(hours=1)))
+    http = pool.authorized_http("minh")
+    http.timeout = 5
+    # Aggressive hedging and a deadline shorter than the slow requests
+    endpoint = ResilientEndpoint("test", EndpointPolicy(timeout_s=0.02, min_hedge_delay_s=0.005, min_samples=1))
+    endpoint.call(lambda: http.request("https://calendar/warm"))
+
+    def sync_user(i):
+        for j in range(5):
+            uri = f"https://calendar/{'slow' if j % 2 else 'fast'}/{i}"
+            try:
+                endpoint.call(lambda: http.request(uri))
+            except UpstreamError:
+                pass
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(sync_user, range(8)))
+    time.sleep(0.05)  # let timed-out attempts finish
+
+    metrics = endpoint.metrics()
+    assert metrics["hedges"] and metrics["timeouts"], metrics
+    assert not CheckingHttp.overlaps, CheckingHttp.overlaps[:5]
+    assert len(CheckingHttp.created) > 1 and all(h.timeout == 5 for h in CheckingHttp.created)
+    print(f"   ✅ {metrics['hedges']} hedges, {metrics['timeouts']} timeouts, "
+          f"{len(CheckingHttp.created)} Https, no concurrent use of one Http")
+
+
+def main():
+    """Run all credential pool tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: OAuth Credential Pool")
+    print("="*70)
+
+    tests = [
+        ("Hot Path", test_hot_path),
+        ("Expired Token", test_expired_refreshed_once),
+        ("Background Refresh", test_background_refresh),
+        ("Sync Tool from Pool", test_sync_tool_for_user),
+        ("Concurrent Calendar Calls", test_concurrent_calendar_calls),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
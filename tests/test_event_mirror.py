@@ -0,0 +1,260 @@
+"""
+Test Calendar Event Mirror - with a Fake Calendar Server
+Run: python tests/test_event_mirror.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import tempfile
+
+from utils.event_mirror import EventMirror
+from utils.resilience import DEFAULT_POLICIES, ResilientEndpoint
+
+
+class GoneError(Exception):
+    """HttpError double for an expired sync token"""
+
+    class resp:
+        status = 410
+
+
+class HttpStatusError(Exception):
+    """HttpError double with a response status"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("resp", (), {"status": status})
+
+
+class FailingCalendarService:
+    """Calendar v3 double whose events.list always fails with one status"""
+
+    def __init__(self, status):
+        self.status = status
+
+    def events(self):
+        return self
+
+    def list(self, **kwargs):
+        raise HttpStatusError(self.status)
+
+
+class FakeCalendarService:
+    """Calendar v3 double for events.list with sync tokens and paging"""
+
+    def __init__(self):
+        self.store = {}
+        self.version = {}
+        self.clock = 0
+        self.requests = []
+        self.expired = set()
+
+    def put(self, event_id, start, end, atp=True, status="confirmed"):
+        self.clock += 1
+        event = {
+            "id": event_id,
+            "status": status,
+            "summary": f"[ATP] {event_id}",
+            "start": {"dateTime": start},
+            "end": {"dateTime": end},
+        }
+        if atp:
+            event["extendedProperties"] = {"private": {"atomicTaskId": f"task_{event_id}", "isAtomic": "true"}}
+        self.store[event_id] = event
+        self.version[event_id] = self.clock
+        return event
+
+    def delete(self, event_id):
+        self.clock += 1
+        self.store[event_id] = {"id": event_id, "status": "cancelled"}
+        self.version[event_id] = self.clock
+
+    def events(self):
+        return self
+
+    def list(self, calendarId, maxResults, syncToken=None, pageToken=None):
+        self.requests.append(syncToken)
+        if syncToken in self.expired:
+            raise GoneError("Sync token is no longer valid")
+        since = int(syncToken) if syncToken else 0
+        items = [
+            event for event_id, event in sorted(self.store.items())
+            if self.version[event_id] > since and (syncToken or event["status"] != "cancelled")
+        ]
+        offset = int(pageToken or 0)
+        page = {"items": items[offset:offset + maxResults]}
+        if offset + maxResults < len(items):
+            page["nextPageToken"] = str(offset + maxResults)
+        else:
+            page["nextSyncToken"] = str(self.clock)
+        self._response = page
+        return self
+
+    def execute(self):
+        return self._response
+
+
+def seed(service, count):
+    for i in range(count):
+        service.put(f"e{i}", f"2026-10-20T{6 + i % 12:02d}:00:00+07:00", f"2026-10-20T{6 + i % 12:02d}:25:00+07:00")
+    service.put("meeting", "2026-10-20T09:00:00+07:00", "2026-10-20T10:00:00+07:00", atp=False)
+
+
+def test_incremental_sync():
+    """Only changes are fetched; moves and deletions are logged"""
+    print("\n" + "="*60)
+    print("🔄 TEST: Incremental Sync")
+    print("="*60)
+
+    service = FakeCalendarService()
+    seed(service, 300)
+    mirror = EventMirror()
+
+    assert mirror.sync(service, "minh") == []
+    assert len(mirror) == 300 and len(service.requests) == 2  # 2 pages, non-ATP skipped
+    print("   ✅ First sync mirrors 300 ATP events over 2 pages")
+
+    service.put("e1", "2026-10-20T08:00:00Z", "2026-10-20T08:25:00Z")  # 07:00 → 15:00 local
+    service.delete("e2")
+    service.put("meeting", "2026-10-20T11:00:00+07:00", "2026-10-20T12:00:00+07:00", atp=False)
+    changes = mirror.sync(service, "minh")
+    assert len(service.requests) == 3
+    assert [(c.kind, c.atomic_task_id) for c in changes] == [("moved", "task_e1"), ("deleted", "task_e2")]
+    assert changes[0].shift_minutes == 8 * 60 and changes[0].to_start == 15 * 60
+    assert changes[1].to_date is None and len(mirror) == 299
+    print("   ✅ 1 request for the delta: 1 move (+480 min), 1 deletion")
+
+    assert mirror.sync(service, "minh") == []
+    assert len(mirror.changes("minh")) == 2 and mirror.changes(kind="deleted")[0].event_id == "e2"
+    print("   ✅ No changes, no new log rows")
+
+
+def test_expired_token_and_restart():
+    """A 410 falls back to a full sync that still finds deletions"""
+    print("\n" + "="*60)
+    print("♻️  TEST: Expired Sync Token")
+    print("="*60)
+
+    path = os.path.join(tempfile.mkdtemp(), "mirror.db")
+    service = FakeCalendarService()
+    seed(service, 5)
+    mirror = EventMirror(path)
+    mirror.sync(service, "minh")
+    mirror.sync(service, "lan")
+    mirror.close()
+
+    mirror = EventMirror(path)
+    token = mirror.sync_token("minh")
+    assert token is not None
+    service.expired.add(token)
+    service.delete("e3")
+    service.put("e4", "2026-10-21T10:00:00+07:00", "2026-10-21T10:50:00+07:00")
+
+    changes = mirror.sync(service, "minh")
+    assert service.requests[-2:] == [token, None]
+    assert sorted((c.kind, c.event_id) for c in changes) == [("deleted", "e3"), ("moved", "e4")]
+    moved = next(c for c in changes if c.kind == "moved")
+    assert (moved.to_date, moved.to_start, moved.to_end - moved.to_start) == ("2026-10-21", 600, 50)
+    assert mirror.sync_token("minh") != token
+    print("   ✅ Full re-sync after 410 found the move and the deletion")
+
+    assert len(mirror.events("lan")) == 5
+    print("   ✅ Other users' mirrors untouched")
+
+
+def test_record_and_failure():
+    """Created events are mirrored at once; failed syncs change nothing"""
+    print("\n" + "="*60)
+    print("📝 TEST: Record Created Events")
+    print("="*60)
+
+    service = FakeCalendarService()
+    mirror = EventMirror()
+    mirror.sync(service, "minh")
+    created = service.put("new", "2026-10-20T06:00:00+07:00", "2026-10-20T06:25:00+07:00")
+    mirror.record("minh", [created])
+    service.put("new", "2026-10-20T07:00:00+07:00", "2026-10-20T07:25:00+07:00")
+    assert [c.kind for c in mirror.sync(service, "minh")] == ["moved"]
+    print("   ✅ Move before the first sync still detected")
+
+    token = mirror.sync_token("minh")
+    service.delete("new")
+    original = service.list
+    service.list = lambda **kwargs: (_ for _ in ()).throw(ConnectionError("offline"))
+    assert mirror.sync(service, "minh") == []
+    assert mirror.sync_token("minh") == token and len(mirror) == 1
+    service.list = original
+    assert [c.kind for c in mirror.sync(service, "minh")] == ["deleted"]
+    print("   ✅ Failed sync kept the token; retry found the deletion")
+
+    try:
+        mirror.changes(kind="added")
+    except ValueError:
+        print("   ✅ Unknown kind rejected")
+    else:
+        raise AssertionError("Unknown kind should raise ValueError")
+
+
+def test_user_errors_keep_circuit_closed():
+    """One user's 4xx errors do not stop other users' syncs; outages still do"""
+    print("\n" + "="*60)
+    print("🚦 TEST: Per-User Errors and the Circuit")
+    print("="*60)
+
+    service = FakeCalendarService()
+    seed(service, 3)
+    mirror = EventMirror()
+    mirror.endpoint = ResilientEndpoint("calendar", DEFAULT_POLICIES["calendar"])
+
+    for i, status in enumerate([403, 404, 403, 404, 403, 404]):
+        assert mirror.sync(FailingCalendarService(status), f"user{i}") == []
+    metrics = mirror.endpoint.metrics()
+    assert metrics["circuit"] == "closed" and metrics["client_errors"] == 6 and metrics["failures"] == 0
+    mirror.sync(service, "minh")
+    assert len(mirror.events("minh")) == 3
+    print("   ✅ 6 users' 403/404 errors left the circuit closed; the next user synced")
+
+    for i in range(DEFAULT_POLICIES["calendar"].failure_threshold):
+        mirror.sync(FailingCalendarService(503), f"user{i}")
+    assert mirror.endpoint.metrics()["circuit"] == "open"
+    mirror.sync(service, "lan")
+    assert mirror.events("lan") == {}
+    print("   ✅ Repeated 503s still open the circuit")
+
+
+def main():
+    """Run all event mirror tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Calendar Event Mirror")
+    print("="*70)
+
+    tests = [
+        ("Incremental Sync", test_incremental_sync),
+        ("Expired Sync Token", test_expired_token_and_restart),
+        ("Record Created Events", test_record_and_failure),
+        ("Per-User Errors and the Circuit", test_user_errors_keep_circuit_closed),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Test Calendar Free/Busy Ingestion - with a Fake Calendar Server
+Run: python tests/test_free_busy.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+from datetime import date, datetime, timedelta
+
+from agents.bio_optimizer import BioOptimizerAgent
+from schemas.time_types import TimeRange
+from utils.free_busy import FreeBusyIngestor, subtract_busy
+from benchmarks.synthetic import make_profile, make_tasks, make_tips, make_timing_research
+
+DAY = date(2026, 10, 20)
+
+
+class FakeCalendarService:
+    """Calendar v3 double answering freebusy.query from a list of busy intervals"""
+
+    def __init__(self, busy, down=False):
+        self.busy = busy
+        self.down = down
+        self.bodies = []
+
+    def freebusy(self):
+        return self
+
+    def query(self, body):
+        self.bodies.append(body)
+        return self
+
+    def execute(self):
+        if self.down:
+            raise ConnectionError("calendar unavailable")
+        body = self.bodies[-1]
+        window_start = datetime.fromisoformat(body["timeMin"])
+        window_end = datetime.fromisoformat(body["timeMax"])
+        busy = [
+            interval for interval in self.busy
+            if datetime.fromisoformat(interval["start"].replace("Z", "+00:00")) < window_end
+            and datetime.fromisoformat(interval["end"].replace("Z", "+00:00")) > window_start
+        ]
+        return {"calendars": {item["id"]: {"busy": busy} for item in body["items"]}}
+
+
+MEETINGS = [
+    {"start": "2026-10-19T23:30:00Z", "end": "2026-10-20T00:00:00Z"},          # 06:30-07:00 local (UTC+7)
+    {"start": "2026-10-20T17:00:00+07:00", "end": "2026-10-20T18:00:00+07:00"},
+    {"start": "2026-10-22T22:00:00+07:00", "end": "2026-10-23T09:00:00+07:00"},  # overnight
+]
+
+
+def test_subtract_busy():
+    """Meetings split candidate slots; slivers are dropped"""
+    print("\n" + "="*60)
+    print("✂️  TEST: Subtract Busy Time")
+    print("="*60)
+
+    slots = [TimeRange.parse("09:00-11:00"), TimeRange.parse("14:00-15:00")]
+    busy = [TimeRange.parse("09:30-10:00"), TimeRange.parse("10:55-14:30")]
+    free = [str(slot) for slot in subtract_busy(slots, busy)]
+    assert free == ["09:00-09:30", "10:00-10:55", "14:30-15:00"], free
+    assert subtract_busy(slots, [TimeRange.parse("09:05-10:58")], min_minutes=10) == [slots[1]]
+    print(f"   ✅ {free}")
+
+
+def test_one_query_per_horizon():
+    """A week is read with one request, then served from the cache"""
+    print("\n" + "="*60)
+    print("📆 TEST: One Query per Horizon")
+    print("="*60)
+
+    service = FakeCalendarService(MEETINGS)
+    ingestor = FreeBusyIngestor(service, user_id="minh")
+    week = [DAY + timedelta(days=offset) for offset in range(7)]
+
+    busy = ingestor.busy(week)
+    assert len(service.bodies) == 1
+    assert [str(r) for r in busy[DAY]] == ["06:30-07:00", "17:00-18:00"]
+    assert [str(r) for r in busy[DAY + timedelta(days=2)]] == ["22:00-00:00"]
+    assert [str(r) for r in busy[DAY + timedelta(days=3)]] == ["00:00-09:00"]
+    assert busy[DAY + timedelta(days=1)] == []
+    print("   ✅ 7 days in 1 request; UTC converted and overnight meeting split")
+
+    ingestor.busy([DAY, DAY + timedelta(days=3)])
+    assert len(service.bodies) == 1
+    ingestor.invalidate(DAY)
+    ingestor.busy(week)
+    assert len(service.bodies) == 2
+    assert service.bodies[-1]["timeMin"].startswith("2026-10-20") and service.bodies[-1]["timeMax"].startswith("2026-10-21")
+    print("   ✅ Cached days reused; only the invalidated day re-read")
+
+
+def test_failure_degrades():
+    """A calendar outage schedules without busy time and is not cached"""
+    print("\n" + "="*60)
+    print("🔌 TEST: Calendar Outage")
+    print("="*60)
+
+    service = FakeCalendarService(MEETINGS, down=True)
+    ingestor = FreeBusyIngestor(service)
+    assert ingestor.busy([DAY]) == {DAY: []}
+    service.down = False
+    assert len(ingestor.busy([DAY])[DAY]) == 2
+    print("   ✅ Empty busy list during the outage; next call re-reads")
+
+
+def test_schedule_avoids_meetings():
+    """A3 only places tasks in free time"""
+    print("\n" + "="*60)
+    print("🗓️  TEST: Schedule Avoids Meetings")
+    print("="*60)
+
+    optimizer = BioOptimizerAgent(use_mock_search=True)
+    profile = make_profile()
+    tasks = make_tasks(6)
+    ingestor = FreeBusyIngestor(FakeCalendarService(MEETINGS))
+    free_slots = ingestor.free_slots([DAY], optimizer._get_available_time_slots(profile))[DAY]
+
+    output = optimizer.optimize_schedule(
+        tasks, make_tips(tasks), profile, timing_research=make_timing_research(), free_slots=free_slots
+    )
+    meetings = ingestor.busy([DAY])[DAY]
+    focus = [item for item in output.optimized_schedule if item.type == "focus"]
+    assert focus
+    assert not any(item.scheduled_time.overlaps(meeting) for item in focus for meeting in meetings)
+    print(f"   ✅ {len(focus)} focus blocks, none overlapping {len(meetings)} meetings")
+
+
+def main():
+    """Run all free/busy tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Calendar Free/Busy Ingestion")
+    print("="*70)
+
+    tests = [
+        ("Subtract Busy Time", test_subtract_busy),
+        ("One Query per Horizon", test_one_query_per_horizon),
+        ("Calendar Outage", test_failure_degrades),
+        ("Schedule Avoids Meetings", test_schedule_avoids_meetings),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
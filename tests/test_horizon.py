@@ -0,0 +1,217 @@
+"""
+Test Multi-Day Planning Horizon - with Fake Data
+Run: python tests/test_horizon.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+from datetime import date
+
+from agents.bio_optimizer import BioOptimizerAgent, DAILY_FOCUS_BUDGET
+from agents.json_formatter import JSONFormatterAgent
+from schemas.time_types import TimeRange
+from standalone.calendar_sync import CalendarSyncTool
+from benchmarks.synthetic import make_profile, make_tasks, make_tips
+
+
+class CountingSearchTool:
+    """Search stub that counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, max_results=5, **kwargs):
+        self.calls += 1
+        return {"results": [{"url": "https://example.com/ultradian"}]}
+
+    def search_workflow(self, activity, task_type="workflow"):
+        self.calls += 1
+        return [{"url": "https://example.com/timing"}]
+
+
+class FakeRequest:
+    def __init__(self, body, fail=False):
+        self.body, self.fail = body, fail
+
+    def execute(self):
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        return {"id": f"evt_{self.body['start']['dateTime']}", "htmlLink": "https://calendar/x"}
+
+
+class FakeBatch:
+    def __init__(self, service):
+        self.service, self.requests = service, []
+
+    def add(self, request, callback):
+        self.requests.append((request, callback))
+
+    def execute(self):
+        self.service.batches += 1
+        for n, (request, callback) in enumerate(self.requests):
+            try:
+                callback(str(n), request.execute(), None)
+            except Exception as e:
+                callback(str(n), None, e)
+
+
+class FakeCalendarService:
+    """Calendar service stub supporting batch requests"""
+
+    def __init__(self, fail_summaries=()):
+        self.batches = 0
+        self.inserted = []
+        self.fail_summaries = fail_summaries
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        self.inserted.append(body)
+        return FakeRequest(body, fail=body["summary"] in self.fail_summaries)
+
+    def new_batch_http_request(self):
+        return FakeBatch(self)
+
+
+def _make_agent():
+    agent = BioOptimizerAgent(use_mock_search=True)
+    agent.search_tool = CountingSearchTool()
+    return agent
+
+
+def test_spread_over_days():
+    """Tasks are spread over the horizon with one research pass"""
+    print("\n" + "="*60)
+    print("📆 TEST: Spread Over Days")
+    print("="*60)
+
+    agent = _make_agent()
+    tasks = make_tasks(12)
+    horizon = agent.optimize_horizon(
+        tasks, make_tips(tasks), make_profile(), days=4, start_date=date(2026, 1, 5)
+    )
+
+    assert [d.day for d in horizon.days] == [date(2026, 1, d) for d in (5, 6, 7, 8)]
+    assert agent.search_tool.calls == 2, "research should run once for the whole horizon"
+    print(f"   ✅ 4 days planned with {agent.search_tool.calls} search calls")
+
+    focus = [sum(i.duration_minutes for i in d.optimized_schedule if i.type == "focus") for d in horizon.days]
+    assert all(minutes > 0 for minutes in focus), focus
+    print(f"   ✅ Focus minutes per day: {focus}")
+
+    ids = [i.task_id for d in horizon.days for i in d.optimized_schedule if i.type == "focus"]
+    assert len(ids) == len(set(ids))
+    print("   ✅ Task IDs are unique across days")
+
+
+def test_fatigue_carries_over():
+    """Unpaid rest becomes fatigue that lowers the next day's budget"""
+    print("\n" + "="*60)
+    print("😴 TEST: Fatigue Carry-over")
+    print("="*60)
+
+    agent = _make_agent()
+    tasks = make_tasks(30)
+    profile = make_profile()
+    horizon = agent.optimize_horizon(tasks, make_tips(tasks), profile, days=3, start_date=date(2026, 1, 5))
+
+    base = DAILY_FOCUS_BUDGET[profile.energy_tomorrow]
+    assert horizon.days[0].carried_fatigue == 0 and horizon.days[0].focus_budget == base
+    for day in horizon.days[1:]:
+        assert day.focus_budget == max(base // 2, base - day.carried_fatigue)
+    print(f"   ✅ Budgets: {[d.focus_budget for d in horizon.days]} (base {base})")
+
+    if horizon.unscheduled_task_refs:
+        print(f"   ✅ {len(horizon.unscheduled_task_refs)} tasks reported as unscheduled")
+
+
+def test_free_slots_override():
+    """Per-day free-time index replaces peak hours for that day"""
+    print("\n" + "="*60)
+    print("🗂️  TEST: Per-day Free Slots")
+    print("="*60)
+
+    agent = _make_agent()
+    tasks = make_tasks(6)
+    busy_day = date(2026, 1, 6)
+    horizon = agent.optimize_horizon(
+        tasks, make_tips(tasks), make_profile(), days=2, start_date=date(2026, 1, 5),
+        free_slots={busy_day: [TimeRange.parse("20:00-21:00")]}
+    )
+    second = [i for i in horizon.days[1].optimized_schedule if i.type == "focus"]
+    assert second and all(i.scheduled_time.start >= 20 * 60 for i in second)
+    print("   ✅ Day 2 only uses its free slot (20:00-21:00)")
+
+
+def test_batch_sync():
+    """All days are synced in one batched pass with dated events"""
+    print("\n" + "="*60)
+    print("📅 TEST: Batch Calendar Sync")
+    print("="*60)
+
+    agent = _make_agent()
+    tasks = make_tasks(8)
+    profile = make_profile()
+    horizon = agent.optimize_horizon(tasks, make_tips(tasks), profile, days=3, start_date=date(2026, 1, 5))
+    plan = JSONFormatterAgent().format_horizon(horizon, "Synthetic goal", profile)
+    assert [p.metadata.plan_date for p in plan.plans] == ["2026-01-05", "2026-01-06", "2026-01-07"]
+
+    sync = CalendarSyncTool.__new__(CalendarSyncTool)
+    sync.service = FakeCalendarService()
+    sync.pending_sync = []
+    sync.event_mirror = None
+    results = sync.create_events(plan.model_dump(mode="json"))
+
+    expected = sum(len(p.editable_schedule) + len(p.rest_periods) for p in plan.plans)
+    assert len(results) == expected and all(r["success"] for r in results)
+    assert sync.service.batches == 1
+    days = {body["start"]["dateTime"][:10] for body in sync.service.inserted}
+    assert days == {"2026-01-05", "2026-01-06", "2026-01-07"}
+    print(f"   ✅ {expected} events across 3 days in {sync.service.batches} batch request")
+
+    failing = CalendarSyncTool.__new__(CalendarSyncTool)
+    failing.service = FakeCalendarService(fail_summaries={"☕ Rest: mandatory_break"})
+    failing.pending_sync = []
+    failing.event_mirror = None
+    results = failing.create_events(plan.model_dump(mode="json"))
+    assert any(not r["success"] for r in results) and any(r["success"] for r in results)
+    print("   ✅ Failures in a batch are reported per event")
+
+
+def main():
+    """Run all horizon tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Multi-Day Planning Horizon")
+    print("="*70)
+
+    tests = [
+        ("Spread Over Days", test_spread_over_days),
+        ("Fatigue Carry-over", test_fatigue_carries_over),
+        ("Per-day Free Slots", test_free_slots_override),
+        ("Batch Calendar Sync", test_batch_sync),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Test Plan Archive - with Fake Data
+Run: python tests/test_plan_archive.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import tempfile
+
+from agents.json_formatter import JSONFormatterAgent
+from agents.replanner import IncrementalReplanner
+from utils.plan_archive import PlanArchive, resolve_plan_date
+from benchmarks.synthetic import make_profile, make_schedule
+from schemas.agent3_output import BioInsights
+
+
+def create_plan(user_id: str, plan_date: str, chronotype: str = "lark", n: int = 6):
+    """FinalPlan with n/2 focus blocks of 25 min and n/2 rests of 25 min"""
+    return JSONFormatterAgent().format_final_plan(
+        optimized_schedule=make_schedule(n),
+        bio_insights=BioInsights(total_focus_time="", total_rest_time="", energy_curve_match="", warning=""),
+        goal="Chạy bộ 5km",
+        bio_profile=make_profile(chronotype),
+        plan_date=plan_date,
+        user_id=user_id
+    )
+
+
+def test_append_and_reload():
+    """Plans are appended as versions and reload exactly"""
+    print("\n" + "="*60)
+    print("🗄️  TEST: Append and Reload")
+    print("="*60)
+
+    path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    archive = PlanArchive(path)
+    plan = create_plan("minh", "2026-09-01")
+    first_id = archive.append(plan)
+    edited = IncrementalReplanner().replan(plan, {"action": "delete", "id": plan.editable_schedule[0].id})
+    second_id = archive.append(edited)
+    archive.close()
+
+    archive = PlanArchive(path)
+    assert len(archive) == 2
+    assert archive.get(first_id) == plan
+    assert archive.latest("minh", "2026-09-01") == edited and second_id > first_id
+    print("   ✅ Both versions kept; latest returns the edited plan")
+
+    undated = create_plan("minh", "")
+    assert resolve_plan_date(undated) > undated.metadata.created_at[:10]
+    print("   ✅ Empty plan_date archived as the day after creation")
+
+
+def test_focus_blocks_by_user_and_month():
+    """Focus blocks of one user over a date range, latest version per day"""
+    print("\n" + "="*60)
+    print("🔎 TEST: Focus Blocks Query")
+    print("="*60)
+
+    archive = PlanArchive()
+    for day in ("2026-08-31", "2026-09-01", "2026-09-15", "2026-10-01"):
+        archive.append(create_plan("minh", day))
+        archive.append(create_plan("lan", day))
+    archive.append(create_plan("minh", "2026-09-15", n=2))  # re-planned day
+
+    items = archive.items("minh", "2026-09-01", "2026-09-30", kind="focus")
+    assert [item.plan_date for item in items] == ["2026-09-01"] * 3 + ["2026-09-15"]
+    assert all(item.user_id == "minh" and item.duration_minutes == 25 for item in items)
+    assert items == sorted(items, key=lambda i: (i.plan_date, i.start_minute))
+    print(f"   ✅ {len(items)} focus blocks for September (older versions excluded)")
+
+    all_versions = archive.items("minh", "2026-09-15", "2026-09-15", kind="focus", latest_only=False)
+    assert len(all_versions) == 4
+    assert len(archive.items("minh", kind="rest")) == 4 * 3 - 3 + 1
+    print("   ✅ All versions and rest rows on request")
+
+    try:
+        archive.items("minh", kind="sleep")
+    except ValueError:
+        print("   ✅ Unknown kind rejected")
+    else:
+        raise AssertionError("Unknown kind should raise ValueError")
+
+
+def test_focus_minutes_by_chronotype():
+    """Average focus minutes per plan, by chronotype"""
+    print("\n" + "="*60)
+    print("📈 TEST: Focus Minutes by Chronotype")
+    print("="*60)
+
+    archive = PlanArchive()
+    archive.append(create_plan("minh", "2026-09-01", "lark", n=6))   # 75 min
+    archive.append(create_plan("minh", "2026-09-01", "lark", n=2))   # replaces it: 25 min
+    archive.append(create_plan("an", "2026-09-01", "lark", n=4))     # 50 min
+    archive.append(create_plan("lan", "2026-09-01", "owl", n=8))     # 100 min
+    archive.append(create_plan("lan", "2026-10-01", "owl", n=4))     # 50 min (outside range)
+
+    averages = archive.focus_minutes_by_chronotype("2026-09-01", "2026-09-30")
+    assert averages == {"lark": 37.5, "owl": 100.0}, averages
+    print(f"   ✅ {averages}")
+
+
+def main():
+    """Run all plan archive tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Plan Archive")
+    print("="*70)
+
+    tests = [
+        ("Append and Reload", test_append_and_reload),
+        ("Focus Blocks Query", test_focus_blocks_by_user_and_month),
+        ("Focus Minutes by Chronotype", test_focus_minutes_by_chronotype),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Test User Profile Store - with Fake Data
+Run: python tests/test_profile_store.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import tempfile
+
+from agents.goal_clarifier import GoalClarifierAgent
+from agents.json_formatter import JSONFormatterAgent
+from agents.bio_optimizer import BioOptimizerAgent
+from utils.profile_store import (
+    ProfileStore,
+    ENERGY_ASLEEP,
+    ENERGY_SLUMP,
+    ENERGY_NORMAL,
+    ENERGY_PEAK
+)
+
+BIO_CONTEXT = {
+    "chronotype": "lark",
+    "sleep_time": "22:00",
+    "wake_time": "05:30",
+    "peak_hours": ["06:00-08:00"],
+    "slump_hours": ["13:00-14:00"],
+    "fixed_commitments": ["Họp nhóm 09:00-10:00"],
+}
+
+GOALS_INFO = [{"goal": "Chạy bộ 5km", "deadline": "07:00 sáng mai", "estimated_duration": "45 phút", "energy_level": "high"}]
+
+
+class UnreachableLLM:
+    """LLM double that fails every call"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise AssertionError("Known answers must not need an LLM call")
+        return fail
+
+
+def create_agent(store: ProfileStore, goals) -> GoalClarifierAgent:
+    """A1 with a fixed goal breakdown and no LLM"""
+    agent = GoalClarifierAgent(profile_store=store)
+    agent.llm = UnreachableLLM()
+    agent._break_goals = lambda user_input: list(goals)
+    agent._extract_info = lambda user_input: {}
+    return agent
+
+
+def test_persistence():
+    """Profiles survive a restart and are isolated per user"""
+    print("\n" + "="*60)
+    print("💾 TEST: Persistence")
+    print("="*60)
+
+    path = os.path.join(tempfile.mkdtemp(), "profiles.db")
+    store = ProfileStore(path)
+    store.learn("minh", BIO_CONTEXT, GOALS_INFO)
+    store.learn("lan", {"chronotype": "owl"})
+    store.close()
+
+    store = ProfileStore(path)
+    assert len(store) == 2
+    profile = store.get("minh")
+    assert profile.chronotype == "lark" and str(profile.peak_hours[0]) == "06:00-08:00"
+    assert store.habit("minh", "chạy bộ sáng mai").deadline == "07:00 sáng mai"
+    assert store.get("lan").peak_hours == [] and store.habit("lan", "Chạy bộ 5km") is None
+    assert store.get("nobody") is None
+    print("   ✅ 2 tenants reloaded; habits keyed by activity")
+
+    store.learn("lan", {"chronotype": ""})
+    assert store.get("lan").chronotype == "owl"
+    print("   ✅ Missing answers do not erase learned ones")
+
+
+def test_compiled_cache():
+    """Compiled profiles are cached, evicted LRU and invalidated on save"""
+    print("\n" + "="*60)
+    print("⚡ TEST: Compiled Profile Cache")
+    print("="*60)
+
+    store = ProfileStore(cache_size=2)
+    for user_id in ("a", "b", "c"):
+        store.learn(user_id, BIO_CONTEXT)
+
+    compiled = store.compiled("a")
+    assert store.compiled("a") is compiled
+    store.compiled("b")
+    store.compiled("c")  # evicts "a"
+    assert store.compiled("a") is not compiled
+    print("   ✅ Cache hit, then LRU eviction")
+
+    levels = {minute: compiled.level_at(minute) for minute in (6 * 60, 9 * 60 + 30, 13 * 60, 16 * 60, 23 * 60, 5 * 60)}
+    assert levels == {
+        360: ENERGY_PEAK, 570: ENERGY_ASLEEP, 780: ENERGY_SLUMP,
+        960: ENERGY_NORMAL, 1380: ENERGY_ASLEEP, 300: ENERGY_ASLEEP,
+    }
+    print("   ✅ Energy vector: peak, meeting, slump, normal and sleep slots")
+
+    store.learn("a", {"chronotype": "owl"})
+    assert store.compiled("a").bio_context["chronotype"] == "owl"
+    print("   ✅ Saving a profile invalidates its compiled copy")
+
+
+def test_returning_user_skips_questions():
+    """Goals with remembered answers are not asked again"""
+    print("\n" + "="*60)
+    print("🔁 TEST: Returning User")
+    print("="*60)
+
+    store = ProfileStore()
+    store.learn("minh", BIO_CONTEXT, GOALS_INFO)
+
+    agent = create_agent(store, ["Chạy bộ 5km"])
+    agent.set_user("minh")
+    result = agent.chat("Mai tôi muốn chạy bộ 5km")
+    assert result["context_complete"]
+    assert result["collected_info"]["all_goals_info"][0]["estimated_duration"] == "45 phút"
+    assert result["collected_info"]["user_id"] == "minh"
+    print("   ✅ Known goal completed in the first turn without an LLM call")
+
+    agent = create_agent(store, ["Viết báo cáo", "Chạy bộ"])
+    agent.set_user("minh")
+    result = agent.chat("Mai viết báo cáo rồi chạy bộ")
+    assert not result["context_complete"] and "Chạy bộ: hoàn thành 07:00" not in result["response"]
+    agent._extract_info = lambda user_input: {"deadline": "17:00", "estimated_duration": "2 giờ"}
+    result = agent.chat("Trước 17:00, khoảng 2 giờ")
+    assert result["context_complete"] and "Mình nhớ" in result["response"]
+    assert len(result["collected_info"]["all_goals_info"]) == 2
+    print("   ✅ Only the new goal was clarified")
+
+    agent = create_agent(store, ["Chạy bộ 5km"])
+    result = agent.chat("Mai tôi muốn chạy bộ 5km")
+    assert not result["context_complete"]
+    print("   ✅ Anonymous users are always asked")
+
+
+def test_profile_fills_bio():
+    """Stored bio fields replace A1's defaults and the user ID reaches the plan"""
+    print("\n" + "="*60)
+    print("🧬 TEST: Profile in the Pipeline")
+    print("="*60)
+
+    store = ProfileStore()
+    store.learn("minh", BIO_CONTEXT)
+    agent = create_agent(store, [])
+
+    output = agent.local_goal_spec({
+        "all_goals_info": [{"goal": "Đọc sách", "deadline": "21:00", "estimated_duration": "30 phút"}],
+        "user_id": "minh",
+        "wake_time": "06:00",
+    })
+    assert output.user_id == "minh"
+    assert output.user_bio_profile.chronotype == "lark"
+    assert str(output.user_bio_profile.wake_time) == "06:00"
+    assert store.habit("minh", "Đọc sách") is not None
+    print("   ✅ Profile used under this run's answers; new habit learned")
+
+    a3 = BioOptimizerAgent(use_mock_search=True)
+    a3_output = a3.optimize_schedule([], [], output.user_bio_profile, timing_research={})
+    plan = JSONFormatterAgent().format_final_plan(
+        optimized_schedule=a3_output.optimized_schedule,
+        bio_insights=a3_output.bio_insights,
+        goal=output.clarified_goal,
+        bio_profile=output.user_bio_profile,
+        user_id=output.user_id
+    )
+    assert plan.metadata.user_id == "minh"
+    print("   ✅ Metadata.user_id set")
+
+
+def main():
+    """Run all profile store tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: User Profile Store")
+    print("="*70)
+
+    tests = [
+        ("Persistence", test_persistence),
+        ("Compiled Profile Cache", test_compiled_cache),
+        ("Returning User", test_returning_user_skips_questions),
+        ("Profile in the Pipeline", test_profile_fills_bio),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
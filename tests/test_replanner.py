@@ -0,0 +1,235 @@
+"""
+Test Incremental Replanner - Pure Python
+Run: python tests/test_replanner.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import time
+
+from agents.replanner import IncrementalReplanner
+from schemas.final_plan import (
+    FinalPlan,
+    EditableScheduleItem,
+    EditableFields,
+    RestPeriodEditable,
+    UserContextSummary,
+    Metadata
+)
+from schemas.time_types import TimeRange
+
+
+def _item(item_id: str, time_range: str, can_delete: bool = True) -> EditableScheduleItem:
+    time = TimeRange.parse(time_range)
+    return EditableScheduleItem(
+        id=item_id,
+        time=time,
+        task=f"Task {item_id}",
+        evidence="Timing: Peak performance window",
+        editable_fields=EditableFields(time=time, duration=time.duration, can_delete=can_delete)
+    )
+
+
+def _rest(time_range: str) -> RestPeriodEditable:
+    return RestPeriodEditable(time=time_range, rationale="Pomodoro short break for cognitive recovery")
+
+
+def create_plan() -> FinalPlan:
+    """08:00-09:35 morning run of tasks plus one afternoon task"""
+    return FinalPlan(
+        metadata=Metadata(goal="Viết báo cáo"),
+        user_context_summary=UserContextSummary(
+            chronotype="lark",
+            total_scheduled_hours="90 minutes",
+            notes="Optimized for lark chronotype. "
+        ),
+        editable_schedule=[
+            _item("atomic_1", "08:00-08:25", can_delete=False),
+            _item("atomic_2", "08:30-08:55"),
+            _item("atomic_3", "09:00-09:15"),
+            _item("atomic_4", "09:15-09:30"),
+            _item("atomic_5", "14:00-14:25"),
+        ],
+        rest_periods=[
+            _rest("08:25-08:30"),
+            _rest("08:55-09:00"),
+            _rest("09:30-09:35"),
+            _rest("14:25-14:30"),
+        ]
+    )
+
+
+def _times(plan: FinalPlan):
+    return {item.id: str(item.time) for item in plan.editable_schedule}
+
+
+def _rests(plan: FinalPlan):
+    return [str(rest.time) for rest in plan.rest_periods]
+
+
+def _assert_no_overlaps(plan: FinalPlan):
+    blocks = sorted(
+        [item.time for item in plan.editable_schedule] + [rest.time for rest in plan.rest_periods],
+        key=lambda t: t.start
+    )
+    for a, b in zip(blocks, blocks[1:]):
+        assert not a.overlaps(b), f"{a} overlaps {b}"
+
+
+def test_extend_pushes_run():
+    """Extending a task pushes the rest of its run, not the afternoon"""
+    print("\n" + "="*60)
+    print("⏩ TEST: Extend")
+    print("="*60)
+
+    plan = create_plan()
+    new_plan = IncrementalReplanner().replan(plan, {"action": "extend", "id": "atomic_2", "minutes": 10})
+    times = _times(new_plan)
+    assert times["atomic_2"] == "08:30-09:05"
+    assert times["atomic_3"] == "09:10-09:25" and times["atomic_4"] == "09:25-09:40"
+    assert times["atomic_5"] == "14:00-14:25"
+    assert "14:25-14:30" in _rests(new_plan)
+    _assert_no_overlaps(new_plan)
+    assert new_plan.user_context_summary.total_scheduled_hours == "115 minutes"
+    print(f"   ✅ {times}")
+
+    assert _times(plan)["atomic_2"] == "08:30-08:55"
+    print("   ✅ Original plan untouched")
+
+
+def test_move_and_delete():
+    """Moving into an occupied slot reflows; deleting drops the task's rest"""
+    print("\n" + "="*60)
+    print("🔀 TEST: Move and Delete")
+    print("="*60)
+
+    replanner = IncrementalReplanner()
+    moved = replanner.replan(create_plan(), {"action": "move", "id": "atomic_5", "time": "09:20-09:45"})
+    _assert_no_overlaps(moved)
+    assert _times(moved)["atomic_5"] == "09:35-10:00"
+    print(f"   ✅ Moved task placed after the block it collided with: {_times(moved)['atomic_5']}")
+
+    deleted = replanner.replan(create_plan(), {"action": "delete", "id": "atomic_2"})
+    assert "atomic_2" not in _times(deleted)
+    assert "08:55-09:00" not in _rests(deleted)
+    _assert_no_overlaps(deleted)
+    print(f"   ✅ Deleted atomic_2, rests now {_rests(deleted)}")
+
+    try:
+        replanner.replan(create_plan(), {"action": "delete", "id": "atomic_1"})
+    except ValueError as e:
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("atomic_1 cannot be deleted")
+
+
+def test_mark_done():
+    """Done tasks become fixed; later tasks cannot be pushed onto them"""
+    print("\n" + "="*60)
+    print("✅ TEST: Mark Done")
+    print("="*60)
+
+    replanner = IncrementalReplanner()
+    plan = replanner.replan(create_plan(), {"action": "done", "id": "atomic_3", "actual_minutes": 20})
+    item = next(i for i in plan.editable_schedule if i.id == "atomic_3")
+    assert item.status == "done" and not item.editable_fields.can_move
+    assert _times(plan)["atomic_4"] == "09:20-09:35"
+    _assert_no_overlaps(plan)
+    print(f"   ✅ atomic_3 done in 20 min, atomic_4 now {_times(plan)['atomic_4']}")
+
+    try:
+        replanner.replan(plan, {"action": "extend", "id": "atomic_2", "minutes": 30})
+    except ValueError as e:
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("Extending into a done task should fail")
+
+
+def test_day_bound_and_rests():
+    """Reflows stop at midnight; reused rests follow the rule due now"""
+    print("\n" + "="*60)
+    print("🌙 TEST: Day Bound and Rest Rules")
+    print("="*60)
+
+    replanner = IncrementalReplanner()
+    try:
+        replanner.replan(create_plan(), {"action": "extend", "id": "atomic_1", "minutes": 900})
+    except ValueError as e:
+        assert "midnight" in str(e)
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("A reflow past midnight should fail")
+
+    plan = create_plan()
+    plan.editable_schedule = [_item("atomic_1", "10:00-10:25"), _item("atomic_2", "16:00-16:25")]
+    plan.rest_periods = [
+        RestPeriodEditable(time="10:25-10:45", rationale="Ultradian rhythm recovery after 90+ min focus"),
+        RestPeriodEditable(time="16:25-16:35", rationale="Pomodoro short break for cognitive recovery", extended_minutes=5),
+    ]
+    moved = replanner.replan(plan, {"action": "move", "id": "atomic_1", "time": "11:00-11:25"})
+    rest = moved.rest_periods[0]
+    assert str(rest.time) == "11:25-11:30" and rest.rationale.startswith("Pomodoro")
+    print(f"   ✅ Lone 25-min chunk now gets a 5-min Pomodoro rest ({rest.time})")
+
+    moved = replanner.replan(plan, {"action": "move", "id": "atomic_2", "time": "17:00-17:25"})
+    assert str(moved.rest_periods[-1].time) == "17:25-17:35"
+    print("   ✅ The user's 5-min extension is kept")
+
+
+def test_replan_is_fast():
+    """A single edit on a long day takes milliseconds"""
+    print("\n" + "="*60)
+    print("⚡ TEST: Replan Speed")
+    print("="*60)
+
+    items = [_item(f"atomic_{n}", f"{6 + n // 4:02d}:{(n % 4) * 15:02d}-{6 + n // 4:02d}:{(n % 4) * 15 + 10:02d}") for n in range(60)]
+    plan = create_plan()
+    plan.editable_schedule = items
+    plan.rest_periods = []
+
+    replanner = IncrementalReplanner()
+    start = time.perf_counter()
+    for _ in range(20):
+        replanner.replan(plan, {"action": "extend", "id": "atomic_30", "minutes": 5})
+    elapsed_ms = (time.perf_counter() - start) * 1000 / 20
+    print(f"   ✅ {elapsed_ms:.2f} ms per edit (60 tasks)")
+    assert elapsed_ms < 50
+
+
+def main():
+    """Run all replanner tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Incremental Replanner")
+    print("="*70)
+
+    tests = [
+        ("Extend", test_extend_pushes_run),
+        ("Day Bound and Rest Rules", test_day_bound_and_rests),
+        ("Move and Delete", test_move_and_delete),
+        ("Mark Done", test_mark_done),
+        ("Replan Speed", test_replan_is_fast),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
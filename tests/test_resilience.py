@@ -0,0 +1,237 @@
+"""
+Test Resilience Layer - Pure Python
+Run: python tests/test_resilience.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+import time
+
+from utils.resilience import (
+    EndpointPolicy,
+    ResilientEndpoint,
+    DeadlineExceeded,
+    CircuitOpenError,
+    UpstreamError
+)
+from utils.web_search import WebSearchTool
+
+
+def create_endpoint(**overrides) -> ResilientEndpoint:
+    """Endpoint with short test timings"""
+    settings = {"timeout_s": 0.2, "min_hedge_delay_s": 0.01, "min_samples": 5,
+                "failure_threshold": 3, "reset_timeout_s": 0.05}
+    settings.update(overrides)
+    return ResilientEndpoint("test", EndpointPolicy(**settings))
+
+
+def test_deadline():
+    """A slow call fails at its deadline, or returns the fallback"""
+    print("\n" + "="*60)
+    print("⏰ TEST: Deadline")
+    print("="*60)
+
+    endpoint = create_endpoint(timeout_s=0.05, hedge=False)
+    start = time.perf_counter()
+    try:
+        endpoint.call(time.sleep, 0.5)
+    except DeadlineExceeded as e:
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("Slow call should exceed its deadline")
+    assert time.perf_counter() - start < 0.2
+
+    assert endpoint.call(time.sleep, 0.5, fallback=lambda error: "cached") == "cached"
+    metrics = endpoint.metrics()
+    assert metrics["timeouts"] == 2 and metrics["fallbacks"] == 1
+    print("   ✅ Fallback used instead of raising; timeouts counted")
+
+
+def test_hedged_request():
+    """A straggler is overtaken by a hedged duplicate after the p95 delay"""
+    print("\n" + "="*60)
+    print("🏇 TEST: Hedged Request")
+    print("="*60)
+
+    endpoint = create_endpoint(timeout_s=1.0)
+    for _ in range(5):
+        endpoint.call(lambda: "warm")
+    assert endpoint.hedge_delay() is not None
+
+    attempt = itertools.count()
+
+    def straggler():
+        if next(attempt) == 0:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    assert endpoint.call(straggler) == "fast"
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    metrics = endpoint.metrics()
+    assert metrics["hedges"] == 1 and metrics["hedge_wins"] == 1
+    assert elapsed_ms < 250
+    print(f"   ✅ Hedge answered in {elapsed_ms:.0f} ms instead of 500 ms")
+
+
+def test_circuit_breaker():
+    """Repeated failures open the circuit; a trial call closes it again"""
+    print("\n" + "="*60)
+    print("🔌 TEST: Circuit Breaker")
+    print("="*60)
+
+    endpoint = create_endpoint(hedge=False)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ConnectionError("503")
+
+    for _ in range(3):
+        try:
+            endpoint.call(failing)
+        except UpstreamError:
+            pass
+    assert endpoint.breaker.state == "open"
+
+    try:
+        endpoint.call(failing)
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("Open circuit should fail fast")
+    assert len(calls) == 3
+    print("   ✅ Circuit opened after 3 failures; 4th call short-circuited")
+
+    time.sleep(0.06)
+    assert endpoint.call(lambda: "ok") == "ok"
+    assert endpoint.breaker.state == "closed"
+    print("   ✅ Trial call after cool-down closed the circuit")
+
+
+def test_stream():
+    """Streams pass chunks through under the deadline and circuit breaker"""
+    print("\n" + "="*60)
+    print("🔤 TEST: Stream")
+    print("="*60)
+
+    endpoint = create_endpoint(timeout_s=0.1)
+
+    def tokens(words, delay=0.0):
+        for word in words:
+            time.sleep(delay)
+            yield word
+
+    assert list(endpoint.stream(tokens, ["a", "b", "c"])) == ["a", "b", "c"]
+    print("   ✅ Chunks arrive in order")
+
+    received = []
+    try:
+        for chunk in endpoint.stream(tokens, ["a", "b", "c"], 0.06):
+            received.append(chunk)
+    except DeadlineExceeded as e:
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("Stalled stream should exceed its deadline")
+    assert received == ["a"]
+
+    def failing():
+        raise ConnectionError("503")
+        yield
+
+    for _ in range(3):
+        try:
+            list(endpoint.stream(failing))
+        except UpstreamError:
+            pass
+    assert endpoint.breaker.state == "open"
+    try:
+        list(endpoint.stream(tokens, ["a"]))
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("Open circuit should fail fast")
+    metrics = endpoint.metrics()
+    assert metrics["timeouts"] == 1 and metrics["hedges"] == 0
+    print("   ✅ Failures open the circuit; streams are never hedged")
+
+    time.sleep(0.06)
+    trial = endpoint.stream(tokens, ["a", "b", "c"])
+    assert next(trial) == "a" and endpoint.breaker.state == "half_open"
+    trial.close()  # consumer gone, e.g. client disconnect
+    assert endpoint.call(lambda: "ok") == "ok" and endpoint.breaker.state == "closed"
+    print("   ✅ An abandoned half-open trial stream releases the trial")
+
+
+def test_search_degraded_mode():
+    """Tavily failures serve the last good response for the query"""
+    print("\n" + "="*60)
+    print("🔎 TEST: Search Degraded Mode")
+    print("="*60)
+
+    class FakeClient:
+        down = False
+
+        def search(self, **kwargs):
+            if self.down:
+                raise ConnectionError("Tavily unavailable")
+            return {"results": [{"title": "Pacing", "url": "https://example.com/pacing", "content": "..."}]}
+
+    tool = WebSearchTool(api_key="test-key", endpoint=create_endpoint(hedge=False))
+    tool.client = FakeClient()
+    fresh = tool.search("running tips")
+    assert not fresh.get("degraded")
+
+    tool.client.down = True
+    cached = tool.search("running tips")
+    assert cached["degraded"] and cached["results"] == fresh["results"]
+    print("   ✅ Cached evidence served while Tavily is down")
+
+    assert tool.search("swimming tips") == {"results": [], "degraded": True}
+    print("   ✅ Unknown query degrades to empty results")
+
+    results = tool.search_workflow("swimming", "tips")
+    assert results == [] and results.degraded
+    tool.client.down = False
+    time.sleep(0.06)  # circuit cool-down
+    assert not tool.search_workflow("swimming", "tips").degraded
+    print("   ✅ search_workflow reports degraded results (kept out of A2 caches)")
+
+
+def main():
+    """Run all resilience tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Resilience Layer")
+    print("="*70)
+
+    tests = [
+        ("Deadline", test_deadline),
+        ("Hedged Request", test_hedged_request),
+        ("Circuit Breaker", test_circuit_breaker),
+        ("Stream", test_stream),
+        ("Search Degraded Mode", test_search_degraded_mode),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Test Declarative Scheduling Policy (load, validate, compile) - Offline
+Run: python tests/test_scheduling_policy.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import json
+import tempfile
+from datetime import date
+
+from agents.bio_optimizer import BioOptimizerAgent
+from agents.replanner import IncrementalReplanner
+from utils.scheduling_policy import DEFAULT_POLICY, load_policy
+from benchmarks.synthetic import make_profile, make_tasks, make_timing_research
+
+CUSTOM = {
+    "name": "long-blocks",
+    "chunking": {"high": {"max_minutes": 50, "label": "Block"}},
+    "rest_rules": [
+        {"focus_minutes": 100, "rest_minutes": 30, "reason": "Long block recovery"},
+        {"focus_minutes": 50, "rest_minutes": 10, "reason": "Block break"},
+    ],
+    "max_slots": 2,
+}
+
+
+def _write_policy(data):
+    """Write a policy file and return its path"""
+    path = os.path.join(tempfile.mkdtemp(), "policy.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return path
+
+
+def test_no_lost_minutes():
+    """Splits add up to the task; chunks longer than a slot continue elsewhere"""
+    print("\n" + "="*60)
+    print("⏱️  TEST: No Lost Minutes")
+    print("="*60)
+
+    for difficulty in ("low", "medium", "high"):
+        for minutes in range(0, 301):
+            chunks = DEFAULT_POLICY.split(difficulty, minutes)
+            assert sum(chunks) == minutes, (difficulty, minutes, chunks)
+            limit = DEFAULT_POLICY.chunk_rule(difficulty).max_minutes
+            assert limit is None or max(chunks) <= limit or len(chunks) == 1
+    assert DEFAULT_POLICY.split("high", 60) == (20, 20, 20)
+    assert DEFAULT_POLICY.split("medium", 20) == (10, 10)
+    assert DEFAULT_POLICY.split("high", 60) is DEFAULT_POLICY.split("high", 60), "Splits are memoized"
+    print("   ✅ Every split adds up to the task (60 min high → 3 × 20, not 2 × 25)")
+
+    agent = BioOptimizerAgent(use_mock_search=True)
+    tasks = make_tasks(3)
+    tasks[0].difficulty, tasks[0].estimated_duration = "high", "PT60M"
+    atomic = agent._break_into_atomic_tasks(tasks[0], {"principle": "", "trigger": "", "friction_reduction": ""}, make_profile())
+    assert [a["name"] for a in atomic] == [f"{tasks[0].name} (Pomodoro {i}/3)" for i in (1, 2, 3)]
+    assert atomic[0]["description"].endswith("- Pomodoro session 1")
+    print("   ✅ Labels come from the policy")
+
+    tasks[1].difficulty, tasks[1].estimated_duration = "low", "PT150M"
+    horizon = agent.optimize_horizon(tasks, [], make_profile(), days=10, start_date=date(2026, 3, 2))
+    placed = sum(item.duration_minutes for day in horizon.days for item in day.optimized_schedule if item.type == "focus")
+    requested = sum(agent._parse_duration(task.estimated_duration) for task in tasks)
+    assert placed == requested and not horizon.unscheduled_task_refs, (placed, requested)
+    ids = [item.task_id for day in horizon.days for item in day.optimized_schedule]
+    assert len(ids) == len(set(ids)), "Continued pieces need their own IDs"
+    print(f"   ✅ Horizon places all {requested} requested minutes (150 min task continued across slots/days)")
+
+
+def test_load_policy():
+    """Files are validated once, cached, and merged over the defaults"""
+    print("\n" + "="*60)
+    print("📄 TEST: Load Policy")
+    print("="*60)
+
+    path = _write_policy(CUSTOM)
+    policy = load_policy(path)
+    assert load_policy(path) is policy, "Unchanged files are not re-validated"
+    assert policy.name == "long-blocks" and policy.fingerprint != DEFAULT_POLICY.fingerprint
+    assert policy.chunk_rule("medium").max_minutes == 15, "Unspecified difficulties keep their defaults"
+    assert policy.split("high", 120) == (40, 40, 40)
+    assert policy.fallback_slots == DEFAULT_POLICY.fallback_slots
+    print("   ✅ Loaded, cached, unspecified fields default")
+
+    invalid = [
+        {**CUSTOM, "rest_rules": list(reversed(CUSTOM["rest_rules"]))},
+        {**CUSTOM, "chunking": {"extreme": {"max_minutes": 5}}},
+        {**CUSTOM, "chunking": {"high": {"max_minutes": 0}}},
+        {**CUSTOM, "fallback_slots": ["25:00-26:00"]},
+    ]
+    for data in invalid:
+        try:
+            load_policy(_write_policy(data))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Invalid policy accepted: {data}")
+    print(f"   ✅ {len(invalid)} invalid policies rejected with ValueError")
+
+
+def test_tenant_policy():
+    """A3 and the replanner follow the policy they are given"""
+    print("\n" + "="*60)
+    print("🏢 TEST: Tenant Policy")
+    print("="*60)
+
+    policy = load_policy(_write_policy(CUSTOM))
+    agent = BioOptimizerAgent(use_mock_search=True)
+    tenant = agent.with_policy(policy)
+    assert tenant.llm is agent.llm and agent.policy is DEFAULT_POLICY
+    print("   ✅ with_policy shares the LLM and leaves the original agent alone")
+
+    tasks = make_tasks(4)
+    for task in tasks:
+        task.difficulty, task.estimated_duration = "high", "PT100M"
+    profile = make_profile()
+    assert tenant._get_available_time_slots(profile) == profile.peak_hours[:2]
+    output = tenant.optimize_schedule(tasks, [], profile, timing_research=make_timing_research())
+    focus = [item for item in output.optimized_schedule if item.type == "focus"]
+    rests = {item.rationale_timing.why_this_time for item in output.optimized_schedule if item.type == "rest"}
+    assert {item.duration_minutes for item in focus} == {50}
+    assert rests <= {"Long block recovery", "Block break"} and rests
+    print(f"   ✅ 50-min blocks and the tenant's rest rules ({len(focus)} blocks)")
+
+    replanner = IncrementalReplanner(policy)
+    assert replanner.policy.full_rest == 30
+    assert IncrementalReplanner().policy is DEFAULT_POLICY
+    print("   ✅ Replanner uses the same rest rules")
+
+
+def main():
+    """Run all scheduling policy tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Scheduling Policy")
+    print("="*70)
+
+    tests = [
+        ("No Lost Minutes", test_no_lost_minutes),
+        ("Load Policy", test_load_policy),
+        ("Tenant Policy", test_tenant_policy),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
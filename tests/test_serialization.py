@@ -0,0 +1,177 @@
+"""
+Test Plan Serialization Backends - Pure Python
+Run: python tests/test_serialization.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+
+from agents import domain_researcher, goal_clarifier
+from agents.json_formatter import JSONFormatterAgent
+from schemas.final_plan import FinalPlan, PlanHorizon
+from utils.serialization import SERIALIZERS, get_serializer
+from benchmarks.synthetic import make_profile, make_schedule
+from schemas.agent3_output import BioInsights
+
+
+def _make_plan() -> FinalPlan:
+    return JSONFormatterAgent().format_final_plan(
+        optimized_schedule=make_schedule(6),
+        bio_insights=BioInsights(
+            total_focus_time="75 minutes",
+            total_rest_time="15 minutes",
+            energy_curve_match="16%"
+        ),
+        goal="Chạy bộ 5km vào sáng mai",
+        bio_profile=make_profile()
+    )
+
+
+def _available_backends():
+    backends = []
+    for name in SERIALIZERS:
+        try:
+            backends.append(get_serializer(name))
+        except ImportError:
+            print(f"   ⏭️  {name} not installed, skipped")
+    return backends
+
+
+def test_backends_roundtrip():
+    """Every installed backend round-trips a plan and agrees on content"""
+    print("\n" + "="*60)
+    print("🔁 TEST: Backend Round-trip")
+    print("="*60)
+
+    plan = _make_plan()
+    expected = plan.model_dump(mode="json")
+    for serializer in _available_backends():
+        for compact in (False, True):
+            data = serializer.dumps(plan, compact=compact)
+            assert json.loads(data) == expected, f"{serializer.name} content differs"
+            restored = serializer.loads(data, FinalPlan)
+            assert restored.model_dump(mode="json") == expected
+        print(f"   ✅ {serializer.name}: pretty and compact round-trip")
+
+
+def test_compact_and_unicode():
+    """Compact output has no indentation; Vietnamese text is not escaped"""
+    print("\n" + "="*60)
+    print("📦 TEST: Compact Mode")
+    print("="*60)
+
+    plan = _make_plan()
+    for serializer in _available_backends():
+        pretty = serializer.dumps(plan)
+        compact = serializer.dumps(plan, compact=True)
+        assert b"\n" not in compact and len(compact) < len(pretty)
+        assert "Chạy bộ".encode("utf-8") in compact
+        print(f"   ✅ {serializer.name}: {len(pretty)} → {len(compact)} bytes")
+
+
+def test_save_and_load_file():
+    """save_to_file creates the directory and load_from_file validates"""
+    print("\n" + "="*60)
+    print("💾 TEST: Save and Load File")
+    print("="*60)
+
+    agent = JSONFormatterAgent()
+    plan = _make_plan()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nested", "plan.json")
+        agent.save_to_file(plan, path, compact=True)
+        loaded = agent.load_from_file(path)
+        assert loaded.model_dump(mode="json") == plan.model_dump(mode="json")
+        print("   ✅ Saved into a new directory and loaded back")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"goal": "broken"}')
+        try:
+            agent.load_from_file(path)
+        except ValueError:
+            print("   ✅ Invalid plan file rejected")
+        else:
+            raise AssertionError("Invalid plan file should be rejected")
+
+        horizon = PlanHorizon(goal="Chạy bộ 5km", plans=[plan, plan], unscheduled_task_refs=["t9"])
+        horizon_path = os.path.join(tmp, "horizon.json")
+        agent.save_to_file(horizon, horizon_path)
+        loaded = agent.load_from_file(horizon_path)
+        assert isinstance(loaded, PlanHorizon), type(loaded).__name__
+        assert loaded.model_dump(mode="json") == horizon.model_dump(mode="json")
+        print("   ✅ Horizon file loaded back as PlanHorizon")
+
+
+def test_llm_wrappers():
+    """Structured-output wrappers are module-level models read with the v2 API"""
+    print("\n" + "="*60)
+    print("🧩 TEST: LLM Output Wrappers")
+    print("="*60)
+
+    for module, names in ((goal_clarifier, ("GoalsList", "ExtractedInfo")),
+                          (domain_researcher, ("TaskList", "TipList", "WarningList"))):
+        for name in names:
+            assert getattr(module, name).__module__ == module.__name__, name
+    print("   ✅ Schemas are built once at import, not per LLM call")
+
+    info = goal_clarifier.ExtractedInfo.model_validate({"deadline": "chiều mai", "energy_level": None})
+    assert info.model_dump(exclude_none=True) == {"deadline": "chiều mai"}
+    try:
+        domain_researcher.WarningList.model_validate({"warnings": "not a list"})
+    except ValueError:
+        print("   ✅ Missing fields dropped; malformed LLM output rejected")
+    else:
+        raise AssertionError("Malformed LLM output should be rejected")
+
+
+def test_unknown_backend():
+    """Unknown backend names fail fast"""
+    print("\n" + "="*60)
+    print("⚠️  TEST: Unknown Backend")
+    print("="*60)
+
+    try:
+        get_serializer("yaml")
+    except ValueError as e:
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("Unknown backend should raise ValueError")
+
+
+def main():
+    """Run all serialization tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Plan Serialization Backends")
+    print("="*70)
+
+    tests = [
+        ("Backend Round-trip", test_backends_roundtrip),
+        ("Compact Mode", test_compact_and_unicode),
+        ("Save and Load File", test_save_and_load_file),
+        ("LLM Output Wrappers", test_llm_wrappers),
+        ("Unknown Backend", test_unknown_backend),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
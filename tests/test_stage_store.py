@@ -0,0 +1,203 @@
+"""
+Test Stage Store (resumable pipeline) - Offline
+Run: python tests/test_stage_store.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from main import AtomicTaskPlanner
+from utils.stage_store import StageStore
+from benchmarks.synthetic import make_timing_research
+
+BIO_CONTEXT = {
+    "goals": ["Chạy bộ 5km"],
+    "all_goals_info": [{"goal": "Chạy bộ 5km", "deadline": "18:00", "estimated_duration": "45 phút", "energy_level": "high"}],
+    "chronotype": "lark",
+    "peak_hours": ["06:00-08:00"],
+}
+
+
+def create_planner(store: StageStore):
+    """Planner with offline stages that count their calls"""
+    planner = AtomicTaskPlanner(use_mock_search=True, stage_store=store)
+    calls = {"a1": 0, "a2": 0, "a3": 0}
+    failures = {"a3": 0}
+    a1, a3 = planner.agent_a1, planner.agent_a3
+    optimize_schedule = a3.optimize_schedule
+
+    def generate_goal_spec(user_request, bio_context):
+        calls["a1"] += 1
+        return a1.local_goal_spec(bio_context)
+
+    def optimize(**kwargs):
+        calls["a3"] += 1
+        if failures["a3"]:
+            failures["a3"] -= 1
+            raise RuntimeError("A3 crashed")
+        return optimize_schedule(timing_research=make_timing_research(), **kwargs)
+
+    planner.degraded_a2 = False
+
+    def research_domain(goal, bio_context, speculation=None):
+        calls["a2"] += 1
+        output = planner.fallback_planner.research_goal({"goal": goal})
+        return output.model_copy(update={"degraded": planner.degraded_a2})
+
+    a1.generate_goal_spec = generate_goal_spec
+    planner.agent_a2.research_domain = research_domain
+    a3.optimize_schedule = optimize
+    return planner, calls, failures
+
+
+def test_keys():
+    """Keys depend on content, not on dict order"""
+    print("\n" + "="*60)
+    print("🔑 TEST: Content Keys")
+    print("="*60)
+
+    store = StageStore()
+    assert store.key("a1", "x", {"a": 1, "b": 2}) == store.key("a1", "x", {"b": 2, "a": 1})
+    assert store.key("a1", "x", {"a": 1}) != store.key("a1", "x", {"a": 2})
+    assert store.key("a2", "goal") != store.key("a3", "goal")
+    assert StageStore(version="2").key("a2", "goal") != store.key("a2", "goal")
+    print("   ✅ Stable across dict order; changes with content, stage and version")
+
+    try:
+        store.key("a4", "x")
+    except ValueError:
+        print("   ✅ Unknown stage rejected")
+    else:
+        raise AssertionError("Unknown stage should raise ValueError")
+
+
+def _put_same_key(directory: str) -> int:
+    """Worker process: write one A2 key repeatedly (batch workers share A2 keys)"""
+    store = StageStore(directory)
+    key = store.key("a2", "Chạy bộ 5km")
+    output = AtomicTaskPlanner(use_mock_search=True).fallback_planner.research_goal({"goal": "Chạy bộ 5km"})
+    for _ in range(30):
+        store.put("a2", key, output)
+    return os.getpid()
+
+
+def test_concurrent_writers():
+    """Forked workers writing the same key do not collide on the temp file"""
+    print("\n" + "="*60)
+    print("🍴 TEST: Concurrent Writers")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=3, mp_context=context) as pool:
+            pids = list(pool.map(_put_same_key, [tmp] * 3))
+        store = StageStore(tmp)
+        assert store.get("a2", store.key("a2", "Chạy bộ 5km")) is not None
+        leftovers = [name for name in os.listdir(os.path.join(tmp, "a2")) if name.endswith(".tmp")]
+        assert not leftovers, leftovers
+        print(f"   ✅ {len(set(pids))} processes wrote the same key; no errors or temp files left")
+
+
+def test_resume_after_failure():
+    """A failed A3 is retried without repeating A1 and A2"""
+    print("\n" + "="*60)
+    print("♻️  TEST: Resume After Failure")
+    print("="*60)
+
+    planner, calls, failures = create_planner(StageStore())
+    failures["a3"] = 1
+    try:
+        planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("A3 failure should propagate")
+
+    plan = planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    assert calls == {"a1": 1, "a2": 1, "a3": 2} and plan.editable_schedule
+    print("   ✅ Retry ran only A3")
+
+    again = planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    assert calls == {"a1": 1, "a2": 1, "a3": 2}
+    assert again.editable_schedule == plan.editable_schedule
+    print("   ✅ Identical re-run served entirely from the store")
+
+
+def test_degraded_not_stored():
+    """A degraded A2 output is used for its run but not stored"""
+    print("\n" + "="*60)
+    print("🩹 TEST: Degraded Output Not Stored")
+    print("="*60)
+
+    planner, calls, _ = create_planner(StageStore())
+    planner.degraded_a2 = True
+    planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    planner.degraded_a2 = False
+    planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    assert calls["a2"] == 2 and calls["a1"] == 1
+    print("   ✅ A2 re-ran after the degraded run; the healthy output was stored")
+
+
+def test_bio_change_reuses_research():
+    """A changed bio profile re-runs A1 and A3 but reuses A2"""
+    print("\n" + "="*60)
+    print("🧬 TEST: Bio Change Reuses A2")
+    print("="*60)
+
+    directory = tempfile.mkdtemp()
+    planner, calls, _ = create_planner(StageStore(directory))
+    planner.run_pipeline("Mai tôi muốn chạy bộ 5km", BIO_CONTEXT)
+    owl = {**BIO_CONTEXT, "chronotype": "owl", "peak_hours": ["20:00-22:00"]}
+    plan = planner.run_pipeline("Mai tôi muốn chạy bộ 5km", owl)
+    assert calls == {"a1": 2, "a2": 1, "a3": 2}
+    assert plan.user_context_summary.chronotype == "owl"
+    print("   ✅ A2 reused for the new profile")
+
+    store = StageStore(directory)
+    planner, calls, _ = create_planner(store)
+    planner.run_pipeline("Mai tôi muốn chạy bộ 5km", owl)
+    assert calls == {"a1": 0, "a2": 0, "a3": 0} and store.hits == 3
+    print("   ✅ Persisted outputs reused after a restart")
+
+
+def main():
+    """Run all stage store tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Stage Store")
+    print("="*70)
+
+    tests = [
+        ("Content Keys", test_keys),
+        ("Resume After Failure", test_resume_after_failure),
+        ("Degraded Output Not Stored", test_degraded_not_stored),
+        ("Bio Change Reuses A2", test_bio_change_reuses_research),
+        ("Concurrent Writers", test_concurrent_writers),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Test Streaming Pipeline - with Recorded Fixtures
+Run: python tests/test_streaming.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import json
+
+from langchain_core.messages import AIMessageChunk
+
+from main import AtomicTaskPlanner
+from schemas.final_plan import FinalPlan
+from schemas.pipeline_events import STAGES, stage_result
+from utils.resilience import EndpointPolicy, ResilientEndpoint, UpstreamError
+from benchmarks.replay import ReplayLLM, ReplaySearchTool, load_fixture, load_requests, FIXTURES_DIR
+
+
+def create_planner():
+    """Planner wired to the recorded 'running' fixture"""
+    fixture = load_fixture("running")
+    planner = AtomicTaskPlanner(use_mock_search=True)
+    llm = ReplayLLM(fixture)
+    search = ReplaySearchTool(fixture)
+    for agent in (planner.agent_a1, planner.agent_a2, planner.agent_a3):
+        agent.llm = llm
+        if hasattr(agent, "search_tool"):
+            agent.search_tool = search
+    request = load_requests(os.path.join(FIXTURES_DIR, "requests.jsonl"))[0]
+    return planner, llm, request
+
+
+def test_event_order():
+    """Stages stream in order and every stage ends with its result"""
+    print("\n" + "="*60)
+    print("📡 TEST: Event Order")
+    print("="*60)
+
+    planner, _, request = create_planner()
+    events = list(planner.stream_pipeline(request["user_request"], request["bio_context"]))
+
+    started = [e.stage for e in events if e.type == "started"]
+    results = [e.stage for e in events if e.type == "result"]
+    assert started == list(STAGES) and results == list(STAGES)
+    assert isinstance(events[-1].data, FinalPlan)
+    print(f"   ✅ {len(events)} events, stages {' → '.join(started)}, FinalPlan last")
+
+    a3_result = next(e.data for e in events if e.stage == "a3" and e.type == "result")
+    placed = [e.data for e in events if e.type in ("schedule_item", "rest")]
+    assert placed == a3_result.optimized_schedule
+    print(f"   ✅ {len(placed)} schedule items streamed in schedule order")
+
+    json.loads(events[-1].to_json())
+    print("   ✅ Events serialize to JSON lines")
+
+
+def test_tasks_before_tips():
+    """Tasks are yielded before the tips LLM call runs"""
+    print("\n" + "="*60)
+    print("⏱️  TEST: Time to First Task")
+    print("="*60)
+
+    planner, llm, request = create_planner()
+    a1_output = planner.agent_a1.generate_goal_spec(request["user_request"], request["bio_context"])
+    calls_before = llm.calls
+
+    stream = planner.agent_a2.research_domain_stream(a1_output.clarified_goal, {})
+    first = next(stream)
+    assert first.type == "task"
+    assert llm.calls - calls_before == 1  # only the task generation call
+    output = stage_result(stream)
+    assert output.tasks[0] == first.data
+    print(f"   ✅ First task after 1 LLM call ({llm.calls - calls_before} calls in total)")
+
+
+def test_token_streaming():
+    """SMART goal and coach replies stream token by token"""
+    print("\n" + "="*60)
+    print("🔤 TEST: Token Streaming")
+    print("="*60)
+
+    planner, _, request = create_planner()
+
+    def streaming_llm(prompt_value):
+        for word in ["Chạy", " 5km", " trước", " 07:00"]:
+            yield AIMessageChunk(content=word)
+
+    agent = planner.agent_a1
+    agent.llm = streaming_llm
+    events = list(agent.generate_goal_spec_stream(request["user_request"], request["bio_context"]))
+    tokens = [e.data for e in events if e.type == "token"]
+    assert tokens == ["Chạy", " 5km", " trước", " 07:00"]
+    assert events[-1].data.clarified_goal == "Chạy 5km trước 07:00"
+    print(f"   ✅ SMART goal streamed as {len(tokens)} tokens")
+
+    agent.reset()
+    agent._extract_info = lambda user_input: {}
+    agent.chat("Chạy 5km")  # first turn answers from a template
+    received = []
+    result = agent.chat("Chưa biết", on_token=received.append)
+    assert len(received) == 4 and "".join(received) == result["response"]
+    print("   ✅ Coach reply delivered to on_token chunk by chunk")
+
+
+def test_smart_goal_outage():
+    """A Gemini failure in the SMART-goal stream switches to the local pipeline"""
+    print("\n" + "="*60)
+    print("🌩️  TEST: SMART Goal Outage")
+    print("="*60)
+
+    planner, _, request = create_planner()
+
+    def failing_llm(prompt_value):
+        raise ConnectionError("503 Service Unavailable")
+        yield
+
+    agent = planner.agent_a1
+    agent.llm = failing_llm
+    agent.llm_endpoint = ResilientEndpoint("test", EndpointPolicy(timeout_s=1.0, min_hedge_delay_s=0.1))
+    try:
+        agent.generate_goal_spec(request["user_request"], request["bio_context"])
+    except UpstreamError as e:
+        print(f"   ✅ {e}")
+    else:
+        raise AssertionError("Upstream failure should not be swallowed")
+
+    plan = planner.run_pipeline(request["user_request"], request["bio_context"])
+    assert plan.metadata.degraded and "503" in plan.metadata.degraded_reason
+    print("   ✅ run_pipeline falls back to the local pipeline")
+
+
+def main():
+    """Run all streaming tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Streaming Pipeline")
+    print("="*70)
+
+    tests = [
+        ("Event Order", test_event_order),
+        ("Time to First Task", test_tasks_before_tips),
+        ("Token Streaming", test_token_streaming),
+        ("SMART Goal Outage", test_smart_goal_outage),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Test A2 Template Store - with Fake Data
+Run: python tests/test_template_store.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from agents.domain_researcher import DomainResearcherAgent
+from schemas.agent2_output import DomainResearcherOutput
+from utils.resilience import EndpointPolicy, ResilientEndpoint
+from utils.template_store import TemplateStore, normalize_activity
+from benchmarks.synthetic import make_tasks, make_tips
+
+
+def create_output(domain: str = "running") -> DomainResearcherOutput:
+    tasks = make_tasks(3)
+    return DomainResearcherOutput(domain=domain, tasks=tasks, pro_tips=make_tips(tasks), warnings=["Warm up first"])
+
+
+def create_agent(store: TemplateStore):
+    """A2 with activity extraction and research stubbed out (counts research runs)"""
+    agent = DomainResearcherAgent(use_mock_search=True, template_store=store)
+    agent.research_calls = 0
+
+    def research(goal, activity):
+        agent.research_calls += 1
+        return create_output(activity)
+
+    agent._extract_activity = lambda goal: "Running"
+    agent._research = research
+    return agent
+
+
+def test_normalize_activity():
+    """Keys ignore case, punctuation and extra spaces"""
+    print("\n" + "="*60)
+    print("🔑 TEST: Normalize Activity")
+    print("="*60)
+
+    assert normalize_activity("  Writing-Report ") == "writing report"
+    assert normalize_activity("Chạy  bộ!") == "chạy bộ"
+    print("   ✅ 'Writing-Report' → 'writing report', 'Chạy  bộ!' → 'chạy bộ'")
+
+
+def test_warm_path_skips_research():
+    """Second request for the same activity is served from the template"""
+    print("\n" + "="*60)
+    print("🔥 TEST: Warm Path")
+    print("="*60)
+
+    store = TemplateStore()
+    agent = create_agent(store)
+    first = agent.research_domain("Run 5km tomorrow", {})
+    second = agent.research_domain("Go for a run", {})
+    assert agent.research_calls == 1
+    assert second.model_dump() == first.model_dump()
+    assert second is not first
+    print("   ✅ One research run for two requests; callers get their own copy")
+
+
+def test_persistence_and_version():
+    """Templates survive a restart; a version bump invalidates them"""
+    print("\n" + "="*60)
+    print("💾 TEST: Persistence and Version")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        TemplateStore(tmp).put("running", create_output())
+
+        reloaded = TemplateStore(tmp).lookup("Running")
+        assert reloaded is not None and reloaded.output.domain == "running"
+        print("   ✅ Template loaded from disk by a new store")
+
+        assert TemplateStore(tmp, version="2").lookup("running") is None
+        print("   ✅ Entries from another version are ignored")
+
+
+def _put_running(directory: str) -> int:
+    """Worker process: store the same activity repeatedly"""
+    store = TemplateStore(directory)
+    output = create_output()
+    for _ in range(30):
+        store.put("running", output)
+    return os.getpid()
+
+
+def test_concurrent_writers():
+    """Forked workers storing the same activity do not collide on the temp file"""
+    print("\n" + "="*60)
+    print("🍴 TEST: Concurrent Writers")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=3, mp_context=context) as pool:
+            pids = list(pool.map(_put_running, [tmp] * 3))
+        assert TemplateStore(tmp).lookup("running") is not None
+        leftovers = [name for _, _, files in os.walk(tmp) for name in files if name.endswith(".tmp")]
+        assert not leftovers, leftovers
+        print(f"   ✅ {len(set(pids))} processes stored the same activity; no errors or temp files left")
+
+
+def test_stale_refresh_in_background():
+    """Stale templates are served immediately and refreshed off the request path"""
+    print("\n" + "="*60)
+    print("🔄 TEST: Background Refresh")
+    print("="*60)
+
+    store = TemplateStore(ttl_seconds=0)
+    agent = create_agent(store)
+    agent.research_domain("Run 5km", {})
+    created_at = store.lookup("running").created_at
+
+    output = agent.research_domain("Run 5km", {})
+    assert output.domain == "Running"
+    store.close()  # wait for the refresh
+    assert agent.research_calls == 2
+    assert store.lookup("running").created_at > created_at
+    print("   ✅ Stale entry served, refreshed once in the background")
+
+
+def test_degraded_not_stored():
+    """Research that fell back to degraded mode is served once, not stored"""
+    print("\n" + "="*60)
+    print("🩹 TEST: Degraded Output Not Stored")
+    print("="*60)
+
+    store = TemplateStore()
+    agent = DomainResearcherAgent(use_mock_search=True, template_store=store)
+    agent._extract_activity = lambda goal: "running"
+    agent._generate_tasks = lambda goal, activity, workflow_results: make_tasks(3)
+    agent.llm_endpoint = ResilientEndpoint("test", EndpointPolicy(timeout_s=1.0, min_hedge_delay_s=0.1, failure_threshold=1))
+    agent.llm_endpoint.breaker.record_failure()  # Gemini circuit open
+
+    output = agent.research_domain("Run 5km tomorrow", {})
+    assert output.degraded and output.tasks and not output.pro_tips and not output.warnings
+    assert store.lookup("running") is None
+    print("   ✅ Tasks without tips/warnings returned, template store left empty")
+
+    stored = store.put("running", create_output())
+    assert store.put("running", output) is None and store.lookup("running") is stored
+    print("   ✅ A degraded refresh keeps the previous template")
+
+
+def main():
+    """Run all template store tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: A2 Template Store")
+    print("="*70)
+
+    tests = [
+        ("Normalize Activity", test_normalize_activity),
+        ("Warm Path", test_warm_path_skips_research),
+        ("Persistence and Version", test_persistence_and_version),
+        ("Background Refresh", test_stale_refresh_in_background),
+        ("Degraded Output Not Stored", test_degraded_not_stored),
+        ("Concurrent Writers", test_concurrent_writers),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Test Compiled Time Types - Pure Python
+Run: python tests/test_time_types.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+from schemas.time_types import DurationParseError, TimeOfDay, TimeRange, TimeParseError, parse_duration, parse_minutes
+from schemas.agent1_output import UserBioProfile
+from schemas.final_plan import RestPeriodEditable
+
+
+def test_parse_and_render():
+    """Ranges parse once into minutes and render back unchanged"""
+    print("\n" + "="*60)
+    print("⏰ TEST: Parse and Render")
+    print("="*60)
+
+    r = TimeRange.parse("08:00-09:30")
+    assert (r.start, r.end, r.duration) == (480, 570, 90)
+    assert str(r) == "08:00-09:30"
+    assert str(TimeOfDay.parse("07:05")) == "07:05"
+    assert f"{TimeOfDay.parse('23:59')}" == "23:59"
+    print("   ✅ 08:00-09:30 → (480, 570), rendered back unchanged")
+
+    overnight = TimeRange.parse("23:00-01:00")
+    assert overnight.duration == 120 and str(overnight) == "23:00-01:00"
+    print("   ✅ Overnight range 23:00-01:00 lasts 120 minutes")
+
+
+def test_malformed_times_raise():
+    """Malformed input is an error instead of silently becoming 00:00"""
+    print("\n" + "="*60)
+    print("⚠️  TEST: Malformed Times")
+    print("="*60)
+
+    for bad in ["8h-9h", "25:00-26:00", "08:60-09:00", "", None]:
+        try:
+            TimeRange.parse(bad)
+        except TimeParseError:
+            print(f"   ✅ {bad!r} rejected")
+        else:
+            raise AssertionError(f"{bad!r} should be rejected")
+
+    assert parse_minutes(0) == 0 and parse_minutes(1440) == 1440
+    for bad in [-5, 1441, 5000, True]:
+        try:
+            parse_minutes(bad)
+        except TimeParseError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} minutes should be rejected")
+    print("   ✅ Integer minutes outside 0-1440 rejected")
+
+
+def test_compare_and_overlap():
+    """Comparisons are integer comparisons"""
+    print("\n" + "="*60)
+    print("🔀 TEST: Compare and Overlap")
+    print("="*60)
+
+    a = TimeRange.parse("08:00-09:00")
+    b = TimeRange.parse("08:30-09:30")
+    c = TimeRange.parse("09:00-10:00")
+    assert a < b < c
+    assert a.overlaps(b) and not a.overlaps(c)
+    assert a.contains(540) and not a.contains(541)
+    assert a.shift(60) == c
+    print("   ✅ Ordering, overlap and containment")
+
+
+def test_schema_boundary():
+    """Schemas accept strings, hold TimeRange and dump strings in JSON mode"""
+    print("\n" + "="*60)
+    print("📐 TEST: Schema Boundary")
+    print("="*60)
+
+    profile = UserBioProfile(
+        chronotype="lark",
+        sleep_time="23:00",
+        wake_time="06:00",
+        meal_times={"breakfast": "07:00"},
+        peak_hours=["06:00-08:00"],
+        energy_tomorrow="high"
+    )
+    assert isinstance(profile.peak_hours[0], TimeRange)
+    assert profile.wake_time == 360
+    dumped = profile.model_dump(mode="json")
+    assert dumped["peak_hours"] == ["06:00-08:00"] and dumped["wake_time"] == "06:00"
+    print("   ✅ UserBioProfile round-trips through JSON mode")
+
+    rest = RestPeriodEditable.model_validate_json('{"time": "10:25-10:30", "rationale": "Pomodoro"}')
+    assert rest.time.duration == 5
+    print("   ✅ RestPeriodEditable parses time from JSON")
+
+
+def test_to_datetimes():
+    """Ranges materialize to timezone-aware datetimes"""
+    print("\n" + "="*60)
+    print("📅 TEST: Date and Timezone")
+    print("="*60)
+
+    start, end = TimeRange.parse("23:30-00:15").to_datetimes(date(2026, 1, 5), "Asia/Ho_Chi_Minh")
+    assert start.isoformat() == "2026-01-05T23:30:00+07:00"
+    assert end.isoformat() == "2026-01-06T00:15:00+07:00"
+    print(f"   ✅ {start.isoformat()} → {end.isoformat()}")
+
+    rest = RestPeriodEditable(time=TimeRange.parse("23:30-00:15").on("2026-01-05", "Asia/Ho_Chi_Minh"), rationale="Wind down")
+    loaded = RestPeriodEditable.model_validate_json(rest.model_dump_json())
+    assert loaded.time == rest.time and loaded.time.day == date(2026, 1, 5) and loaded.time.tz == "Asia/Ho_Chi_Minh"
+    assert loaded.time.duration == 45
+    assert RestPeriodEditable(time="10:25-10:30", rationale="Pomodoro").model_dump(mode="json")["time"] == "10:25-10:30"
+    print("   ✅ Date and timezone survive JSON; unpinned ranges stay HH:MM-HH:MM")
+
+
+def test_parse_duration():
+    """ISO 8601 durations in hours, minutes, seconds and days; lenient LLM input"""
+    print("\n" + "="*60)
+    print("⏳ TEST: Parse Duration")
+    print("="*60)
+
+    cases = {"PT30M": 30, "PT1H": 60, "PT1H30M": 90, "PT90S": 2, "PT1.5H": 90, "P1DT2H": 1560, "PT0S": 0}
+    for text, minutes in cases.items():
+        assert parse_duration(text) == minutes, (text, parse_duration(text))
+    print(f"   ✅ Strict: {', '.join(f'{text}={minutes}' for text, minutes in cases.items())}")
+
+    for bad in ["P30M", "pt1h", "1 hour", "P1Y", "PT", "P1DT", "PT1.5H30M", "", None]:
+        try:
+            parse_duration(bad)
+        except DurationParseError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} should be rejected in strict mode")
+    print("   ✅ Strict rejects months/years, lowercase, free text and misplaced fractions")
+
+    lenient = {" pt1h ": 60, "P30M": 30, "P1H": 60, "45": 45, "1 hour": 60, "1 tiếng 30 phút": 90, "1,5 giờ": 90, "PT20M (approx.)": 20}
+    for text, minutes in lenient.items():
+        assert parse_duration(text, strict=False) == minutes, (text, parse_duration(text, strict=False))
+    try:
+        parse_duration("soon", strict=False)
+    except DurationParseError:
+        pass
+    else:
+        raise AssertionError("Unreadable text should raise in lenient mode too")
+    print("   ✅ Lenient reads missing T, bare minutes and free text; unreadable text still raises")
+
+
+def main():
+    """Run all time type tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Compiled Time Types")
+    print("="*70)
+
+    tests = [
+        ("Parse and Render", test_parse_and_render),
+        ("Malformed Times", test_malformed_times_raise),
+        ("Compare and Overlap", test_compare_and_overlap),
+        ("Schema Boundary", test_schema_boundary),
+        ("Date and Timezone", test_to_datetimes),
+        ("Parse Duration", test_parse_duration),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
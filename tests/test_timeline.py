@@ -0,0 +1,119 @@
+"""
+Test Timeline Placement (rests, cursors, overlap check) - Offline
+Run: python tests/test_timeline.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test")
+
+import random
+
+from agents.bio_optimizer import BioOptimizerAgent
+from schemas.time_types import TimeRange
+from utils.scheduling_policy import DEFAULT_POLICY
+from utils.timeline import free_intervals, place, placed_minutes
+from utils.validators import find_overlaps
+from benchmarks.synthetic import make_profile, make_tasks, make_tips, make_timing_research
+
+REST_RULES = DEFAULT_POLICY.rest_rules
+
+
+def _ranges(*texts):
+    return [TimeRange.parse(text) for text in texts]
+
+
+def test_free_intervals():
+    """Overlapping and touching slots merge; the earliest-listed slot sets the order"""
+    print("\n" + "="*60)
+    print("🧱 TEST: Free Intervals")
+    print("="*60)
+
+    slots = _ranges("17:00-19:00", "06:00-08:00", "06:00-07:00", "11:00-12:00", "16:00-17:00", "12:00-12:30")
+    intervals = [str(interval) for interval in free_intervals(slots)]
+    assert intervals == ["16:00-19:00", "06:00-08:00", "11:00-12:30"], intervals
+    print(f"   ✅ {intervals}")
+
+
+def test_rest_policies():
+    """Pomodoro breaks do not reset the ultradian count; rests never spill out of an interval"""
+    print("\n" + "="*60)
+    print("☕ TEST: Rest Policies")
+    print("="*60)
+
+    placements = list(place([25] * 5, _ranges("08:00-12:00"), REST_RULES))
+    rests = [(str(TimeRange(p.start, p.end)), REST_RULES[p.index].rest_minutes) for p in placements if p.kind == "rest"]
+    assert rests == [("08:25-08:30", 5), ("08:55-09:00", 5), ("09:25-09:30", 5), ("09:55-10:15", 20), ("10:40-10:45", 5)], rests
+    print("   ✅ Three Pomodoro breaks, then the ultradian break after 100 min of focus")
+
+    placements = list(place([25, 25], _ranges("08:00-08:27", "14:00-15:00"), REST_RULES))
+    assert [(p.kind, p.start) for p in placements] == [("focus", 480), ("focus", 840), ("rest", 865)]
+    print("   ✅ A rest that does not fit closes the interval; the next chunk moves on")
+
+    placements = list(place([90, 10], _ranges("08:00-08:30", "14:00-16:00"), REST_RULES))
+    assert [(p.kind, p.index, p.end - p.start) for p in placements] == [
+        ("focus", 0, 30), ("focus", 0, 60), ("rest", 1, 5), ("focus", 1, 10)
+    ], placements
+    print("   ✅ A chunk longer than an empty interval continues in the next one")
+
+    placements = list(place([90, 10], _ranges("08:00-08:30"), REST_RULES))
+    assert placed_minutes([90, 10], placements) == (0, 30, 1)
+    assert placed_minutes([90, 10], list(place([90, 10], _ranges("08:00-12:00"), REST_RULES))) == (2, 0, 0)
+    print("   ✅ placed_minutes reports the chunk left half-placed")
+
+
+def test_no_overlaps():
+    """A3 schedules are overlap-free, including fallback slots that overlap peaks"""
+    print("\n" + "="*60)
+    print("🚦 TEST: No Overlaps")
+    print("="*60)
+
+    agent = BioOptimizerAgent(use_mock_search=True)
+    rng = random.Random(5)
+    for seed in range(40):
+        tasks = make_tasks(rng.randint(1, 12), seed=seed)
+        schedule = agent._generate_schedule(tasks, make_tips(tasks), make_profile(), make_timing_research())
+        assert not find_overlaps([item.scheduled_time for item in schedule])
+        ids = [item.task_id for item in schedule]
+        assert len(ids) == len(set(ids)), "Duplicate item IDs would duplicate calendar events"
+    print("   ✅ 40 random queues: no overlaps, unique IDs")
+
+    overlaps = find_overlaps(_ranges("08:00-09:00", "10:00-10:30", "08:30-08:45", "08:45-09:15"))
+    assert overlaps == [(0, 2), (0, 3)], overlaps
+    assert not find_overlaps(_ranges("08:00-08:25", "08:25-08:30"))
+    print("   ✅ find_overlaps reports overlaps, touching ranges are fine")
+
+
+def main():
+    """Run all timeline tests"""
+    print("\n" + "="*70)
+    print("🔧 TEST: Timeline Placement")
+    print("="*70)
+
+    tests = [
+        ("Free Intervals", test_free_intervals),
+        ("Rest Policies", test_rest_policies),
+        ("No Overlaps", test_no_overlaps),
+    ]
+
+    results = []
+    for name, test in tests:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            results.append((name, False))
+
+    print("\n" + "="*70)
+    print("📊 TEST SUMMARY")
+    print("="*70)
+    for name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"   {status}: {name}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Activity canonicalization index
+
+Maps free-form goals and activity labels ("chạy bộ", "Running", "go for a
+jog", "runing") to stable canonical activity IDs so that caches and templates
+keyed by activity get hits. Matching is local: an alias table (English and
+Vietnamese; unaccented input matches accented aliases) plus a character n-gram nearest-neighbour
+lookup for typos and variants. Only goals with no confident match need the
+LLM.
+
+Generic single words ("run", "chạy", "write", "học") are only trusted when
+they are the goal's only content word ("Chạy 10km tối nay", "Jogging before
+work"); in "Run a marketing campaign" or "Chạy deadline dự án" they are a
+different activity, so such goals go to the LLM.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# Canonical activity ID → aliases (first alias is the display label)
+CANONICAL_ACTIVITIES: Dict[str, List[str]] = {
+    "running": ["running", "run", "jogging", "jog", "go for a run", "chạy bộ", "chạy", "chạy 5km"],
+    "walking": ["walking", "walk", "brisk walk", "đi bộ"],
+    "cycling": ["cycling", "bike ride", "biking", "đạp xe"],
+    "swimming": ["swimming", "swim", "bơi", "bơi lội"],
+    "strength_training": ["strength training", "gym", "workout", "weight lifting", "tập gym", "tập tạ", "tập thể hình"],
+    "yoga": ["yoga", "tập yoga"],
+    "meditation": ["meditation", "meditate", "mindfulness", "thiền", "ngồi thiền"],
+    "writing_report": ["writing report", "write report", "write a report", "report writing", "viết báo cáo", "làm báo cáo"],
+    "writing": ["writing", "write", "viết", "viết bài", "viết blog"],
+    "studying": ["studying", "study", "học bài", "ôn bài", "học"],
+    "exam_preparation": ["exam preparation", "exam prep", "ôn thi", "luyện thi"],
+    "language_learning": ["language learning", "learn english", "học tiếng anh", "học ngoại ngữ", "luyện tiếng anh"],
+    "reading": ["reading", "read", "read a book", "đọc sách"],
+    "programming": ["programming", "coding", "code", "lập trình", "viết code"],
+    "presentation": ["presentation prep", "presentation", "thuyết trình", "chuẩn bị slide"],
+    "cleaning": ["cleaning", "tidy up", "dọn dẹp", "dọn nhà"],
+    "cooking": ["cooking", "cook", "meal prep", "nấu ăn"],
+    "email": ["email", "inbox", "trả lời email"],
+    "music_practice": ["music practice", "practice guitar", "practice piano", "tập đàn", "luyện đàn"],
+}
+
+# n-gram similarity needed to accept a match, and margin over the runner-up
+MIN_SIMILARITY = 0.72
+MIN_MARGIN = 0.05
+
+_NGRAM = 3
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Words that say who/when/how much rather than what: they never compete with
+# a single-word alias ("Run tomorrow morning" is still running)
+FILLER_WORDS = frozenset("""
+    a an the to for of on in at by with and or my your our this that some all
+    i we you me want need will would should must go going get lets let please
+    today tomorrow tonight morning afternoon evening night noon week weekend daily
+    every each day days before after work lunch breakfast dinner minutes minute
+    hours hour min mins km
+    tôi mình em anh muốn cần sẽ phải để và với cho của một các những hãy nên đi
+    vào lúc sáng trưa chiều tối đêm mai ngày hôm nay mỗi trước sau khi giờ phút
+    tuần buổi nữa
+""".split())
+
+
+def fold_text(text: str) -> str:
+    """
+    Lowercase and strip diacritics ("Chạy Bộ" → "chay bo")
+
+    Args:
+        text: Raw text
+
+    Returns:
+        ASCII-folded lowercase words joined by single spaces
+    """
+    text = text.lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_WORD.findall(stripped))
+
+
+def _words(text: str) -> List[str]:
+    """Lowercase words with diacritics kept (NFC)"""
+    return _WORD.findall(unicodedata.normalize("NFC", text.lower()))
+
+
+def _content_words(words: List[str], filler: frozenset) -> List[str]:
+    """Words that name the activity (no filler words, no numbers like '5km')"""
+    return [word for word in words if word not in filler and not any(ch.isdigit() for ch in word)]
+
+
+def _ngrams(text: str) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + _NGRAM] for i in range(len(padded) - _NGRAM + 1))
+
+
+class _GramIndex:
+    """
+    Inverted index of alias n-grams for cosine nearest-neighbour lookups
+    A phrase is only compared with aliases of the same word count, so a
+    two-word window ("read reply") cannot land on a one-word alias ("read").
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._owners: List[str] = []
+        self._norms: List[float] = []
+        self._sizes: List[int] = []
+
+    def add(self, activity_id: str, phrase: str):
+        alias_index = len(self._owners)
+        vector = _ngrams(phrase)
+        for gram, count in vector.items():
+            self._postings.setdefault(gram, []).append((alias_index, count))
+        self._owners.append(activity_id)
+        self._norms.append(math.sqrt(sum(c * c for c in vector.values())))
+        self._sizes.append(len(phrase.split()))
+
+    def nearest(self, phrase: str) -> Tuple[Optional[str], float, float]:
+        """Best activity and its score, plus the runner-up activity's score"""
+        vector = _ngrams(phrase)
+        norm = math.sqrt(sum(c * c for c in vector.values()))
+        size = len(phrase.split())
+        dots: Dict[int, int] = {}
+        for gram, count in vector.items():
+            for alias_index, alias_count in self._postings.get(gram, ()):
+                if self._sizes[alias_index] == size:
+                    dots[alias_index] = dots.get(alias_index, 0) + count * alias_count
+        best: Dict[str, float] = {}
+        for alias_index, dot in dots.items():
+            activity_id = self._owners[alias_index]
+            score = dot / (norm * self._norms[alias_index])
+            if score > best.get(activity_id, 0.0):
+                best[activity_id] = score
+        if not best:
+            return None, 0.0, 0.0
+        ranked = sorted(best.values(), reverse=True)
+        best_id = max(best, key=best.get)
+        return best_id, ranked[0], ranked[1] if len(ranked) > 1 else 0.0
+
+
+class ActivityMatch(BaseModel):
+    """Result of canonicalizing an activity"""
+    activity_id: str = Field(description="Canonical activity ID")
+    label: str = Field(description="Canonical display label (template/cache key)")
+    score: float = Field(description="Match confidence 0-1")
+    method: str = Field(description="alias|ngram")
+
+
+class ActivityIndex:
+    """
+    Alias table plus character n-gram nearest-neighbour index
+    Built once; lookups are pure Python and take microseconds.
+    """
+
+    def __init__(self, activities: Optional[Dict[str, List[str]]] = None):
+        """
+        Initialize activity index
+
+        Args:
+            activities: Canonical ID → aliases (default: CANONICAL_ACTIVITIES)
+        """
+        activities = activities or CANONICAL_ACTIVITIES
+        self.labels = {activity_id: aliases[0] for activity_id, aliases in activities.items()}
+        # Accented text is matched as written ("bởi" is not "bơi"); unaccented
+        # text is matched against folded aliases ("chay bo" → "chạy bộ")
+        self._aliases: Dict[str, str] = {}
+        self._folded_aliases: Dict[str, str] = {}
+        self._grams = _GramIndex()
+        self._folded_grams = _GramIndex()
+        for activity_id, aliases in activities.items():
+            for alias in aliases:
+                accented = " ".join(_words(alias))
+                folded = fold_text(alias)
+                self._aliases.setdefault(accented, activity_id)
+                self._folded_aliases.setdefault(folded, activity_id)
+                self._grams.add(activity_id, accented)
+                self._folded_grams.add(activity_id, folded)
+        self._max_alias_words = max(len(alias.split()) for alias in self._aliases)
+        self._folded_filler = frozenset(fold_text(word) for word in FILLER_WORDS)
+
+    def _alias_match(self, activity_id: str) -> ActivityMatch:
+        return ActivityMatch(activity_id=activity_id, label=self.labels[activity_id], score=1.0, method="alias")
+
+    def _match_alias(self, words: List[str], content: List[str], aliases: Dict[str, str]) -> Optional[ActivityMatch]:
+        """
+        Longest multi-word alias found in the words (earliest wins on ties);
+        a single-word alias only when it is the only content word
+        """
+        for size in range(min(self._max_alias_words, len(words)), 1, -1):
+            for start in range(len(words) - size + 1):
+                activity_id = aliases.get(" ".join(words[start:start + size]))
+                if activity_id is not None:
+                    return self._alias_match(activity_id)
+        if len(content) == 1 and content[0] in aliases:
+            return self._alias_match(aliases[content[0]])
+        return None
+
+    def match(self, text: str) -> Optional[ActivityMatch]:
+        """
+        Canonicalize a goal or activity label
+
+        Args:
+            text: Goal sentence or activity label
+
+        Returns:
+            ActivityMatch if confident, else None
+        """
+        if text.isascii():
+            words, aliases, grams = fold_text(text).split(), self._folded_aliases, self._folded_grams
+            content = _content_words(words, self._folded_filler)
+        else:
+            words, aliases, grams = _words(text), self._aliases, self._grams
+            content = _content_words(words, FILLER_WORDS)
+        if not words:
+            return None
+
+        alias_match = self._match_alias(words, content, aliases)
+        if alias_match is not None:
+            return alias_match
+
+        # Typos and variants: compare 1-3 content word windows with the aliases
+        # (single words only when they are the only content word, as above)
+        best_id, best_score, best_margin = None, 0.0, 0.0
+        smallest = 1 if len(content) == 1 else 2
+        for size in range(smallest, min(3, len(content)) + 1):
+            for start in range(len(content) - size + 1):
+                activity_id, score, runner_up = grams.nearest(" ".join(content[start:start + size]))
+                if activity_id is not None and score > best_score:
+                    best_id, best_score, best_margin = activity_id, score, score - runner_up
+        if best_id is None or best_score < MIN_SIMILARITY or best_margin < MIN_MARGIN:
+            return None
+        return ActivityMatch(
+            activity_id=best_id,
+            label=self.labels[best_id],
+            score=round(best_score, 3),
+            method="ngram"
+        )
+
+
+_default_index: Optional[ActivityIndex] = None
+
+
+def get_activity_index() -> ActivityIndex:
+    """Shared index built from CANONICAL_ACTIVITIES on first use"""
+    global _default_index
+    if _default_index is None:
+        _default_index = ActivityIndex()
+    return _default_index
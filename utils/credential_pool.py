@@ -0,0 +1,283 @@
+"""
+Per-user OAuth credential pool for multi-user calendar sync
+
+Credentials are loaded from `{token_dir}/{user_id}.json` once, kept in
+memory, and refreshed by a background thread before they expire, so a batch
+over many users finds valid tokens without a file read or a refresh round
+trip per user. Each thread reuses one HTTP transport for refreshes and one
+for Calendar API calls. Calendar calls run on the resilience pool, not on
+the worker that built the service, so the Calendar transport is chosen by
+the thread that sends the request (`ThreadLocalHttp`): a hedged or timed-out
+attempt never shares an `httplib2.Http`, which is not thread-safe, with
+another request. The pool never starts an interactive OAuth
+flow: users without a token file are skipped (run
+`standalone/calendar_sync.py` once per user to create it).
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import httplib2
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    GOOGLE_AUTH_AVAILABLE = True
+except ImportError:
+    GOOGLE_AUTH_AVAILABLE = False
+
+CALENDAR_SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+# Refresh tokens expiring within this many seconds
+REFRESH_MARGIN_S = 300
+
+# Seconds between background refresh passes
+REFRESH_INTERVAL_S = 60
+
+
+def _utcnow() -> datetime:
+    """Naive UTC now (google-auth expiries are naive UTC)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ThreadLocalHttp:
+    """
+    httplib2.Http stand-in that sends each request on the calling thread's own Http
+
+    Settings assigned through it (timeout, redirect_codes, ...) are applied
+    to every thread's Http, including ones created later.
+    """
+
+    def __init__(self, factory: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            factory: Builds one thread's Http (default: httplib2.Http)
+        """
+        object.__setattr__(self, "_factory", factory or (lambda: httplib2.Http()))
+        object.__setattr__(self, "_local", threading.local())
+        object.__setattr__(self, "_settings", {})
+        object.__setattr__(self, "_created", [])
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def current(self) -> Any:
+        """The calling thread's Http (created on first use)"""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = self._factory()
+            with self._lock:
+                for name, value in self._settings.items():
+                    setattr(http, name, value)
+                self._created.append(http)
+        return http
+
+    def request(self, *args, **kwargs):
+        return self.current().request(*args, **kwargs)
+
+    def close(self):
+        """Close the calling thread's connections (other threads' are in use)"""
+        self.current().close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.current(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        with self._lock:
+            self._settings[name] = value
+            for http in self._created:
+                setattr(http, name, value)
+
+
+class CredentialPool:
+    """In-memory OAuth credentials keyed by user ID. Thread-safe."""
+
+    def __init__(
+        self,
+        token_dir: str = "tokens",
+        scopes: List[str] = CALENDAR_SCOPES,
+        refresh_margin_s: float = REFRESH_MARGIN_S,
+        loader: Optional[Callable[[Dict], Any]] = None,
+        transport_factory: Optional[Callable[[], Any]] = None,
+        http_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize credential pool
+
+        Args:
+            token_dir: Directory of per-user token files ("{user_id}.json";
+                None = memory only, see add)
+            scopes: OAuth scopes the tokens were granted
+            refresh_margin_s: Refresh tokens expiring within this window
+            loader: Builds credentials from a token dict (default:
+                Credentials.from_authorized_user_info)
+            transport_factory: Builds a refresh transport (default:
+                google.auth.transport.requests.Request)
+            http_factory: Builds one thread's Calendar Http (default:
+                httplib2.Http)
+        """
+        self.token_dir = token_dir
+        self.scopes = scopes
+        self.refresh_margin_s = refresh_margin_s
+        self.loader = loader or (lambda info: Credentials.from_authorized_user_info(info, scopes))
+        self.transport_factory = transport_factory or (lambda: Request())
+        self.loads = 0
+        self.refreshes = 0
+        self._credentials: Dict[str, Any] = {}
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._http = ThreadLocalHttp(http_factory)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, user_id: str, credentials: Any):
+        """
+        Put credentials in the pool (e.g., right after a user authorized)
+
+        Args:
+            user_id: User ID
+            credentials: google.oauth2.credentials.Credentials
+        """
+        with self._lock:
+            self._credentials[user_id] = credentials
+
+    def get(self, user_id: str) -> Optional[Any]:
+        """
+        Valid credentials of a user
+
+        Loads the token file on first use; only an already expired token is
+        refreshed here, everything else is left to the background refresher.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Credentials, or None if the user has no token or it cannot be refreshed
+        """
+        with self._lock:
+            credentials = self._credentials.get(user_id)
+        if credentials is None:
+            credentials = self._load(user_id)
+            if credentials is None:
+                return None
+        if self._expiring(credentials, 0) and not self._refresh(user_id, credentials, 0):
+            return None
+        return credentials
+
+    def authorized_http(self, user_id: str) -> Optional[Any]:
+        """
+        HTTP client for Calendar API calls of a user
+
+        Requests go out on the connection pool of the thread that sends them
+        (see ThreadLocalHttp), so the client can be used from the resilience
+        pool's threads.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            AuthorizedHttp for googleapiclient's build(http=...), or None
+        """
+        credentials = self.get(user_id)
+        if credentials is None:
+            return None
+        return AuthorizedHttp(credentials, http=self._http)
+
+    def refresh_due(self) -> int:
+        """
+        Refresh every pooled token that expires within the margin
+
+        Returns:
+            Number of tokens refreshed
+        """
+        with self._lock:
+            pooled = list(self._credentials.items())
+        return sum(
+            self._refresh(user_id, credentials, self.refresh_margin_s)
+            for user_id, credentials in pooled
+            if self._expiring(credentials, self.refresh_margin_s)
+        )
+
+    def start(self, interval_s: float = REFRESH_INTERVAL_S):
+        """
+        Start the background refresher (daemon thread)
+
+        Args:
+            interval_s: Seconds between refresh passes
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval_s):
+                self.refresh_due()
+
+        self._thread = threading.Thread(target=run, name="atp-token-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresher"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def users(self) -> List[str]:
+        """IDs of users with pooled credentials"""
+        with self._lock:
+            return list(self._credentials)
+
+    def _load(self, user_id: str) -> Optional[Any]:
+        path = self._token_path(user_id)
+        if path is None or not os.path.exists(path):
+            return None
+        with self._user_lock(user_id):
+            with self._lock:
+                if user_id in self._credentials:
+                    return self._credentials[user_id]
+            with open(path, 'r') as token:
+                credentials = self.loader(json.load(token))
+            self.loads += 1
+            with self._lock:
+                self._credentials[user_id] = credentials
+        return credentials
+
+    def _refresh(self, user_id: str, credentials: Any, margin_s: float) -> bool:
+        """Refresh one token (once, even if several threads ask); True on success"""
+        with self._user_lock(user_id):
+            if not self._expiring(credentials, margin_s):
+                return True
+            try:
+                credentials.refresh(self._transport())
+            except Exception as e:
+                print(f"⚠️  Token refresh failed for {user_id}: {e}")
+                return False
+            self.refreshes += 1
+            path = self._token_path(user_id)
+            if path is not None:
+                with open(path, 'w') as token:
+                    token.write(credentials.to_json())
+        return True
+
+    def _expiring(self, credentials: Any, margin_s: float) -> bool:
+        expiry = getattr(credentials, "expiry", None)
+        if expiry is None:
+            return not getattr(credentials, "token", None)
+        return (expiry - _utcnow()).total_seconds() <= margin_s
+
+    def _transport(self) -> Any:
+        """This thread's refresh transport"""
+        if not hasattr(self._local, "transport"):
+            self._local.transport = self.transport_factory()
+        return self._local.transport
+
+    def _token_path(self, user_id: str) -> Optional[str]:
+        if self.token_dir is None:
+            return None
+        return os.path.join(self.token_dir, f"{os.path.basename(user_id)}.json")
+
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
@@ -0,0 +1,351 @@
+"""
+Local mirror of ATP calendar events with incremental sync (SQLite)
+
+Each user's ATP events (those tagged `extendedProperties.private.isAtomic`)
+are mirrored locally together with the Calendar API `nextSyncToken`, so a
+reconciliation fetches only what changed since the last one instead of
+listing the whole calendar again. Changes the user made on their side are
+appended to the `event_changes` log:
+
+    mirror.sync(service, "minh") -> [EventChange(kind="moved", ...), ...]
+    mirror.changes(kind="deleted", since="2026-10-01")
+
+The Calendar API does not allow filters (privateExtendedProperty, timeMin,
+...) together with sync tokens, so the listing is unfiltered and non-ATP
+events are skipped locally. An expired token (HTTP 410) triggers one full
+re-sync that diffs the listing against the mirror.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pytz
+from pydantic import BaseModel, Field
+
+from utils.free_busy import DEFAULT_TIMEZONE, _parse_rfc3339
+from utils.resilience import UpstreamError, get_endpoint
+
+CHANGE_KINDS = ("moved", "deleted")
+
+# Events per events.list page (the API maximum is 2500)
+PAGE_SIZE = 250
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id TEXT NOT NULL,
+    calendar_id TEXT NOT NULL,
+    sync_token TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, calendar_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    user_id TEXT NOT NULL,
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    atomic_task_id TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    event_date TEXT NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    PRIMARY KEY (user_id, calendar_id, event_id)
+);
+CREATE TABLE IF NOT EXISTS event_changes (
+    change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    atomic_task_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    from_date TEXT NOT NULL,
+    from_start INTEGER NOT NULL,
+    from_end INTEGER NOT NULL,
+    to_date TEXT,
+    to_start INTEGER,
+    to_end INTEGER,
+    detected_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_user_kind ON event_changes (user_id, kind, detected_at);
+"""
+
+# (atomic_task_id, summary, event_date, start_minute, end_minute)
+EventRow = Tuple[str, str, str, int, int]
+
+
+class EventChange(BaseModel):
+    """A user-side change to an ATP event"""
+    user_id: str
+    event_id: str = Field(description="Calendar event ID")
+    atomic_task_id: str = Field(description="Schedule item ID the event was created from")
+    kind: str = Field(description="moved|deleted")
+    from_date: str = Field(description="YYYY-MM-DD the event was on")
+    from_start: int = Field(description="Minutes since midnight before the change")
+    from_end: int
+    to_date: Optional[str] = Field(default=None, description="New day (None when deleted)")
+    to_start: Optional[int] = None
+    to_end: Optional[int] = None
+    detected_at: str = Field(description="ISO timestamp of the sync that saw the change")
+
+    @property
+    def shift_minutes(self) -> Optional[int]:
+        """How far a moved event's start moved (None when deleted)"""
+        if self.kind != "moved":
+            return None
+        days = (datetime.fromisoformat(self.to_date) - datetime.fromisoformat(self.from_date)).days
+        return days * 1440 + self.to_start - self.from_start
+
+
+class EventMirror:
+    """Per-user mirror of ATP calendar events and sync tokens. Thread-safe."""
+
+    def __init__(self, path: str = ":memory:", timezone: str = DEFAULT_TIMEZONE):
+        """
+        Initialize event mirror
+
+        Args:
+            path: SQLite database file (":memory:" = not persisted)
+            timezone: Timezone event times are mirrored in
+        """
+        self.path = path
+        self.timezone = timezone
+        self.endpoint = get_endpoint("calendar")
+        self.requests = 0
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def sync(self, service: Any, user_id: str, calendar_id: str = "primary") -> List[EventChange]:
+        """
+        Fetch changes since the last sync and update the mirror
+
+        The first sync of a user only builds the mirror. A failed sync
+        leaves the mirror and token untouched, so the next one retries.
+
+        Args:
+            service: Authenticated Calendar v3 service of the user
+            user_id: User the calendar belongs to
+            calendar_id: Calendar to reconcile
+
+        Returns:
+            Moves and deletions found by this sync
+        """
+        token = self.sync_token(user_id, calendar_id)
+        try:
+            items, next_token = self._list(service, calendar_id, token)
+        except UpstreamError as e:
+            if token is None or not _is_gone(e):
+                print(f"⚠️  Calendar sync failed for {user_id}: {e}")
+                return []
+            print(f"⚠️  Sync token expired for {user_id} - running a full sync")
+            token = None
+            try:
+                items, next_token = self._list(service, calendar_id, None)
+            except UpstreamError as e:
+                print(f"⚠️  Calendar sync failed for {user_id}: {e}")
+                return []
+
+        detected_at = datetime.now().isoformat()
+        with self._lock, self._db:
+            mirrored = self._mirrored(user_id, calendar_id)
+            seen = set()
+            changes = []
+            for item in items:
+                event_id = item["id"]
+                row = self._event_row(item) if item.get("status") != "cancelled" else None
+                before = mirrored.get(event_id)
+                if row is None:
+                    if before is not None:
+                        changes.append(self._change(user_id, event_id, "deleted", before, None, detected_at))
+                        self._delete(user_id, calendar_id, event_id)
+                    continue
+                seen.add(event_id)
+                if before is not None and before[2:] != row[2:]:
+                    changes.append(self._change(user_id, event_id, "moved", before, row, detected_at))
+                self._upsert(user_id, calendar_id, event_id, row)
+
+            if token is None and mirrored:
+                # Full listing: mirrored events that are gone were deleted
+                for event_id in mirrored.keys() - seen:
+                    changes.append(self._change(user_id, event_id, "deleted", mirrored[event_id], None, detected_at))
+                    self._delete(user_id, calendar_id, event_id)
+
+            self._db.executemany(
+                "INSERT INTO event_changes (user_id, event_id, atomic_task_id, kind, from_date, from_start,"
+                " from_end, to_date, to_start, to_end, detected_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [tuple(change.model_dump().values()) for change in changes]
+            )
+            if next_token:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_state (user_id, calendar_id, sync_token, synced_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (user_id, calendar_id, next_token, detected_at)
+                )
+        return changes
+
+    def record(self, user_id: str, events: Iterable[Dict], calendar_id: str = "primary"):
+        """
+        Mirror events ATP just created, so moves made before the next sync
+        are still detected
+
+        Args:
+            user_id: User the calendar belongs to
+            events: Event resources returned by events.insert
+            calendar_id: Calendar the events were created in
+        """
+        with self._lock, self._db:
+            for event in events:
+                row = self._event_row(event)
+                if row is not None:
+                    self._upsert(user_id, calendar_id, event["id"], row)
+
+    def sync_token(self, user_id: str, calendar_id: str = "primary") -> Optional[str]:
+        """
+        Stored nextSyncToken of a user's calendar
+
+        Args:
+            user_id: User ID
+            calendar_id: Calendar ID
+
+        Returns:
+            Token, or None before the first sync
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sync_token FROM sync_state WHERE user_id = ? AND calendar_id = ?",
+                (user_id, calendar_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def changes(
+        self,
+        user_id: Optional[str] = None,
+        kind: Optional[str] = None,
+        since: Optional[str] = None
+    ) -> List[EventChange]:
+        """
+        Logged user-side changes, for one user or all of them
+
+        Args:
+            user_id: User ID (None = all users)
+            kind: "moved" or "deleted" (None = both)
+            since: Only changes detected at or after this ISO date/time
+
+        Returns:
+            EventChange list in detection order
+
+        Raises:
+            ValueError: If kind is not in CHANGE_KINDS
+        """
+        if kind is not None and kind not in CHANGE_KINDS:
+            raise ValueError(f"Unknown change kind '{kind}'. Choose from: {', '.join(CHANGE_KINDS)}")
+        fields = list(EventChange.model_fields)
+        query = f"SELECT {', '.join(fields)} FROM event_changes WHERE 1 = 1"
+        params: list = []
+        for column, value in (("user_id", user_id), ("kind", kind)):
+            if value is not None:
+                query += f" AND {column} = ?"
+                params.append(value)
+        if since is not None:
+            query += " AND detected_at >= ?"
+            params.append(since)
+        query += " ORDER BY change_id"
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [EventChange(**dict(zip(fields, row))) for row in rows]
+
+    def events(self, user_id: str, calendar_id: str = "primary") -> Dict[str, EventRow]:
+        """
+        Mirrored ATP events of a user
+
+        Args:
+            user_id: User ID
+            calendar_id: Calendar ID
+
+        Returns:
+            Dict of event ID → (atomic_task_id, summary, date, start_minute, end_minute)
+        """
+        with self._lock:
+            return self._mirrored(user_id, calendar_id)
+
+    def _list(self, service: Any, calendar_id: str, token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """All pages of events.list (incremental when token is set)"""
+        items: List[Dict] = []
+        page_token = None
+        while True:
+            params = {"calendarId": calendar_id, "maxResults": PAGE_SIZE}
+            if token:
+                params["syncToken"] = token
+            if page_token:
+                params["pageToken"] = page_token
+            self.requests += 1
+            response = self.endpoint.call(lambda: service.events().list(**params).execute())
+            items.extend(response.get("items", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return items, response.get("nextSyncToken")
+
+    def _event_row(self, event: Dict) -> Optional[EventRow]:
+        """Mirror row of an ATP event (None for other events)"""
+        tags = event.get("extendedProperties", {}).get("private", {})
+        start = event.get("start", {}).get("dateTime")
+        if tags.get("isAtomic") != "true" or not start:
+            return None
+        zone = pytz.timezone(self.timezone)
+        start = _parse_rfc3339(start).astimezone(zone)
+        end = _parse_rfc3339(event["end"]["dateTime"]).astimezone(zone)
+        start_minute = start.hour * 60 + start.minute
+        end_minute = start_minute + int((end - start).total_seconds() // 60)
+        return (tags.get("atomicTaskId", ""), event.get("summary", ""), start.date().isoformat(), start_minute, end_minute)
+
+    def _mirrored(self, user_id: str, calendar_id: str) -> Dict[str, EventRow]:
+        rows = self._db.execute(
+            "SELECT event_id, atomic_task_id, summary, event_date, start_minute, end_minute FROM events"
+            " WHERE user_id = ? AND calendar_id = ?",
+            (user_id, calendar_id)
+        ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def _upsert(self, user_id: str, calendar_id: str, event_id: str, row: EventRow):
+        self._db.execute(
+            "INSERT OR REPLACE INTO events (user_id, calendar_id, event_id, atomic_task_id, summary,"
+            " event_date, start_minute, end_minute) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, calendar_id, event_id) + row
+        )
+
+    def _delete(self, user_id: str, calendar_id: str, event_id: str):
+        self._db.execute(
+            "DELETE FROM events WHERE user_id = ? AND calendar_id = ? AND event_id = ?",
+            (user_id, calendar_id, event_id)
+        )
+
+    def _change(self, user_id, event_id, kind, before: EventRow, after: Optional[EventRow], detected_at) -> EventChange:
+        return EventChange(
+            user_id=user_id,
+            event_id=event_id,
+            atomic_task_id=before[0],
+            kind=kind,
+            from_date=before[2],
+            from_start=before[3],
+            from_end=before[4],
+            to_date=after[2] if after else None,
+            to_start=after[3] if after else None,
+            to_end=after[4] if after else None,
+            detected_at=detected_at
+        )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def _is_gone(error: UpstreamError) -> bool:
+    """True if the wrapped Calendar API error is HTTP 410 (sync token expired)"""
+    response = getattr(error.__cause__, "resp", None)
+    return str(getattr(response, "status", "")) == "410"
@@ -0,0 +1,212 @@
+"""
+Read-only calendar free/busy ingestion for the scheduler
+
+One Google Calendar `freebusy.query` covers every day that is not cached yet
+(the API accepts any time window), so planning a day or a week costs a
+single request per user. Busy intervals are split into per-day TimeRanges in
+the user's timezone, cached with a TTL and subtracted from A3's candidate
+slots to build the per-day free-time index (`optimize_schedule(free_slots=...)`,
+`optimize_horizon(free_slots=...)`).
+
+Works with any object shaped like the Calendar v3 service
+(`service.freebusy().query(body=...).execute()`), so tests use a fake.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+from schemas.time_types import MINUTES_PER_DAY, TimeRange
+from utils.resilience import UpstreamError, get_endpoint
+
+DEFAULT_TIMEZONE = "Asia/Ho_Chi_Minh"
+
+# Seconds a day's busy intervals are reused before the next query
+FREEBUSY_CACHE_TTL_S = 300
+
+# Free pieces shorter than this are dropped from the free-time index
+MIN_FREE_MINUTES = 10
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    """Parse a Calendar API timestamp ("2026-10-20T09:00:00Z" or with offset)"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def subtract_busy(
+    slots: List[TimeRange],
+    busy: List[TimeRange],
+    min_minutes: int = MIN_FREE_MINUTES
+) -> List[TimeRange]:
+    """
+    Remove busy intervals from candidate slots
+
+    Args:
+        slots: Candidate slots for one day, in priority order
+        busy: Busy intervals for the same day
+        min_minutes: Drop free pieces shorter than this
+
+    Returns:
+        Free pieces in the slots' order (a slot split by a meeting yields
+        its pieces in time order)
+    """
+    busy = sorted(busy, key=lambda b: b.start)
+    free = []
+    for slot in slots:
+        cursor = slot.start
+        for interval in busy:
+            if interval.end <= cursor:
+                continue
+            if interval.start >= slot.end:
+                break
+            if interval.start - cursor >= min_minutes:
+                free.append(TimeRange(cursor, interval.start))
+            cursor = max(cursor, interval.end)
+        if slot.end - cursor >= min_minutes:
+            free.append(TimeRange(cursor, slot.end))
+    return free
+
+
+class FreeBusyIngestor:
+    """
+    Cached free/busy reader for one user's calendars
+    Thread-safe; failures degrade to "no known busy time" and are not cached.
+    """
+
+    def __init__(
+        self,
+        service: Any,
+        user_id: str = "anonymous",
+        calendar_ids: Tuple[str, ...] = ("primary",),
+        timezone: str = DEFAULT_TIMEZONE,
+        ttl_seconds: float = FREEBUSY_CACHE_TTL_S
+    ):
+        """
+        Initialize free/busy ingestor
+
+        Args:
+            service: Authenticated Calendar v3 service (e.g., CalendarSyncTool.service)
+            user_id: User the calendars belong to (used in log messages)
+            calendar_ids: Calendars whose busy time blocks scheduling
+            timezone: Timezone the plan's HH:MM times are in
+            ttl_seconds: Age after which a day is queried again
+        """
+        self.service = service
+        self.user_id = user_id
+        self.calendar_ids = tuple(calendar_ids)
+        self.timezone = timezone
+        self.ttl_seconds = ttl_seconds
+        self.endpoint = get_endpoint("calendar")
+        self.queries = 0
+        self._cache: Dict[date, Tuple[float, List[TimeRange]]] = {}
+        self._lock = threading.Lock()
+
+    def busy(self, days: Iterable[date]) -> Dict[date, List[TimeRange]]:
+        """
+        Busy intervals per day, querying all uncached days in one request
+
+        Args:
+            days: Days to read
+
+        Returns:
+            Dict of day → busy TimeRanges sorted by start (empty if unknown)
+        """
+        days = sorted(set(days))
+        now = time.monotonic()
+        with self._lock:
+            cached = {
+                day: entry[1] for day, entry in self._cache.items()
+                if day in days and now - entry[0] < self.ttl_seconds
+            }
+        missing = [day for day in days if day not in cached]
+        if missing:
+            fetched = self._query(missing[0], missing[-1])
+            if fetched is not None:
+                with self._lock:
+                    for day in missing:
+                        self._cache[day] = (now, fetched.get(day, []))
+                cached.update({day: fetched.get(day, []) for day in missing})
+        return {day: cached.get(day, []) for day in days}
+
+    def free_slots(
+        self,
+        days: Iterable[date],
+        candidate_slots: List[TimeRange],
+        min_minutes: int = MIN_FREE_MINUTES
+    ) -> Dict[date, List[TimeRange]]:
+        """
+        Per-day free-time index: candidate slots minus busy time
+
+        Args:
+            days: Days to plan
+            candidate_slots: Slots the scheduler would use (e.g., A3's
+                _get_available_time_slots)
+            min_minutes: Drop free pieces shorter than this
+
+        Returns:
+            Dict of day → free TimeRanges
+        """
+        return {
+            day: subtract_busy(candidate_slots, busy, min_minutes)
+            for day, busy in self.busy(days).items()
+        }
+
+    def invalidate(self, day: Optional[date] = None):
+        """
+        Forget cached busy time (after the calendar changed)
+
+        Args:
+            day: Day to forget (None = all days)
+        """
+        with self._lock:
+            if day is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(day, None)
+
+    def _query(self, first_day: date, last_day: date) -> Optional[Dict[date, List[TimeRange]]]:
+        """One freebusy.query for [first_day, last_day]; None if it failed"""
+        zone = pytz.timezone(self.timezone)
+        window_start = zone.localize(datetime(first_day.year, first_day.month, first_day.day))
+        window_end = zone.localize(datetime(last_day.year, last_day.month, last_day.day) + timedelta(days=1))
+        body = {
+            "timeMin": window_start.isoformat(),
+            "timeMax": window_end.isoformat(),
+            "timeZone": self.timezone,
+            "items": [{"id": calendar_id} for calendar_id in self.calendar_ids],
+        }
+        self.queries += 1
+        try:
+            response = self.endpoint.call(lambda: self.service.freebusy().query(body=body).execute())
+        except UpstreamError as e:
+            print(f"⚠️  Free/busy unavailable for {self.user_id}: {e} - scheduling without it")
+            return None
+
+        busy: Dict[date, List[TimeRange]] = {}
+        for calendar_id, calendar in response.get("calendars", {}).items():
+            if calendar.get("errors"):
+                print(f"⚠️  Free/busy error for calendar {calendar_id}: {calendar['errors']}")
+            for interval in calendar.get("busy", []):
+                start = _parse_rfc3339(interval["start"]).astimezone(zone)
+                end = _parse_rfc3339(interval["end"]).astimezone(zone)
+                for day, time_range in self._split_by_day(start, end):
+                    busy.setdefault(day, []).append(time_range)
+        for ranges in busy.values():
+            ranges.sort(key=lambda r: r.start)
+        return busy
+
+    def _split_by_day(self, start: datetime, end: datetime) -> Iterable[Tuple[date, TimeRange]]:
+        """Cut a busy interval at local midnights into per-day minute ranges"""
+        day = start.date()
+        while datetime.combine(day, datetime.min.time()) < end.replace(tzinfo=None):
+            day_start = start.replace(tzinfo=None) if day == start.date() else datetime.combine(day, datetime.min.time())
+            start_minute = day_start.hour * 60 + day_start.minute
+            if day == end.date():
+                end_minute = end.hour * 60 + end.minute
+            else:
+                end_minute = MINUTES_PER_DAY
+            if end_minute > start_minute:
+                yield day, TimeRange(start_minute, end_minute)
+            day += timedelta(days=1)
@@ -0,0 +1,376 @@
+"""
+Durable local job queue (SQLite) for batch planning
+
+Jobs survive crashes: a worker leases a job for a limited time, extends the
+lease while it runs (heartbeat) and stores progress checkpoints, so a job
+whose worker died is leased again after the lease expires and resumes from
+its last checkpoint. Failed jobs are retried up to `max_attempts` times,
+optionally after a delay (`fail(..., delay_s=...)`, e.g. to wait out an
+upstream outage).
+Several processes can share one queue file (WAL mode, leases taken in an
+IMMEDIATE transaction).
+
+    queue.enqueue("nightly", [("minh", {...}), ("lan", {...})])
+    jobs = queue.lease("worker-1", limit=4)
+    queue.checkpoint(job.job_id, "worker-1", {"a1": ...})
+    queue.complete(job.job_id, "worker-1", result_bytes)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+JOB_STATUSES = ("queued", "leased", "done", "failed")
+
+# Seconds a leased job stays reserved without a heartbeat
+DEFAULT_LEASE_S = 300.0
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    user_hash INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    checkpoint TEXT,
+    result BLOB,
+    error TEXT,
+    available_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, status);
+"""
+
+
+class Job(BaseModel):
+    """A leased job"""
+    job_id: int
+    batch: str
+    user_id: str
+    payload: Dict[str, Any] = Field(description="Job input (e.g., user_request and bio_context)")
+    attempts: int = Field(description="Leases so far, this one included")
+    checkpoint: Dict[str, Any] = Field(default_factory=dict, description="Progress saved by earlier attempts")
+
+
+class JobQueue:
+    """SQLite-backed job queue with leases, retries and checkpoints"""
+
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Initialize job queue
+
+        Args:
+            path: SQLite database file (shared by all worker processes)
+            max_attempts: Default attempts per job before it is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        if "available_at" not in {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}:
+            try:  # queue files created before retry delays
+                self._db.execute("ALTER TABLE jobs ADD COLUMN available_at REAL")
+            except sqlite3.OperationalError:
+                pass  # another process added it first
+        self._lock = threading.Lock()
+
+    def enqueue(self, batch: str, jobs: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Add jobs to a batch
+
+        Args:
+            batch: Batch name (e.g., "nightly-2026-10-19")
+            jobs: (user_id, payload) pairs
+
+        Returns:
+            Number of jobs added
+        """
+        now = time.time()
+        rows = [
+            (batch, user_id, zlib.crc32(user_id.encode("utf-8")), json.dumps(payload, ensure_ascii=False),
+             "queued", self.max_attempts, now)
+            for user_id, payload in jobs
+        ]
+        with self._transaction():
+            self._db.executemany(
+                "INSERT INTO jobs (batch, user_id, user_hash, payload, status, max_attempts, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def lease(
+        self,
+        owner: str,
+        limit: int = 1,
+        lease_s: float = DEFAULT_LEASE_S,
+        shard: Optional[Tuple[int, int]] = None,
+        batch: Optional[str] = None
+    ) -> List[Job]:
+        """
+        Lease queued jobs, and jobs whose previous lease expired
+
+        Jobs whose lease expired on their last attempt are marked failed.
+        Jobs retried with a delay are skipped until it has passed.
+
+        Args:
+            owner: Worker name (leases are only changed by their owner)
+            limit: Maximum jobs to lease
+            lease_s: Lease length in seconds
+            shard: (index, count) to prefer this worker's users; other
+                shards' jobs are taken once this one is empty
+            batch: Only lease jobs of this batch (None = any batch)
+
+        Returns:
+            Leased jobs, oldest first within the preferred shard
+        """
+        now = time.time()
+        where = (
+            "((status = 'queued' AND COALESCE(available_at, 0) <= ?)"
+            " OR (status = 'leased' AND lease_expires < ?))"
+        )
+        params: list = [now, now]
+        if batch is not None:
+            where += " AND batch = ?"
+            params.append(batch)
+        order = "job_id"
+        if shard is not None:
+            order = "(user_hash % ?) != ?, job_id"
+            params.extend([shard[1], shard[0]])
+        with self._transaction():
+            self._db.execute(
+                "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), updated_at = ?"
+                " WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            rows = self._db.execute(
+                "SELECT job_id, batch, user_id, payload, attempts, checkpoint FROM jobs"
+                f" WHERE {where} ORDER BY {order} LIMIT ?",
+                params + [limit]
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?,"
+                " lease_expires = ?, updated_at = ? WHERE job_id = ?",
+                [(owner, now + lease_s, now, row[0]) for row in rows]
+            )
+        return [
+            Job(
+                job_id=job_id,
+                batch=batch,
+                user_id=user_id,
+                payload=json.loads(payload),
+                attempts=attempts + 1,
+                checkpoint=json.loads(checkpoint) if checkpoint else {}
+            )
+            for job_id, batch, user_id, payload, attempts, checkpoint in rows
+        ]
+
+    def heartbeat(self, job_ids: List[int], owner: str, lease_s: float = DEFAULT_LEASE_S) -> int:
+        """
+        Extend leases of running jobs
+
+        Args:
+            job_ids: Jobs to extend
+            owner: Worker holding the leases
+            lease_s: New lease length from now
+
+        Returns:
+            Number of leases still held by owner
+        """
+        now = time.time()
+        with self._transaction():
+            return sum(
+                self._db.execute(
+                    "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+                    " WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+                    (now + lease_s, now, job_id, owner)
+                ).rowcount
+                for job_id in job_ids
+            )
+
+    def checkpoint(self, job_id: int, owner: str, data: Dict[str, Any]) -> bool:
+        """
+        Save a job's progress (replaces the previous checkpoint)
+
+        Args:
+            job_id: Job ID
+            owner: Worker holding the lease
+            data: JSON-serializable progress
+
+        Returns:
+            False if the lease was lost (another worker owns the job now)
+        """
+        return self._finish(
+            "UPDATE jobs SET checkpoint = ?, updated_at = ?"
+            " WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+            (json.dumps(data, ensure_ascii=False), time.time(), job_id, owner)
+        )
+
+    def complete(self, job_id: int, owner: str, result: bytes) -> bool:
+        """
+        Mark a job done
+
+        Args:
+            job_id: Job ID
+            owner: Worker holding the lease
+            result: Serialized result (e.g., a compact FinalPlan)
+
+        Returns:
+            False if the lease was lost
+        """
+        return self._finish(
+            "UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL, lease_expires = NULL,"
+            " updated_at = ? WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+            (result, time.time(), job_id, owner)
+        )
+
+    def fail(self, job_id: int, owner: str, error: str, retry: bool = True, delay_s: float = 0.0) -> bool:
+        """
+        Record a failed attempt; the job is queued again while attempts remain
+
+        Args:
+            job_id: Job ID
+            owner: Worker holding the lease
+            error: Error message
+            retry: False to fail the job now (e.g., invalid input)
+            delay_s: Seconds before the retry may be leased
+
+        Returns:
+            False if the lease was lost
+        """
+        now = time.time()
+        return self._finish(
+            "UPDATE jobs SET status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END,"
+            " error = ?, lease_owner = NULL, lease_expires = NULL, available_at = ?, updated_at = ?"
+            " WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+            (int(retry), error, now + delay_s, now, job_id, owner)
+        )
+
+    def retry_wait(self, batch: Optional[str] = None) -> Optional[float]:
+        """
+        Time until the next delayed retry can be leased
+
+        Args:
+            batch: Batch name (None = all batches)
+
+        Returns:
+            Seconds to wait, or None if no queued job is waiting on a delay
+        """
+        now = time.time()
+        query = "SELECT MIN(available_at) FROM jobs WHERE status = 'queued' AND available_at > ?"
+        params: list = [now]
+        if batch is not None:
+            query += " AND batch = ?"
+            params.append(batch)
+        with self._lock:
+            available_at = self._db.execute(query, params).fetchone()[0]
+        return None if available_at is None else available_at - now
+
+    def result(self, job_id: int) -> Optional[bytes]:
+        """
+        Stored result of a done job
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Result bytes, or None if the job is not done
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM jobs WHERE job_id = ? AND status = 'done'", (job_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """
+        Jobs per status
+
+        Args:
+            batch: Batch name (None = all batches)
+
+        Returns:
+            Dict of status → count (every status in JOB_STATUSES is present)
+        """
+        query = "SELECT status, COUNT(*) FROM jobs"
+        params: list = []
+        if batch is not None:
+            query += " WHERE batch = ?"
+            params.append(batch)
+        with self._lock:
+            rows = self._db.execute(query + " GROUP BY status", params).fetchall()
+        return {status: 0 for status in JOB_STATUSES} | dict(rows)
+
+    def errors(self, batch: Optional[str] = None) -> Dict[str, str]:
+        """
+        Last error of each failed job
+
+        Args:
+            batch: Batch name (None = all batches)
+
+        Returns:
+            Dict of user ID → error
+        """
+        query = "SELECT user_id, error FROM jobs WHERE status = 'failed'"
+        params: list = []
+        if batch is not None:
+            query += " AND batch = ?"
+            params.append(batch)
+        with self._lock:
+            return dict(self._db.execute(query, params).fetchall())
+
+    def _finish(self, query: str, params: tuple) -> bool:
+        with self._transaction():
+            return self._db.execute(query, params).rowcount == 1
+
+    def _transaction(self):
+        return _Transaction(self._db, self._lock)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT under the connection lock (cross-process safe)"""
+
+    def __init__(self, db: sqlite3.Connection, lock: threading.Lock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
@@ -0,0 +1,282 @@
+"""
+Append-only plan archive (SQLite)
+
+Every FinalPlan is appended as a new version; nothing is updated or deleted.
+Plans are stored once as a compact JSON blob for exact reloads, and their
+schedule is also exploded into the `schedule_items` table with one typed
+column per field (minutes as integers, kind as focus/rest) so analytics and
+the learning loop query indexed columns instead of parsing JSON:
+
+    archive.items("minh", "2026-09-01", "2026-09-30", kind="focus")
+    archive.focus_minutes_by_chronotype()
+"""
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from schemas.final_plan import FinalPlan
+from utils.serialization import get_serializer
+
+ITEM_KINDS = ("focus", "rest")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    plan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    plan_date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    chronotype TEXT NOT NULL,
+    degraded INTEGER NOT NULL,
+    calendar_ready INTEGER NOT NULL,
+    focus_minutes INTEGER NOT NULL,
+    rest_minutes INTEGER NOT NULL,
+    plan BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plans_user_date ON plans (user_id, plan_date);
+CREATE INDEX IF NOT EXISTS plans_chronotype_date ON plans (chronotype, plan_date);
+CREATE TABLE IF NOT EXISTS schedule_items (
+    plan_id INTEGER NOT NULL REFERENCES plans (plan_id),
+    user_id TEXT NOT NULL,
+    plan_date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_user_kind_date ON schedule_items (user_id, kind, plan_date);
+CREATE INDEX IF NOT EXISTS items_plan ON schedule_items (plan_id);
+"""
+
+DateLike = Union[date, str]
+
+
+class ArchivedItem(BaseModel):
+    """One schedule row from the archive"""
+    plan_id: int
+    user_id: str
+    plan_date: str = Field(description="YYYY-MM-DD")
+    kind: str = Field(description="focus|rest")
+    item_id: str = Field(description="Schedule item ID (rest type for rests)")
+    start_minute: int = Field(description="Minutes since midnight")
+    end_minute: int
+    duration_minutes: int
+    label: str = Field(description="Task name, or rest rationale")
+    status: str = Field(description="planned|done (rests: planned)")
+
+
+def resolve_plan_date(plan: FinalPlan) -> str:
+    """
+    Day a plan is for
+
+    Args:
+        plan: Final plan
+
+    Returns:
+        metadata.plan_date, or the day after metadata.created_at when empty
+    """
+    if plan.metadata.plan_date:
+        return plan.metadata.plan_date
+    created = datetime.fromisoformat(plan.metadata.created_at).date()
+    return (created + timedelta(days=1)).isoformat()
+
+
+def _iso(day: Optional[DateLike]) -> Optional[str]:
+    return day.isoformat() if isinstance(day, date) else day
+
+
+class PlanArchive:
+    """Append-only SQLite archive of FinalPlans. Thread-safe."""
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Initialize plan archive
+
+        Args:
+            path: SQLite database file (":memory:" = not persisted)
+        """
+        self.path = path
+        self.serializer = get_serializer()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def append(self, plan: FinalPlan) -> int:
+        """
+        Archive a plan as a new version
+
+        Args:
+            plan: Final plan (an edited or approved plan is appended again)
+
+        Returns:
+            plan_id of the new row
+        """
+        plan_date = resolve_plan_date(plan)
+        user_id = plan.metadata.user_id
+        items = [
+            ("focus", item.id, item.time.start, item.time.end, item.editable_fields.duration, item.task, item.status)
+            for item in plan.editable_schedule
+        ]
+        items.extend(
+            ("rest", rest.type, rest.time.start, rest.time.end, rest.time.duration, rest.rationale, "planned")
+            for rest in plan.rest_periods
+        )
+        focus_minutes = sum(row[4] for row in items if row[0] == "focus")
+        rest_minutes = sum(row[4] for row in items if row[0] == "rest")
+
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO plans (user_id, plan_date, created_at, goal, chronotype, degraded,"
+                " calendar_ready, focus_minutes, rest_minutes, plan) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user_id, plan_date, plan.metadata.created_at, plan.metadata.goal,
+                    plan.user_context_summary.chronotype, int(plan.metadata.degraded),
+                    int(plan.calendar_ready), focus_minutes, rest_minutes,
+                    self.serializer.dumps(plan, compact=True)
+                )
+            )
+            plan_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO schedule_items (plan_id, user_id, plan_date, kind, item_id, start_minute,"
+                " end_minute, duration_minutes, label, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(plan_id, user_id, plan_date) + row for row in items]
+            )
+        return plan_id
+
+    def get(self, plan_id: int) -> Optional[FinalPlan]:
+        """
+        Reload an archived plan
+
+        Args:
+            plan_id: Row ID returned by append
+
+        Returns:
+            FinalPlan or None
+        """
+        with self._lock:
+            row = self._db.execute("SELECT plan FROM plans WHERE plan_id = ?", (plan_id,)).fetchone()
+        return self.serializer.loads(row[0], FinalPlan) if row else None
+
+    def latest(self, user_id: str, plan_date: DateLike) -> Optional[FinalPlan]:
+        """
+        Most recent version of a user's plan for a day
+
+        Args:
+            user_id: User ID
+            plan_date: Day (date or YYYY-MM-DD)
+
+        Returns:
+            FinalPlan or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT plan FROM plans WHERE user_id = ? AND plan_date = ? ORDER BY plan_id DESC LIMIT 1",
+                (user_id, _iso(plan_date))
+            ).fetchone()
+        return self.serializer.loads(row[0], FinalPlan) if row else None
+
+    def items(
+        self,
+        user_id: str,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        kind: Optional[str] = None,
+        latest_only: bool = True
+    ) -> List[ArchivedItem]:
+        """
+        Schedule items of a user over a date range (e.g., last month's focus blocks)
+
+        Args:
+            user_id: User ID
+            start_date: First day, inclusive (None = no lower bound)
+            end_date: Last day, inclusive (None = no upper bound)
+            kind: "focus" or "rest" (None = both)
+            latest_only: Only the latest plan version of each day
+
+        Returns:
+            ArchivedItem list ordered by day and start time
+
+        Raises:
+            ValueError: If kind is not in ITEM_KINDS
+        """
+        if kind is not None and kind not in ITEM_KINDS:
+            raise ValueError(f"Unknown item kind '{kind}'. Choose from: {', '.join(ITEM_KINDS)}")
+        query = (
+            "SELECT plan_id, user_id, plan_date, kind, item_id, start_minute, end_minute,"
+            " duration_minutes, label, status FROM schedule_items WHERE user_id = ?"
+        )
+        query, params = self._filter(query, [user_id], start_date, end_date, kind, latest_only)
+        query += " ORDER BY plan_date, start_minute"
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        fields = list(ArchivedItem.model_fields)
+        return [ArchivedItem(**dict(zip(fields, row))) for row in rows]
+
+    def focus_minutes_by_chronotype(
+        self,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None
+    ) -> Dict[str, float]:
+        """
+        Average scheduled focus minutes per plan, by chronotype
+
+        Only the latest version of each user's plan for a day is counted.
+
+        Args:
+            start_date: First day, inclusive (None = no lower bound)
+            end_date: Last day, inclusive (None = no upper bound)
+
+        Returns:
+            Dict of chronotype → average focus minutes
+        """
+        query = (
+            "SELECT chronotype, AVG(focus_minutes) FROM plans p WHERE plan_id ="
+            " (SELECT MAX(plan_id) FROM plans WHERE user_id = p.user_id AND plan_date = p.plan_date)"
+        )
+        params: list = []
+        if start_date is not None:
+            query += " AND plan_date >= ?"
+            params.append(_iso(start_date))
+        if end_date is not None:
+            query += " AND plan_date <= ?"
+            params.append(_iso(end_date))
+        query += " GROUP BY chronotype"
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return {chronotype: round(average, 2) for chronotype, average in rows}
+
+    def _filter(self, query, params, start_date, end_date, kind, latest_only):
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        if start_date is not None:
+            query += " AND plan_date >= ?"
+            params.append(_iso(start_date))
+        if end_date is not None:
+            query += " AND plan_date <= ?"
+            params.append(_iso(end_date))
+        if latest_only:
+            query += (
+                " AND plan_id IN (SELECT MAX(plan_id) FROM plans WHERE user_id = ?"
+                " GROUP BY plan_date)"
+            )
+            params.append(params[0])
+        return query, params
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
@@ -0,0 +1,286 @@
+"""
+Persistent user profile store (one SQLite row per user)
+
+A1 rebuilds the bio profile from the collected info on every run. The store
+keeps what was learned about each user - chronotype, sleep/meal times,
+peak/slump hours, commitments and per-activity habits (usual deadline,
+duration and energy) - so a returning user is asked only what is still
+unknown. Compiled profiles (known bio fields plus a 15-minute energy vector)
+are cached in memory with LRU eviction.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from schemas.time_types import MINUTES_PER_DAY, TimeOfDay, TimeRange
+from utils.activity_index import get_activity_index
+from utils.serialization import get_serializer
+from utils.template_store import normalize_activity
+
+ANONYMOUS_USER = "anonymous"
+
+# Compiled profiles kept in memory
+PROFILE_CACHE_SIZE = 1024
+
+# Energy vector resolution
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+# Energy vector levels
+ENERGY_ASLEEP = 0
+ENERGY_SLUMP = 1
+ENERGY_NORMAL = 2
+ENERGY_PEAK = 3
+
+# UserBioProfile fields a profile remembers (energy_tomorrow changes daily)
+BIO_FIELDS = (
+    "chronotype", "sleep_time", "wake_time", "meal_times", "peak_hours",
+    "slump_hours", "fixed_commitments", "physical_constraints",
+)
+
+_RANGE_IN_TEXT = re.compile(r"\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}")
+
+
+def activity_key(goal: str) -> str:
+    """
+    Key under which a goal's habits are remembered
+
+    Args:
+        goal: Goal as written by the user
+
+    Returns:
+        Canonical activity label if the goal maps to one, else the normalized goal
+    """
+    match = get_activity_index().match(goal)
+    return match.label if match is not None else normalize_activity(goal)
+
+
+class GoalHabit(BaseModel):
+    """Clarification answers last given for an activity"""
+    deadline: str = Field(default="", description="Usual deadline (e.g., '07:00 sáng mai')")
+    estimated_duration: str = Field(default="", description="Usual duration as the user wrote it")
+    energy_level: str = Field(default="medium", description="high|medium|low")
+
+
+class UserProfile(BaseModel):
+    """Everything learned about one user"""
+    user_id: str = Field(description="Tenant key")
+    chronotype: Optional[str] = Field(default=None, description="lark|owl|intermediate")
+    sleep_time: Optional[TimeOfDay] = Field(default=None)
+    wake_time: Optional[TimeOfDay] = Field(default=None)
+    meal_times: Dict[str, TimeOfDay] = Field(default_factory=dict)
+    peak_hours: List[TimeRange] = Field(default_factory=list)
+    slump_hours: List[TimeRange] = Field(default_factory=list)
+    fixed_commitments: List[str] = Field(default_factory=list)
+    physical_constraints: List[str] = Field(default_factory=list)
+    habits: Dict[str, GoalHabit] = Field(default_factory=dict, description="Activity key → habit")
+    updated_at: float = Field(default_factory=time.time)
+
+    def known_bio(self) -> Dict[str, Any]:
+        """Known bio fields in bio_context form (unknown fields omitted)"""
+        data = self.model_dump(mode="json", include=set(BIO_FIELDS))
+        return {name: value for name, value in data.items() if value not in (None, {}, [])}
+
+
+class CompiledProfile(BaseModel):
+    """A profile prepared for the pipeline"""
+    user_id: str
+    bio_context: Dict[str, Any] = Field(description="Known bio fields, merged under the collected info")
+    energy: bytes = Field(description=f"One energy level per {SLOT_MINUTES} minutes, from 00:00")
+
+    def level_at(self, minute: int) -> int:
+        """Energy level at a minute of the day (ENERGY_ASLEEP … ENERGY_PEAK)"""
+        return self.energy[(minute % MINUTES_PER_DAY) // SLOT_MINUTES]
+
+
+def _fill(levels: bytearray, start: int, end: int, level: int):
+    """Set the slots covering [start, end) minutes, wrapping past midnight"""
+    if end <= start:
+        end += MINUTES_PER_DAY
+    for slot in range(start // SLOT_MINUTES, -(-end // SLOT_MINUTES)):
+        levels[slot % SLOTS_PER_DAY] = level
+
+
+def compile_energy_vector(profile: UserProfile) -> bytes:
+    """
+    Compile a profile into per-slot energy levels
+
+    Sleep and fixed commitments with a time range are ENERGY_ASLEEP, slump
+    hours ENERGY_SLUMP, peak hours ENERGY_PEAK and the rest ENERGY_NORMAL.
+
+    Args:
+        profile: User profile
+
+    Returns:
+        SLOTS_PER_DAY bytes
+    """
+    levels = bytearray([ENERGY_NORMAL]) * SLOTS_PER_DAY
+    for time_range in profile.slump_hours:
+        _fill(levels, time_range.start, time_range.end, ENERGY_SLUMP)
+    for time_range in profile.peak_hours:
+        _fill(levels, time_range.start, time_range.end, ENERGY_PEAK)
+    for commitment in profile.fixed_commitments:
+        for text in _RANGE_IN_TEXT.findall(commitment):
+            time_range = TimeRange.parse(text)
+            _fill(levels, time_range.start, time_range.end, ENERGY_ASLEEP)
+    if profile.sleep_time is not None and profile.wake_time is not None:
+        _fill(levels, profile.sleep_time, profile.wake_time, ENERGY_ASLEEP)
+    return bytes(levels)
+
+
+class ProfileStore:
+    """
+    SQLite-backed profile store keyed by user ID, with an LRU cache of
+    compiled profiles. Thread-safe.
+    """
+
+    def __init__(self, path: str = ":memory:", cache_size: int = PROFILE_CACHE_SIZE):
+        """
+        Initialize profile store
+
+        Args:
+            path: SQLite database file (":memory:" = not persisted)
+            cache_size: Compiled profiles kept in memory
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.serializer = get_serializer()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "user_id TEXT PRIMARY KEY, profile BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._cache: "OrderedDict[str, CompiledProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[UserProfile]:
+        """
+        Load a user's profile
+
+        Args:
+            user_id: Tenant key
+
+        Returns:
+            UserProfile or None for unknown users
+        """
+        with self._lock:
+            row = self._db.execute("SELECT profile FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        return self.serializer.loads(row[0], UserProfile) if row else None
+
+    def save(self, profile: UserProfile):
+        """
+        Insert or replace a profile and drop its compiled copy
+
+        Args:
+            profile: Profile to store
+        """
+        profile.updated_at = time.time()
+        data = self.serializer.dumps(profile, compact=True)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, profile, updated_at) VALUES (?, ?, ?)",
+                (profile.user_id, data, profile.updated_at)
+            )
+            self._db.commit()
+            self._cache.pop(profile.user_id, None)
+
+    def learn(
+        self,
+        user_id: str,
+        bio_context: Optional[Dict[str, Any]] = None,
+        goals_info: Optional[List[Dict[str, Any]]] = None
+    ) -> UserProfile:
+        """
+        Merge what one run learned into the user's profile
+
+        Only bio fields the user actually gave are kept (A1's defaults are
+        not learned).
+
+        Args:
+            user_id: Tenant key
+            bio_context: Collected info of the run (bio fields in BIO_FIELDS)
+            goals_info: Per-goal clarification answers (all_goals_info)
+
+        Returns:
+            Updated UserProfile
+
+        Raises:
+            ValidationError: If a given bio field is malformed
+        """
+        profile = self.get(user_id) or UserProfile(user_id=user_id)
+        known = {name: (bio_context or {})[name] for name in BIO_FIELDS if (bio_context or {}).get(name)}
+        if known:
+            profile = UserProfile.model_validate({**profile.model_dump(mode="json"), **known})
+        for goal_info in goals_info or []:
+            if not goal_info.get("goal") or not goal_info.get("deadline"):
+                continue
+            profile.habits[activity_key(goal_info["goal"])] = GoalHabit(
+                deadline=goal_info["deadline"],
+                estimated_duration=goal_info.get("estimated_duration") or "",
+                energy_level=goal_info.get("energy_level") or "medium"
+            )
+        self.save(profile)
+        return profile
+
+    def habit(self, user_id: str, goal: str) -> Optional[GoalHabit]:
+        """
+        Remembered answers for a goal's activity
+
+        Args:
+            user_id: Tenant key
+            goal: Goal as written by the user
+
+        Returns:
+            GoalHabit or None
+        """
+        profile = self.get(user_id)
+        return profile.habits.get(activity_key(goal)) if profile else None
+
+    def compiled(self, user_id: str) -> Optional[CompiledProfile]:
+        """
+        Compiled profile for a user (cached, least recently used evicted)
+
+        Args:
+            user_id: Tenant key
+
+        Returns:
+            CompiledProfile or None for unknown users
+        """
+        with self._lock:
+            compiled = self._cache.get(user_id)
+            if compiled is not None:
+                self._cache.move_to_end(user_id)
+                return compiled
+
+        profile = self.get(user_id)
+        if profile is None:
+            return None
+        compiled = CompiledProfile(
+            user_id=user_id,
+            bio_context=profile.known_bio(),
+            energy=compile_energy_vector(profile)
+        )
+        with self._lock:
+            self._cache[user_id] = compiled
+            self._cache.move_to_end(user_id)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compiled
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
@@ -0,0 +1,420 @@
+"""
+Resilience layer for upstream calls (Gemini, Tavily)
+
+Every call to an endpoint goes through a ResilientEndpoint, which adds:
+- a per-call deadline (the caller stops waiting; the worker thread finishes
+  in the background because Python threads cannot be cancelled)
+- one hedged duplicate request when the first attempt is slower than the
+  endpoint's recent p95 latency
+- a circuit breaker that fails fast after repeated failures and lets a single
+  trial call through after a cool-down (optionally ignoring HTTP 4xx errors,
+  which are about the caller's request, not the upstream's health)
+- an optional degraded-mode fallback used instead of raising
+- the same deadline and circuit breaker for token streams (`stream`), which
+  are never hedged: a duplicate would repeat tokens the caller already has
+- metrics (calls, failures, timeouts, hedges, short circuits, fallbacks and
+  latency percentiles) for each endpoint
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from pydantic import BaseModel, Field
+
+
+class UpstreamError(Exception):
+    """An upstream call failed, timed out or was short-circuited"""
+
+
+class DeadlineExceeded(UpstreamError, TimeoutError):
+    """No attempt finished before the call's deadline"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The endpoint's circuit breaker is open"""
+
+
+class EndpointPolicy(BaseModel):
+    """Resilience settings for one endpoint"""
+    timeout_s: float = Field(description="Deadline for one call, hedge included")
+    hedge: bool = Field(default=True, description="Send a duplicate request when the first is slow")
+    hedge_percentile: float = Field(default=95.0, description="Latency percentile that triggers the hedge")
+    min_hedge_delay_s: float = Field(description="Never hedge earlier than this")
+    min_samples: int = Field(default=20, description="Successful calls needed before hedging starts")
+    failure_threshold: int = Field(default=5, description="Consecutive failures that open the circuit")
+    reset_timeout_s: float = Field(default=30.0, description="Time the circuit stays open before a trial call")
+    client_errors_open_circuit: bool = Field(default=True, description="HTTP 4xx errors count toward the circuit breaker")
+
+
+DEFAULT_POLICIES: Dict[str, EndpointPolicy] = {
+    "gemini": EndpointPolicy(timeout_s=60.0, min_hedge_delay_s=2.0),
+    "tavily": EndpointPolicy(timeout_s=15.0, min_hedge_delay_s=1.0),
+    # Not hedged: Calendar quota is per user and writes are not idempotent.
+    # 4xx (403 quota, 404 calendar, 410 sync token) concern one user's
+    # calendar, so they must not open the circuit for every other user.
+    "calendar": EndpointPolicy(
+        timeout_s=10.0, hedge=False, min_hedge_delay_s=1.0, client_errors_open_circuit=False
+    ),
+}
+
+# Latency samples kept per endpoint for the hedge delay and metrics
+LATENCY_WINDOW = 200
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="atp-upstream")
+        return _executor
+
+
+def is_client_error(error: Optional[BaseException]) -> bool:
+    """
+    True if an upstream error is an HTTP 4xx (e.g., googleapiclient HttpError)
+
+    Args:
+        error: Exception raised by the upstream call
+
+    Returns:
+        True for 400-499 responses (status read from `error.resp.status`)
+    """
+    status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return 400 <= int(status) < 500
+    except (TypeError, ValueError):
+        return False
+
+
+def _percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+    closed → open after `failure_threshold` failures; open → half-open after
+    `reset_timeout_s`; one trial call then closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a call may be made now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another trial call through after one ended with no outcome (e.g., an abandoned stream)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class ResilientEndpoint:
+    """Deadlines, hedging, circuit breaking, fallbacks and metrics for one endpoint"""
+
+    def __init__(self, name: str, policy: EndpointPolicy):
+        """
+        Initialize endpoint
+
+        Args:
+            name: Endpoint name used in metrics (e.g., "gemini")
+            policy: Resilience settings
+        """
+        self.name = name
+        self.policy = policy
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout_s)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {
+            "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "hedges": 0, "hedge_wins": 0, "short_circuits": 0, "fallbacks": 0,
+            "client_errors": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging (None = do not hedge yet)"""
+        if not self.policy.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.policy.min_samples:
+                return None
+            samples = list(self._latencies)
+        return max(self.policy.min_hedge_delay_s, _percentile(samples, self.policy.hedge_percentile))
+
+    def call(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        fallback: Optional[Callable[[UpstreamError], Any]] = None,
+        timeout_s: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Call `fn(*args, **kwargs)` with the endpoint's protections
+
+        Args:
+            fn: Upstream call (e.g., chain.invoke or client.search)
+            fallback: Degraded-mode result builder, called with the error
+                instead of raising
+            timeout_s: Override the policy deadline for this call
+
+        Returns:
+            The first successful attempt's result, or the fallback's result
+
+        Raises:
+            UpstreamError: If the call fails and there is no fallback
+                (DeadlineExceeded, CircuitOpenError, or wrapping fn's error)
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            return self._fail(CircuitOpenError(f"{self.name}: circuit open"), fallback, record=False)
+
+        deadline = time.monotonic() + (timeout_s or self.policy.timeout_s)
+        start = time.perf_counter()
+        executor = _get_executor()
+        attempts = [executor.submit(fn, *args, **kwargs)]
+        pending = set(attempts)
+        last_error: Optional[BaseException] = None
+
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is not None:
+            done, pending = wait(pending, timeout=min(hedge_delay, max(0.0, deadline - time.monotonic())))
+            result = self._first_success(done)
+            if result is not None:
+                return self._succeed(result, attempts, start)
+            last_error = self._first_error(done) or last_error
+            if time.monotonic() < deadline:
+                self._count("hedges")
+                hedge = executor.submit(fn, *args, **kwargs)
+                attempts.append(hedge)
+                pending.add(hedge)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            result = self._first_success(done)
+            if result is not None:
+                return self._succeed(result, attempts, start)
+            last_error = self._first_error(done) or last_error
+
+        if pending:
+            self._count("timeouts")
+            error = DeadlineExceeded(f"{self.name}: no response within {timeout_s or self.policy.timeout_s:g}s")
+        else:
+            error = UpstreamError(f"{self.name}: {last_error}")
+            error.__cause__ = last_error
+            if self._ignores(last_error):
+                return self._fail(error, fallback, record=False)
+        return self._fail(error, fallback)
+
+    def stream(self, fn: Callable[..., Iterator[Any]], *args, timeout_s: Optional[float] = None, **kwargs) -> Iterator[Any]:
+        """
+        Iterate `fn(*args, **kwargs)` with the endpoint's deadline and breaker
+
+        The iterator runs on the upstream pool and hands chunks over as they
+        arrive; the deadline covers the whole stream. Closing this generator
+        early stops the worker at its next chunk.
+
+        Args:
+            fn: Upstream stream (e.g., stream_text with a chain and inputs)
+            timeout_s: Override the policy deadline for this stream
+
+        Yields:
+            The stream's chunks
+
+        Raises:
+            UpstreamError: If the stream fails, stalls past the deadline
+                (DeadlineExceeded) or the circuit is open (CircuitOpenError)
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            self._fail(CircuitOpenError(f"{self.name}: circuit open"), None, record=False)
+
+        timeout = timeout_s or self.policy.timeout_s
+        deadline = time.monotonic() + timeout
+        start = time.perf_counter()
+        chunks: queue.Queue = queue.Queue()
+        stopped = threading.Event()
+
+        def produce():
+            try:
+                for chunk in fn(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    chunks.put(("chunk", chunk))
+                chunks.put(("end", None))
+            except BaseException as e:
+                chunks.put(("error", e))
+
+        _get_executor().submit(produce)
+        settled = False  # the stream ended or failed, so the breaker saw an outcome
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    kind, value = chunks.get(timeout=remaining) if remaining > 0 else chunks.get_nowait()
+                except queue.Empty:
+                    self._count("timeouts")
+                    settled = True
+                    self._fail(DeadlineExceeded(f"{self.name}: stream not finished within {timeout:g}s"), None)
+                if kind == "chunk":
+                    yield value
+                elif kind == "end":
+                    settled = True
+                    break
+                else:
+                    error = UpstreamError(f"{self.name}: {value}")
+                    error.__cause__ = value
+                    settled = True
+                    self._fail(error, None, record=not self._ignores(value))
+        finally:
+            stopped.set()
+            if not settled:
+                # Abandoned by the consumer (GeneratorExit): a half-open trial must not stay pending
+                self.breaker.release_trial()
+
+        self.breaker.record_success()
+        with self._lock:
+            self._counters["successes"] += 1
+            self._latencies.append(time.perf_counter() - start)
+
+    def _first_success(self, done) -> Optional[Future]:
+        for future in done:
+            if future.exception() is None:
+                return future
+        return None
+
+    def _first_error(self, done) -> Optional[BaseException]:
+        for future in done:
+            if future.exception() is not None:
+                return future.exception()
+        return None
+
+    def _ignores(self, error: BaseException) -> bool:
+        """True if fn's error must not count toward the breaker (a 4xx, when the policy says so)"""
+        if self.policy.client_errors_open_circuit or not is_client_error(error):
+            return False
+        # The upstream answered: close a half-open circuit instead of leaving its trial pending
+        self.breaker.record_success()
+        self._count("client_errors")
+        return True
+
+    def _succeed(self, future: Future, attempts: list, start: float) -> Any:
+        elapsed = time.perf_counter() - start
+        self.breaker.record_success()
+        with self._lock:
+            self._counters["successes"] += 1
+            if future is not attempts[0]:
+                self._counters["hedge_wins"] += 1
+            self._latencies.append(elapsed)
+        return future.result()
+
+    def _fail(self, error: UpstreamError, fallback, record: bool = True) -> Any:
+        if record:
+            self.breaker.record_failure()
+            self._count("failures")
+        if fallback is None:
+            raise error
+        self._count("fallbacks")
+        print(f"⚠️  {error} - using degraded fallback")
+        return fallback(error)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of counters, circuit state and latency percentiles
+
+        Returns:
+            Dict of metric name → value
+        """
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._counters)
+            samples = [s * 1000 for s in self._latencies]
+        snapshot["circuit"] = self.breaker.state
+        snapshot["p50_ms"] = round(_percentile(samples, 50), 3)
+        snapshot["p95_ms"] = round(_percentile(samples, 95), 3)
+        snapshot["p99_ms"] = round(_percentile(samples, 99), 3)
+        return snapshot
+
+
+_endpoints: Dict[str, ResilientEndpoint] = {}
+_endpoints_lock = threading.Lock()
+
+
+def get_endpoint(name: str) -> ResilientEndpoint:
+    """
+    Shared endpoint for an upstream (created on first use)
+
+    Args:
+        name: Endpoint name; DEFAULT_POLICIES gives its settings (unknown
+            names get the Gemini policy)
+
+    Returns:
+        ResilientEndpoint shared by every caller in the process
+    """
+    with _endpoints_lock:
+        endpoint = _endpoints.get(name)
+        if endpoint is None:
+            policy = DEFAULT_POLICIES.get(name, DEFAULT_POLICIES["gemini"])
+            endpoint = _endpoints[name] = ResilientEndpoint(name, policy)
+        return endpoint
+
+
+def resilience_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Metrics for every endpoint used so far
+
+    Returns:
+        Dict of endpoint name → metrics snapshot
+    """
+    with _endpoints_lock:
+        endpoints = list(_endpoints.values())
+    return {endpoint.name: endpoint.metrics() for endpoint in endpoints}
@@ -0,0 +1,222 @@
+"""
+Declarative A3 scheduling policy
+
+Chunk sizes, rest rules and slot limits are data, not code: a
+SchedulingPolicy is loaded from a JSON file and validated once, then
+compiled into the lookup tables A3 reads on every run (RestPolicy tuples for
+the timeline engine, parsed fallback slots and a memoized chunk split table).
+Each compiled policy has a fingerprint, so per-tenant policies can run side
+by side (and be A/B-tested) without sharing cached stage outputs.
+
+Fields left out of a file keep their defaults, so a policy only states what
+it changes:
+
+    {"name": "long-blocks",
+     "chunking": {"high": {"max_minutes": 50, "label": "Block"}},
+     "rest_rules": [{"focus_minutes": 90, "rest_minutes": 20, "reason": "..."},
+                    {"focus_minutes": 50, "rest_minutes": 10, "reason": "..."}]}
+
+    policy = load_policy("policies/long-blocks.json")
+    agent = BioOptimizerAgent(policy=policy)
+
+Splits never lose minutes: a task longer than its difficulty's max_minutes
+becomes ceil(duration / max_minutes) chunks of near-equal length that add up
+to the full duration.
+"""
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+from schemas.time_types import TimeRange
+from utils.timeline import RestPolicy
+
+DIFFICULTIES = ("low", "medium", "high")
+
+# Path of the policy file used when none is passed (unset = DEFAULT_POLICY)
+POLICY_ENV = "ATP_SCHEDULING_POLICY"
+
+
+class ChunkRule(BaseModel):
+    """How tasks of one difficulty are split into atomic chunks"""
+    max_minutes: Optional[int] = Field(default=None, gt=0, description="Longest chunk (None = never split)")
+    label: str = Field(default="Part", min_length=1, description="Name suffix, e.g. 'Part' -> 'Task (Part 1/3)'")
+    session_label: Optional[str] = Field(default=None, description="Description suffix (None = label)")
+
+
+class RestRule(BaseModel):
+    """A rest of rest_minutes owed after focus_minutes of focus"""
+    focus_minutes: int = Field(gt=0)
+    rest_minutes: int = Field(gt=0)
+    reason: str = Field(min_length=1)
+
+
+DEFAULT_CHUNKING = {
+    "low": ChunkRule(),
+    "medium": ChunkRule(max_minutes=15),
+    "high": ChunkRule(max_minutes=25, label="Pomodoro", session_label="Pomodoro session"),
+}
+
+
+class SchedulingPolicy(BaseModel):
+    """Chunking, rest and slot rules of A3"""
+    name: str = Field(default="default", min_length=1)
+    atomic_minutes: int = Field(default=5, ge=0, description="Tasks this short are never split")
+    chunking: Dict[str, ChunkRule] = Field(default_factory=lambda: dict(DEFAULT_CHUNKING))
+    rest_rules: List[RestRule] = Field(
+        default_factory=lambda: [
+            RestRule(focus_minutes=90, rest_minutes=20, reason="Ultradian rhythm recovery after 90+ min focus"),
+            RestRule(focus_minutes=25, rest_minutes=5, reason="Pomodoro short break for cognitive recovery"),
+        ],
+        description="Longest first; each counts focus since the last rest at least as long as its own"
+    )
+    fallback_slots: List[TimeRange] = Field(
+        default_factory=lambda: [
+            TimeRange.parse(text) for text in ("06:00-07:00", "11:00-12:00", "14:00-15:00", "16:00-17:00")
+        ],
+        description="Extra slots used when the profile has too few peak windows"
+    )
+    min_peak_slots: int = Field(default=3, ge=0, description="Fallback slots are added below this many peak windows")
+    max_slots: int = Field(default=6, gt=0, description="Most slots scheduled in one day")
+
+    @field_validator("chunking")
+    @classmethod
+    def complete_chunking(cls, value: Dict[str, ChunkRule]) -> Dict[str, ChunkRule]:
+        """Unknown difficulties are rejected; missing ones keep their defaults"""
+        unknown = set(value) - set(DIFFICULTIES)
+        if unknown:
+            raise ValueError(f"Unknown difficulty {sorted(unknown)}. Choose from: {', '.join(DIFFICULTIES)}")
+        return {**DEFAULT_CHUNKING, **value}
+
+    @model_validator(mode="after")
+    def check_rest_order(self) -> "SchedulingPolicy":
+        """Rest rules are checked in order, so they must be longest first"""
+        thresholds = [rule.focus_minutes for rule in self.rest_rules]
+        if any(a <= b for a, b in zip(thresholds, thresholds[1:])):
+            raise ValueError(f"rest_rules must be ordered by focus_minutes, longest first (got {thresholds})")
+        return self
+
+
+class CompiledPolicy:
+    """
+    Lookup tables of a validated SchedulingPolicy
+
+    Built once per policy and shared; chunk splits are memoized per
+    (difficulty, minutes), since queues repeat the same few durations.
+    """
+
+    def __init__(self, policy: SchedulingPolicy):
+        """
+        Compile a policy
+
+        Args:
+            policy: Validated scheduling policy
+        """
+        self.policy = policy
+        self.name = policy.name
+        self.fingerprint = hashlib.sha256(policy.model_dump_json().encode("utf-8")).hexdigest()[:16]
+        self.rest_rules = tuple(
+            RestPolicy(rule.focus_minutes, rule.rest_minutes, rule.reason) for rule in policy.rest_rules
+        )
+        # A rest or idle gap at least this long resets every rest rule
+        self.full_rest = max((rule.rest_minutes for rule in self.rest_rules), default=0)
+        self.fallback_slots = tuple(policy.fallback_slots)
+        self.min_peak_slots = policy.min_peak_slots
+        self.max_slots = policy.max_slots
+        self._chunk_rules = dict(policy.chunking)
+        self._splits: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+
+    def chunk_rule(self, difficulty: str) -> ChunkRule:
+        """Chunk rule of a difficulty (unknown difficulties are treated as high)"""
+        return self._chunk_rules.get(difficulty, self._chunk_rules["high"])
+
+    def split(self, difficulty: str, minutes: int) -> Tuple[int, ...]:
+        """
+        Chunk durations of a task
+
+        Args:
+            difficulty: Task difficulty
+            minutes: Task duration
+
+        Returns:
+            Durations that add up to `minutes`; a single unsplit chunk when
+            the task is atomic or its difficulty is never split
+        """
+        key = (difficulty, minutes)
+        chunks = self._splits.get(key)
+        if chunks is None:
+            if not self.is_split(difficulty, minutes):
+                chunks = (minutes,)
+            else:
+                parts = -(-minutes // self.chunk_rule(difficulty).max_minutes)
+                size, extra = divmod(minutes, parts)
+                chunks = tuple(size + (1 if i < extra else 0) for i in range(parts))
+            self._splits[key] = chunks
+        return chunks
+
+    def is_split(self, difficulty: str, minutes: int) -> bool:
+        """True if the task is split into labeled parts (even a single one)"""
+        return self.chunk_rule(difficulty).max_minutes is not None and minutes > self.policy.atomic_minutes
+
+    def slots(self, peak_hours: Sequence[TimeRange]) -> List[TimeRange]:
+        """
+        Candidate slots of a day: peak windows, fallback slots when there are
+        too few, capped at max_slots
+
+        Args:
+            peak_hours: The profile's peak windows
+
+        Returns:
+            Slots in priority order
+        """
+        slots = list(peak_hours)
+        if len(slots) < self.min_peak_slots:
+            slots.extend(self.fallback_slots)
+        return slots[:self.max_slots]
+
+
+DEFAULT_POLICY = CompiledPolicy(SchedulingPolicy())
+
+# Compiled policies by absolute path, with the file mtime they were read at
+_LOADED: Dict[str, Tuple[float, CompiledPolicy]] = {}
+
+
+def load_policy(path: str) -> CompiledPolicy:
+    """
+    Load, validate and compile a JSON policy file (cached until the file changes)
+
+    Args:
+        path: Policy file path
+
+    Returns:
+        CompiledPolicy
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the file is not a valid SchedulingPolicy
+    """
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = _LOADED.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        compiled = CompiledPolicy(SchedulingPolicy.model_validate_json(text))
+    except ValidationError as e:
+        raise ValueError(f"Invalid scheduling policy {path}: {e}") from e
+    _LOADED[path] = (mtime, compiled)
+    return compiled
+
+
+def default_policy() -> CompiledPolicy:
+    """
+    Policy from the ATP_SCHEDULING_POLICY file, else DEFAULT_POLICY
+
+    Returns:
+        CompiledPolicy
+    """
+    path = os.getenv(POLICY_ENV)
+    return load_policy(path) if path else DEFAULT_POLICY
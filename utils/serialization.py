@@ -0,0 +1,95 @@
+"""
+Pluggable JSON serializers for plans and other pydantic models
+
+Backends:
+    pydantic - model_dump_json / model_validate_json (Rust encoder, default)
+    orjson   - orjson over model_dump(mode="json") (optional dependency)
+    json     - stdlib json, kept for comparison and environments without pydantic-core JSON
+
+All backends write UTF-8 without escaping non-ASCII text. `compact=True` drops
+indentation for machine consumers; the default output stays human-editable.
+"""
+import json
+from typing import Dict, Type, TypeVar
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+DEFAULT_BACKEND = "pydantic"
+
+
+class PydanticSerializer:
+    """Serialize with pydantic-core's compiled JSON encoder"""
+
+    name = "pydantic"
+
+    def dumps(self, model: BaseModel, compact: bool = False) -> bytes:
+        return model.model_dump_json(indent=None if compact else 2).encode("utf-8")
+
+    def loads(self, data: bytes, model_cls: Type[ModelT]) -> ModelT:
+        return model_cls.model_validate_json(data)
+
+
+class OrjsonSerializer:
+    """Serialize with orjson (requires `pip install orjson`)"""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed. Run: pip install orjson")
+
+    def dumps(self, model: BaseModel, compact: bool = False) -> bytes:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        return orjson.dumps(model.model_dump(mode="json"), option=option)
+
+    def loads(self, data: bytes, model_cls: Type[ModelT]) -> ModelT:
+        return model_cls.model_validate(orjson.loads(data))
+
+
+class StdlibJSONSerializer:
+    """Serialize with the standard library json module"""
+
+    name = "json"
+
+    def dumps(self, model: BaseModel, compact: bool = False) -> bytes:
+        if compact:
+            text = json.dumps(model.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(model.model_dump(mode="json"), ensure_ascii=False, indent=2)
+        return text.encode("utf-8")
+
+    def loads(self, data: bytes, model_cls: Type[ModelT]) -> ModelT:
+        return model_cls.model_validate(json.loads(data))
+
+
+SERIALIZERS: Dict[str, type] = {
+    "pydantic": PydanticSerializer,
+    "orjson": OrjsonSerializer,
+    "json": StdlibJSONSerializer,
+}
+
+
+def get_serializer(name: str = DEFAULT_BACKEND):
+    """
+    Get a serializer backend by name
+
+    Args:
+        name: "pydantic", "orjson" or "json"
+
+    Returns:
+        Serializer with dumps(model, compact) and loads(data, model_cls)
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the backend's optional dependency is missing
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{name}'. Choose from: {', '.join(SERIALIZERS)}")
+    return SERIALIZERS[name]()
@@ -0,0 +1,180 @@
+"""
+Content-addressed store of pipeline stage outputs
+
+Each A1/A2/A3 output is stored under a hash of the stage's inputs, so a
+retried or re-run pipeline reuses every stage whose inputs did not change
+and only repeats the stages after the first change. A2 is keyed by the
+clarified goal alone (it does not read the bio profile), so a changed
+profile re-runs A1 and A3 but reuses the paid research. Bump STAGE_VERSION
+when a stage's prompts or output schema change.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+from schemas.agent1_output import GoalClarifierOutput
+from schemas.agent2_output import DomainResearcherOutput
+from schemas.agent3_output import BioOptimizerOutput
+from utils.serialization import get_serializer
+
+# Bump when stage prompts or output schemas change
+STAGE_VERSION = "1"
+
+STAGE_MODELS: Dict[str, Type[BaseModel]] = {
+    "a1": GoalClarifierOutput,
+    "a2": DomainResearcherOutput,
+    "a3": BioOptimizerOutput,
+}
+
+# Outputs kept in memory (least recently used are dropped first)
+STAGE_CACHE_SIZE = 512
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-ready form of stage inputs (models dumped, keys sorted on encode)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    return value
+
+
+class StageStore:
+    """
+    In-memory LRU of stage outputs with optional JSON persistence
+    (`{directory}/{stage}/{key}.json`). Thread-safe.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        version: str = STAGE_VERSION,
+        cache_size: int = STAGE_CACHE_SIZE
+    ):
+        """
+        Initialize stage store
+
+        Args:
+            directory: Directory for persisted outputs (None = memory only)
+            version: Stage version mixed into every key
+            cache_size: Outputs kept in memory
+        """
+        self.directory = directory
+        self.version = version
+        self.cache_size = cache_size
+        self.serializer = get_serializer()
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, BaseModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if directory:
+            for stage in STAGE_MODELS:
+                os.makedirs(os.path.join(directory, stage), exist_ok=True)
+
+    def key(self, stage: str, *inputs: Any) -> str:
+        """
+        Content address of a stage run
+
+        Args:
+            stage: "a1", "a2" or "a3"
+            *inputs: Everything the stage output depends on (models, dicts,
+                lists or scalars)
+
+        Returns:
+            Hex SHA-256 of the stage, version and canonical inputs
+
+        Raises:
+            ValueError: If stage is not in STAGE_MODELS
+        """
+        if stage not in STAGE_MODELS:
+            raise ValueError(f"Unknown stage '{stage}'. Choose from: {', '.join(STAGE_MODELS)}")
+        payload = json.dumps(
+            [stage, self.version, _canonical(list(inputs))],
+            sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, stage: str, key: str) -> Optional[BaseModel]:
+        """
+        Stored output of a stage run
+
+        Args:
+            stage: Stage name
+            key: Key from key()
+
+        Returns:
+            Validated stage output, or None
+        """
+        with self._lock:
+            output = self._entries.get(key)
+            if output is not None:
+                self._entries.move_to_end(key)
+        if output is None:
+            output = self._load(stage, key)
+            if output is not None:
+                self._remember(key, output)
+        with self._lock:
+            if output is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return output
+
+    def put(self, stage: str, key: str, output: BaseModel):
+        """
+        Store a stage output
+
+        Args:
+            stage: Stage name
+            key: Key from key()
+            output: Validated stage output
+        """
+        self._remember(key, output)
+        if self.directory:
+            # Write-then-rename so readers never see a partial file
+            path = self._path(stage, key)
+            # Unique temp file: forked workers share thread idents and often write the same key
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self.serializer.dumps(output, compact=True))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _remember(self, key: str, output: BaseModel):
+        with self._lock:
+            self._entries[key] = output
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.cache_size:
+                self._entries.popitem(last=False)
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, f"{key}.json")
+
+    def _load(self, stage: str, key: str) -> Optional[BaseModel]:
+        if not self.directory:
+            return None
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return self.serializer.loads(f.read(), STAGE_MODELS[stage])
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,53 @@
+"""
+Token streaming helpers for free-text LLM calls (`prompt | llm`)
+"""
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+def stream_text(chain: Any, inputs: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the text of an LLM answer chunk by chunk
+
+    Models that cannot stream produce the whole answer as one chunk.
+
+    Args:
+        chain: Runnable such as `prompt | llm`
+        inputs: Prompt variables
+
+    Yields:
+        Non-empty text chunks
+    """
+    for chunk in chain.stream(inputs):
+        text = getattr(chunk, "content", chunk)
+        if isinstance(text, str) and text:
+            yield text
+
+
+def complete_text(
+    chain: Any,
+    inputs: Dict[str, Any],
+    on_token: Optional[Callable[[str], None]] = None,
+    endpoint: Optional[Any] = None
+) -> str:
+    """
+    Run a free-text LLM call, optionally streaming tokens to a callback
+
+    Args:
+        chain: Runnable such as `prompt | llm`
+        inputs: Prompt variables
+        on_token: Called with each text chunk as it arrives (None = no streaming)
+        endpoint: ResilientEndpoint the call or stream runs under (None = call directly)
+
+    Returns:
+        Full answer text
+    """
+    if on_token is None:
+        if endpoint is not None:
+            return endpoint.call(chain.invoke, inputs).content
+        return chain.invoke(inputs).content
+    parts = []
+    chunks = stream_text(chain, inputs) if endpoint is None else endpoint.stream(stream_text, chain, inputs)
+    for text in chunks:
+        on_token(text)
+        parts.append(text)
+    return "".join(parts)
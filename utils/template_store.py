@@ -0,0 +1,206 @@
+"""
+Template store for Domain Researcher (A2) outputs
+
+A2's tasks, tips and warnings depend on the activity, not on the user's bio
+context, so a validated DomainResearcherOutput can be reused for every goal
+that maps to the same normalized activity. Entries are versioned (bump
+TEMPLATE_VERSION when A2 prompts or schemas change) and expire after a TTL;
+stale entries are still served while a background refresh replaces them.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from schemas.agent2_output import DomainResearcherOutput
+from utils.serialization import get_serializer
+
+# Bump when A2 prompts or DomainResearcherOutput change
+TEMPLATE_VERSION = "1"
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_activity(activity: str) -> str:
+    """
+    Normalize an activity label into a template key
+
+    Args:
+        activity: Activity label (e.g., "  Running ", "writing-report")
+
+    Returns:
+        Lowercase words joined by single spaces (e.g., "running", "writing report")
+    """
+    return " ".join(_NON_WORD.sub(" ", activity.lower()).split())
+
+
+class TemplateEntry(BaseModel):
+    """One stored A2 output"""
+    key: str = Field(description="Normalized activity")
+    version: str = Field(description="TEMPLATE_VERSION the entry was built with")
+    created_at: float = Field(description="Unix timestamp of the research run")
+    output: DomainResearcherOutput = Field(description="Validated A2 output")
+
+
+class TemplateStore:
+    """
+    In-memory template cache with optional JSON persistence (one file per key)
+    Thread-safe; refreshes run on a single background worker.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        version: str = TEMPLATE_VERSION
+    ):
+        """
+        Initialize template store
+
+        Args:
+            directory: Directory for persisted templates (None = memory only)
+            ttl_seconds: Age after which an entry is refreshed
+            version: Template version; entries with another version are ignored
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self.serializer = get_serializer()
+        self._entries: Dict[str, TemplateEntry] = {}
+        self._refreshing: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        slug = re.sub(r"\W+", "_", key, flags=re.ASCII).strip("_")[:40] or "activity"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.directory, f"{slug}-{digest}.json")
+
+    def _load(self, key: str) -> Optional[TemplateEntry]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return self.serializer.loads(f.read(), TemplateEntry)
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable template {path}: {e}")
+            return None
+
+    def lookup(self, activity: str) -> Optional[TemplateEntry]:
+        """
+        Find the current-version entry for an activity (fresh or stale)
+
+        Args:
+            activity: Activity label (normalized internally)
+
+        Returns:
+            TemplateEntry or None
+        """
+        key = normalize_activity(activity)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries.setdefault(key, entry)
+        if entry is None or entry.version != self.version:
+            return None
+        return entry
+
+    def is_fresh(self, entry: TemplateEntry) -> bool:
+        """True if the entry is younger than the TTL"""
+        return time.time() - entry.created_at < self.ttl_seconds
+
+    def put(self, activity: str, output: DomainResearcherOutput) -> Optional[TemplateEntry]:
+        """
+        Store an A2 output as the template for an activity
+
+        Degraded outputs (a search or LLM call fell back) are not stored, so
+        a transient outage is not served to later requests; an existing
+        entry is kept.
+
+        Args:
+            activity: Activity label
+            output: Validated A2 output
+
+        Returns:
+            The stored TemplateEntry, or None if the output was degraded
+        """
+        if output.degraded:
+            return None
+        key = normalize_activity(activity)
+        entry = TemplateEntry(key=key, version=self.version, created_at=time.time(), output=output)
+        with self._lock:
+            self._entries[key] = entry
+        if self.directory:
+            # Write-then-rename so readers never see a partial file
+            path = self._path(key)
+            # Unique temp file: forked workers share thread idents and often write the same key
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self.serializer.dumps(entry, compact=True))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return entry
+
+    def refresh_in_background(
+        self,
+        activity: str,
+        research: Callable[[], DomainResearcherOutput]
+    ) -> Future:
+        """
+        Re-run research for an activity off the request path (deduplicated)
+
+        Args:
+            activity: Activity label
+            research: Zero-argument callable producing a fresh A2 output
+
+        Returns:
+            Future of the refresh (shared by concurrent callers)
+        """
+        key = normalize_activity(activity)
+        with self._lock:
+            future = self._refreshing.get(key)
+            if future is not None and not future.done():
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atp-template")
+            future = self._executor.submit(self._refresh, activity, research)
+            self._refreshing[key] = future
+            return future
+
+    def _refresh(self, activity: str, research: Callable[[], DomainResearcherOutput]):
+        try:
+            return self.put(activity, research())
+        except Exception as e:
+            # Keep serving the stale entry; the next lookup retries
+            print(f"⚠️  Template refresh failed for '{activity}': {e}")
+            return None
+
+    def close(self):
+        """Wait for pending refreshes and stop the background worker"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,194 @@
+"""
+Timeline placement of focus chunks and rests
+
+Candidate slots (peak hours, fallback hours, calendar free time) may overlap,
+so they are first merged into disjoint free intervals. Each interval keeps a
+single cursor: chunks are laid back to back from its start and every rest is
+inserted at the cursor, so later items always move past it and nothing can
+overlap. Rests follow RestPolicy rules, checked in order (longest first). Each
+policy counts the focus minutes since the last rest at least as long as its
+own, so Pomodoro breaks do not reset the ultradian count. Time outside the
+free intervals breaks the focus streak.
+
+    intervals = free_intervals(slots)
+    for placement in place(durations, intervals, policy.rest_rules):
+        ...  # Placement(kind, start, end, index)
+"""
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from schemas.time_types import TimeRange
+
+
+class RestPolicy(NamedTuple):
+    """A rest of `rest_minutes` owed after `focus_minutes` of focus"""
+    focus_minutes: int
+    rest_minutes: int
+    reason: str
+
+
+class Placement(NamedTuple):
+    """One placed item, in minutes since midnight"""
+    kind: str  # "focus" or "rest"
+    start: int
+    end: int
+    index: int  # queue index (focus) or policy index (rest)
+
+
+def placed_minutes(durations: Sequence[int], placements: Sequence[Placement]) -> Tuple[int, int, int]:
+    """
+    How far placement got through the queue
+
+    Args:
+        durations: Chunk durations passed to place
+        placements: Its placements
+
+    Returns:
+        Tuple of (chunks fully placed, minutes and pieces placed of the next chunk)
+    """
+    minutes = [0] * len(durations)
+    pieces = [0] * len(durations)
+    for kind, start, end, index in placements:
+        if kind == "focus":
+            minutes[index] += end - start
+            pieces[index] += 1
+    done = 0
+    while done < len(durations) and pieces[done] and minutes[done] == durations[done]:
+        done += 1
+    if done == len(durations):
+        return done, 0, 0
+    return done, minutes[done], pieces[done]
+
+
+def free_intervals(slots: Sequence[TimeRange]) -> List[TimeRange]:
+    """
+    Merge candidate slots into disjoint free intervals
+
+    Overlapping and touching slots are joined. Intervals keep the priority of
+    their earliest-listed slot, so peak hours are still filled first.
+
+    Args:
+        slots: Candidate slots in priority order
+
+    Returns:
+        Disjoint intervals in priority order (empty slots dropped)
+    """
+    merged = []  # [start, end, priority]
+    for priority in sorted(range(len(slots)), key=lambda i: (slots[i].start, slots[i].end)):
+        slot = slots[priority]
+        if slot.duration <= 0:
+            continue
+        if merged and slot.start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], slot.end)
+            merged[-1][2] = min(merged[-1][2], priority)
+        else:
+            merged.append([slot.start, slot.end, priority])
+    merged.sort(key=lambda interval: interval[2])
+    return [TimeRange(start, end) for start, end, _ in merged]
+
+
+class FocusStreak:
+    """Focus minutes since the last rest long enough for each policy"""
+
+    def __init__(self, policies: Sequence[RestPolicy]):
+        """
+        Initialize focus streak
+
+        Args:
+            policies: Rest policies, longest first
+        """
+        self.policies = policies
+        self.minutes = [0] * len(policies)
+
+    def add(self, minutes: int) -> Optional[int]:
+        """
+        Count focus minutes
+
+        Args:
+            minutes: Focus just placed
+
+        Returns:
+            Index of the first policy now owed a rest, or None
+        """
+        self.minutes = [focus + minutes for focus in self.minutes]
+        for index, (policy, focus) in enumerate(zip(self.policies, self.minutes)):
+            if focus >= policy.focus_minutes:
+                return index
+        return None
+
+    def rest(self, minutes: int):
+        """Count a rest (or idle gap): resets every policy it is long enough for"""
+        self.minutes = [
+            0 if policy.rest_minutes <= minutes else focus
+            for policy, focus in zip(self.policies, self.minutes)
+        ]
+
+    def reset(self):
+        """Start a fresh streak"""
+        self.minutes = [0] * len(self.policies)
+
+    @property
+    def idle(self) -> bool:
+        """True if no focus is counted toward any policy"""
+        return not any(self.minutes)
+
+
+def place(
+    durations: Sequence[int],
+    intervals: Sequence[TimeRange],
+    policies: Sequence[RestPolicy],
+    focus_budget: Optional[int] = None
+) -> Iterator[Placement]:
+    """
+    Lay chunks and rests out on the free intervals
+
+    Chunks are placed in queue order. A chunk that no longer fits in the rest
+    of an interval moves to the next interval. A chunk longer than a whole
+    empty interval fills it and continues in the next one, so no minutes are
+    lost (one focus placement per piece, sharing the queue index). An owed
+    rest that does not fit closes the interval.
+
+    Args:
+        durations: Chunk durations in queue order
+        intervals: Disjoint free intervals in fill order (see free_intervals)
+        policies: Rest policies, longest first
+        focus_budget: Stop before starting a new chunk once this many focus
+            minutes are placed (None = no limit)
+
+    Yields:
+        Placements in placement order, never overlapping
+    """
+    streak = FocusStreak(policies)
+    index = 0
+    left = durations[0] if durations else 0  # minutes of the current chunk still to place
+    started = False
+    focus = 0
+    for interval in intervals:
+        cursor = interval.start
+        streak.reset()
+        while index < len(durations):
+            if not started and focus_budget is not None and focus >= focus_budget:
+                return
+            length = left
+            if cursor + length > interval.end:
+                if cursor > interval.start:
+                    break
+                length = interval.duration
+
+            yield Placement("focus", cursor, cursor + length, index)
+            cursor += length
+            focus += length
+            left -= length
+            started = True
+            if left == 0:
+                index += 1
+                left = durations[index] if index < len(durations) else 0
+                started = False
+
+            due = streak.add(length)
+            if due is not None:
+                rest = policies[due].rest_minutes
+                if cursor + rest > interval.end:
+                    break
+                yield Placement("rest", cursor, cursor + rest, due)
+                cursor += rest
+                streak.rest(rest)
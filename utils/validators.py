@@ -1,26 +1,28 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from schemas.time_types import TimeRange, parse_minutes, format_minutes
 
 def check_schedule_conflicts(schedule: List[Dict]) -> List[Dict]:
     """
     Check for overlapping time slots in schedule
     
     Args:
-        schedule: List of schedule items with time ranges
+        schedule: List of schedule items with time ranges ("HH:MM-HH:MM" or TimeRange)
     
     Returns:
         List of conflicts found
+    
+    Raises:
+        TimeParseError: If an item has a malformed time range
     """
     conflicts = []
     
-    # Parse time ranges to minutes from midnight
+    # Parse time ranges to minutes from midnight (TimeRange objects are already compiled)
     time_slots = []
     for item in schedule:
-        time_range = item.get("time", "")
-        if "-" in time_range:
-            start, end = time_range.split("-")
-            start_mins = time_to_minutes(start)
-            end_mins = time_to_minutes(end)
-            time_slots.append((start_mins, end_mins, item))
+        time_range = item.get("time")
+        if time_range:
+            parsed = TimeRange.parse(time_range)
+            time_slots.append((parsed.start, parsed.end, item))
     
     # Check for overlaps
     for i, (s1, e1, item1) in enumerate(time_slots):
@@ -30,15 +32,38 @@ def check_schedule_conflicts(schedule: List[Dict]) -> List[Dict]:
             # Check if intervals overlap
             if not (e1 <= s2 or e2 <= s1):
                 conflicts.append({
-                    "time1": item1.get("time"),
+                    "time1": str(item1.get("time")),
                     "task1": item1.get("task"),
-                    "time2": item2.get("time"),
+                    "time2": str(item2.get("time")),
                     "task2": item2.get("task"),
                     "overlap": True
                 })
     
     return conflicts
 
+def find_overlaps(ranges: List[TimeRange]) -> List[Tuple[int, int]]:
+    """
+    Find overlapping time ranges with one sorted sweep (O(n log n))
+
+    Each range is compared with the latest-ending range before it, so an
+    empty result proves the ranges are disjoint; a non-empty one lists at
+    least one overlap per offending range.
+
+    Args:
+        ranges: Time ranges (e.g., scheduled_time of every focus and rest item)
+
+    Returns:
+        List of (earlier index, later index) pairs that overlap
+    """
+    overlaps = []
+    latest = None
+    for index in sorted(range(len(ranges)), key=lambda i: (ranges[i].start, ranges[i].end)):
+        if latest is not None and ranges[index].start < ranges[latest].end:
+            overlaps.append((latest, index))
+        if latest is None or ranges[index].end > ranges[latest].end:
+            latest = index
+    return overlaps
+
 def time_to_minutes(time_str: str) -> int:
     """
     Convert time string HH:MM to minutes from midnight
@@ -48,12 +73,11 @@ def time_to_minutes(time_str: str) -> int:
     
     Returns:
         Minutes from midnight
+    
+    Raises:
+        TimeParseError: If time_str is not a valid HH:MM time
     """
-    try:
-        hours, minutes = time_str.split(":")
-        return int(hours) * 60 + int(minutes)
-    except:
-        return 0
+    return parse_minutes(time_str)
 
 def minutes_to_time(minutes: int) -> str:
     """
@@ -65,6 +89,4 @@ def minutes_to_time(minutes: int) -> str:
     Returns:
         Time string in HH:MM format
     """
-    hours = minutes // 60
-    mins = minutes % 60
-    return f"{hours:02d}:{mins:02d}"
\ No newline at end of file
+    return format_minutes(minutes)
\ No newline at end of file
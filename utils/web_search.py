@@ -1,23 +1,38 @@
 import os
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional
 from tavily import TavilyClient
 import json
+from utils.resilience import ResilientEndpoint, get_endpoint
+
+# Last good responses kept per tool for degraded mode
+SEARCH_CACHE_SIZE = 256
+
+
+class SearchResults(list):
+    """Formatted search results; `degraded` is True if they came from the degraded-mode fallback"""
+    degraded = False
 
 class WebSearchTool:
     """Wrapper for Tavily Web Search API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, endpoint: Optional[ResilientEndpoint] = None):
         """
         Initialize Tavily client
         
         Args:
             api_key: Tavily API key. If None, reads from TAVILY_API_KEY env var
+            endpoint: Resilience wrapper for the API (default: shared "tavily" endpoint)
         """
         self.api_key = api_key or os.getenv("TAVILY_API_KEY")
         if not self.api_key:
             raise ValueError("TAVILY_API_KEY not found in environment variables")
         
         self.client = TavilyClient(api_key=self.api_key)
+        self.endpoint = endpoint or get_endpoint("tavily")
+        self._cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def search(
         self,
@@ -36,19 +51,34 @@ class WebSearchTool:
             search_depth: Search depth - "basic" or "advanced" (default: "advanced")
         
         Returns:
-            Dict containing search results
+            Dict containing search results. If Tavily fails, times out or its
+            circuit is open, the last good response for the same query (marked
+            "degraded": True) or empty results.
         """
-        try:
-            response = self.client.search(
-                query=query,
-                max_results=max_results,
-                include_domains=include_domains,
-                search_depth=search_depth
-            )
-            return response
-        except Exception as e:
-            print(f"Error in web search: {e}")
-            return {"results": []}
+        key = (query, max_results, tuple(include_domains or ()), search_depth)
+        response = self.endpoint.call(
+            self.client.search,
+            query=query,
+            max_results=max_results,
+            include_domains=include_domains,
+            search_depth=search_depth,
+            fallback=lambda error: self._cached_response(key)
+        )
+        if not response.get("degraded"):
+            with self._cache_lock:
+                self._cache[key] = response
+                self._cache.move_to_end(key)
+                if len(self._cache) > SEARCH_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return response
+    
+    def _cached_response(self, key: tuple) -> Dict:
+        """Degraded-mode search result: last good response or empty results"""
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is None:
+            return {"results": [], "degraded": True}
+        return {**cached, "degraded": True}
     
     def get_reliable_sources(self) -> List[str]:
         """
@@ -102,7 +132,8 @@ class WebSearchTool:
             task_type: Type of search - "workflow", "tips", "timing", "evidence"
         
         Returns:
-            List of formatted search results
+            SearchResults (a list of formatted results, `degraded` set if
+            Tavily was unavailable)
         """
         queries = {
             "workflow": f"best workflow for {activity} beginners steps",
@@ -123,10 +154,9 @@ class WebSearchTool:
             search_depth="advanced"
         )
         
-        return [
-            self.format_search_result(r) 
-            for r in results.get("results", [])
-        ]
+        formatted = SearchResults(self.format_search_result(r) for r in results.get("results", []))
+        formatted.degraded = bool(results.get("degraded"))
+        return formatted
 
 
 # Mock version for testing without API key